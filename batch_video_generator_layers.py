@@ -2,9 +2,25 @@ import csv
 import os
 import json
 from multiprocessing import Pool, cpu_count
+from src.utils.resources import get_governor, init_worker
 from text_generator_layers import LayerBasedTextGenerator
 from video_compositor import VideoCompositor
 
+TASKS_DB = 'tasks.db'
+
+
+def _record_render(song, video_path):
+    """完成した動画をタスクストアに記録（ワーカーから並行して呼ばれても安全）"""
+    if not video_path:
+        return
+    try:
+        from src.utils.task_store import TaskStore
+        store = TaskStore(TASKS_DB)
+        store.mark_rendered(song, video_path)
+        store.close()
+    except Exception as e:
+        print(f"警告: タスクストアへの記録に失敗: {song}: {e}")
+
 
 def _parallel_worker(args):
     """マルチプロセス用のワーカー関数（トップレベル関数として定義）"""
@@ -12,7 +28,9 @@ def _parallel_worker(args):
     try:
         print(f"\n[{idx + 1}/{total}] {artist} - {song}")
         generator = LayerBasedBatchVideoGenerator(template_path, base_video)
-        return generator.generate_single_video(artist, song, output_dir, row=row)
+        video_path = generator.generate_single_video(artist, song, output_dir, row=row)
+        _record_render(song, video_path)
+        return video_path
     except Exception as e:
         print(f"エラー: {artist} - {song}: {e}")
         import traceback
@@ -230,6 +248,7 @@ class LayerBasedBatchVideoGenerator:
             print(f"\n[{i}/{len(songs)}]")
             try:
                 video_path = self.generate_single_video(artist, song, output_dir, row=row)
+                _record_render(song, video_path)
                 results.append(video_path)
             except Exception as e:
                 print(f"エラー: {artist} - {song}: {e}")
@@ -248,8 +267,12 @@ class LayerBasedBatchVideoGenerator:
             for i, (artist, song, row) in enumerate(songs)
         ]
 
-        with Pool(processes=min(cpu_count(), len(songs))) as pool:
-            results = pool.map(_parallel_worker, args)
+        # ワーカーごとのスレッド数（ffmpeg・BLAS）をコア数 / ワーカー数 に制限する
+        processes = min(cpu_count(), len(songs))
+        with get_governor().acquire('render', jobs=processes) as lease:
+            print(f"ワーカーあたり{lease.threads}スレッド")
+            with Pool(processes=processes, initializer=init_worker, initargs=(lease.threads, lease.interop_threads)) as pool:
+                results = pool.map(_parallel_worker, args)
 
         return results
 
@@ -123,13 +123,9 @@ class DynamicBackgroundBatchGenerator:
             print(f"{'='*60}")
 
             # タグの取得
-            tags = []
-            tags_str = row.get('tags', '')
-            if tags_str:
-                try:
-                    tags = eval(tags_str) if tags_str else []
-                except:
-                    tags = []
+            # JSON配列の文字列として安全にパース（解析できない値はタグなし）
+            from src.ml.tag_vocabulary import parse_tags
+            tags = parse_tags(row.get('tags', ''))
 
             # 背景を動的に選択してテンプレートを更新
             try:
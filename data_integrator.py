@@ -10,6 +10,8 @@ import pandas as pd
 from datetime import datetime
 import os
 
+from src.utils.song_index import SongNameIndex
+
 
 class DataIntegrator:
     """複数のデータソースを統合してML/RL用データセットを作成"""
@@ -135,18 +137,13 @@ class DataIntegrator:
         print(f"  Channel history: {channel_history_added}件を追加（独立サンプル）")
 
         # 3. TaikoGameデータからタグ・難易度情報を追加
-        # song_nameをキーにマッチング
-        song_name_to_taiko = {}
-        for item in self.taiko_release_data:
-            song_name = item.get('song_name', '').strip()
-            if song_name:
-                song_name_to_taiko[song_name] = item
+        # 正規化したsong_nameをキーにマッチング（表記ゆれはn-gramで補完し、補完した組み合わせは表示する）
+        song_name_to_taiko = SongNameIndex(self.taiko_release_data)
 
         taiko_matched = 0
         for video_id, data in video_id_map.items():
-            song_name = data.get('song_name', '')
-            if song_name in song_name_to_taiko:
-                taiko_item = song_name_to_taiko[song_name]
+            taiko_item, _ = song_name_to_taiko.lookup(data.get('song_name', ''), fuzzy=True)
+            if taiko_item is not None:
                 data.update({
                     'taiko_id': taiko_item.get('id', ''),
                     'tags': taiko_item.get('tags', ''),
@@ -345,6 +342,14 @@ def main():
     # 保存
     integrator.save_integrated_data(integrated_data)
 
+    # 登録済みの視聴数予測モデルを rankings.json の新しい行で逐次更新（再訓練しない）
+    # 統合データは訓練データと特徴量の入力が異なるため、訓練と同じ曲データを使う
+    try:
+        from src.ml.incremental import update_registered_model
+        update_registered_model()
+    except ImportError as e:
+        print(f"⚠ src.ml.incremental のインポートに失敗: {e}")
+
     print("="*60)
     print("✅ 完了")
     print("="*60)
@@ -158,11 +158,9 @@ class DynamicBackgroundSelector:
         tags = []
 
         if taiko_data and 'tags' in taiko_data:
-            tags_str = taiko_data.get('tags', '[]')
-            try:
-                tags = eval(tags_str) if tags_str else []
-            except:
-                tags = []
+            # JSON配列の文字列として安全にパース（解析できない値はタグなし）
+            from src.ml.tag_vocabulary import parse_tags
+            tags = parse_tags(taiko_data.get('tags', '[]'))
 
         print(f"\n{'='*60}")
         print(f"テンプレート生成: {song_data.get('song_name', 'Unknown')}")
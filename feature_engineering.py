@@ -9,6 +9,8 @@ import pandas as pd
 from typing import Dict, List, Tuple, Any
 import re
 
+from src.ml.tag_vocabulary import parse_tags
+
 # チャンネル固有特徴量を読み込み
 try:
     from channel_specific_features import ChannelSpecificFeatureEngineer
@@ -143,12 +145,8 @@ class FeatureEngineer:
         # タグ情報（TaikoGameデータから）
         tags = []
         if taiko_data and 'tags' in taiko_data:
-            tags_str = taiko_data.get('tags', '[]')
-            try:
-                # JSON文字列をパース
-                tags = eval(tags_str) if tags_str else []
-            except:
-                tags = []
+            # JSON配列の文字列として安全にパース（解析できない値はタグなし）
+            tags = parse_tags(taiko_data.get('tags', '[]'))
 
         features['tags'] = tags
         features['tag_count'] = len(tags)
@@ -8,7 +8,8 @@ from src.actions import (
     search_artist_itunes,
     fetch_taikogame_to_csv,
     open_template,
-    ml_rl_schedule_optimization
+    ml_rl_schedule_optimization,
+    ml_tune_hyperparameters
 )
 
 def main():
@@ -27,6 +28,7 @@ def main():
         print("8. TaikoGameデータ取得・CSV保存")
         print("9. テンプレート編集")
         print("10. 🤖 ML/RLスケジュール最適化")
+        print("11. MLハイパーパラメータ探索（10の訓練設定を選ぶ）")
         print("0. 終了")
 
         choice = input("\n選択: ").strip()
@@ -51,11 +53,13 @@ def main():
             open_template()
         elif choice == '10':
             ml_rl_schedule_optimization()
+        elif choice == '11':
+            ml_tune_hyperparameters()
         elif choice == '0':
             print("\n終了します")
             break
         else:
-            print("\n無効な選択です。0-10 のいずれかを入力してください。")
+            print("\n無効な選択です。0-11 のいずれかを入力してください。")
 
 if __name__ == '__main__':
     main()
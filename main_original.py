@@ -60,7 +60,8 @@ def switch_to_next_api_key():
 # キャッシュファイル（RAW DATAディレクトリに保存）
 CACHE_FILE = 'RAW DATA/Youtube_API_raw.json'
 RANKINGS_FILE = 'rankings.json'
-TASKS_FILE = 'tasks.json'
+TASKS_FILE = 'tasks.db'
+LEGACY_TASKS_FILE = 'tasks.json'  # 初回起動時にtasks.dbへ移行
 
 
 def load_cache():
@@ -1034,7 +1035,7 @@ def manage_tasks():
         print("\n総合ランキングが空です。")
         return
 
-    # タスクファイルを読み込み
+    # タスクストアを開く（tasks.json からは初回のみ移行）
     tasks = load_tasks()
 
     while True:
@@ -1042,9 +1043,11 @@ def manage_tasks():
         print("タスク管理 - 総合ランキング")
         print("="*60)
 
-        for i, item in enumerate(overall[:10], 1):
-            song_name = item['song_name']
-            task_status = tasks.get(song_name, {})
+        top_songs = [item['song_name'] for item in overall[:10]]
+        statuses = tasks.get_many(top_songs)
+
+        for i, song_name in enumerate(top_songs, 1):
+            task_status = statuses.get(song_name, {})
             recording = "✓" if task_status.get('recording') else "　"
             editing = "✓" if task_status.get('editing') else "　"
             posting = "✓" if task_status.get('posting') else "　"
@@ -1052,6 +1055,10 @@ def manage_tasks():
             print(f"{i:2d}. {song_name}")
             print(f"    [{recording}] 画面収録  [{editing}] 編集  [{posting}] 投稿")
 
+        pending = tasks.query(recording=True, posting=False)
+        if pending:
+            print(f"\n収録済み・未投稿: {len(pending)}曲")
+
         print("\n操作:")
         print("曲番号を入力してタスクを更新 (例: 1)")
         print("0: 戻る")
@@ -1070,25 +1077,14 @@ def manage_tasks():
 
 
 def load_tasks():
-    """タスクを読み込む"""
-    if os.path.exists(TASKS_FILE):
-        with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-
-def save_tasks(tasks):
-    """タスクを保存"""
-    with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    """タスクストアを開く（プロセス間で共有可能なSQLiteストア）"""
+    from src.utils.task_store import TaskStore
+    return TaskStore(TASKS_FILE, legacy_json=LEGACY_TASKS_FILE)
 
 
 def update_task(song_name, tasks):
-    """タスクを更新"""
-    if song_name not in tasks:
-        tasks[song_name] = {'recording': False, 'editing': False, 'posting': False}
-
-    task = tasks[song_name]
+    """タスクを更新（1行単位でアトミックに更新）"""
+    task = tasks.get(song_name)
 
     print(f"\n{song_name} のタスク:")
     print(f"1. 画面収録 [{'✓' if task['recording'] else ' '}]")
@@ -1099,17 +1095,14 @@ def update_task(song_name, tasks):
     choice = input("トグルする項目 (1-4): ").strip()
 
     if choice == '1':
-        task['recording'] = not task['recording']
+        tasks.toggle(song_name, 'recording')
     elif choice == '2':
-        task['editing'] = not task['editing']
+        tasks.toggle(song_name, 'editing')
     elif choice == '3':
-        task['posting'] = not task['posting']
+        tasks.toggle(song_name, 'posting')
     elif choice == '4':
-        task['recording'] = False
-        task['editing'] = False
-        task['posting'] = False
+        tasks.clear(song_name)
 
-    save_tasks(tasks)
     print("タスクを更新しました")
 
 
@@ -1651,13 +1644,8 @@ def ml_rl_schedule_optimization():
     taiko_csv = 'filtered data/taiko_server_未投稿_filtered.csv'
     if os.path.exists(taiko_csv):
         try:
-            import csv
-            with open(taiko_csv, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    song_name = row.get('song_name', '').strip()
-                    if song_name:
-                        taiko_data_map[song_name] = row
+            from src.utils.song_index import SongNameIndex
+            taiko_data_map = SongNameIndex.from_csv(taiko_csv)
             print(f"✓ TaikoGameデータ {len(taiko_data_map)}曲を読み込みました")
         except Exception as e:
             print(f"警告: TaikoGameデータ読み込みエラー: {e}")
@@ -1771,6 +1759,16 @@ def ml_rl_schedule_optimization():
 
     print(f"✓ {RANKINGS_FILE} を更新しました（{updated_count}件）")
 
+    # 投稿予定日時をタスクストアにも記録
+    try:
+        tasks = load_tasks()
+        for song_name, result in ml_results_map.items():
+            tasks.mark_scheduled(song_name, result['optimal_posting_datetime'])
+        tasks.close()
+        print(f"✓ {TASKS_FILE} に投稿予定日時を記録しました")
+    except Exception as e:
+        print(f"警告: タスクストアの更新に失敗しました: {e}")
+
     # 6. 結果サマリー表示
     print("\n" + "="*60)
     print("📊 最適化結果サマリー")
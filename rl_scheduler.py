@@ -3,11 +3,15 @@ RLスケジューリング最適化モジュール
 Reinforcement Learningを使用して投稿スケジュールを最適化
 """
 
+from __future__ import annotations
+
 import numpy as np
 import datetime
 from typing import Dict, List, Tuple, Any
 import pandas as pd
 
+from src.ml.slot_occupancy import SlotOccupancy
+
 try:
     import torch
     import torch.nn as nn
@@ -17,8 +21,11 @@ except ImportError:
     TORCH_AVAILABLE = False
     print("警告: PyTorchが利用できません。pip install torch>=2.0.0 を実行してください。")
 
+# PyTorchがない環境でもモジュールを読み込めるようにする（ルールベースのフォールバック用）
+_TorchModule = nn.Module if TORCH_AVAILABLE else object
+
 
-class ActorCriticNetwork(nn.Module):
+class ActorCriticNetwork(_TorchModule):
     """Actor-Criticネットワーク（PPO用）"""
 
     def __init__(self, state_dim: int, action_dim: int):
@@ -90,6 +97,77 @@ class ActorCriticNetwork(nn.Module):
         return action, log_prob, value
 
 
+def compute_gae(rewards, values, dones, gamma: float = 0.99, gae_lambda: float = 0.95):
+    """GAE（一般化アドバンテージ推定）でアドバンテージとリターンを計算
+
+    時刻方向の逆順ループ1回で、全環境をまとめて計算する（numpy 配列・torch テンソルのどちらでもよい）。
+
+    Args:
+        rewards: 報酬 [ステップ数 x 環境数]
+        values: 状態価値 [ステップ数 x 環境数]
+        dones: そのステップでエピソードが終了したか（0/1） [ステップ数 x 環境数]
+        gamma: 割引率
+        gae_lambda: GAE の λ
+
+    Returns:
+        (アドバンテージ, リターン) [ステップ数 x 環境数]
+    """
+    advantages = rewards * 0
+    next_advantage = rewards[0] * 0
+    next_value = rewards[0] * 0
+    for t in range(len(rewards) - 1, -1, -1):
+        not_done = 1 - dones[t]
+        delta = rewards[t] + gamma * next_value * not_done - values[t]
+        next_advantage = delta + gamma * gae_lambda * not_done * next_advantage
+        advantages[t] = next_advantage
+        next_value = values[t]
+    return advantages, advantages + values
+
+
+class RolloutBuffer:
+    """PPO のロールアウトバッファ（[ステップ数 x 環境数] の配列を事前に確保して使い回す）
+
+    更新時は torch.from_numpy でコピーせずにテンソルとして参照する。
+    """
+
+    def __init__(self, num_steps: int, num_envs: int, state_dim: int, action_dim: int):
+        """初期化
+
+        Args:
+            num_steps: 1回の収集のステップ数
+            num_envs: 並列環境数
+            state_dim: 状態空間の次元数
+            action_dim: 行動空間の次元数
+        """
+        self.states = np.zeros((num_steps, num_envs, state_dim), dtype=np.float32)
+        self.actions = np.zeros((num_steps, num_envs, action_dim), dtype=np.float32)
+        self.log_probs = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.rewards = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.values = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.dones = np.zeros((num_steps, num_envs), dtype=np.float32)
+        self.step = 0
+
+    def __len__(self) -> int:
+        return self.step
+
+    def reset(self):
+        """収集済みのステップを破棄（配列はそのまま再利用）"""
+        self.step = 0
+
+    def add(self, states: np.ndarray, actions: np.ndarray, log_probs: np.ndarray,
+            rewards: np.ndarray, values: np.ndarray, dones):
+        """全環境の1ステップ分を追加"""
+        if self.step >= len(self.rewards):
+            raise IndexError("ロールアウトバッファが一杯です")
+        self.states[self.step] = states
+        self.actions[self.step] = actions
+        self.log_probs[self.step] = log_probs
+        self.rewards[self.step] = rewards
+        self.values[self.step] = values
+        self.dones[self.step] = dones
+        self.step += 1
+
+
 class PPOAgent:
     """PPOエージェント"""
 
@@ -135,6 +213,92 @@ class PPOAgent:
 
         return action.numpy()[0], log_prob.item(), value.item()
 
+    def select_actions(self, states: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """複数環境の行動を1回のフォワードパスで選択
+
+        Args:
+            states: 状態配列 [環境数 x 状態次元]
+
+        Returns:
+            (行動 [環境数 x 行動次元], ログ確率 [環境数], 状態価値 [環境数])
+        """
+        state_tensor = torch.as_tensor(states, dtype=torch.float32)
+
+        with torch.no_grad():
+            action, log_prob, value = self.old_policy.get_action(state_tensor)
+
+        return action.numpy(), log_prob.numpy(), value.squeeze(-1).numpy()
+
+    def update_rollout(self, buffer: RolloutBuffer, minibatch_size: int = 1024,
+                       gae_lambda: float = 0.95) -> Dict[str, float]:
+        """ロールアウトバッファでポリシーを更新（GAE + ミニバッチ）
+
+        報酬は予測視聴数の規模に依存するため、バッファ内の標準偏差で割ってから GAE を計算する。
+
+        Args:
+            buffer: 収集済みのロールアウトバッファ
+            minibatch_size: ミニバッチの大きさ
+            gae_lambda: GAE の λ
+
+        Returns:
+            損失の辞書
+        """
+        n_steps = len(buffer)
+        rewards = torch.from_numpy(buffer.rewards[:n_steps])
+        rewards = rewards / (rewards.std() + 1e-7) if rewards.numel() > 1 else rewards
+        advantages, returns = compute_gae(rewards, torch.from_numpy(buffer.values[:n_steps]),
+                                          torch.from_numpy(buffer.dones[:n_steps]), self.gamma, gae_lambda)
+
+        # [ステップ数 x 環境数] を1次元に並べる
+        states = torch.from_numpy(buffer.states[:n_steps]).flatten(0, 1)
+        actions = torch.from_numpy(buffer.actions[:n_steps]).flatten(0, 1)
+        old_log_probs = torch.from_numpy(buffer.log_probs[:n_steps]).flatten()
+        advantages = advantages.flatten()
+        returns = returns.flatten()
+        if advantages.numel() > 1:
+            advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-7)
+
+        n_samples = len(states)
+        total_policy_loss = 0
+        total_value_loss = 0
+        n_updates = 0
+
+        for _ in range(self.K_epochs):
+            permutation = torch.randperm(n_samples)
+            for start in range(0, n_samples, minibatch_size):
+                batch = permutation[start:start + minibatch_size]
+
+                action_means, action_stds, values = self.policy(states[batch])
+                dist = Normal(action_means, action_stds)
+                log_probs = dist.log_prob(actions[batch]).sum(dim=-1)
+                ratios = torch.exp(log_probs - old_log_probs[batch])
+
+                # PPO損失
+                surr1 = ratios * advantages[batch]
+                surr2 = torch.clamp(ratios, 1 - self.epsilon_clip, 1 + self.epsilon_clip) * advantages[batch]
+                policy_loss = -torch.min(surr1, surr2).mean()
+
+                # 価値関数損失
+                value_loss = nn.MSELoss()(values.squeeze(-1), returns[batch])
+
+                loss = policy_loss + 0.5 * value_loss
+
+                self.optimizer.zero_grad()
+                loss.backward()
+                self.optimizer.step()
+
+                total_policy_loss += policy_loss.item()
+                total_value_loss += value_loss.item()
+                n_updates += 1
+
+        # 古いポリシーを更新
+        self.old_policy.load_state_dict(self.policy.state_dict())
+
+        return {
+            'policy_loss': total_policy_loss / max(n_updates, 1),
+            'value_loss': total_value_loss / max(n_updates, 1)
+        }
+
     def update(self, memory: List[Tuple]) -> Dict[str, float]:
         """ポリシーを更新
 
@@ -145,19 +309,19 @@ class PPOAgent:
             損失の辞書
         """
         # データを抽出
-        states = torch.FloatTensor([m[0] for m in memory])
-        actions = torch.FloatTensor([m[1] for m in memory])
+        states = torch.as_tensor(np.array([m[0] for m in memory]), dtype=torch.float32)
+        actions = torch.as_tensor(np.array([m[1] for m in memory]), dtype=torch.float32)
         old_log_probs = torch.FloatTensor([m[2] for m in memory])
-        rewards = torch.FloatTensor([m[3] for m in memory])
+        rewards = np.array([m[3] for m in memory], dtype=np.float32)
         old_values = torch.FloatTensor([m[4] for m in memory])
 
-        # 割引報酬を計算
-        returns = []
-        discounted_reward = 0
-        for reward in reversed(rewards):
-            discounted_reward = reward + self.gamma * discounted_reward
-            returns.insert(0, discounted_reward)
-        returns = torch.FloatTensor(returns)
+        # 割引報酬を計算（事前に確保した配列を後ろから埋める）
+        returns = np.empty_like(rewards)
+        discounted_reward = 0.0
+        for i in range(len(rewards) - 1, -1, -1):
+            discounted_reward = rewards[i] + self.gamma * discounted_reward
+            returns[i] = discounted_reward
+        returns = torch.from_numpy(returns)
 
         # 正規化
         returns = (returns - returns.mean()) / (returns.std() + 1e-7)
@@ -212,18 +376,117 @@ class SchedulingEnvironment:
     """投稿スケジューリング環境"""
 
     def __init__(self, songs_data: List[Dict[str, Any]],
-                 view_predictor: Any = None):
+                 view_predictor: Any = None,
+                 feature_engineer: Any = None):
         """初期化
 
         Args:
             songs_data: 曲データのリスト
             view_predictor: 視聴数予測モデル
+            feature_engineer: 予測モデルの訓練に使った FeatureEngineer（省略時は新規作成）
         """
         self.songs_data = songs_data
         self.view_predictor = view_predictor
 
         self.current_song_idx = 0
         self.schedule = []  # (song, posting_datetime) のリスト
+        self.occupancy = SlotOccupancy()  # スケジュール済みの日時の索引（間隔・週あたり投稿数の判定用）
+
+        # スロット特徴量ラティス（予測モデルがある場合のみ）
+        self.slot_lattice = None
+        self._slot_views = {}  # 曲番号 -> 全スロットの予測視聴数
+        if view_predictor is not None:
+            self.slot_lattice = self._build_slot_lattice(feature_engineer)
+
+    def _build_slot_lattice(self, feature_engineer: Any = None):
+        """行動空間（今日から90日 × 24時間）のスロット特徴量ラティスを構築"""
+        try:
+            from src.ml.slot_lattice import SlotFeatureLattice
+            if feature_engineer is None:
+                from src.ml.feature_engineering import FeatureEngineer
+                feature_engineer = FeatureEngineer()
+            lattice = SlotFeatureLattice(feature_engineer.columnar_builder,
+                                         datetime.date.today(), days=91)
+            lattice.add_songs(self.songs_data)
+            return lattice
+        except Exception as e:
+            print(f"警告: スロット特徴量ラティスを構築できません（プレースホルダー予測を使用）: {e}")
+            return None
+
+    def predict_views(self, song: Dict[str, Any],
+                      posting_datetime: datetime.datetime) -> float:
+        """投稿日時での予測視聴数
+
+        初回に全曲 × 全スロットを一括で予測してキャッシュし、以降は参照のみ。
+
+        Args:
+            song: 曲データ
+            posting_datetime: 投稿予定日時
+
+        Returns:
+            予測視聴数
+        """
+        placeholder = song.get('view_count', 0) * 0.8
+        if self.slot_lattice is None:
+            return placeholder
+
+        try:
+            slot = self.slot_lattice.slot_index(posting_datetime.date(), posting_datetime.hour)
+        except KeyError:
+            return placeholder
+
+        song_idx = self.slot_lattice.song_index(song)
+        views = self._slot_views.get(song_idx)
+        if views is None or slot >= len(views):
+            try:
+                all_slots = np.arange(len(self.slot_lattice))
+                if hasattr(self.view_predictor, 'score_candidates'):
+                    # 全曲 × 全スロットを一括で予測
+                    song_indices = np.arange(len(self.slot_lattice.song_matrix))
+                    scores, _ = self.view_predictor.score_candidates(self.slot_lattice, song_indices, all_slots)
+                    self._slot_views.update(zip(song_indices.tolist(), scores))
+                    views = self._slot_views[song_idx]
+                else:
+                    features = self.slot_lattice.candidate_frame(song_idx, all_slots)
+                    views, _ = self.view_predictor.predict(features)
+            except Exception as e:
+                print(f"警告: 視聴数予測に失敗しました（プレースホルダー予測を使用）: {e}")
+                self.slot_lattice = None
+                return placeholder
+            self._slot_views[song_idx] = views
+
+        return float(views[slot])
+
+    def predict_views_grid(self, song: Dict[str, Any], dates: List[datetime.date],
+                           hours: List[int]) -> np.ndarray:
+        """日付 × 時の予測視聴数（predict_views と同じキャッシュを参照）
+
+        Args:
+            song: 曲データ
+            dates: 投稿日のリスト
+            hours: 投稿時（0-23）のリスト
+
+        Returns:
+            予測視聴数 [日付数 x 時の数]
+        """
+        placeholder = np.full((len(dates), len(hours)), song.get('view_count', 0) * 0.8)
+        if self.slot_lattice is None or not len(dates):
+            return placeholder
+
+        try:
+            slots = self.slot_lattice.slot_grid(dates, hours)
+        except KeyError:
+            return placeholder
+
+        # 最も後ろのスロットを1回予測させて、全スロットの予測をキャッシュに載せる
+        last = np.unravel_index(int(np.argmax(slots)), slots.shape)
+        self.predict_views(song, datetime.datetime.combine(dates[last[0]], datetime.time(int(hours[last[1]]))))
+        if self.slot_lattice is None:
+            return placeholder
+        views = self._slot_views.get(self.slot_lattice.song_index(song))
+        if views is None or slots.max() >= len(views):
+            return placeholder
+        return np.asarray(views, dtype=np.float64)[slots]
 
     def reset(self) -> np.ndarray:
         """環境をリセット
@@ -233,6 +496,7 @@ class SchedulingEnvironment:
         """
         self.current_song_idx = 0
         self.schedule = []
+        self.occupancy = SlotOccupancy()
         return self._get_state()
 
     def step(self, action: np.ndarray) -> Tuple[np.ndarray, float, bool, Dict]:
@@ -264,6 +528,7 @@ class SchedulingEnvironment:
 
         # スケジュールに追加
         self.schedule.append((song, posting_datetime))
+        self.occupancy.add(posting_datetime)
         self.current_song_idx += 1
 
         # 次の状態
@@ -320,11 +585,7 @@ class SchedulingEnvironment:
             報酬値
         """
         # 1. 予測視聴数（メイン報酬）
-        if self.view_predictor:
-            # 実際の予測を使用（未実装の場合はダミー）
-            predicted_views = song.get('view_count', 0) * 0.8  # プレースホルダー
-        else:
-            predicted_views = song.get('view_count', 0) * 0.8
+        predicted_views = self.predict_views(song, posting_datetime)
 
         view_reward = predicted_views / 100000  # スケーリング
 
@@ -344,12 +605,8 @@ class SchedulingEnvironment:
 
     def _interval_penalty(self, posting_datetime: datetime.datetime) -> float:
         """投稿間隔ペナルティを計算"""
-        if not self.schedule:
-            return 0
-
-        # 最後の投稿との間隔
-        last_datetime = self.schedule[-1][1]
-        hours_diff = abs((posting_datetime - last_datetime).total_seconds() / 3600)
+        # 時系列で最も近い投稿との間隔
+        hours_diff = self.occupancy.hours_to_nearest(posting_datetime)
 
         # 48時間以内はペナルティ
         if hours_diff < 48:
@@ -358,12 +615,8 @@ class SchedulingEnvironment:
 
     def _fatigue_penalty(self, posting_datetime: datetime.datetime) -> float:
         """視聴者疲労ペナルティを計算（週あたり3本以上でペナルティ）"""
-        # 同じ週の投稿数をカウント
-        week_start = posting_datetime - datetime.timedelta(days=posting_datetime.weekday())
-        week_end = week_start + datetime.timedelta(days=7)
-
-        week_count = sum(1 for _, dt in self.schedule
-                        if week_start <= dt < week_end)
+        # 同じ週（月曜始まり）の投稿数
+        week_count = self.occupancy.posts_in_week(posting_datetime.date())
 
         # 週3本を超えるとペナルティ
         if week_count >= 3:
@@ -409,15 +662,169 @@ class SchedulingEnvironment:
         return state
 
 
+class VectorSchedulingEnvironment:
+    """N エピソードを並列に進める投稿スケジューリング環境
+
+    報酬・状態は SchedulingEnvironment と同じ。全エピソードが同じ順序で曲を割り当てるため、
+    1ステップで全エピソードの同じ曲を配列演算でまとめて処理する。
+    - 予測視聴数: 最初に 曲 × 日付 × 時 の表を作り、以降は参照のみ
+    - 間隔・疲労ペナルティ: エピソードごとの時ごと・週ごとの投稿数の配列
+    投稿日時は時ちょうど（分・秒は0）とする。
+    """
+
+    MAX_DATE_OFFSET = 90
+    INTERVAL_WINDOW = 48  # これ未満の間隔はペナルティ（時間）
+
+    def __init__(self, songs_data: List[Dict[str, Any]], num_envs: int,
+                 view_predictor: Any = None,
+                 feature_engineer: Any = None):
+        """初期化
+
+        Args:
+            songs_data: 曲データのリスト
+            num_envs: 並列に進めるエピソード数
+            view_predictor: 視聴数予測モデル
+            feature_engineer: 予測モデルの訓練に使った FeatureEngineer（省略時は新規作成）
+        """
+        self.songs_data = songs_data
+        self.num_envs = num_envs
+        self.env = SchedulingEnvironment(songs_data, view_predictor, feature_engineer)
+        self.today = datetime.date.today()
+
+        # 未来のリリース日がある曲は日付固定（今日からの日数）、それ以外は -1
+        n_songs = len(songs_data)
+        self.fixed_days = np.full(n_songs, -1, dtype=np.int64)
+        for i, song in enumerate(songs_data):
+            try:
+                release_date = datetime.datetime.strptime(song.get('release_date', ''), '%Y/%m/%d').date()
+            except (TypeError, ValueError):
+                continue
+            if release_date >= self.today:
+                self.fixed_days[i] = (release_date - self.today).days
+
+        # 予測視聴数の表（日付固定の曲はリリース日の24時間分のみ）
+        hours = list(range(24))
+        free_dates = [self.today + datetime.timedelta(days=d) for d in range(self.MAX_DATE_OFFSET + 1)]
+        self.free_views = np.zeros((n_songs, len(free_dates), 24))
+        self.fixed_views = np.zeros((n_songs, 24))
+        for i, song in enumerate(songs_data):
+            if self.fixed_days[i] >= 0:
+                release_date = self.today + datetime.timedelta(days=int(self.fixed_days[i]))
+                self.fixed_views[i] = self.env.predict_views_grid(song, [release_date], hours)[0]
+            else:
+                self.free_views[i] = self.env.predict_views_grid(song, free_dates, hours)
+
+        n_days = max(self.MAX_DATE_OFFSET, int(self.fixed_days.max(initial=0))) + 1
+        self._first_weekday = self.today.weekday()
+        self._hourly = np.zeros((num_envs, n_days * 24 + 2 * self.INTERVAL_WINDOW), dtype=np.int32)
+        self._weekly = np.zeros((num_envs, (self._first_weekday + n_days) // 7 + 1), dtype=np.int32)
+        self._window = np.arange(-self.INTERVAL_WINDOW + 1, self.INTERVAL_WINDOW)
+        self._rows = np.arange(num_envs)
+
+        self.current_song_idx = 0
+        self.days = np.zeros((num_envs, n_songs), dtype=np.int64)  # 今日からの日数
+        self.hours = np.zeros((num_envs, n_songs), dtype=np.int64)
+
+    def reset(self) -> np.ndarray:
+        """全エピソードをリセット
+
+        Returns:
+            初期状態 [環境数 x 状態次元]
+        """
+        self.current_song_idx = 0
+        self._hourly[:] = 0
+        self._weekly[:] = 0
+        return self._get_states()
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """全エピソードで1ステップ実行
+
+        Args:
+            actions: [環境数 x 2] の [date_offset(0-90), hour(0-23)]
+
+        Returns:
+            (次の状態 [環境数 x 状態次元], 報酬 [環境数], 終了フラグ)
+        """
+        i = self.current_song_idx
+        if i >= len(self.songs_data):
+            return self._get_states(), np.zeros(self.num_envs), True
+
+        actions = np.asarray(actions)
+        date_offsets = np.clip(actions[:, 0], 0, self.MAX_DATE_OFFSET).astype(np.int64)
+        hours = np.clip(actions[:, 1], 0, 23).astype(np.int64)
+
+        # 日付固定の曲は常にリリース日に投稿するため、制約違反ペナルティは発生しない
+        if self.fixed_days[i] >= 0:
+            days = np.full(self.num_envs, self.fixed_days[i])
+            predicted_views = self.fixed_views[i, hours]
+        else:
+            days = date_offsets
+            predicted_views = self.free_views[i, days, hours]
+
+        # 投稿間隔ペナルティ（前後48時間以内で最も近い投稿との間隔）
+        t = days * 24 + hours + self.INTERVAL_WINDOW
+        nearby = self._hourly[self._rows[:, None], t[:, None] + self._window[None, :]] > 0
+        hours_diff = np.where(nearby, np.abs(self._window)[None, :], self.INTERVAL_WINDOW).min(axis=1)
+        interval_penalty = (self.INTERVAL_WINDOW - hours_diff) / self.INTERVAL_WINDOW
+
+        # 視聴者疲労ペナルティ（同じ週（月曜始まり）の投稿数が3本以上）
+        weeks = (self._first_weekday + days) // 7
+        week_count = self._weekly[self._rows, weeks]
+        fatigue_penalty = np.where(week_count >= 3, (week_count - 2) / 3, 0.0)
+
+        rewards = predicted_views / 100000 - 0.2 * interval_penalty - 0.1 * fatigue_penalty
+
+        # スケジュールに追加
+        self._hourly[self._rows, t] += 1
+        self._weekly[self._rows, weeks] += 1
+        self.days[:, i] = days
+        self.hours[:, i] = hours
+        self.current_song_idx += 1
+
+        return self._get_states(), rewards, self.current_song_idx >= len(self.songs_data)
+
+    def _get_states(self) -> np.ndarray:
+        """全エピソードの状態（SchedulingEnvironment._get_state と同じ内容）"""
+        state = np.zeros(10)
+        if self.current_song_idx < len(self.songs_data):
+            song = self.songs_data[self.current_song_idx]
+            state[0] = self.current_song_idx / len(self.songs_data)
+            state[1] = song.get('view_count', 0) / 1e7
+            # 全エピソードで割り当て済みの曲数は同じ
+            state[2] = self.current_song_idx / len(self.songs_data)
+        return np.tile(state, (self.num_envs, 1))
+
+    def schedule(self, env_index: int) -> List[Tuple[Dict[str, Any], datetime.datetime]]:
+        """エピソードのスケジュール
+
+        Args:
+            env_index: エピソード（環境）の番号
+
+        Returns:
+            割り当て済みの曲の (song, posting_datetime) のリスト
+        """
+        midnight = datetime.datetime.combine(self.today, datetime.time())
+        return [(song, midnight + datetime.timedelta(days=int(self.days[env_index, i]),
+                                                     hours=int(self.hours[env_index, i])))
+                for i, song in enumerate(self.songs_data[:self.current_song_idx])]
+
+
 def optimize_schedule(songs_data: List[Dict[str, Any]],
                      view_predictor: Any = None,
-                     num_episodes: int = 500) -> List[Tuple[Dict, datetime.datetime, float, float]]:
+                     num_episodes: int = 500,
+                     num_envs: int = 16,
+                     minibatch_size: int = 1024) -> List[Tuple[Dict, datetime.datetime, float, float]]:
     """スケジュールを最適化
 
+    num_envs エピソードを VectorSchedulingEnvironment で並列に進め、その都度ロールアウトバッファで
+    ポリシーを更新する（エピソード数は num_envs の倍数に切り上げる）。
+
     Args:
         songs_data: 曲データのリスト
         view_predictor: 視聴数予測モデル
         num_episodes: エピソード数
+        num_envs: 並列に進めるエピソード数
+        minibatch_size: ポリシー更新のミニバッチの大きさ
 
     Returns:
         (song, posting_datetime, predicted_views, confidence) のリスト
@@ -426,41 +833,48 @@ def optimize_schedule(songs_data: List[Dict[str, Any]],
         print("警告: PyTorchが利用できません。ルールベーススケジューリングにフォールバック")
         return _fallback_schedule(songs_data)
 
+    if not songs_data:
+        return []
+
     print("\nRLスケジューリング最適化を開始...")
 
-    env = SchedulingEnvironment(songs_data, view_predictor)
+    num_envs = max(1, min(num_envs, num_episodes))
+    env = VectorSchedulingEnvironment(songs_data, num_envs, view_predictor)
     agent = PPOAgent(state_dim=10, action_dim=2)
+    buffer = RolloutBuffer(len(songs_data), num_envs, state_dim=10, action_dim=2)
 
     best_schedule = []
     best_reward = float('-inf')
+    num_iterations = -(-num_episodes // num_envs)
 
-    for episode in range(num_episodes):
-        state = env.reset()
-        memory = []
-        episode_reward = 0
-
-        while True:
-            action, log_prob, value = agent.select_action(state)
-            next_state, reward, done, info = env.step(action)
+    for iteration in range(num_iterations):
+        states = env.reset()
+        buffer.reset()
+        episode_rewards = np.zeros(num_envs)
 
-            memory.append((state, action, log_prob, reward, value))
-            episode_reward += reward
+        done = False
+        while not done:
+            actions, log_probs, values = agent.select_actions(states)
+            next_states, rewards, done = env.step(actions)
 
-            state = next_state
+            buffer.add(states, actions, log_probs, rewards, values, float(done))
+            episode_rewards += rewards
 
-            if done:
-                break
+            states = next_states
 
         # ポリシー更新
-        agent.update(memory)
+        agent.update_rollout(buffer, minibatch_size=minibatch_size)
 
         # ベストスケジュールを保存
-        if episode_reward > best_reward:
-            best_reward = episode_reward
-            best_schedule = env.schedule.copy()
+        best_env = int(np.argmax(episode_rewards))
+        if episode_rewards[best_env] > best_reward:
+            best_reward = float(episode_rewards[best_env])
+            best_schedule = env.schedule(best_env)
 
-        if (episode + 1) % 50 == 0:
-            print(f"Episode {episode + 1}/{num_episodes}: Reward = {episode_reward:.2f}, Best = {best_reward:.2f}")
+        episodes = (iteration + 1) * num_envs
+        if episodes // 50 > (episodes - num_envs) // 50 or iteration == num_iterations - 1:
+            print(f"Episode {episodes}/{num_iterations * num_envs}: "
+                  f"Reward = {episode_rewards.mean():.2f}, Best = {best_reward:.2f}")
 
     # 結果を整形
     optimized_schedule = []
@@ -468,7 +882,7 @@ def optimize_schedule(songs_data: List[Dict[str, Any]],
         optimized_schedule.append((
             song,
             posting_datetime,
-            song.get('view_count', 0) * 0.8,  # 予測視聴数（プレースホルダー）
+            env.env.predict_views(song, posting_datetime),  # 予測視聴数
             0.75  # 信頼度（プレースホルダー）
         ))
 
@@ -9,11 +9,17 @@ from src.config import Config
 from src.api.youtube import YouTubeClient
 from src.api.gameserver import GameServerClient
 from src.utils.text_processing import extract_artist_from_title, clean_japanese_artist_name
+from src.utils.song_index import SongNameIndex
+from src.utils.task_store import TASK_FLAGS, TaskStore
 # from src.ml.scheduler import ViewCountPredictor # Uncomment when ML is ready
 
 youtube_client = YouTubeClient()
 game_client = GameServerClient()
 
+TASKS_DB = 'tasks.db'
+LEGACY_TASKS_FILE = 'tasks.json'  # imported into tasks.db the first time it is opened
+_TASK_LABELS = {'recording': '画面収録', 'editing': '編集', 'posting': '投稿'}
+
 def fetch_new_videos():
     """Option 1: Fetch new videos using YouTube API."""
     print("\n=== Fetch New Videos ===")
@@ -75,10 +81,66 @@ def fetch_new_videos():
         import traceback
         traceback.print_exc()
 
+def _open_task_store() -> TaskStore:
+    """Per-song task store shared with batch renders and the scheduler."""
+    return TaskStore(TASKS_DB, legacy_json=LEGACY_TASKS_FILE)
+
 def manage_tasks():
     """Option 2: Task Management."""
     print("\n=== Manage Tasks ===")
-    print("(Not fully ported yet)")
+    if not os.path.exists('rankings.json'):
+        print("Error: rankings.json not found. Run '1. Fetch New Videos' first.")
+        return
+
+    with open('rankings.json', 'r', encoding='utf-8') as f:
+        overall = json.load(f).get('overall', [])
+    if not overall:
+        print("The overall ranking is empty.")
+        return
+
+    tasks = _open_task_store()
+    try:
+        while True:
+            top_songs = [item['song_name'] for item in overall[:10]]
+            statuses = tasks.get_many(top_songs)
+            print()
+            for i, song_name in enumerate(top_songs, 1):
+                status = statuses.get(song_name, {})
+                marks = '  '.join(f"[{'✓' if status.get(flag) else ' '}] {_TASK_LABELS[flag]}" for flag in TASK_FLAGS)
+                scheduled = f"  (scheduled: {status['scheduled_at']})" if status.get('scheduled_at') else ''
+                print(f"{i:2d}. {song_name}\n    {marks}{scheduled}")
+
+            pending = tasks.query(recording=True, posting=False)
+            if pending:
+                print(f"\nRecorded but not posted: {len(pending)} songs")
+
+            choice = input("\nSong number to update (0: back): ").strip()
+            if choice == '0':
+                break
+            if not choice.isdigit() or not 1 <= int(choice) <= len(top_songs):
+                print("無効な選択です")
+                continue
+            _update_task(tasks, top_songs[int(choice) - 1])
+    finally:
+        tasks.close()
+
+def _update_task(tasks: TaskStore, song_name: str):
+    """Toggle one workflow flag for a song (each update is a single-row transaction)."""
+    task = tasks.get(song_name)
+    print(f"\n{song_name}:")
+    for i, flag in enumerate(TASK_FLAGS, 1):
+        print(f"{i}. {_TASK_LABELS[flag]} [{'✓' if task[flag] else ' '}]")
+    print(f"{len(TASK_FLAGS) + 1}. Clear all")
+
+    choice = input(f"Item to toggle (1-{len(TASK_FLAGS) + 1}): ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(TASK_FLAGS):
+        tasks.toggle(song_name, TASK_FLAGS[int(choice) - 1])
+    elif choice == str(len(TASK_FLAGS) + 1):
+        tasks.clear(song_name)
+    else:
+        print("無効な選択です")
+        return
+    print("Task updated.")
 
 def export_csv():
     """Option 3: Export CSV."""
@@ -157,77 +219,114 @@ def open_template():
     else:
         print("Script not found.")
 
-from src.ml.feature_engineering import FeatureEngineer
-from src.ml.scheduler import ViewCountPredictor
-from src.ml.rl_scheduler import ComprehensiveScheduler # Renamed/refactored class
+def _load_ranking_songs():
+    """Load rankings.json and flatten the overall ranking into song dicts for ML.
+
+    Returns:
+        (rankings, songs_data), or (None, None) if the overall ranking is missing
+    """
+    from src.ml.incremental import ranking_songs
+
+    with open('rankings.json', 'r', encoding='utf-8') as f:
+        rankings = json.load(f)
+
+    if 'overall' not in rankings:
+        print("Error: 'overall' ranking not found.")
+        return None, None
+
+    print("Loading data...")
+    # Same conversion the incremental updater uses, so both see identical training rows
+    return rankings, ranking_songs(rankings)
+
+def _load_taiko_map(taiko_path):
+    """TaikoGame rows indexed by song name (empty if the CSV is missing)."""
+    if os.path.exists(taiko_path):
+        return SongNameIndex.from_csv(taiko_path)
+    return {}
 
 def ml_rl_schedule_optimization():
     """Option 10: ML/RL Optimization."""
     print("\n=== ML/RL Schedule Optimization ===")
+
+    # ML stack (pandas/scikit-learn/TensorFlow) is imported only when this action runs
+    from src.ml.feature_engineering import FeatureEngineer
+    from src.ml.feature_store import FeatureStore
+    from src.ml.incremental import DEFAULT_TAIKO_PATH, IncrementalUpdater
+    from src.ml.model_registry import ModelRegistry, training_data_fingerprint
+    from src.ml.scheduler import ViewCountPredictor
+    from src.ml.rl_scheduler import ComprehensiveScheduler
+    from src.ml.tuning import load_best_config
+    from src.utils.profiling import start_run
+    from src.utils.resources import get_governor, limit_process_threads
     
     # Check dependencies
     if not os.path.exists('rankings.json'):
          print("Error: rankings.json not found. Run '1. Fetch New Videos' first.")
          return
 
+    # Per-stage wall/CPU time and peak RSS go to traces/ml_rl_schedule-<timestamp>.json
+    # (set ML_PROFILE=cprofile or ML_PROFILE=sample to profile the run as well)
+    tracer = start_run('ml_rl_schedule')
     try:
-        with open('rankings.json', 'r', encoding='utf-8') as f:
-            rankings = json.load(f)
-            
-        if 'overall' not in rankings:
-            print("Error: 'overall' ranking not found.")
+        tracer.stage('load')
+        rankings, songs_data = _load_ranking_songs()
+        if rankings is None:
             return
 
-        print("Loading data...")
-        songs_data = []
-        # Convert ranking format back to flat list for ML
-        for item in rankings['overall']:
-            song = {
-                'song_name': item['song_name'],
-                'artist_name': item.get('artist_name', ''),
-                'video_id': item['video_id'],
-                'release_date': item.get('release_date', ''),
-                'view_count': item['metrics']['view_count'],
-                'like_count': item['metrics']['like_count'],
-                'comment_count': item['metrics']['comment_count'],
-                'support_rate': item['metrics']['support_rate'],
-                'growth_rate': item['metrics']['growth_rate'],
-                'days_since_published': item['metrics']['days_since_published']
-                # Add other metrics if needed by FeatureEngineer
-            }
-            songs_data.append(song)
-            
         print(f"Loaded {len(songs_data)} songs.")
 
         # 2. Feature Engineering
         print("\nStep 2: Feature Engineering")
-        engineer = FeatureEngineer()
+        tracer.stage('features', rows=len(songs_data))
+        # Static per-song features are shared between training and scheduling
+        engineer = FeatureEngineer(feature_store=FeatureStore())
         target_datetime = datetime.datetime.now()
         
         # Load Taiko data for features if available
-        taiko_map = {}
-        if os.path.exists('filtered data/taiko_server_未投稿_filtered.csv'):
-            with open('filtered data/taiko_server_未投稿_filtered.csv', 'r', encoding='utf-8') as f:
-                 reader = csv.DictReader(f)
-                 for row in reader:
-                     if row.get('song_name'):
-                         taiko_map[row.get('song_name')] = row
-
-        X, y, feature_names = engineer.prepare_training_data(songs_data, taiko_map, target_datetime)
+        taiko_path = DEFAULT_TAIKO_PATH
+        taiko_map = _load_taiko_map(taiko_path)
+
+        # Re-uses the memory-mapped static features while rankings and Taiko data are unchanged;
+        # only the posting-time columns are recomputed for target_datetime
+        X, y, feature_names = engineer.prepare_training_data_cached(songs_data, taiko_map, target_datetime)
         
-        # 3. Train Predictor
+        # 3. Train Predictor (reuses the registered model when the training data is unchanged)
         print("\nStep 3: Training View Count Predictor")
-        predictor = ViewCountPredictor(input_dim=X.shape[1])
-        predictor.train(X, y, epochs=50, verbose=1) # Reduced epochs for speed/test
-        predictor.save(model_path='models/view_predictor.pkl', scaler_path='models/view_scaler.pkl')
+        tracer.stage('train', rows=len(y))
+        train_params = {'epochs': 50}  # Reduced epochs for speed/test
+        # Best config from the last hyperparameter search (Option 11), if it was run on the same features
+        tuned = load_best_config(feature_names=feature_names) or {}
+        if tuned:
+            print(f"Using the tuned config from the leaderboard: {tuned['name']}")
+        train_params.update(tuned.get('train_params', {}))
+        predictor = ViewCountPredictor(input_dim=X.shape[1], backend=tuned.get('backend', 'auto'),
+                                       backend_params=tuned.get('backend_params'))
+        # Built from time-independent inputs only: X holds posting-time columns taken from now(),
+        # while the data key covers Taiko rows, channel history and the tag vocabulary
+        fingerprint = training_data_fingerprint(
+            songs_data, taiko_path,
+            config=dict(train_params, backend=predictor.backend, input_dim=predictor.input_dim,
+                        backend_params=predictor.backend_params),
+            feature_names=feature_names, data_key=engineer.training_data_key(taiko_map))
+        registry = ModelRegistry()
+        # Share the cores with any batch render running at the same time
+        # BLAS/OpenMP and environment limits are restored when the lease ends; TensorFlow reads
+        # its intra-/inter-op thread counts once, when the predictor first imports it
+        with get_governor().acquire('ml') as lease, \
+                limit_process_threads(lease.threads, lease.interop_threads):
+            predictor, model_id, _ = registry.get_or_train(fingerprint, predictor, X, y, **train_params)
+        # Later ingests only fold in rows that this model has not seen
+        IncrementalUpdater(registry, engineer).mark_seen(songs_data)
         
         # 4. RL Optimization
         print("\nStep 4: RL Schedule Optimization")
-        scheduler = ComprehensiveScheduler(ml_predictor=predictor)
+        tracer.stage('optimize', rows=len(songs_data))
+        scheduler = ComprehensiveScheduler(ml_predictor=predictor, feature_engineer=engineer)
         optimized_schedule = scheduler.optimize_schedule(songs_data, optimization_mode='comprehensive')
         
         # 5. Save Results
         print("\nStep 5: Saving Results")
+        tracer.stage('save')
         # Logic to update rankings.json with predictions (simplified)
         ml_map = {s['song_name']: s for s in optimized_schedule}
         
@@ -247,8 +346,53 @@ def ml_rl_schedule_optimization():
             json.dump(rankings, f, ensure_ascii=False, indent=2)
             
         print(f"Updated {updated} entries in rankings.json")
+
+        # Record the planned posting times in the task store as well
+        try:
+            tasks = _open_task_store()
+            for song_name, pred in ml_map.items():
+                tasks.mark_scheduled(song_name, pred.get('optimal_posting_datetime') or None)
+            tasks.close()
+            print(f"Recorded posting times for {len(ml_map)} songs in {TASKS_DB}")
+        except Exception as e:
+            print(f"Warning: failed to update the task store: {e}")
         
     except Exception as e:
         print(f"Error in ML/RL optimization: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        tracer.finish()
+
+def ml_tune_hyperparameters():
+    """Option 11: Hyperparameter search for the view predictor.
+
+    Runs successive halving over the default search space on the same features as
+    Option 10 and writes models/tuning_leaderboard.json; Option 10 then trains with
+    the top config.
+    """
+    print("\n=== ML Hyperparameter Search ===")
+
+    from src.ml.feature_engineering import FeatureEngineer
+    from src.ml.feature_store import FeatureStore
+    from src.ml.incremental import DEFAULT_TAIKO_PATH
+    from src.ml.tuning import DEFAULT_LEADERBOARD_PATH, successive_halving
+
+    if not os.path.exists('rankings.json'):
+        print("Error: rankings.json not found. Run '1. Fetch New Videos' first.")
+        return
+
+    rankings, songs_data = _load_ranking_songs()
+    if rankings is None:
+        return
+    # Time-series folds expect the oldest videos first
+    songs_data.sort(key=lambda song: song.get('days_since_published') or 0, reverse=True)
+    print(f"Loaded {len(songs_data)} songs.")
+
+    engineer = FeatureEngineer(feature_store=FeatureStore())
+    X, y, feature_names = engineer.prepare_training_data_cached(
+        songs_data, _load_taiko_map(DEFAULT_TAIKO_PATH), datetime.datetime.now())
+
+    leaderboard = successive_halving(X, y, leaderboard_path=DEFAULT_LEADERBOARD_PATH,
+                                     feature_names=feature_names)
+    print(f"\nBest config: {leaderboard['name'].iloc[0]} (saved to {DEFAULT_LEADERBOARD_PATH})")
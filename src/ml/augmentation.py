@@ -0,0 +1,194 @@
+"""
+訓練データの拡張（ジッタリング）
+拡張したコピーを vstack で実体化せず、バッチごとに元の行から生成する
+
+- ニューラルネットワーク: AugmentedBatches（keras_sequence で Keras の Sequence に変換）で
+  1バッチ分のメモリだけを使う
+- 勾配ブースティング: 木の学習には全行が必要なため、元の行のインデックスを再標本化して
+  max_rows 行まで生成する
+
+ジッタリングする列は特徴量スキーマの列名で指定する（列の並びが変わっても正しい列に適用される）。
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# 列名 -> ジッタリングの設定（low〜high の一様ノイズを加え、clip の範囲に収める）
+DEFAULT_JITTER: Dict[Union[str, int], Dict[str, Any]] = {
+    'hour': {'low': -3.0, 'high': 3.0, 'clip': (0.0, 23.0)},
+}
+
+# 視聴数に掛けるノイズの幅（±5%）
+DEFAULT_TARGET_NOISE = 0.05
+
+# 勾配ブースティング用に生成する最大行数
+DEFAULT_MAX_ROWS = 50000
+
+
+class Augmenter:
+    """列名で指定した特徴量と視聴数にノイズを加える
+
+    拡張後の行 i は元の行 i % n の (i // n) 番目のコピーで、0番目のコピーは元の行そのまま。
+    """
+
+    def __init__(self, feature_names: Optional[Sequence[str]] = None,
+                 jitter: Optional[Dict[Union[str, int], Dict[str, Any]]] = None,
+                 target_noise: float = DEFAULT_TARGET_NOISE, seed: Optional[int] = None):
+        """
+        Args:
+            feature_names: 特徴量の列名（None の場合は jitter の整数キーのみ有効）
+            jitter: 列名（または列番号） -> {'low', 'high', 'clip'}（省略時は DEFAULT_JITTER）
+            target_noise: 視聴数に掛けるノイズの幅（0.05 で ±5%）
+            seed: 乱数シード
+        """
+        jitter = DEFAULT_JITTER if jitter is None else jitter
+        position = {name: i for i, name in enumerate(feature_names or [])}
+
+        # (列番号, low, high, clip) のリスト。スキーマにない列は無視する
+        self.columns: List[Tuple[int, float, float, Optional[Tuple[float, float]]]] = []
+        for key, spec in jitter.items():
+            column = key if isinstance(key, int) else position.get(key)
+            if column is None:
+                continue
+            clip = spec.get('clip')
+            self.columns.append((column, float(spec.get('low', 0.0)), float(spec.get('high', 0.0)),
+                                 tuple(clip) if clip is not None else None))
+        self.target_noise = target_noise
+        self.rng = np.random.default_rng(seed)
+
+    def apply(self, X: np.ndarray, y: np.ndarray, copies: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """元の行を集めたバッチにノイズを加える（0番目のコピーの行はそのまま）
+
+        Args:
+            X: 元の行の特徴量（書き換える）
+            y: 元の行の視聴数
+            copies: 行ごとのコピー番号
+
+        Returns:
+            (ノイズを加えた特徴量, ノイズを加えた視聴数)
+        """
+        noisy = copies > 0
+        n_noisy = int(noisy.sum())
+        if n_noisy == 0:
+            return X, y
+
+        for column, low, high, clip in self.columns:
+            values = X[noisy, column] + self.rng.uniform(low, high, n_noisy)
+            if clip is not None:
+                values = np.clip(values, *clip)
+            X[noisy, column] = values
+
+        y = np.array(y, dtype=np.float64)
+        y[noisy] *= self.rng.uniform(1 - self.target_noise, 1 + self.target_noise, n_noisy)
+        return X, y
+
+    def gather(self, X: np.ndarray, y: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """拡張後の行番号 -> ノイズを加えた行"""
+        n = len(X)
+        rows = indices % n
+        return self.apply(np.array(X[rows], dtype=np.float64), np.asarray(y)[rows], indices // n)
+
+    def resample(self, X: np.ndarray, y: np.ndarray, factor: int,
+                 max_rows: Optional[int] = DEFAULT_MAX_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+        """拡張したデータを生成（勾配ブースティング用）
+
+        拡張後の行数が max_rows を超える場合は、元の行をすべて残したうえで
+        ノイズを加えたコピーから max_rows 行までを無作為に選ぶ。
+
+        Args:
+            X: 特徴量行列
+            y: 視聴数
+            factor: 拡張倍率（1 で拡張なし）
+            max_rows: 生成する最大行数（None で上限なし）
+
+        Returns:
+            (拡張された特徴量, 拡張された視聴数)
+        """
+        n = len(X)
+        total = n * max(1, factor)
+        if max_rows is None or total <= max(max_rows, n):
+            indices = np.arange(total)
+        else:
+            extra = self.rng.choice(np.arange(n, total), size=max_rows - n, replace=False)
+            indices = np.concatenate([np.arange(n), np.sort(extra)])
+        return self.gather(X, y, indices)
+
+    def batches(self, X: np.ndarray, y: np.ndarray, factor: int, batch_size: int = 32,
+                transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                targets: Optional[Callable[[np.ndarray], Any]] = None,
+                shuffle: bool = True) -> 'AugmentedBatches':
+        """バッチごとに拡張データを生成するイテレータ（ニューラルネットワーク用）"""
+        return AugmentedBatches(self, X, y, factor, batch_size, transform, targets, shuffle)
+
+
+class AugmentedBatches:
+    """拡張データのバッチ列（エポックごとに並びとノイズが変わる）"""
+
+    def __init__(self, augmenter: Augmenter, X: np.ndarray, y: np.ndarray, factor: int,
+                 batch_size: int = 32,
+                 transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 targets: Optional[Callable[[np.ndarray], Any]] = None,
+                 shuffle: bool = True):
+        """
+        Args:
+            augmenter: ノイズの設定
+            X: 元の特徴量行列（正規化前）
+            y: 元の視聴数
+            factor: 拡張倍率
+            batch_size: バッチサイズ
+            transform: バッチの特徴量に適用する変換（scaler.transform など）
+            targets: バッチの視聴数 -> モデルのターゲット
+            shuffle: エポックごとに並びをシャッフルするか
+        """
+        self.augmenter = augmenter
+        self.X = X
+        self.y = np.asarray(y)
+        self.batch_size = batch_size
+        self.transform = transform
+        self.targets = targets
+        self.shuffle = shuffle
+        self.n_rows = len(X) * max(1, factor)
+        self.order = np.arange(self.n_rows)
+        self.on_epoch_end()
+
+    def __len__(self) -> int:
+        return math.ceil(self.n_rows / self.batch_size)
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, Any]:
+        indices = self.order[index * self.batch_size:(index + 1) * self.batch_size]
+        X_batch, y_batch = self.augmenter.gather(self.X, self.y, indices)
+        if self.transform is not None:
+            X_batch = self.transform(X_batch)
+        return X_batch, (self.targets(y_batch) if self.targets is not None else y_batch)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.augmenter.rng.shuffle(self.order)
+
+
+def keras_sequence(batches: AugmentedBatches):
+    """AugmentedBatches を Keras の Sequence（model.fit に渡せる形）に変換"""
+    from .backends import load
+
+    keras = load('tensorflow.keras')
+
+    class _AugmentedSequence(keras.utils.Sequence):
+        def __init__(self):
+            super().__init__()
+
+        def __len__(self):
+            return len(batches)
+
+        def __getitem__(self, index):
+            return batches[index]
+
+        def on_epoch_end(self):
+            batches.on_epoch_end()
+
+    return _AugmentedSequence()
@@ -0,0 +1,103 @@
+"""
+MLバックエンドのレジストリと遅延インポート
+TensorFlow / PyTorch などの重いフレームワークを、実際に使う時点まで読み込まない
+
+is_available() はモジュールを読み込まずに（importlib.util.find_spec で）インストール有無だけを調べる。
+"""
+
+import importlib
+import importlib.util
+from typing import Dict, List
+
+# バックエンド名 -> (インポート名, pipパッケージ名)
+BACKENDS: Dict[str, tuple] = {
+    'tensorflow': ('tensorflow', 'tensorflow>=2.16.0'),
+    'torch': ('torch', 'torch>=2.0.0'),
+    'sklearn': ('sklearn', 'scikit-learn>=1.3.0'),
+}
+
+# バックエンド名 -> 利用可否（インポートに失敗したものは False で上書き）
+_AVAILABLE: Dict[str, bool] = {}
+
+
+def _module_name(name: str) -> str:
+    """バックエンド名またはモジュール名 -> インポート名"""
+    return BACKENDS[name][0] if name in BACKENDS else name
+
+
+def is_available(name: str) -> bool:
+    """バックエンドがインストールされているか（モジュールは読み込まない）
+
+    Args:
+        name: バックエンド名（'tensorflow', 'torch', 'sklearn'）またはモジュール名
+
+    Returns:
+        インストールされている場合 True
+    """
+    if name not in _AVAILABLE:
+        top_level = _module_name(name).split('.')[0]
+        try:
+            _AVAILABLE[name] = importlib.util.find_spec(top_level) is not None
+        except (ImportError, ValueError):
+            _AVAILABLE[name] = False
+    return _AVAILABLE[name]
+
+
+def available_backends() -> List[str]:
+    """インストールされているバックエンド名のリスト"""
+    return [name for name in BACKENDS if is_available(name)]
+
+
+def load(name: str):
+    """バックエンド（またはそのサブモジュール）を読み込む
+
+    Args:
+        name: バックエンド名またはモジュール名（例: 'tensorflow.keras'）
+
+    Returns:
+        モジュール
+
+    Raises:
+        ImportError: インストールされていない・読み込みに失敗した場合
+    """
+    module_name = _module_name(name)
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        top_level = module_name.split('.')[0]
+        _AVAILABLE[top_level] = False
+        pip_name = BACKENDS.get(top_level, (top_level, top_level))[1]
+        raise ImportError(f"{module_name} を読み込めません（pip install {pip_name}）: {e}") from e
+
+
+class LazyModule:
+    """属性に初めてアクセスした時点でモジュールを読み込むプロキシ"""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: モジュール名（例: 'tensorflow.keras.layers'）
+        """
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        """読み込み済みか"""
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        if self._module is None:
+            self._module = load(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """モジュールを遅延インポート（属性アクセス時に読み込む）"""
+    return LazyModule(name)
@@ -6,10 +6,244 @@ YouTube API から取得したチャンネル履歴データ (@taiko_de_hit_song
 最適な投稿時間を学習する追加特徴量モジュール
 """
 
+import json
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# 統計の定義を変更した場合はこの値を上げてサイドカーを無効化する
+STATS_CACHE_VERSION = 1
+
+# ベスト曜日・時間帯の判定に必要な最低動画数（少数サンプルの外れ値を除外）
+MIN_SLOT_SAMPLES = 10
+
+# 朝のピーク時間帯（6-9時）と週末（土日）
+MORNING_PEAK_HOURS = (6, 7, 8, 9)
+WEEKEND_DAYS = (5, 6)
+
+# extract_channel_performance_features が返す特徴量（この順で feature_table に格納）
+CHANNEL_FEATURE_NAMES = [
+    'channel_day_performance', 'channel_hour_performance', 'channel_combined_score',
+    'is_best_day', 'is_best_hour', 'is_second_best_hour',
+    'is_morning_peak', 'is_weekend_boost', 'is_golden_timeslot',
+]
+
+# デフォルト統計（channel_history_clean.csv の実測値ベース、{キー: (平均視聴数, 動画数)}）
+DEFAULT_DAY_OF_WEEK_STATS = {
+    0: (1870, 32),  # 月曜
+    1: (1672, 45),  # 火曜
+    2: (1711, 33),  # 水曜
+    3: (3203, 33),  # 木曜 (最高)
+    4: (1533, 30),  # 金曜
+    5: (1981, 21),  # 土曜
+    6: (2157, 14),  # 日曜
+}
+DEFAULT_HOUR_STATS = {
+    1: (1859, 6), 2: (1343, 4), 3: (1813, 49), 4: (1049, 2), 5: (2174, 2),
+    6: (2413, 35), 7: (1345, 8), 8: (2125, 61), 9: (1985, 37), 12: (681, 1),
+    13: (1405, 2), 15: (1391, 1),
+}
+
+# プロセス内キャッシュ: CSVの絶対パス -> (シグネチャ, ChannelStats)
+_STATS_MEMO = {}
+
+
+class ChannelStats:
+    """
+    チャンネル履歴から集計した曜日別・時間帯別の統計
+
+    曜日×時間帯（7×24）の特徴量テーブルを事前計算しておき、
+    特徴量の抽出を配列の参照だけで行えるようにする。
+    """
+
+    def __init__(self, day_of_week_stats, hour_stats, day_counts=None, hour_counts=None,
+                 n_rows=0, min_samples=MIN_SLOT_SAMPLES):
+        """
+        Args:
+            day_of_week_stats: 曜日(0=月曜) -> 平均視聴数
+            hour_stats: 時(0-23) -> 平均視聴数
+            day_counts: 曜日 -> 動画数
+            hour_counts: 時 -> 動画数
+            n_rows: 集計元の行数
+            min_samples: ベスト曜日・時間帯の判定に必要な最低動画数
+        """
+        self.day_of_week_stats = {int(k): float(v) for k, v in day_of_week_stats.items()}
+        self.hour_stats = {int(k): float(v) for k, v in hour_stats.items()}
+        self.day_counts = {int(k): int(v) for k, v in (day_counts or {}).items()}
+        self.hour_counts = {int(k): int(v) for k, v in (hour_counts or {}).items()}
+        self.n_rows = n_rows
+        self.min_samples = min_samples
+
+        # 全体平均
+        all_views = list(self.day_of_week_stats.values())
+        self.overall_avg = np.mean(all_views) if all_views else 2000
+
+        # 時間帯の全体平均
+        hour_views = list(self.hour_stats.values())
+        self.hour_avg = np.mean(hour_views) if hour_views else 1800
+
+        # ベスト曜日・時間帯（十分な動画数がある中で平均視聴数の高い順）
+        best_days = self._ranked(self.day_of_week_stats, self.day_counts)
+        best_hours = self._ranked(self.hour_stats, self.hour_counts)
+        self.best_day = best_days[0] if best_days else None
+        self.best_hour = best_hours[0] if best_hours else None
+        self.second_best_hour = best_hours[1] if len(best_hours) > 1 else None
+
+        self.feature_table = self._build_feature_table()
+
+    def _ranked(self, stats, counts):
+        """動画数が min_samples 以上のキーを平均視聴数の降順で返す（件数不明なら全キー）"""
+        keys = [k for k in stats if not counts or counts.get(k, 0) >= self.min_samples]
+        return sorted(keys, key=lambda k: stats[k], reverse=True)
+
+    def _build_feature_table(self):
+        """曜日×時間帯の特徴量テーブル [7, 24, 特徴量数] を計算"""
+        table = np.zeros((7, 24, len(CHANNEL_FEATURE_NAMES)))
+        for dow in range(7):
+            # 曜日別パフォーマンス
+            day_performance = self.day_of_week_stats.get(dow, self.overall_avg) / self.overall_avg  # 正規化
+            for hour in range(24):
+                # 時間帯別パフォーマンス
+                hour_performance = self.hour_stats.get(hour, self.hour_avg) / self.hour_avg  # 正規化
+                table[dow, hour] = [
+                    day_performance,
+                    hour_performance,
+                    # 複合パフォーマンススコア
+                    day_performance * 0.6 + hour_performance * 0.4,
+                    # ベストタイミングフラグ
+                    dow == self.best_day,
+                    hour == self.best_hour,
+                    hour == self.second_best_hour,
+                    # 最適時間帯（朝のピーク）
+                    hour in MORNING_PEAK_HOURS,
+                    # 週末効果
+                    dow in WEEKEND_DAYS,
+                    # ハイブリッドパターン（ベスト曜日の朝のピークが最強）
+                    dow == self.best_day and hour in MORNING_PEAK_HOURS,
+                ]
+        return table
+
+    def lookup(self, day_of_week, hour):
+        """曜日・時間帯（スカラーまたは配列）の特徴量を参照
+
+        Returns:
+            np.ndarray: [..., 特徴量数]（列は CHANNEL_FEATURE_NAMES の順）
+        """
+        return self.feature_table[np.asarray(day_of_week), np.asarray(hour)]
+
+    @classmethod
+    def from_history(cls, channel_data):
+        """チャンネル履歴DataFrameから集計"""
+        # Shorts のみをフィルタ
+        shorts = channel_data[channel_data['is_short'] == True]
+
+        # 曜日別・時間帯別の平均視聴数と動画数
+        by_day = shorts.groupby('published_day_of_week')['view_count'].agg(['mean', 'count'])
+        by_hour = shorts.groupby('published_hour')['view_count'].agg(['mean', 'count'])
+
+        return cls(by_day['mean'].to_dict(), by_hour['mean'].to_dict(),
+                   by_day['count'].to_dict(), by_hour['count'].to_dict(),
+                   n_rows=len(channel_data))
+
+    @classmethod
+    def defaults(cls):
+        """履歴データがない場合のデフォルト統計"""
+        return cls({k: v for k, (v, _) in DEFAULT_DAY_OF_WEEK_STATS.items()},
+                   {k: v for k, (v, _) in DEFAULT_HOUR_STATS.items()},
+                   {k: n for k, (_, n) in DEFAULT_DAY_OF_WEEK_STATS.items()},
+                   {k: n for k, (_, n) in DEFAULT_HOUR_STATS.items()})
+
+    def to_dict(self):
+        """サイドカー保存用の辞書"""
+        return {
+            'day_of_week_stats': self.day_of_week_stats,
+            'hour_stats': self.hour_stats,
+            'day_counts': self.day_counts,
+            'hour_counts': self.hour_counts,
+            'n_rows': self.n_rows,
+            'min_samples': self.min_samples,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """サイドカーの辞書から復元"""
+        return cls(data['day_of_week_stats'], data['hour_stats'],
+                   data.get('day_counts'), data.get('hour_counts'),
+                   n_rows=data.get('n_rows', 0), min_samples=data.get('min_samples', MIN_SLOT_SAMPLES))
+
+
+def _file_signature(path):
+    """ファイルのシグネチャ（サイズ・更新時刻、存在しない場合はNone）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def stats_sidecar_path(channel_history_path):
+    """統計サイドカーのパス（例: channel_history_clean.stats.json）"""
+    root, _ = os.path.splitext(channel_history_path)
+    return root + '.stats.json'
+
+
+def load_channel_stats(channel_history_path='channel_history_clean.csv', verbose=True):
+    """
+    チャンネル統計を取得（プロセス内メモ → サイドカー → CSV集計の順）
+
+    CSVのサイズ・更新時刻が変わった場合のみ再集計し、サイドカーを更新する。
+
+    Args:
+        channel_history_path: チャンネル履歴CSVのパス
+        verbose: 進捗表示
+
+    Returns:
+        ChannelStats
+    """
+    key = os.path.abspath(channel_history_path)
+    signature = _file_signature(channel_history_path)
+
+    memo = _STATS_MEMO.get(key)
+    if memo is not None and memo[0] == signature:
+        return memo[1]
+
+    if signature is None:
+        if verbose:
+            print(f"⚠ {channel_history_path} が見つかりません。デフォルト統計を使用します。")
+        stats = ChannelStats.defaults()
+        _STATS_MEMO[key] = (signature, stats)
+        return stats
+
+    sidecar_path = stats_sidecar_path(channel_history_path)
+    stats = None
+    try:
+        with open(sidecar_path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        if sidecar.get('version') == STATS_CACHE_VERSION and sidecar.get('signature') == signature:
+            stats = ChannelStats.from_dict(sidecar['stats'])
+            if verbose:
+                print(f"✓ チャンネル統計キャッシュを使用: {sidecar_path} ({stats.n_rows}件)")
+    except (OSError, ValueError, KeyError):
+        stats = None
+
+    if stats is None:
+        channel_data = pd.read_csv(channel_history_path)
+        stats = ChannelStats.from_history(channel_data)
+        if verbose:
+            print(f"✓ チャンネル履歴データ読み込み完了: {len(channel_data)}件")
+        try:
+            tmp_path = sidecar_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': STATS_CACHE_VERSION, 'signature': signature,
+                           'stats': stats.to_dict()}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, sidecar_path)
+        except OSError as e:
+            print(f"⚠ チャンネル統計キャッシュの保存に失敗: {e}")
+
+    _STATS_MEMO[key] = (signature, stats)
+    return stats
+
 
 class ChannelSpecificFeatureEngineer:
     """
@@ -27,59 +261,13 @@ class ChannelSpecificFeatureEngineer:
             channel_history_path: チャンネル履歴CSVのパス（デフォルト: 広告除外版）
         """
         self.channel_history_path = channel_history_path
-        self.channel_data = None
-        self.day_of_week_stats = None
-        self.hour_stats = None
-
-        # データ読み込みと統計計算
-        self._load_channel_history()
-        self._calculate_statistics()
-
-    def _load_channel_history(self):
-        """チャンネル履歴データを読み込み"""
-        try:
-            self.channel_data = pd.read_csv(self.channel_history_path)
-            print(f"✓ チャンネル履歴データ読み込み完了: {len(self.channel_data)}件")
-        except FileNotFoundError:
-            print(f"⚠ {self.channel_history_path} が見つかりません。デフォルト統計を使用します。")
-            self.channel_data = None
-
-    def _calculate_statistics(self):
-        """曜日別・時間帯別の統計を計算"""
-        if self.channel_data is None:
-            # デフォルト統計（実測値ベース）
-            self.day_of_week_stats = {
-                0: 1870,  # 月曜
-                1: 1672,  # 火曜
-                2: 1711,  # 水曜
-                3: 3203,  # 木曜 (最高)
-                4: 1533,  # 金曜
-                5: 1981,  # 土曜
-                6: 2157   # 日曜
-            }
-
-            self.hour_stats = {
-                1: 1859, 2: 1343, 3: 1813, 4: 1049, 5: 2174,
-                6: 2413, 7: 1345, 8: 2125, 9: 1985, 12: 681,
-                13: 1405, 15: 1391
-            }
-        else:
-            # Shorts のみをフィルタ
-            shorts = self.channel_data[self.channel_data['is_short'] == True]
-
-            # 曜日別平均視聴数
-            self.day_of_week_stats = shorts.groupby('published_day_of_week')['view_count'].mean().to_dict()
-
-            # 時間帯別平均視聴数
-            self.hour_stats = shorts.groupby('published_hour')['view_count'].mean().to_dict()
 
-        # 全体平均
-        all_views = list(self.day_of_week_stats.values())
-        self.overall_avg = np.mean(all_views) if all_views else 2000
-
-        # 時間帯の全体平均
-        hour_views = list(self.hour_stats.values())
-        self.hour_avg = np.mean(hour_views) if hour_views else 1800
+        # 統計はプロセス内・ディスク上でキャッシュされ、CSVが更新された場合のみ再集計される
+        self.stats = load_channel_stats(channel_history_path)
+        self.day_of_week_stats = self.stats.day_of_week_stats
+        self.hour_stats = self.stats.hour_stats
+        self.overall_avg = self.stats.overall_avg
+        self.hour_avg = self.stats.hour_avg
 
     def extract_channel_performance_features(self, datetime_obj):
         """
@@ -91,40 +279,24 @@ class ChannelSpecificFeatureEngineer:
         Returns:
             dict: チャンネル固有特徴量
         """
-        features = {}
-
-        dow = datetime_obj.weekday()
-        hour = datetime_obj.hour
-
-        # 曜日別パフォーマンス
-        expected_views_dow = self.day_of_week_stats.get(dow, self.overall_avg)
-        features['channel_day_performance'] = expected_views_dow / self.overall_avg  # 正規化
-
-        # 時間帯別パフォーマンス
-        expected_views_hour = self.hour_stats.get(hour, self.hour_avg)
-        features['channel_hour_performance'] = expected_views_hour / self.hour_avg  # 正規化
-
-        # 複合パフォーマンススコア
-        features['channel_combined_score'] = (
-            features['channel_day_performance'] * 0.6 +
-            features['channel_hour_performance'] * 0.4
-        )
-
-        # ベストタイミングフラグ
-        features['is_best_day'] = 1 if dow == 3 else 0  # 木曜日
-        features['is_best_hour'] = 1 if hour == 6 else 0  # 6時台
-        features['is_second_best_hour'] = 1 if hour == 8 else 0  # 8時台
+        values = self.stats.lookup(datetime_obj.weekday(), datetime_obj.hour)
+        return {
+            name: int(value) if name.startswith('is_') else float(value)
+            for name, value in zip(CHANNEL_FEATURE_NAMES, values)
+        }
 
-        # 最適時間帯（6-9時）
-        features['is_morning_peak'] = 1 if 6 <= hour <= 9 else 0
-
-        # 週末効果
-        features['is_weekend_boost'] = 1 if dow in [5, 6] else 0
+    def performance_features(self, day_of_week, hour):
+        """
+        曜日・時間帯の配列からチャンネル固有特徴量をまとめて取得
 
-        # ハイブリッドパターン（木曜朝6-9時が最強）
-        features['is_golden_timeslot'] = 1 if (dow == 3 and 6 <= hour <= 9) else 0
+        Args:
+            day_of_week: 曜日の配列（0=月曜）
+            hour: 時の配列（0-23）
 
-        return features
+        Returns:
+            np.ndarray: [件数, 特徴量数]（列は CHANNEL_FEATURE_NAMES の順）
+        """
+        return self.stats.lookup(day_of_week, hour)
 
     def get_optimal_posting_times(self, top_n=10):
         """
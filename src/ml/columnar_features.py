@@ -0,0 +1,403 @@
+"""
+列指向の特徴量ビルダー
+曲データを列（NumPy配列）として扱い、全特徴量をブロードキャストで一括計算する
+
+FeatureEngineer の曲ごとの辞書処理（extract_*_features）と同じ値・同じ列順を、
+事前確保した float32 行列に直接書き込む。
+"""
+
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .feature_store import FeatureStore, data_version, song_ids
+from .tag_vocabulary import TagVocabulary
+
+TEMPORAL_COLUMNS = [
+    'hour', 'day_of_week', 'month', 'day_of_month',
+    'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos', 'month_sin', 'month_cos',
+    'is_weekend', 'is_weekday',
+    'time_period', 'is_morning', 'is_afternoon', 'is_evening', 'is_night',
+    'is_peak_hour', 'season',
+    'days_since_release', 'is_past_release', 'is_release_day',
+]
+
+CHANNEL_COLUMNS = [
+    'channel_day_performance', 'channel_hour_performance', 'channel_combined_score',
+    'is_best_day', 'is_best_hour', 'is_second_best_hour',
+    'is_morning_peak', 'is_weekend_boost', 'is_golden_timeslot',
+]
+
+CONTENT_COLUMNS = [
+    'artist_avg_views', 'tag_count',
+    'has_vocaloid_tag', 'has_anime_tag', 'has_pop_tag', 'has_game_tag',
+    'difficulty_avg', 'artist_video_count',
+]
+
+ENGAGEMENT_COLUMNS = [
+    'like_rate', 'comment_rate', 'engagement_rate',
+    'support_rate', 'growth_rate', 'days_since_published',
+    'relative_engagement_score', 'relative_like_rate', 'relative_comment_rate',
+    'analytics_like_rate', 'analytics_retention_rate', 'analytics_ctr',
+    'channel_organic_ratio', 'analytics_avg_percentage_viewed', 'analytics_engagement_rate',
+    'has_analytics_data',
+    'log_view_count', 'log_like_count', 'log_comment_count',
+]
+
+INTERACTION_COLUMNS = [
+    'anime_evening', 'vocaloid_night', 'pop_afternoon',
+    'weekend_hard', 'peak_anime', 'peak_vocaloid',
+]
+
+# 投稿日時に依存しない曲ごとの特徴（FeatureStore に保存する列）
+STATIC_COLUMNS = CONTENT_COLUMNS + ENGAGEMENT_COLUMNS
+
+# 曲データからそのまま（欠損は0で）コピーする列
+_PASSTHROUGH_COLUMNS = [
+    'support_rate', 'growth_rate', 'days_since_published',
+    'relative_engagement_score', 'relative_like_rate', 'relative_comment_rate',
+    'analytics_like_rate', 'analytics_retention_rate', 'analytics_ctr',
+    'channel_organic_ratio', 'analytics_avg_percentage_viewed', 'analytics_engagement_rate',
+]
+
+# 周期エンコーディングのテーブル（スカラー版と同じ演算順で計算）
+_HOURS = np.arange(24)
+_DOWS = np.arange(7)
+_MONTHS = np.arange(13)
+_HOUR_SIN = np.sin(2 * np.pi * _HOURS / 24)
+_HOUR_COS = np.cos(2 * np.pi * _HOURS / 24)
+_DOW_SIN = np.sin(2 * np.pi * _DOWS / 7)
+_DOW_COS = np.cos(2 * np.pi * _DOWS / 7)
+_MONTH_SIN = np.sin(2 * np.pi * _MONTHS / 12)
+_MONTH_COS = np.cos(2 * np.pi * _MONTHS / 12)
+
+
+# 特徴量の計算に使う曲データの列
+SONG_COLUMNS = [
+    'video_id', 'song_name', 'artist_name', 'release_date', 'data_source',
+    'view_count', 'like_count', 'comment_count',
+] + _PASSTHROUGH_COLUMNS
+
+
+def songs_to_frame(songs: Union[pd.DataFrame, Sequence[Dict[str, Any]]]) -> pd.DataFrame:
+    """曲データ（辞書のリストまたはDataFrame）を列指向のDataFrameに変換
+
+    辞書のリストの場合は特徴量に使う列（SONG_COLUMNS）だけを取り出す。
+    """
+    if isinstance(songs, pd.DataFrame):
+        return songs.reset_index(drop=True)
+
+    songs = list(songs)
+    columns = {}
+    for column in SONG_COLUMNS:
+        values = [song.get(column) for song in songs]
+        if any(value is not None for value in values):
+            columns[column] = values
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(songs)))
+
+
+def _numeric_column(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """数値列を float64 配列で取得（列がない・欠損は0）"""
+    if column not in frame.columns:
+        return np.zeros(len(frame))
+    values = pd.to_numeric(frame[column], errors='coerce')
+    return values.fillna(0).to_numpy(dtype=np.float64)
+
+
+def _string_column(frame: pd.DataFrame, column: str) -> pd.Series:
+    """文字列列を取得（列がない・欠損は空文字）"""
+    if column not in frame.columns:
+        return pd.Series([''] * len(frame), index=frame.index, dtype=object)
+    return frame[column].where(frame[column].notna(), '')
+
+
+def parse_release_days(songs: Union[pd.DataFrame, Sequence[Dict[str, Any]]]) -> np.ndarray:
+    """release_date（YYYY/MM/DD）を datetime64[D] 配列に変換（解析できない場合はNaT）"""
+    frame = songs_to_frame(songs)
+    release = pd.to_datetime(_string_column(frame, 'release_date').astype(str),
+                             format='%Y/%m/%d', errors='coerce')
+    return release.to_numpy().astype('datetime64[D]')
+
+
+class ColumnarFeatureBuilder:
+    """曲データの列から特徴量行列を一括構築するビルダー"""
+
+    def __init__(self, channel_engineer=None, parse_difficulty=None,
+                 tag_vocabulary: Optional[TagVocabulary] = None,
+                 feature_store: Optional[FeatureStore] = None):
+        """
+        Args:
+            channel_engineer: ChannelSpecificFeatureEngineer（Noneの場合はチャンネル特徴量なし）
+            parse_difficulty: 難易度文字列 -> 平均難易度 の関数（FeatureEngineer._parse_difficulty）
+            tag_vocabulary: タグ語彙（省略時は空の語彙から始める）
+            feature_store: 静的特徴量ストア（Noneの場合は毎回計算）
+        """
+        self.channel_engineer = channel_engineer
+        self.parse_difficulty = parse_difficulty or (lambda value: 0.0)
+        self.tag_vocabulary = tag_vocabulary if tag_vocabulary is not None else TagVocabulary()
+        self.feature_store = feature_store
+
+    @property
+    def feature_names(self) -> List[str]:
+        """固定の列順（FeatureEngineer.prepare_training_data と同じ）"""
+        temporal = TEMPORAL_COLUMNS
+        if self.channel_engineer is not None:
+            temporal = temporal + CHANNEL_COLUMNS
+        return temporal + CONTENT_COLUMNS + ENGAGEMENT_COLUMNS + INTERACTION_COLUMNS
+
+    def build(self, songs: Union[pd.DataFrame, Sequence[Dict[str, Any]]],
+              taiko_data_map: Optional[Dict[str, Dict[str, Any]]] = None,
+              target_datetime: Union[datetime.datetime, Sequence[datetime.datetime], None] = None,
+              static_version: Optional[str] = None) -> Tuple[np.ndarray, List[str]]:
+        """特徴量行列を構築
+
+        Args:
+            songs: 曲データ（辞書のリストまたはDataFrame）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            target_datetime: 投稿予定日時（全曲共通の1つ、または曲ごとの配列）
+            static_version: 静的特徴量のデータバージョン（static_features を参照）
+
+        Returns:
+            (float32の特徴量行列 [曲数 x 特徴量数], 特徴量名リスト)
+        """
+        frame = songs_to_frame(songs)
+        static = self.static_features(frame, taiko_data_map, static_version)
+        return self.assemble(static, parse_release_days(frame), target_datetime), self.feature_names
+
+    def assemble(self, static: np.ndarray, release_days: np.ndarray,
+                 target_datetime: Union[datetime.datetime, Sequence[datetime.datetime], None] = None) -> np.ndarray:
+        """静的特徴とリリース日から特徴量行列を組み立て（投稿日時に依存する列だけを計算）
+
+        Args:
+            static: static_features の行列 [曲数 x len(STATIC_COLUMNS)]
+            release_days: リリース日（datetime64[D]、不明はNaT）
+            target_datetime: 投稿予定日時（全曲共通の1つ、または曲ごとの配列）
+
+        Returns:
+            float32の特徴量行列 [曲数 x 特徴量数]（列は feature_names の順）
+        """
+        n = len(static)
+        names = self.feature_names
+        column_index = {name: i for i, name in enumerate(names)}
+        # 列単位で書き込むため列優先（Fortran順）で確保する
+        matrix = np.empty((n, len(names)), dtype=np.float32, order='F')
+
+        def put(name: str, values):
+            matrix[:, column_index[name]] = values
+
+        temporal = self._temporal_columns(n, release_days, target_datetime)
+        for name, values in temporal.items():
+            put(name, values)
+
+        content = {name: static[:, i] for i, name in enumerate(STATIC_COLUMNS)}
+        for name, values in content.items():
+            put(name, values)
+
+        for name, values in self.interaction_columns(temporal, content).items():
+            put(name, values)
+
+        return matrix
+
+    def static_features(self, songs: Union[pd.DataFrame, Sequence[Dict[str, Any]]],
+                        taiko_data_map: Optional[Dict[str, Dict[str, Any]]] = None,
+                        version: Optional[str] = None) -> np.ndarray:
+        """投稿日時に依存しない曲ごとの特徴（列は STATIC_COLUMNS の順）
+
+        feature_store がある場合は、曲ID・データバージョンが一致する保存済みの行を再利用する。
+
+        Args:
+            songs: 曲データ（辞書のリストまたはDataFrame）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            version: データバージョン（ソースファイルのフィンガープリントなど。
+                省略時は曲データ・TaikoGameデータの内容から計算）
+
+        Returns:
+            float32の特徴量行列 [曲数 x len(STATIC_COLUMNS)]
+        """
+        frame = songs_to_frame(songs)
+        tags_values, difficulty_values = self._taiko_columns(frame, taiko_data_map or {})
+
+        def compute() -> np.ndarray:
+            columns = {**self._content_columns(frame, tags_values, difficulty_values),
+                       **self._engagement_columns(frame)}
+            return np.column_stack([columns[name] for name in STATIC_COLUMNS]).astype(np.float32)
+
+        if self.feature_store is None or len(frame) == 0:
+            return compute()
+
+        if version is None:
+            version = data_version(frame, tags_values, difficulty_values, extra=','.join(STATIC_COLUMNS))
+        return self.feature_store.get_or_compute(version, song_ids(frame), STATIC_COLUMNS, compute)
+
+    @staticmethod
+    def interaction_columns(temporal: Dict[str, np.ndarray],
+                            content: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """交互作用特徴（create_interaction_features と同じ値、配列はブロードキャスト可）"""
+        return {
+            'anime_evening': content['has_anime_tag'] * temporal['is_evening'],
+            'vocaloid_night': content['has_vocaloid_tag'] * temporal['is_night'],
+            'pop_afternoon': content['has_pop_tag'] * temporal['is_afternoon'],
+            'weekend_hard': temporal['is_weekend'] * content['difficulty_avg'],
+            'peak_anime': temporal['is_peak_hour'] * content['has_anime_tag'],
+            'peak_vocaloid': temporal['is_peak_hour'] * content['has_vocaloid_tag'],
+        }
+
+    def _temporal_columns(self, n: int, release_days: np.ndarray, target_datetime) -> Dict[str, np.ndarray]:
+        """時間的特徴（extract_temporal_features と同じ値）"""
+        if target_datetime is None:
+            target_datetime = datetime.datetime.now()
+
+        if isinstance(target_datetime, datetime.datetime):
+            targets = pd.DatetimeIndex([target_datetime] * n)
+        else:
+            targets = pd.DatetimeIndex(pd.to_datetime(list(target_datetime)))
+            if len(targets) != n:
+                raise ValueError(f"target_datetime の数({len(targets)})が曲数({n})と一致しません")
+
+        columns = self.slot_columns(targets)
+        columns.update(self.release_columns(targets.normalize().to_numpy().astype('datetime64[D]'),
+                                            release_days))
+        return columns
+
+    def slot_columns(self, targets: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+        """投稿日時だけで決まる特徴（release_date 関連以外の時間的特徴 + チャンネル固有特徴）
+
+        Args:
+            targets: 投稿日時の配列
+
+        Returns:
+            特徴量名 -> 配列 の辞書
+        """
+        hour = targets.hour.to_numpy()
+        dow = targets.dayofweek.to_numpy()
+        month = targets.month.to_numpy()
+
+        time_period = np.select([hour < 6, hour < 12, hour < 18], [0, 1, 2], default=3)
+        weekend = (dow >= 5).astype(np.int64)
+
+        columns = {
+            'hour': hour,
+            'day_of_week': dow,
+            'month': month,
+            'day_of_month': targets.day.to_numpy(),
+            'hour_sin': _HOUR_SIN[hour],
+            'hour_cos': _HOUR_COS[hour],
+            'dow_sin': _DOW_SIN[dow],
+            'dow_cos': _DOW_COS[dow],
+            'month_sin': _MONTH_SIN[month],
+            'month_cos': _MONTH_COS[month],
+            'is_weekend': weekend,
+            'is_weekday': 1 - weekend,
+            'time_period': time_period,
+            'is_morning': (time_period == 1).astype(np.int64),
+            'is_afternoon': (time_period == 2).astype(np.int64),
+            'is_evening': (time_period == 3).astype(np.int64),
+            'is_night': (time_period == 0).astype(np.int64),
+            'is_peak_hour': ((hour >= 18) & (hour <= 21)).astype(np.int64),
+            'season': (month % 12) // 3,
+        }
+
+        if self.channel_engineer is not None:
+            columns.update(self._channel_columns(dow, hour))
+
+        return columns
+
+    @staticmethod
+    def release_columns(target_days: np.ndarray, release_days: np.ndarray) -> Dict[str, np.ndarray]:
+        """release_date との関係（解析できない release_date は0、配列はブロードキャスト可）
+
+        Args:
+            target_days: 投稿日（datetime64[D]）
+            release_days: リリース日（datetime64[D]、不明はNaT）
+
+        Returns:
+            days_since_release / is_past_release / is_release_day の辞書
+        """
+        valid = ~np.isnat(release_days) & ~np.isnat(target_days)
+        diff = (target_days - release_days).astype('timedelta64[D]').astype(np.int64)
+        days_diff = np.where(valid, diff, 0)
+        return {
+            'days_since_release': days_diff,
+            'is_past_release': (valid & (days_diff >= 0)).astype(np.int64),
+            'is_release_day': (valid & (days_diff == 0)).astype(np.int64),
+        }
+
+    def _channel_columns(self, dow: np.ndarray, hour: np.ndarray) -> Dict[str, np.ndarray]:
+        """チャンネル固有特徴（曜日×時間帯のテーブルから引く）"""
+        values = self.channel_engineer.performance_features(dow, hour)
+        return {name: values[:, i] for i, name in enumerate(CHANNEL_COLUMNS)}
+
+    def tag_matrix(self, songs: Union[pd.DataFrame, Sequence[Dict[str, Any]]],
+                   taiko_data_map: Optional[Dict[str, Dict[str, Any]]] = None) -> sparse.csr_matrix:
+        """曲ごとの全タグのマルチホットCSR行列 [曲数 x 語彙数]（列は tag_vocabulary.tags の順）"""
+        tags_values, _ = self._taiko_columns(songs_to_frame(songs), taiko_data_map or {})
+        return self.tag_vocabulary.encode(tags_values)
+
+    @staticmethod
+    def _taiko_columns(frame: pd.DataFrame, taiko_data_map: Dict[str, Dict[str, Any]]):
+        """TaikoGameデータの tags / difficulty を曲名で結合（ユニークな曲名ごとに1回だけ引く）"""
+        song_codes, unique_names = pd.factorize(_string_column(frame, 'song_name').astype(str))
+        unique_tags = np.empty(len(unique_names), dtype=object)
+        unique_difficulty = np.empty(len(unique_names), dtype=object)
+        for i, song_name in enumerate(unique_names):
+            taiko = taiko_data_map.get(song_name, {}) if taiko_data_map else {}
+            unique_tags[i] = taiko.get('tags', '[]') if taiko and 'tags' in taiko else None
+            unique_difficulty[i] = taiko.get('difficulty', '') if taiko and 'difficulty' in taiko else None
+        return unique_tags[song_codes], unique_difficulty[song_codes]
+
+    def _content_columns(self, frame: pd.DataFrame, tags_values: np.ndarray,
+                         difficulty_values: np.ndarray) -> Dict[str, np.ndarray]:
+        """コンテンツ特徴（extract_content_features + アーティスト統計と同じ値）"""
+        # アーティスト統計（空のアーティスト名は集計しない）
+        artists = _string_column(frame, 'artist_name')
+        views = _numeric_column(frame, 'view_count')
+        stats = pd.DataFrame({'artist': artists.to_numpy(), 'views': views})
+        stats = stats[stats['artist'] != '']
+        grouped = stats.groupby('artist')['views'].agg(['mean', 'count'])
+        artist_avg_views = artists.map(grouped['mean']).fillna(0).to_numpy(dtype=np.float64)
+        artist_video_count = artists.map(grouped['count']).fillna(0).to_numpy(dtype=np.float64)
+
+        # タグはマルチホットのCSR行列から数・フラグを取り出す
+        tag_columns = self.tag_vocabulary.flag_columns(self.tag_vocabulary.encode(tags_values))
+
+        # 難易度は同じ文字列が多いため、ユニーク値ごとに1回だけ解析する
+        difficulty_cache = {
+            value: (self.parse_difficulty(value) if value is not None else 0)
+            for value in pd.unique(difficulty_values)
+        }
+        difficulty_avg = np.array([difficulty_cache[value] for value in difficulty_values], dtype=np.float64)
+
+        return {
+            'artist_avg_views': artist_avg_views,
+            **tag_columns,
+            'difficulty_avg': difficulty_avg,
+            'artist_video_count': artist_video_count,
+        }
+
+    def _engagement_columns(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """エンゲージメント特徴（extract_engagement_features と同じ値）"""
+        view_count = _numeric_column(frame, 'view_count')
+        like_count = _numeric_column(frame, 'like_count')
+        comment_count = _numeric_column(frame, 'comment_count')
+
+        has_views = view_count > 0
+        safe_views = np.where(has_views, view_count, 1)
+
+        columns = {
+            'like_rate': np.where(has_views, like_count / safe_views, 0),
+            'comment_rate': np.where(has_views, comment_count / safe_views, 0),
+            'engagement_rate': np.where(has_views, (like_count + comment_count * 10) / safe_views, 0),
+        }
+        for name in _PASSTHROUGH_COLUMNS:
+            columns[name] = _numeric_column(frame, name)
+
+        data_source = _string_column(frame, 'data_source')
+        columns['has_analytics_data'] = (data_source == 'analytics').to_numpy(dtype=np.float64)
+
+        columns['log_view_count'] = np.log1p(view_count)
+        columns['log_like_count'] = np.log1p(like_count)
+        columns['log_comment_count'] = np.log1p(comment_count)
+        return columns
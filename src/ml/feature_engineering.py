@@ -4,11 +4,18 @@ YouTube動画の視聴数予測のための特徴量を生成
 """
 
 import datetime
+import json
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any
 import re
 
+from .columnar_features import STATIC_COLUMNS, ColumnarFeatureBuilder, parse_release_days, songs_to_frame
+from .feature_store import FeatureStore
+from .tag_vocabulary import FLAG_TAGS, TagVocabulary
+from .training_cache import TrainingCache, data_digest, default_cache_dir, source_fingerprint
+from ..utils.profiling import traced
+
 # チャンネル固有特徴量を読み込み
 try:
     from .channel_specific_features import ChannelSpecificFeatureEngineer
@@ -18,12 +25,27 @@ except ImportError:
     print("警告: channel_specific_features.py が見つかりません。チャンネル固有特徴量は使用されません。")
 
 
+# prepare_training_data_cached の既定のキャッシュディレクトリ
+DEFAULT_TRAINING_CACHE_DIR = 'models/training_features.cache'
+
+# 訓練データキャッシュに静的特徴と一緒に保存するリリース日の列（1970-01-01 からの日数、不明はNaN）
+RELEASE_DAY_COLUMN = 'release_day'
+
+
 class FeatureEngineer:
     """特徴量エンジニアリングクラス"""
 
-    def __init__(self, use_channel_features=True):
+    def __init__(self, use_channel_features=True, tag_sources: List[str] = None,
+                 feature_store: FeatureStore = None):
+        """
+        Args:
+            use_channel_features: チャンネル固有特徴量を使用するか
+            tag_sources: タグ語彙を構築するTaikoGameデータCSV（省略時は filtered data/ 内のCSV）
+            feature_store: 曲ごとの静的特徴量ストア（訓練・スケジューリング間で再利用、省略時は毎回計算）
+        """
         self.artist_encoder = {}
-        self.tag_encoder = {}
+        self.feature_store = feature_store
+        self.tag_vocabulary = TagVocabulary.from_csv(tag_sources)
         self.use_channel_features = use_channel_features and CHANNEL_FEATURES_AVAILABLE
 
         # チャンネル固有特徴量エンジニア
@@ -38,6 +60,15 @@ class FeatureEngineer:
         else:
             self.channel_engineer = None
 
+        # 列指向の一括ビルダー（prepare_training_data で使用）
+        self.columnar_builder = ColumnarFeatureBuilder(
+            channel_engineer=self.channel_engineer if self.use_channel_features else None,
+            parse_difficulty=self._parse_difficulty,
+            tag_vocabulary=self.tag_vocabulary,
+            feature_store=self.feature_store
+        )
+
+    @traced('FeatureEngineer.extract_temporal_features')
     def extract_temporal_features(self, datetime_obj: datetime.datetime,
                                   release_date_str: str = '') -> Dict[str, float]:
         """時間的特徴を抽出
@@ -140,24 +171,17 @@ class FeatureEngineer:
         # アーティストの過去の平均視聴数（後で計算）
         features['artist_avg_views'] = 0  # プレースホルダー
 
-        # タグ情報（TaikoGameデータから）
-        tags = []
+        # タグ情報（TaikoGameデータから、語彙の列番号としてキャッシュ済み）
+        tag_columns = np.empty(0, dtype=np.int32)
         if taiko_data and 'tags' in taiko_data:
-            tags_str = taiko_data.get('tags', '[]')
-            try:
-                # JSON文字列をパース
-                tags = eval(tags_str) if tags_str else []
-            except:
-                tags = []
+            tag_columns = self.tag_vocabulary.encode_one(taiko_data.get('tags', '[]'))
 
-        features['tags'] = tags
-        features['tag_count'] = len(tags)
+        features['tags'] = self.tag_vocabulary.decode(tag_columns)
+        features['tag_count'] = len(tag_columns)
 
         # 特定のタグフラグ
-        features['has_vocaloid_tag'] = 1 if 'ボカロ' in tags else 0
-        features['has_anime_tag'] = 1 if 'アニメ' in tags else 0
-        features['has_pop_tag'] = 1 if 'ポップス' in tags else 0
-        features['has_game_tag'] = 1 if 'ゲーム' in tags else 0
+        for name, tag in FLAG_TAGS.items():
+            features[name] = 1 if self.tag_vocabulary.index[tag] in tag_columns else 0
 
         # 難易度（TaikoGameデータから）
         if taiko_data and 'difficulty' in taiko_data:
@@ -249,11 +273,69 @@ class FeatureEngineer:
 
         return features
 
+    def build_feature_matrix(self, songs_data, taiko_data_map: Dict[str, Dict[str, Any]] = None,
+                             target_datetime=None, data_version: str = None) -> Tuple[np.ndarray, List[str]]:
+        """特徴量行列を列指向で一括構築
+
+        Args:
+            songs_data: 曲データ（辞書のリストまたはDataFrame）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            target_datetime: 予測対象の日時（全曲共通の1つ、または曲ごとの配列）
+            data_version: 特徴量ストアのデータバージョン（省略時は曲データの内容から計算）
+
+        Returns:
+            (float32の特徴量行列, 特徴量名リスト)
+        """
+        return self.columnar_builder.build(songs_data, taiko_data_map, target_datetime, data_version)
+
+    def build_tag_matrix(self, songs_data, taiko_data_map: Dict[str, Dict[str, Any]] = None):
+        """曲ごとの全タグのマルチホット行列を構築
+
+        Args:
+            songs_data: 曲データ（辞書のリストまたはDataFrame）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+
+        Returns:
+            scipy.sparse.csr_matrix [曲数 x 語彙数]（列は self.tag_vocabulary.tags の順）
+        """
+        return self.columnar_builder.tag_matrix(songs_data, taiko_data_map)
+
+    @traced('FeatureEngineer.prepare_training_data')
     def prepare_training_data(self, songs_data: List[Dict[str, Any]],
                              taiko_data_map: Dict[str, Dict[str, Any]] = None,
-                             target_datetime: datetime.datetime = None) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+                             target_datetime: datetime.datetime = None,
+                             data_version: str = None) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
         """訓練データを準備
 
+        Args:
+            songs_data: 曲データのリスト（またはDataFrame）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            target_datetime: 予測対象の日時（指定しない場合は現在）
+            data_version: 特徴量ストアのデータバージョン（省略時は曲データの内容から計算）
+
+        Returns:
+            (特徴量DataFrame, ターゲット配列, 特徴量名リスト)
+        """
+        if target_datetime is None:
+            target_datetime = datetime.datetime.now()
+
+        songs_frame = songs_to_frame(songs_data)
+        matrix, feature_names = self.build_feature_matrix(songs_frame, taiko_data_map, target_datetime,
+                                                          data_version)
+
+        features_df = pd.DataFrame(matrix, columns=feature_names, copy=False)
+        if 'view_count' in songs_frame.columns:
+            targets_array = songs_frame['view_count'].fillna(0).to_numpy()
+        else:
+            targets_array = np.zeros(len(songs_frame), dtype=np.int64)
+
+        return features_df, targets_array, feature_names
+
+    def _prepare_training_data_dicts(self, songs_data: List[Dict[str, Any]],
+                                     taiko_data_map: Dict[str, Dict[str, Any]] = None,
+                                     target_datetime: datetime.datetime = None) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """訓練データを曲ごとの辞書から準備（列指向版の検証用リファレンス実装）
+
         Args:
             songs_data: 曲データのリスト
             taiko_data_map: 曲名 -> TaikoGameデータのマッピング
@@ -309,6 +391,136 @@ class FeatureEngineer:
 
         return features_df, targets_array, feature_names
 
+    def load_training_data(self, json_path: str = 'ML_training_data_enriched.json',
+                           taiko_data_map: Dict[str, Dict[str, Any]] = None,
+                           target_datetime: datetime.datetime = None,
+                           extra_sources: List[str] = None,
+                           use_cache: bool = True) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """訓練データJSONから特徴量を準備（バイナリキャッシュ経由）
+
+        ソースのフィンガープリントが一致する場合はJSONを解析せず、メモリマップした
+        静的特徴から時間的特徴の列だけを計算する。
+
+        Args:
+            json_path: 訓練データJSONのパス
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            target_datetime: 予測対象の日時（指定しない場合は現在）
+            extra_sources: フィンガープリントに含める追加ファイル（TaikoGame CSVなど）
+            use_cache: キャッシュを使用するか
+
+        Returns:
+            (特徴量DataFrame, ターゲット配列, 特徴量名リスト)
+        """
+        if target_datetime is None:
+            target_datetime = datetime.datetime.now()
+
+        # 静的特徴量は対象日時に依存しないため、ソースファイルだけでバージョンを決める
+        static_sources = [json_path] + list(extra_sources or [])
+        static_version = source_fingerprint(*static_sources, extra='static')[:16]
+
+        if not use_cache:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                songs_data = json.load(f)
+            return self.prepare_training_data(songs_data, taiko_data_map, target_datetime, static_version)
+
+        def build():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                songs_data = json.load(f)
+            return self._static_training_block(songs_data, taiko_data_map, static_version)
+
+        fingerprint = self.training_data_key(taiko_data_map, sources=static_sources)
+        cache = TrainingCache(default_cache_dir(json_path))
+        return self._assemble_training_data(*cache.get_or_build(fingerprint, build)[:2], target_datetime)
+
+    def prepare_training_data_cached(self, songs_data: List[Dict[str, Any]],
+                                     taiko_data_map: Dict[str, Dict[str, Any]] = None,
+                                     target_datetime: datetime.datetime = None,
+                                     cache_dir: str = DEFAULT_TRAINING_CACHE_DIR,
+                                     use_cache: bool = True) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """曲データから特徴量を準備（バイナリキャッシュ経由）
+
+        曲データは rankings.json などから加工して渡されるため、ファイルではなく内容でキーを決める。
+        キャッシュするのは対象日時に依存しない静的特徴・リリース日・ターゲットで、曲データ・
+        TaikoGameデータが前回と同じ場合は、時間的特徴・交互作用特徴の列だけを計算する。
+
+        Args:
+            songs_data: 曲データのリスト
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            target_datetime: 予測対象の日時（指定しない場合は現在）
+            cache_dir: キャッシュディレクトリ
+            use_cache: キャッシュを使用するか
+
+        Returns:
+            (特徴量DataFrame, ターゲット配列, 特徴量名リスト)
+        """
+        if target_datetime is None:
+            target_datetime = datetime.datetime.now()
+
+        if not use_cache:
+            return self.prepare_training_data(songs_data, taiko_data_map, target_datetime)
+
+        fingerprint = self.training_data_key(taiko_data_map, list(songs_data))
+        block, targets, _ = TrainingCache(cache_dir).get_or_build(
+            fingerprint, lambda: self._static_training_block(songs_data, taiko_data_map))
+        return self._assemble_training_data(block, targets, target_datetime)
+
+    def training_data_key(self, taiko_data_map: Any, *values: Any, sources: List[str] = ()) -> str:
+        """対象日時に依存しない訓練データのキー
+
+        ソースファイル・チャンネル履歴のサイズと更新時刻に加え、TaikoGameデータとタグ語彙の内容、
+        values（曲データなど）の内容から計算する。
+
+        Args:
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+            values: キーに含める値（曲データなど）
+            sources: キーに含めるソースファイル
+
+        Returns:
+            キー文字列
+        """
+        sources = list(sources)
+        if self.use_channel_features and self.channel_engineer:
+            sources.append(self.channel_engineer.channel_history_path)
+
+        # SongNameIndex は行のリスト、辞書はそのまま
+        taiko_rows = taiko_data_map.rows() if hasattr(taiko_data_map, 'rows') else (taiko_data_map or {})
+        contents = data_digest(taiko_rows, list(self.tag_vocabulary.index), *values)
+        return source_fingerprint(*sources, extra=f"static;{contents}")
+
+    def _static_training_block(self, songs_data: List[Dict[str, Any]],
+                               taiko_data_map: Dict[str, Dict[str, Any]] = None,
+                               data_version: str = None) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """訓練データのうち対象日時に依存しない部分（静的特徴 + リリース日）
+
+        Returns:
+            (STATIC_COLUMNS + release_day 列のDataFrame, ターゲット配列, 列名リスト)
+        """
+        songs_frame = songs_to_frame(songs_data)
+        static = self.columnar_builder.static_features(songs_frame, taiko_data_map, data_version)
+        release_days = parse_release_days(songs_frame)
+        release = np.where(np.isnat(release_days), np.nan, release_days.astype(np.int64))
+
+        columns = STATIC_COLUMNS + [RELEASE_DAY_COLUMN]
+        block = pd.DataFrame(np.column_stack([static.astype(np.float64), release]), columns=columns)
+        if 'view_count' in songs_frame.columns:
+            targets_array = songs_frame['view_count'].fillna(0).to_numpy()
+        else:
+            targets_array = np.zeros(len(songs_frame), dtype=np.int64)
+        return block, targets_array, columns
+
+    def _assemble_training_data(self, block: pd.DataFrame, targets: np.ndarray,
+                                target_datetime: datetime.datetime) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """静的特徴のブロックに対象日時の時間的特徴を加えて訓練データを組み立て"""
+        days = block[RELEASE_DAY_COLUMN].to_numpy(dtype=np.float64)
+        release_days = np.full(len(days), np.datetime64('NaT'), dtype='datetime64[D]')
+        known = ~np.isnan(days)
+        release_days[known] = days[known].astype(np.int64).astype('datetime64[D]')
+
+        static = block[STATIC_COLUMNS].to_numpy(dtype=np.float32)
+        matrix = self.columnar_builder.assemble(static, release_days, target_datetime)
+        feature_names = self.columnar_builder.feature_names
+        return pd.DataFrame(matrix, columns=feature_names, copy=False), targets, feature_names
+
     def _calculate_artist_stats(self, songs_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
         """アーティストごとの統計を計算
 
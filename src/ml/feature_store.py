@@ -0,0 +1,241 @@
+"""
+曲ごとの静的特徴量ストア
+投稿日時に依存しない特徴（コンテンツ・エンゲージメント・アーティスト統計・タグ）を
+曲IDとデータバージョンをキーに保存し、訓練とスケジューリングの間・実行間で再利用する
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .training_cache import FEATURE_SCHEMA_VERSION
+
+# 既定の保存先
+DEFAULT_STORE_DIR = 'feature_store'
+
+
+def song_ids(frame: pd.DataFrame) -> List[str]:
+    """曲IDのリスト（video_id、なければ曲名）
+
+    同じIDが複数回現れる場合は2回目以降に '#2', '#3', ... を付けて区別する。
+    """
+    ids = pd.Series([''] * len(frame), index=frame.index, dtype=object)
+    if 'song_name' in frame.columns:
+        ids = frame['song_name'].fillna('').astype(str)
+    if 'video_id' in frame.columns:
+        video_ids = frame['video_id'].fillna('').astype(str)
+        ids = video_ids.where(video_ids != '', ids)
+
+    if not ids.duplicated().any():
+        return ids.tolist()
+    occurrence = ids.groupby(ids, sort=False).cumcount()
+    suffixed = ids + '#' + (occurrence + 1).astype(str)
+    return ids.where(occurrence == 0, suffixed).tolist()
+
+
+def data_version(frame: pd.DataFrame, *arrays: Sequence, extra: str = '') -> str:
+    """特徴量の入力データからデータバージョン（ハッシュ）を計算
+
+    アーティスト統計は曲リスト全体から計算されるため、行の並びも含めてハッシュする。
+
+    Args:
+        frame: 曲データの列（songs_to_frame の戻り値）
+        arrays: 追加の入力列（TaikoGameデータの tags / difficulty など）
+        extra: バージョンに含める追加情報（列名など）
+
+    Returns:
+        データバージョン文字列
+    """
+    digest = hashlib.sha1()
+    digest.update(f"schema={FEATURE_SCHEMA_VERSION};rows={len(frame)};{extra}".encode('utf-8'))
+    columns = [(name, frame[name]) for name in sorted(frame.columns)]
+    columns += [(f"#{i}", pd.Series(values, dtype=object)) for i, values in enumerate(arrays)]
+    for name, values in columns:
+        digest.update(f"{name}:{values.dtype};".encode('utf-8'))
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+        else:
+            # 文字列は区切り文字で連結してまとめてハッシュする（行ごとのハッシュより速い）
+            digest.update('\x1f'.join(map(str, values.tolist())).encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """データバージョンごとの静的特徴量ストア
+
+    ディレクトリ構成:
+        <version>/features.npy  特徴量行列（float32, C順）
+        <version>/keys.json     行ごとの曲ID
+        <version>/schema.json   カラム名・行数
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, max_versions: int = 8):
+        """
+        Args:
+            store_dir: 保存先ディレクトリ
+            max_versions: 保持するデータバージョン数（古いものから削除）
+        """
+        self.store_dir = store_dir
+        self.max_versions = max_versions
+        # バージョン -> (行列, 曲IDのリスト, 曲ID -> 行番号, カラム名)
+        self._loaded: Dict[str, Tuple[np.ndarray, List[str], Dict[str, int], List[str]]] = {}
+
+    def _version_dir(self, version: str) -> str:
+        return os.path.join(self.store_dir, version)
+
+    def versions(self) -> List[str]:
+        """保存済みのデータバージョン（新しい順）"""
+        if not os.path.isdir(self.store_dir):
+            return []
+        versions = [name for name in os.listdir(self.store_dir)
+                    if os.path.exists(os.path.join(self.store_dir, name, 'schema.json'))]
+        return sorted(versions, key=lambda name: os.path.getmtime(self._version_dir(name)), reverse=True)
+
+    def _load(self, version: str) -> Optional[Tuple[np.ndarray, List[str], Dict[str, int], List[str]]]:
+        """バージョンを読み込み（メモリマップ、プロセス内で再利用）"""
+        if version in self._loaded:
+            return self._loaded[version]
+
+        version_dir = self._version_dir(version)
+        try:
+            with open(os.path.join(version_dir, 'schema.json'), 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+            with open(os.path.join(version_dir, 'keys.json'), 'r', encoding='utf-8') as f:
+                keys = json.load(f)
+            matrix = np.load(os.path.join(version_dir, 'features.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        columns = schema['columns']
+        if matrix.shape != (schema['n_rows'], len(columns)) or len(keys) != schema['n_rows']:
+            return None
+
+        loaded = (matrix, keys, {key: row for row, key in enumerate(keys)}, columns)
+        self._loaded[version] = loaded
+        return loaded
+
+    def get(self, version: str, key: str, columns: Optional[List[str]] = None) -> Optional[np.ndarray]:
+        """1曲の特徴量ベクトルを取得
+
+        Args:
+            version: データバージョン
+            key: 曲ID
+            columns: 期待するカラム名（一致しない場合は None）
+
+        Returns:
+            特徴量ベクトル。存在しない場合は None
+        """
+        loaded = self._load(version)
+        if loaded is None or (columns is not None and loaded[3] != list(columns)):
+            return None
+        row = loaded[2].get(key)
+        return None if row is None else np.array(loaded[0][row])
+
+    def read(self, version: str, keys: Sequence[str],
+             columns: Optional[List[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """複数曲の特徴量をまとめて取得
+
+        Args:
+            version: データバージョン
+            keys: 曲IDのリスト
+            columns: 期待するカラム名（一致しない場合はすべて未取得扱い）
+
+        Returns:
+            (特徴量行列 [曲数 x カラム数]（未取得の行は0）, 取得できたかのブール配列)
+        """
+        loaded = self._load(version)
+        n_columns = len(columns) if columns is not None else (len(loaded[3]) if loaded else 0)
+        found = np.zeros(len(keys), dtype=bool)
+        if loaded is None or (columns is not None and loaded[3] != list(columns)):
+            return np.zeros((len(keys), n_columns), dtype=np.float32), found
+
+        stored, stored_keys, index, _ = loaded
+        if list(keys) == stored_keys:
+            # 保存時と同じ曲リスト（よくあるケース）は行列をそのまま複製する
+            return np.array(stored), np.ones(len(keys), dtype=bool)
+
+        matrix = np.zeros((len(keys), n_columns), dtype=np.float32)
+        rows = np.array([index.get(key, -1) for key in keys], dtype=np.int64)
+        found = rows >= 0
+        matrix[found] = stored[rows[found]]
+        return matrix, found
+
+    def write(self, version: str, keys: Sequence[str], matrix: np.ndarray, columns: List[str]):
+        """特徴量を保存（同じバージョンの既存の行には追記・上書き）
+
+        Args:
+            version: データバージョン
+            keys: 曲IDのリスト
+            matrix: 特徴量行列 [曲数 x カラム数]
+            columns: カラム名
+        """
+        keys = list(keys)
+        matrix = np.asarray(matrix, dtype=np.float32)
+
+        existing = self._load(version)
+        if existing is not None and existing[3] == list(columns):
+            new_keys = set(keys)
+            kept = [key for key in existing[1] if key not in new_keys]
+            if kept:
+                matrix = np.vstack([existing[0][[existing[2][key] for key in kept]], matrix])
+                keys = kept + keys
+        # 置換する前にメモリマップへの参照を外す
+        existing = None
+        self._loaded.pop(version, None)
+
+        version_dir = self._version_dir(version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        matrix = np.ascontiguousarray(matrix)
+        path = os.path.join(version_dir, 'features.npy')
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, matrix)
+        os.replace(path + '.tmp', path)
+
+        for name, payload in (('keys.json', keys),
+                              ('schema.json', {'columns': list(columns), 'dtype': 'float32',
+                                               'n_rows': int(matrix.shape[0])})):
+            path = os.path.join(version_dir, name)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False)
+            # スキーマは最後に置換し、行列・IDが揃ってから有効になるようにする
+            os.replace(path + '.tmp', path)
+
+        os.utime(version_dir)
+        self.prune()
+
+    def get_or_compute(self, version: str, keys: Sequence[str], columns: List[str],
+                       compute_fn: Callable[[], np.ndarray]) -> np.ndarray:
+        """すべての曲が保存済みなら読み込み、そうでなければ計算して保存
+
+        Args:
+            version: データバージョン
+            keys: 曲IDのリスト
+            columns: カラム名
+            compute_fn: 特徴量行列 [曲数 x カラム数] を返す関数
+
+        Returns:
+            float32の特徴量行列
+        """
+        matrix, found = self.read(version, keys, columns)
+        if found.all():
+            return matrix
+
+        matrix = np.asarray(compute_fn(), dtype=np.float32)
+        try:
+            self.write(version, keys, matrix, columns)
+        except OSError as e:
+            print(f"⚠ 特徴量ストアへの保存に失敗: {e}")
+        return matrix
+
+    def prune(self, keep: Optional[int] = None):
+        """古いデータバージョンを削除（新しい順に keep 個を残す）"""
+        keep = self.max_versions if keep is None else keep
+        for version in self.versions()[keep:]:
+            self._loaded.pop(version, None)
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
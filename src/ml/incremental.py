@@ -0,0 +1,217 @@
+"""
+視聴数予測モデルの逐次更新
+訓練データ（rankings.json の総合ランキング）で増えた（または視聴数が変わった）行だけで
+登録済みのモデルを更新し、新しいバージョンとしてモデルレジストリに登録する
+
+曲データ・特徴量の作り方・TaikoGameデータは訓練（src.actions.ml_rl_schedule_optimization）と同じ。
+どの行を学習済みかは台帳（曲ID -> 視聴数）に記録する。
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils.song_index import SongNameIndex
+from .feature_store import song_ids
+from .model_registry import INCREMENTAL_PREFIX, ModelRegistry
+
+# 台帳のファイル名（レジストリのディレクトリ内）
+LEDGER_FILE = 'incremental_ledger.json'
+
+# 訓練（src.actions.ml_rl_schedule_optimization）と同じ曲データ・TaikoGameデータ
+DEFAULT_RANKINGS_PATH = 'rankings.json'
+DEFAULT_TAIKO_PATH = 'filtered data/taiko_server_未投稿_filtered.csv'
+
+
+def ranking_songs(rankings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """rankings.json の総合ランキングを訓練用の曲データに変換
+
+    Args:
+        rankings: rankings.json の内容
+
+    Returns:
+        曲データのリスト（総合ランキングがない場合は空）
+    """
+    songs = []
+    for item in rankings.get('overall', []):
+        metrics = item['metrics']
+        songs.append({
+            'song_name': item['song_name'],
+            'artist_name': item.get('artist_name', ''),
+            'video_id': item['video_id'],
+            'release_date': item.get('release_date', ''),
+            'view_count': metrics['view_count'],
+            'like_count': metrics['like_count'],
+            'comment_count': metrics['comment_count'],
+            'support_rate': metrics['support_rate'],
+            'growth_rate': metrics['growth_rate'],
+            'days_since_published': metrics['days_since_published'],
+        })
+    return songs
+
+
+def load_training_songs(path: str = DEFAULT_RANKINGS_PATH) -> Optional[List[Dict[str, Any]]]:
+    """訓練と同じ曲データを読み込み（ファイル・総合ランキングがない場合は None）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            rankings = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if 'overall' not in rankings:
+        return None
+    return ranking_songs(rankings)
+
+
+class IncrementalUpdater:
+    """新しいラベル付きデータで現在のモデルを更新する"""
+
+    def __init__(self, registry: Optional[ModelRegistry] = None, engineer=None,
+                 epochs: int = 5, extra_estimators: int = 20,
+                 taiko_path: Optional[str] = DEFAULT_TAIKO_PATH):
+        """
+        Args:
+            registry: モデルレジストリ
+            engineer: 特徴量エンジニア（省略時は訓練と同じく静的特徴量ストア付きの FeatureEngineer）
+            epochs: 追加学習のエポック数（keras）
+            extra_estimators: 追加する木の数（hgb / gbr）
+            taiko_path: update() で taiko_data_map を省略した場合に読み込むTaikoGameデータのCSV
+        """
+        self.registry = registry or ModelRegistry()
+        self._engineer = engineer
+        self.epochs = epochs
+        self.extra_estimators = extra_estimators
+        self.ledger_path = os.path.join(self.registry.root, LEDGER_FILE)
+        self.taiko_path = taiko_path
+
+    @property
+    def engineer(self):
+        if self._engineer is None:
+            from .feature_engineering import FeatureEngineer
+            from .feature_store import FeatureStore
+            self._engineer = FeatureEngineer(feature_store=FeatureStore())
+        return self._engineer
+
+    def load_taiko_map(self):
+        """訓練時と同じTaikoGameデータの索引（CSVがなければ空の辞書）"""
+        if not self.taiko_path or not os.path.exists(self.taiko_path):
+            return {}
+        return SongNameIndex.from_csv(self.taiko_path)
+
+    def _load_ledger(self) -> Dict[str, float]:
+        try:
+            with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_ledger(self, ledger: Dict[str, float]):
+        os.makedirs(os.path.dirname(self.ledger_path) or '.', exist_ok=True)
+        with open(self.ledger_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(ledger, f, ensure_ascii=False)
+        os.replace(self.ledger_path + '.tmp', self.ledger_path)
+
+    @staticmethod
+    def _keys_and_views(songs: Sequence[Dict[str, Any]]):
+        frame = pd.DataFrame(list(songs))
+        views = pd.to_numeric(frame.get('view_count', pd.Series(0, index=frame.index)),
+                              errors='coerce').fillna(0).astype(float)
+        return song_ids(frame), views.to_numpy()
+
+    def mark_seen(self, songs: Sequence[Dict[str, Any]]):
+        """曲データを学習済みとして台帳に記録（全件で訓練した後に呼ぶ）"""
+        keys, views = self._keys_and_views(songs)
+        ledger = self._load_ledger()
+        ledger.update(zip(keys, views.tolist()))
+        self._save_ledger(ledger)
+
+    def pending_mask(self, songs: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """未学習の行（台帳にない、または視聴数が変わった行）のブール配列"""
+        if not songs:
+            return np.zeros(0, dtype=bool)
+        keys, views = self._keys_and_views(songs)
+        ledger = self._load_ledger()
+        return np.array([ledger.get(key) != value for key, value in zip(keys, views.tolist())], dtype=bool)
+
+    def update(self, songs: Sequence[Dict[str, Any]], taiko_data_map: Optional[Dict] = None,
+               target_datetime: Optional[datetime.datetime] = None, verbose: int = 1) -> Optional[str]:
+        """未学習の行で現在のモデルを更新して登録
+
+        アーティスト統計などは曲リスト全体から計算するため、特徴量は全件で作り、
+        未学習の行だけを更新に使う。
+
+        Args:
+            songs: 最新のラベル付き曲データ（全件。訓練と同じ load_training_songs の形式）
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング（省略時は taiko_path から読み込む。
+                訓練時と異なるとタグ・難易度の特徴量がずれる）
+            target_datetime: 特徴量の対象日時
+            verbose: 詳細度
+
+        Returns:
+            新しいモデルID（登録済みのモデルがない・未学習の行がない場合は None）
+        """
+        parent = self.registry.current()
+        if parent is None:
+            if verbose:
+                print("⏭ 登録済みのモデルがないため、逐次更新をスキップします")
+            return None
+
+        songs = list(songs)
+        pending = self.pending_mask(songs)
+        if not pending.any():
+            if verbose:
+                print("⏭ 新しい訓練データがないため、モデルは更新しません")
+            return None
+
+        if taiko_data_map is None:
+            taiko_data_map = self.load_taiko_map()
+        X, y, _ = self.engineer.prepare_training_data(songs, taiko_data_map, target_datetime)
+        predictor = self.registry.load(parent, prefer_numpy=False)
+        update = predictor.partial_fit(X[pending], y[pending], epochs=self.epochs,
+                                       extra_estimators=self.extra_estimators, verbose=verbose)
+
+        keys, views = self._keys_and_views(songs)
+        digest = hashlib.sha1(parent.encode('utf-8'))
+        for key, value in zip(np.asarray(keys, dtype=object)[pending], views[pending]):
+            digest.update(f"{key}:{value};".encode('utf-8'))
+        fingerprint = f"{INCREMENTAL_PREFIX}{digest.hexdigest()[:16]}"
+
+        metrics = dict(predictor.history or {}, incremental=update)
+        model_id = self.registry.register(predictor, fingerprint, metrics=metrics, parent=parent)
+        self.mark_seen(songs)
+        if verbose:
+            print(f"✓ {int(pending.sum())}件でモデルを更新: {parent} → {model_id}")
+        return model_id
+
+
+def update_registered_model(songs: Optional[Sequence[Dict[str, Any]]] = None,
+                            rankings_path: str = DEFAULT_RANKINGS_PATH, verbose: int = 1) -> Optional[str]:
+    """訓練と同じ曲データで登録済みのモデルを逐次更新（取り込みスクリプトから呼ぶ）
+
+    アナリティクスを統合した ML_training_data などは、訓練データと特徴量の入力（アーティスト統計・
+    アナリティクス列）が異なるため使わない。
+
+    Args:
+        songs: 曲データ（省略時は rankings_path から load_training_songs で読み込む）
+        rankings_path: 訓練に使う rankings.json のパス
+        verbose: 詳細度
+
+    Returns:
+        新しいモデルID（更新しなかった場合は None）
+    """
+    if songs is None:
+        songs = load_training_songs(rankings_path)
+        if songs is None:
+            if verbose:
+                print(f"⏭ {rankings_path} の総合ランキングがないため、逐次更新をスキップします")
+            return None
+    updater = IncrementalUpdater()
+    try:
+        return updater.update(songs, verbose=verbose)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"⚠ モデルの逐次更新に失敗: {e}")
+        return None
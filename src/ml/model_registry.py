@@ -0,0 +1,325 @@
+"""
+視聴数予測モデルのレジストリ
+訓練済みモデルを成果物の内容ハッシュ（モデルID）で保存し、訓練データのフィンガープリント・
+特徴量スキーマ・評価指標を記録する。同じデータで訓練済みのモデルがあれば再訓練せずに読み込む。
+
+ディレクトリ構成:
+    objects/<モデルID>/   モデル・スケーラー・スキーマ・manifest.json（作成後は変更しない）
+    refs/current          現在のモデルIDを指すポインタ
+    refs/data-<フィンガープリント>  そのデータで訓練したモデルID
+
+ポインタは一時ファイルからの os.replace で置き換えるため、訓練中のプロセスが書き込んでいる間も
+他のスケジューラは常に完成済みのモデルを読める。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .training_cache import FEATURE_SCHEMA_VERSION
+
+# 既定の保存先
+DEFAULT_REGISTRY_DIR = 'models/registry'
+
+# objects/<モデルID>/ 内のファイル名
+MODEL_FILE = 'view_predictor.pkl'
+SCALER_FILE = 'view_scaler.pkl'
+SCHEMA_FILE = 'view_schema.json'
+MANIFEST_FILE = 'manifest.json'
+
+CURRENT = 'current'
+
+# 逐次更新（src.ml.incremental）で登録したモデルのフィンガープリントの接頭辞
+INCREMENTAL_PREFIX = 'update-'
+
+
+def training_data_fingerprint(songs: Sequence[Dict[str, Any]], *source_paths: str,
+                              config: Optional[Dict[str, Any]] = None,
+                              feature_names: Optional[Sequence[str]] = None,
+                              data_key: Optional[str] = None) -> str:
+    """訓練データのフィンガープリントを計算
+
+    曲データの内容と、特徴量の追加ソース（TaikoGameデータなど）のサイズ・更新時刻、
+    特徴量スキーマのバージョン、訓練設定から計算する。
+    特徴量行列は投稿日時（現在時刻）の列を含み実行のたびに変わるため使わず、曲データ以外から
+    作る特徴量（チャンネル履歴・タグ語彙など）の変化は data_key で渡す。
+
+    Args:
+        songs: 訓練に使う曲データ
+        source_paths: 特徴量の追加ソースのパス
+        config: 訓練設定（バックエンド・入力次元・パラメータなど）
+        feature_names: 特徴量名のリスト
+        data_key: 対象日時に依存しない特徴量の入力のキー（FeatureEngineer.training_data_key）
+
+    Returns:
+        フィンガープリント文字列
+    """
+    digest = hashlib.sha1()
+    digest.update(f"schema={FEATURE_SCHEMA_VERSION};".encode('utf-8'))
+    digest.update(json.dumps(config or {}, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(json.dumps(list(songs), sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    if feature_names is not None:
+        digest.update(json.dumps(list(feature_names), ensure_ascii=False).encode('utf-8'))
+    if data_key is not None:
+        digest.update(f"data={data_key};".encode('utf-8'))
+    for path in source_paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+        except OSError:
+            digest.update(f"{os.path.abspath(path)}:missing;".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _content_hash(directory: str) -> str:
+    """ディレクトリ内のファイル（manifest.json を除く）の内容ハッシュ"""
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name == MANIFEST_FILE:
+            continue
+        digest.update(f"{name}\0".encode('utf-8'))
+        with open(os.path.join(directory, name), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _json_safe(value: Any) -> Any:
+    """評価指標をJSONに書ける値に変換（リストの履歴は最後の値のみ）"""
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return _json_safe(value[-1]) if value else None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+
+
+class ModelRegistry:
+    """内容アドレス型のモデルレジストリ"""
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR):
+        """
+        Args:
+            root: レジストリのディレクトリ
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.refs_dir = os.path.join(root, 'refs')
+
+    def _object_dir(self, model_id: str) -> str:
+        return os.path.join(self.objects_dir, model_id)
+
+    def _ref_path(self, name: str) -> str:
+        return os.path.join(self.refs_dir, name)
+
+    def resolve(self, name: str = CURRENT) -> Optional[str]:
+        """ポインタ -> モデルID（存在しない場合は None）"""
+        try:
+            with open(self._ref_path(name), 'r', encoding='utf-8') as f:
+                model_id = f.read().strip()
+        except OSError:
+            return None
+        return model_id if model_id and os.path.isdir(self._object_dir(model_id)) else None
+
+    def current(self) -> Optional[str]:
+        """現在のモデルID"""
+        return self.resolve(CURRENT)
+
+    def find(self, fingerprint: str) -> Optional[str]:
+        """訓練データのフィンガープリント -> そのデータで訓練したモデルID"""
+        return self.resolve(f"data-{fingerprint}")
+
+    def incremental_head(self, model_id: str) -> str:
+        """現在のモデルが model_id を逐次更新したモデルならその ID、そうでなければ model_id
+
+        逐次更新は元のモデルと同じ訓練データに新しい行を足したものなので、元のデータの
+        フィンガープリントで見つかった場合も、更新後のモデルを使い続ける。
+        """
+        head = self.current()
+        seen = set()
+        candidate = head
+        while candidate is not None and candidate not in seen:
+            if candidate == model_id:
+                return head
+            seen.add(candidate)
+            try:
+                manifest = self.manifest(candidate)
+            except (OSError, ValueError):
+                break
+            if not str(manifest.get('fingerprint', '')).startswith(INCREMENTAL_PREFIX):
+                break
+            candidate = manifest.get('parent')
+        return model_id
+
+    def set_ref(self, name: str, model_id: str):
+        """ポインタを原子的に更新"""
+        os.makedirs(self.refs_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.refs_dir, prefix=f".{name}.")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(model_id)
+        os.replace(tmp_path, self._ref_path(name))
+
+    def set_current(self, model_id: str):
+        """現在のモデルを切り替え"""
+        if not os.path.isdir(self._object_dir(model_id)):
+            raise KeyError(f"モデルが見つかりません: {model_id}")
+        self.set_ref(CURRENT, model_id)
+
+    def manifest(self, model_id: str) -> Dict[str, Any]:
+        """モデルのマニフェスト（フィンガープリント・スキーマ・評価指標など）"""
+        with open(os.path.join(self._object_dir(model_id), MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def models(self) -> List[str]:
+        """登録済みのモデルID（新しい順）"""
+        if not os.path.isdir(self.objects_dir):
+            return []
+        model_ids = [name for name in os.listdir(self.objects_dir)
+                     if os.path.exists(os.path.join(self._object_dir(name), MANIFEST_FILE))]
+        return sorted(model_ids, key=lambda model_id: os.stat(self._object_dir(model_id)).st_mtime_ns,
+                      reverse=True)
+
+    def register(self, predictor, fingerprint: str, metrics: Optional[Dict[str, Any]] = None,
+                 set_current: bool = True, parent: Optional[str] = None) -> str:
+        """訓練済みモデルを登録
+
+        Args:
+            predictor: 訓練済みのViewCountPredictor
+            fingerprint: 訓練データのフィンガープリント
+            metrics: 評価指標（省略時は predictor.history）
+            set_current: 現在のモデルに切り替えるか
+            parent: 更新元のモデルID（逐次更新・継続訓練の場合）
+
+        Returns:
+            モデルID
+        """
+        os.makedirs(self.objects_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.objects_dir, prefix='.staging-')
+        try:
+            predictor.save(model_path=os.path.join(staging, MODEL_FILE),
+                           scaler_path=os.path.join(staging, SCALER_FILE),
+                           schema_path=os.path.join(staging, SCHEMA_FILE))
+            model_id = _content_hash(staging)
+
+            manifest = {
+                'model_id': model_id,
+                'fingerprint': fingerprint,
+                'parent': parent,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'backend': predictor.backend,
+                'model_type': type(predictor.model).__name__,
+                'feature_names': predictor.feature_names,
+                'feature_dtype': predictor.feature_dtype,
+                'metrics': _json_safe(predictor.history if metrics is None else metrics) or {},
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+            target = self._object_dir(model_id)
+            if not os.path.isdir(target):
+                try:
+                    # ディレクトリごと原子的に公開する
+                    os.rename(staging, target)
+                except OSError:
+                    # 同じ内容を別プロセスが先に公開した
+                    if not os.path.isdir(target):
+                        raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        predictor.model_id = model_id
+        self.set_ref(f"data-{fingerprint}", model_id)
+        if set_current:
+            self.set_ref(CURRENT, model_id)
+        return model_id
+
+    def load(self, model_id: Optional[str] = None, prefer_numpy: bool = True):
+        """モデルを読み込み
+
+        Args:
+            model_id: モデルID（省略時は現在のモデル）
+            prefer_numpy: NumPyランタイムがあれば優先する（継続訓練に使う場合は False）
+
+        Returns:
+            ViewCountPredictor
+        """
+        from .scheduler import ViewCountPredictor
+
+        model_id = model_id or self.current()
+        if model_id is None:
+            raise FileNotFoundError(f"登録済みのモデルがありません: {self.root}")
+        object_dir = self._object_dir(model_id)
+        manifest = self.manifest(model_id)
+
+        predictor = ViewCountPredictor(input_dim=len(manifest.get('feature_names') or []) or 40,
+                                       backend=manifest.get('backend', 'auto'))
+        predictor.load(model_path=os.path.join(object_dir, MODEL_FILE),
+                       scaler_path=os.path.join(object_dir, SCALER_FILE),
+                       schema_path=os.path.join(object_dir, SCHEMA_FILE),
+                       prefer_numpy=prefer_numpy)
+        predictor.history = manifest.get('metrics')
+        predictor.model_id = model_id
+        return predictor
+
+    def get_or_train(self, fingerprint: str, predictor, X, y, warm_start: bool = False,
+                     verbose: int = 1, **train_params):
+        """同じデータで訓練済みのモデルがあれば読み込み、なければ訓練して登録
+
+        Args:
+            fingerprint: 訓練データのフィンガープリント
+            predictor: 未訓練のViewCountPredictor（バックエンド・パラメータを指定したもの）
+            X: 特徴量
+            y: ターゲット（視聴数）
+            warm_start: 現在のモデルから訓練を継続するか（対応するバックエンドのみ）。
+                既定では訓練データが変わるたびに新規に訓練する
+            verbose: 詳細度
+            train_params: ViewCountPredictor.train に渡す引数
+
+        Returns:
+            (ViewCountPredictor, モデルID, 訓練したか)
+        """
+        model_id = self.find(fingerprint)
+        if model_id is not None:
+            model_id = self.incremental_head(model_id)
+            if verbose:
+                print(f"✓ 訓練データが前回と同じため、登録済みのモデルを使用します: {model_id}")
+            self.set_ref(CURRENT, model_id)
+            return self.load(model_id), model_id, False
+
+        previous_id = self.current() if warm_start else None
+        predictor_warm = False
+        if previous_id is not None:
+            try:
+                predictor_warm = predictor.warm_start_from(self.load(previous_id, prefer_numpy=False))
+                if predictor_warm and verbose:
+                    print(f"前回のモデル {previous_id} から訓練を継続します")
+            except (OSError, ValueError, ImportError) as e:
+                print(f"⚠ 前回のモデルを読み込めません（新規に訓練します）: {e}")
+
+        predictor.train(X, y, verbose=verbose, **train_params)
+        model_id = self.register(predictor, fingerprint, parent=previous_id if predictor_warm else None)
+        if verbose:
+            print(f"モデルを登録: {model_id}")
+        return predictor, model_id, True
+
+    def prune(self, keep: int = 5):
+        """古いモデルを削除（新しい順に keep 個と、現在のモデルを残す）"""
+        current = self.current()
+        removed = set()
+        for model_id in self.models()[keep:]:
+            if model_id != current:
+                shutil.rmtree(self._object_dir(model_id), ignore_errors=True)
+                removed.add(model_id)
+        if not removed or not os.path.isdir(self.refs_dir):
+            return
+        # 削除したモデルを指すポインタも削除
+        for name in os.listdir(self.refs_dir):
+            if name.startswith('data-') and self.resolve(name) is None:
+                os.remove(self._ref_path(name))
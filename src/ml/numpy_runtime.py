@@ -0,0 +1,256 @@
+"""
+視聴数予測モデルのNumPy推論ランタイム
+ViewCountPredictor の Keras モデル（128-64-32 のMLP + BatchNorm、views / confidence の2出力）を
+全結合層だけの .npz に書き出し、TensorFlowなしでバッチ推論する
+
+BatchNorm は推論時にはアフィン変換なので、直後の全結合層の重みに畳み込む。
+入力の StandardScaler も同様に最初の全結合層へ畳み込むため、生の特徴量をそのまま渡せる。
+"""
+
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# .npz の形式を変更した場合はこの値を上げる
+FORMAT_VERSION = 1
+
+# 出力ヘッド
+HEADS = ('views', 'confidence')
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # exp のオーバーフローを避けるため符号で分けて計算
+    out = np.empty_like(x)
+    positive = x >= 0
+    out[positive] = 1 / (1 + np.exp(-x[positive]))
+    exp_x = np.exp(x[~positive])
+    out[~positive] = exp_x / (1 + exp_x)
+    return out
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+}
+
+
+def _activation_name(config: Dict[str, Any]) -> str:
+    """Keras の層設定から活性化関数名を取得（文字列・シリアライズ済み辞書の両方に対応）"""
+    activation = config.get('activation', 'linear')
+    if isinstance(activation, dict):
+        activation = activation.get('config', {}).get('name') or activation.get('class_name', 'linear')
+    activation = str(activation).lower()
+    if activation not in ACTIVATIONS:
+        raise ValueError(f"未対応の活性化関数です: {activation}")
+    return activation
+
+
+def keras_layer_specs(model) -> Dict[str, List[Dict[str, Any]]]:
+    """Keras モデルを層の仕様（dense / batch_norm）のリストに変換
+
+    ViewCountPredictor.build_model の構造（'views' より前が共有層、'views' の後から
+    'confidence' までが信頼度の分岐）を前提とする。Dropout は推論時には恒等写像なので省く。
+
+    Args:
+        model: Keras モデル
+
+    Returns:
+        {'trunk': [...], 'views': [...], 'confidence': [...]}
+    """
+    layers = [layer for layer in model.layers if type(layer).__name__ != 'InputLayer']
+    names = [layer.name for layer in layers]
+    if 'views' not in names or 'confidence' not in names:
+        raise ValueError("'views' / 'confidence' 出力層が見つかりません")
+    views_at = names.index('views')
+    confidence_at = names.index('confidence')
+
+    def spec(layer) -> Optional[Dict[str, Any]]:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        weights = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+        if kind == 'Dense':
+            kernel = weights[0]
+            bias = weights[1] if config.get('use_bias', True) else np.zeros(kernel.shape[1])
+            return {'type': 'dense', 'kernel': kernel, 'bias': bias,
+                    'activation': _activation_name(config)}
+        if kind == 'BatchNormalization':
+            weights = list(weights)
+            gamma = weights.pop(0) if config.get('scale', True) else None
+            beta = weights.pop(0) if config.get('center', True) else None
+            mean, variance = weights
+            return {'type': 'batch_norm',
+                    'gamma': np.ones_like(mean) if gamma is None else gamma,
+                    'beta': np.zeros_like(mean) if beta is None else beta,
+                    'mean': mean, 'variance': variance, 'epsilon': float(config.get('epsilon', 1e-3))}
+        if kind == 'Dropout':
+            return None
+        raise ValueError(f"未対応の層です: {kind} ({layer.name})")
+
+    def specs(selected) -> List[Dict[str, Any]]:
+        return [s for s in (spec(layer) for layer in selected) if s is not None]
+
+    return {
+        'trunk': specs(layers[:views_at]),
+        'views': specs([layers[views_at]]),
+        'confidence': specs(layers[views_at + 1:confidence_at + 1]),
+    }
+
+
+def fold_layers(specs: List[Dict[str, Any]],
+                pending: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                ) -> Tuple[List[Tuple[np.ndarray, np.ndarray, str]], Optional[Tuple[np.ndarray, np.ndarray]]]:
+    """BatchNorm（と入力のアフィン変換）を後続の全結合層に畳み込む
+
+    y = x * scale + shift の後の全結合層 (W, b) は、W' = scale[:, None] * W、b' = shift @ W + b になる。
+
+    Args:
+        specs: 層の仕様のリスト（適用順）
+        pending: 最初の全結合層の前に適用するアフィン変換 (scale, shift)
+
+    Returns:
+        (全結合層 (W, b, 活性化関数名) のリスト, 末尾に残ったアフィン変換)
+    """
+    folded = []
+    for spec in specs:
+        if spec['type'] == 'batch_norm':
+            scale = spec['gamma'] / np.sqrt(spec['variance'] + spec['epsilon'])
+            shift = spec['beta'] - spec['mean'] * scale
+            if pending is not None:
+                # 連続するアフィン変換を合成
+                scale, shift = pending[0] * scale, pending[1] * scale + shift
+            pending = (scale, shift)
+        else:
+            kernel, bias = spec['kernel'], spec['bias']
+            if pending is not None:
+                kernel, bias = pending[0][:, None] * kernel, pending[1] @ kernel + bias
+                pending = None
+            folded.append((kernel, bias, spec['activation']))
+    return folded, pending
+
+
+class NumpyMLP:
+    """全結合層だけになったMLPのNumPy推論ランタイム（ViewCountPredictor のモデルとして使う）"""
+
+    def __init__(self, trunk: List[Tuple[np.ndarray, np.ndarray, str]],
+                 heads: Dict[str, List[Tuple[np.ndarray, np.ndarray, str]]],
+                 feature_names: Optional[List[str]] = None, dtype=np.float32):
+        """
+        Args:
+            trunk: 共有層 (W, b, 活性化関数名) のリスト
+            heads: 'views' / 'confidence' -> 分岐の層のリスト
+            feature_names: 訓練時の特徴量名
+            dtype: 推論時の浮動小数点型
+        """
+        self.dtype = np.dtype(dtype)
+        cast = lambda layers: [(np.ascontiguousarray(W, dtype=self.dtype),
+                                np.ascontiguousarray(b, dtype=self.dtype), act) for W, b, act in layers]
+        self.trunk = cast(trunk)
+        self.heads = {name: cast(heads[name]) for name in HEADS}
+        self.feature_names = feature_names
+        self.n_features = self.trunk[0][0].shape[0] if self.trunk else self.heads['views'][0][0].shape[0]
+
+    @classmethod
+    def from_specs(cls, specs: Dict[str, List[Dict[str, Any]]],
+                   scaler_mean: Optional[np.ndarray] = None, scaler_scale: Optional[np.ndarray] = None,
+                   feature_names: Optional[List[str]] = None) -> 'NumpyMLP':
+        """層の仕様から作成（BatchNorm・StandardScaler を畳み込む）
+
+        Args:
+            specs: keras_layer_specs の戻り値
+            scaler_mean: StandardScaler.mean_
+            scaler_scale: StandardScaler.scale_
+            feature_names: 訓練時の特徴量名
+        """
+        pending = None
+        if scaler_mean is not None and scaler_scale is not None:
+            scale = 1 / np.asarray(scaler_scale, dtype=np.float64)
+            pending = (scale, -np.asarray(scaler_mean, dtype=np.float64) * scale)
+
+        trunk, pending = fold_layers(specs['trunk'], pending)
+        heads = {}
+        for name in HEADS:
+            heads[name], rest = fold_layers(specs[name], pending)
+            if rest is not None:
+                raise ValueError(f"{name} の分岐が BatchNormalization で終わっています")
+        return cls(trunk, heads, feature_names)
+
+    @classmethod
+    def from_keras(cls, model, scaler=None, feature_names: Optional[List[str]] = None) -> 'NumpyMLP':
+        """Keras モデル（と StandardScaler）から作成"""
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        return cls.from_specs(keras_layer_specs(model), mean, scale, feature_names)
+
+    def forward(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """バッチの順伝播
+
+        Args:
+            X: 生の特徴量行列 [件数 x 特徴量数]
+
+        Returns:
+            'views'（対数視聴数）/ 'confidence' -> [件数] の配列
+        """
+        h = np.asarray(X, dtype=self.dtype)
+        if h.ndim != 2 or h.shape[1] != self.n_features:
+            raise ValueError(f"特徴量の形状 {h.shape} がモデルの入力次元({self.n_features})と一致しません")
+
+        def run(h, layers):
+            for W, b, activation in layers:
+                h = ACTIVATIONS[activation](h @ W + b)
+            return h
+
+        h = run(h, self.trunk)
+        return {name: run(h, self.heads[name]).ravel() for name in HEADS}
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """視聴数を予測（ViewCountPredictor.predict と同じ戻り値）
+
+        Returns:
+            (予測視聴数, 信頼度スコア)
+        """
+        outputs = self.forward(X)
+        return np.expm1(outputs['views'].astype(np.float64)), outputs['confidence'].astype(np.float64)
+
+    def save(self, path: str):
+        """平坦な .npz として保存（pickle を使わない）"""
+        arrays = {}
+        meta = {'format': FORMAT_VERSION, 'dtype': self.dtype.name, 'feature_names': self.feature_names}
+        for group, layers in [('trunk', self.trunk)] + [(name, self.heads[name]) for name in HEADS]:
+            meta[group] = []
+            for i, (W, b, activation) in enumerate(layers):
+                arrays[f"{group}_{i}_W"] = W
+                arrays[f"{group}_{i}_b"] = b
+                meta[group].append(activation)
+        np.savez(path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyMLP':
+        """save で保存した .npz を読み込み"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != FORMAT_VERSION:
+                raise ValueError(f"未対応の形式です: {path} (format={meta.get('format')})")
+
+            def layers(group):
+                return [(data[f"{group}_{i}_W"], data[f"{group}_{i}_b"], activation)
+                        for i, activation in enumerate(meta[group])]
+
+            return cls(layers('trunk'), {name: layers(name) for name in HEADS},
+                       meta.get('feature_names'), meta.get('dtype', 'float32'))
+
+
+if __name__ == '__main__':
+    # 既存の Keras モデルを変換: python -m src.ml.numpy_runtime [models/view_predictor.pkl]
+    from .scheduler import ViewCountPredictor
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'models/view_predictor.pkl'
+    predictor = ViewCountPredictor()
+    predictor.load(model_path, prefer_numpy=False)
+    predictor.export_numpy_runtime(model_path.replace('.pkl', '.npz'))
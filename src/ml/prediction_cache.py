@@ -0,0 +1,143 @@
+"""
+投稿スロットの視聴数予測キャッシュ
+(モデルのバージョン, 曲, スロット) -> (予測視聴数, 信頼度) をプロセス内で保持し、スケジューラの
+実行をまたいで再利用する（同じモデルで制約だけを変えた What-if 分析や、メニューからの再実行など）。
+
+- モデルのバージョンは登録済みモデルならモデルID（ViewCountPredictor.prediction_version）
+- 曲のキーは曲名と、投稿日時に依存しない特徴（静的特徴・リリース日）の内容
+- スロットのキーは絶対時刻（1970-01-01 からの時間数）。ラティスの開始日が変わっても一致する
+- スロット特徴の定義（チャンネル固有特徴のテーブルなど）のキーもモデルのバージョンに含める
+- 曲ごとに連続した時間範囲の配列で保持し、曲単位の LRU で max_songs 曲まで残す
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# 既定の最大曲数（モデル・曲の組み合わせ）
+DEFAULT_MAX_SONGS = 2000
+
+
+class _SongSlots:
+    """1曲の連続した時間範囲の予測（未予測は NaN）"""
+
+    __slots__ = ('start', 'views', 'confidence')
+
+    def __init__(self):
+        self.start = 0
+        self.views = np.empty(0)
+        self.confidence = np.empty(0)
+
+    def cover(self, low: int, high: int):
+        """[low, high) の時間範囲を含むように配列を広げる"""
+        if len(self.views) == 0:
+            start, stop = low, high
+        else:
+            start, stop = min(self.start, low), max(self.start + len(self.views), high)
+            if start == self.start and stop == self.start + len(self.views):
+                return
+        views = np.full(stop - start, np.nan)
+        confidence = np.full(stop - start, np.nan)
+        offset = self.start - start
+        views[offset:offset + len(self.views)] = self.views
+        confidence[offset:offset + len(self.confidence)] = self.confidence
+        self.start, self.views, self.confidence = start, views, confidence
+
+
+class PredictionCache:
+    """(モデルのバージョン, 曲, スロット) -> (予測視聴数, 信頼度) のキャッシュ"""
+
+    def __init__(self, max_songs: int = DEFAULT_MAX_SONGS):
+        """
+        Args:
+            max_songs: 保持する最大曲数（モデルのバージョンごとに数える）
+        """
+        if max_songs < 1:
+            raise ValueError("max_songs は1以上を指定してください")
+        self.max_songs = max_songs
+        self._songs: 'OrderedDict[Tuple[Hashable, Hashable], _SongSlots]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._songs)
+
+    def clear(self):
+        """全件破棄（統計は残す）"""
+        self._songs.clear()
+
+    def lookup(self, version: Hashable, song: Hashable,
+               slot_hours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """1曲の指定スロットの予測を取得（キャッシュにないスロットは NaN）
+
+        Args:
+            version: モデルのバージョン
+            song: 曲のキー
+            slot_hours: スロットの絶対時刻（1970-01-01 からの時間数）
+
+        Returns:
+            (予測視聴数, 信頼度スコア)
+        """
+        slot_hours = np.asarray(slot_hours, dtype=np.int64)
+        views = np.full(len(slot_hours), np.nan)
+        confidence = np.full(len(slot_hours), np.nan)
+        entry = self._songs.get((version, song))
+        if entry is not None:
+            self._songs.move_to_end((version, song))
+            positions = slot_hours - entry.start
+            inside = (positions >= 0) & (positions < len(entry.views))
+            views[inside] = entry.views[positions[inside]]
+            confidence[inside] = entry.confidence[positions[inside]]
+
+        found = int(np.count_nonzero(~np.isnan(views)))
+        self.hits += found
+        self.misses += len(slot_hours) - found
+        return views, confidence
+
+    def store(self, version: Hashable, song: Hashable, slot_hours: np.ndarray,
+              views: np.ndarray, confidence: np.ndarray):
+        """1曲の指定スロットの予測を保存
+
+        Args:
+            version: モデルのバージョン
+            song: 曲のキー
+            slot_hours: スロットの絶対時刻（1970-01-01 からの時間数）
+            views: 予測視聴数
+            confidence: 信頼度スコア
+        """
+        slot_hours = np.asarray(slot_hours, dtype=np.int64)
+        if not len(slot_hours):
+            return
+        key = (version, song)
+        entry = self._songs.get(key)
+        if entry is None:
+            if len(self._songs) >= self.max_songs:
+                self._songs.popitem(last=False)
+                self.evictions += 1
+            entry = self._songs[key] = _SongSlots()
+        else:
+            self._songs.move_to_end(key)
+
+        entry.cover(int(slot_hours.min()), int(slot_hours.max()) + 1)
+        entry.views[slot_hours - entry.start] = views
+        entry.confidence[slot_hours - entry.start] = confidence
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計（スロット単位）"""
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'songs': len(self), 'max_songs': self.max_songs, 'evictions': self.evictions}
+
+
+_shared_cache: Optional[PredictionCache] = None
+
+
+def get_prediction_cache() -> PredictionCache:
+    """プロセス全体で共有する予測キャッシュ（スケジューラの既定）"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PredictionCache()
+    return _shared_cache
@@ -20,17 +20,41 @@ from typing import Dict, List, Tuple, Any, Optional
 import pandas as pd
 import json
 
+from .prediction_cache import PredictionCache, get_prediction_cache
+from .slot_assignment import SlotAssigner
+from .slot_lattice import SlotFeatureLattice
+from .slot_occupancy import SlotOccupancy
+from ..utils.profiling import traced
+
 
 class ComprehensiveScheduler:
     """包括的スケジューリング最適化"""
 
-    def __init__(self, ml_predictor=None):
+    def __init__(self, ml_predictor=None, feature_engineer=None,
+                 prediction_cache: Optional[PredictionCache] = None):
         """
         Args:
             ml_predictor: ML視聴数予測モデル（src.ml.scheduler.ViewCountPredictor）
+            feature_engineer: 予測モデルの訓練に使った FeatureEngineer（省略時は新規作成）
+            prediction_cache: 実行をまたいで共有する予測キャッシュ（省略時はプロセス共有のキャッシュ）
         """
         self.ml_predictor = ml_predictor
+        self.feature_engineer = feature_engineer
+        self.prediction_cache = prediction_cache if prediction_cache is not None else get_prediction_cache()
         self.today = datetime.datetime.now().date()
+        self.slot_lattice: Optional[SlotFeatureLattice] = None
+        self._slot_views: Dict[int, np.ndarray] = {}  # 曲番号 -> スロットごとの予測視聴数（未予測はNaN）
+
+    def _get_slot_lattice(self, max_days_ahead: int = 90) -> SlotFeatureLattice:
+        """スケジューリング期間のスロット特徴量ラティスを取得（初回のみ構築）"""
+        if self.slot_lattice is None:
+            if self.feature_engineer is None:
+                from .feature_engineering import FeatureEngineer
+                self.feature_engineer = FeatureEngineer()
+            self.slot_lattice = SlotFeatureLattice(
+                self.feature_engineer.columnar_builder, self.today, days=max_days_ahead
+            )
+        return self.slot_lattice
 
     def optimize_schedule(self, songs_data: List[Dict[str, Any]],
                          optimization_mode: str = 'comprehensive',
@@ -44,7 +68,9 @@ class ComprehensiveScheduler:
                 - 'virality': バイラリティ最大化のみ
                 - 'order': 公開順序最適化のみ
                 - 'interval': 投稿間隔最適化のみ
-                - 'comprehensive': 総合最適化（デフォルト）
+                - 'comprehensive': 総合最適化（デフォルト）。ML予測がある場合は全曲のスロットを
+                  制約付きの割当問題として一括で決める（ない場合は 'greedy' と同じ）
+                - 'greedy': 優先順に1曲ずつ最適な日時を選び、その後で投稿間隔を調整する
             constraints: 制約条件
             verbose: 進捗表示
 
@@ -63,6 +89,20 @@ class ComprehensiveScheduler:
             print(f"制約条件: {json.dumps(constraints, indent=2, ensure_ascii=False)}")
             print()
 
+        # スロット特徴量ラティスを構築し、全曲 × 期間内の候補スロットを一括で予測
+        if self.ml_predictor:
+            max_days_ahead = constraints.get('max_days_ahead', 90)
+            lattice = self._get_slot_lattice(max_days_ahead)
+            song_indices = lattice.add_songs(songs_data)
+            # 一括割り当てでは曲ごとの探索期間だけを予測する
+            if optimization_mode != 'comprehensive':
+                candidate_dates = [
+                    self.today + datetime.timedelta(days=offset) for offset in range(max_days_ahead)
+                    if self._is_allowed_day_of_week(self.today + datetime.timedelta(days=offset), constraints)
+                ]
+                slots = lattice.slot_grid(candidate_dates, self._get_candidate_hours(constraints))
+                self._score_songs(song_indices, slots.ravel())
+
         # ステップ1: 曲を分類
         categorized_songs = self._categorize_songs_by_release_date(songs_data)
 
@@ -80,8 +120,13 @@ class ComprehensiveScheduler:
         else:
             prioritized_songs = songs_data
 
+        # ステップ3-4: 全曲の投稿スロットを制約付きで一括最適化
+        if optimization_mode == 'comprehensive' and self.ml_predictor:
+            final_schedule = self._assign_slots_globally(prioritized_songs, constraints, verbose=verbose)
+            return self._finish_schedule(final_schedule, constraints, verbose=verbose)
+
         # ステップ3: 時間帯最適化（バイラリティ最大化）
-        if optimization_mode in ['virality', 'comprehensive']:
+        if optimization_mode in ['virality', 'comprehensive', 'greedy']:
             optimized_schedule = self._optimize_posting_times(
                 prioritized_songs,
                 categorized_songs,
@@ -92,7 +137,7 @@ class ComprehensiveScheduler:
             optimized_schedule = prioritized_songs
 
         # ステップ4: 投稿間隔最適化
-        if optimization_mode in ['interval', 'comprehensive']:
+        if optimization_mode in ['interval', 'comprehensive', 'greedy']:
             final_schedule = self._optimize_intervals(
                 optimized_schedule,
                 constraints,
@@ -101,7 +146,12 @@ class ComprehensiveScheduler:
         else:
             final_schedule = optimized_schedule
 
-        # ステップ5: スケジュール検証
+        return self._finish_schedule(final_schedule, constraints, verbose=verbose)
+
+    def _finish_schedule(self, final_schedule: List[Dict[str, Any]],
+                         constraints: Dict[str, Any],
+                         verbose: bool = True) -> List[Dict[str, Any]]:
+        """ステップ5: スケジュールを検証し、サマリーを表示"""
         validated_schedule = self._validate_schedule(final_schedule, constraints, verbose=verbose)
 
         if verbose:
@@ -110,6 +160,10 @@ class ComprehensiveScheduler:
             print("✅ スケジュール最適化完了")
             print("=" * 60)
             self._print_schedule_summary(validated_schedule)
+            cache_stats = self.prediction_cache.stats()
+            if cache_stats['hits'] + cache_stats['misses']:
+                print(f"予測キャッシュ: ヒット率 {cache_stats['hit_rate']:.1%}"
+                      f"（{cache_stats['songs']:,}/{cache_stats['max_songs']:,}曲、このプロセスの累計）")
 
         return validated_schedule
 
@@ -153,6 +207,7 @@ class ComprehensiveScheduler:
             'date_fixed': date_fixed_songs
         }
 
+    @traced('ComprehensiveScheduler._prioritize_songs')
     def _prioritize_songs(self, songs_data: List[Dict[str, Any]], verbose: bool = True) -> List[Dict[str, Any]]:
         """公開順序最適化: どの曲を先に公開すべきかを決定
 
@@ -284,12 +339,25 @@ class ComprehensiveScheduler:
         optimized_songs = []
         current_date = self.today
 
+        # ML予測がある場合は、全曲の 曲 × 日付 × 時 の予測視聴数テンソルから一括で選ぶ
+        fixed_hours: Dict[int, int] = {}
+        free_slots: List[Tuple[datetime.date, int]] = []
+        if self.ml_predictor:
+            fixed_songs = [song for song in songs_data if '_fixed_date' in song]
+            fixed_hours = dict(zip(map(id, fixed_songs),
+                                   self._optimal_hours_on_fixed_dates(fixed_songs, constraints)))
+            free_slots = self._schedule_free_songs(
+                [song for song in songs_data if '_fixed_date' not in song], constraints)
+        free_slots.reverse()
+
         for song in songs_data:
             # release_date制約をチェック
             if '_fixed_date' in song:
                 # 日付固定 → 時間のみ最適化
                 fixed_date = song['_fixed_date']
-                optimal_hour = self._find_optimal_hour(song, fixed_date, constraints)
+                optimal_hour = fixed_hours.get(id(song))
+                if optimal_hour is None:
+                    optimal_hour = self._find_optimal_hour(song, fixed_date, constraints)
                 optimal_datetime = datetime.datetime.combine(fixed_date, datetime.time(hour=optimal_hour))
 
                 song['optimal_posting_datetime'] = optimal_datetime.isoformat()
@@ -297,9 +365,12 @@ class ComprehensiveScheduler:
 
             else:
                 # 完全自由 → ML/RLで日時を決定
-                optimal_date, optimal_hour = self._find_optimal_datetime(
-                    song, current_date, constraints
-                )
+                if free_slots:
+                    optimal_date, optimal_hour = free_slots.pop()
+                else:
+                    optimal_date, optimal_hour = self._find_optimal_datetime(
+                        song, current_date, constraints
+                    )
                 optimal_datetime = datetime.datetime.combine(optimal_date, datetime.time(hour=optimal_hour))
 
                 song['optimal_posting_datetime'] = optimal_datetime.isoformat()
@@ -316,6 +387,7 @@ class ComprehensiveScheduler:
 
         return optimized_songs
 
+    @traced('ComprehensiveScheduler._find_optimal_hour')
     def _find_optimal_hour(self, song: Dict[str, Any],
                           date: datetime.date,
                           constraints: Dict[str, Any]) -> int:
@@ -329,34 +401,19 @@ class ComprehensiveScheduler:
         Returns:
             最適な時（0-23）
         """
-        # ML予測がある場合は、各時間帯でシミュレーション
+        # ML予測がある場合は、各時間帯の予測視聴数を比較
         if self.ml_predictor:
-            best_hour = None
-            best_predicted_views = 0
-
             candidate_hours = self._get_candidate_hours(constraints)
+            predicted_views = self._predict_slot_views(song, [date], candidate_hours)[0]
 
-            for hour in candidate_hours:
-                # 特徴量を生成
-                features = self._create_features_for_prediction(song, date, hour)
-
-                # 視聴数予測
-                try:
-                    predicted_views, confidence = self.ml_predictor.predict(features)
-                    predicted_views = predicted_views[0] if isinstance(predicted_views, np.ndarray) else predicted_views
-
-                    if predicted_views > best_predicted_views:
-                        best_predicted_views = predicted_views
-                        best_hour = hour
-                except:
-                    pass
+            if len(candidate_hours) and predicted_views.max() > 0:
+                return candidate_hours[int(np.argmax(predicted_views))]
 
-            if best_hour is not None:
-                return best_hour
+        return self._fallback_hour(date)
 
-        # フォールバック: ヒューリスティックな最適時間
-        # 統計的に最も効果的な時間帯
-        preferred_hours = constraints.get('preferred_hours', [18, 19, 20, 21])
+    @staticmethod
+    def _fallback_hour(date: datetime.date) -> int:
+        """フォールバック: ヒューリスティックな最適時間（統計的に最も効果的な時間帯）"""
         day_of_week = date.weekday()  # 0=月曜, 6=日曜
 
         if day_of_week >= 5:  # 土日
@@ -366,6 +423,107 @@ class ComprehensiveScheduler:
             # 平日は午後6-7時が最適
             return 18
 
+    @traced('ComprehensiveScheduler._optimal_hours_on_fixed_dates')
+    def _optimal_hours_on_fixed_dates(self, songs: List[Dict[str, Any]],
+                                      constraints: Dict[str, Any]) -> List[int]:
+        """日付固定の曲の最適な時（_find_optimal_hour と同じ結果を、同じ日付の曲ごとに一括で計算）
+
+        Args:
+            songs: 日付固定の曲データ（'_fixed_date' あり）
+            constraints: 制約条件
+
+        Returns:
+            曲ごとの最適な時（0-23）
+        """
+        hours = self._get_candidate_hours(constraints)
+        result = [self._fallback_hour(song['_fixed_date']) for song in songs]
+        if not songs or not hours:
+            return result
+
+        lattice = self._get_slot_lattice()
+        by_date: Dict[datetime.date, List[int]] = {}
+        for i, song in enumerate(songs):
+            by_date.setdefault(song['_fixed_date'], []).append(i)
+
+        for date, members in by_date.items():
+            song_indices = np.array([lattice.song_index(songs[i]) for i in members], dtype=np.int64)
+            views = self._slot_score_tensor(song_indices, [date], hours)[:, 0, :]  # [曲数 x 時の数]
+            best = views.argmax(axis=1)
+            for i, hour_idx, value in zip(members, best, views[np.arange(len(members)), best]):
+                if value > 0:
+                    result[i] = hours[int(hour_idx)]
+        return result
+
+    @traced('ComprehensiveScheduler._schedule_free_songs')
+    def _schedule_free_songs(self, songs: List[Dict[str, Any]], constraints: Dict[str, Any],
+                             batch_songs: int = 4) -> List[Tuple[datetime.date, int]]:
+        """完全自由な曲を優先順に、前の曲の翌日以降で最適な日時に割り当てる
+
+        _find_optimal_datetime を曲ごとに呼ぶのと同じ結果を、曲 × 日付 × 候補時 の予測視聴数
+        テンソルから計算する。日ごとの最良の時を argmax で求めておき、曲ごとには探索期間
+        （開始日から max_days_ahead 日）の日ごとの最良値から、曜日のマスク（許可されていない日は
+        -inf）の下で argmax で日を選ぶ。
+
+        探索期間は前の曲の結果で決まるため、テンソルは必要になった部分だけを計算する。
+        探索期間に未計算の日がある曲に達したら、続く batch_songs 曲ぶんの曲と日数を先読みして
+        1回のバッチで予測する。
+
+        Args:
+            songs: 完全自由な曲データ（優先順位順）
+            constraints: 制約条件
+            batch_songs: 1回のバッチで予測する曲数
+
+        Returns:
+            曲ごとの (最適な日付, 最適な時)
+        """
+        max_days_ahead = constraints.get('max_days_ahead', 90)
+        hours = self._get_candidate_hours(constraints)
+        lattice = self._get_slot_lattice()
+        song_indices = np.array([lattice.song_index(song) for song in songs], dtype=np.int64)
+
+        # 曲 × 今日からの日数 ごとの最良の時・予測値（未計算は NaN、許可されていない曜日は -inf）
+        day_hours = np.zeros((len(songs), 0), dtype=np.int64)
+        day_values = np.empty((len(songs), 0))
+
+        def grow(n_days: int):
+            nonlocal day_hours, day_values
+            old = day_values.shape[1]
+            if n_days <= old:
+                return
+            allowed = np.array([self._is_allowed_day_of_week(self.today + datetime.timedelta(days=day), constraints)
+                                for day in range(old, n_days)])
+            day_values = np.hstack([day_values, np.tile(np.where(allowed, np.nan, -np.inf), (len(songs), 1))])
+            day_hours = np.hstack([day_hours, np.zeros((len(songs), n_days - old), dtype=np.int64)])
+
+        results = []
+        start_date = self.today
+        for i in range(len(songs)):
+            best_date, best_hour = start_date, 18
+            low = (start_date - self.today).days
+            high = low + max_days_ahead
+            if hours and max_days_ahead > 0:
+                grow(high)
+                if np.isnan(day_values[i, low:high]).any():
+                    rows = np.arange(i, min(i + batch_songs, len(songs)))
+                    stop = high + len(rows) - 1
+                    grow(stop)
+                    days = low + np.flatnonzero(np.isnan(day_values[rows, low:stop]).any(axis=0))
+                    dates = [self.today + datetime.timedelta(days=int(day)) for day in days]
+                    views = self._slot_score_tensor(song_indices[rows], dates, hours)
+                    day_hours[np.ix_(rows, days)] = views.argmax(axis=2)
+                    day_values[np.ix_(rows, days)] = views.max(axis=2)
+
+                best = low + int(np.argmax(day_values[i, low:high]))
+                if day_values[i, best] > 0:
+                    best_date = self.today + datetime.timedelta(days=best)
+                    best_hour = hours[int(day_hours[i, best])]
+            results.append((best_date, best_hour))
+
+            # 次の投稿は最低でも翌日以降
+            start_date = best_date + datetime.timedelta(days=1)
+        return results
+
+    @traced('ComprehensiveScheduler._find_optimal_datetime')
     def _find_optimal_datetime(self, song: Dict[str, Any],
                               start_date: datetime.date,
                               constraints: Dict[str, Any]) -> Tuple[datetime.date, int]:
@@ -382,35 +540,213 @@ class ComprehensiveScheduler:
         max_days_ahead = constraints.get('max_days_ahead', 90)
         best_date = start_date
         best_hour = 18
-        best_predicted_views = 0
 
-        # 今後90日間でスキャン
-        for days_offset in range(max_days_ahead):
-            candidate_date = start_date + datetime.timedelta(days=days_offset)
+        if not self.ml_predictor:
+            return best_date, best_hour
+
+        # 今後90日間（曜日制約を満たす日）× 候補時間の予測視聴数を一度に比較
+        candidate_dates = [
+            start_date + datetime.timedelta(days=days_offset)
+            for days_offset in range(max_days_ahead)
+            if self._is_allowed_day_of_week(start_date + datetime.timedelta(days=days_offset), constraints)
+        ]
+        candidate_hours = self._get_candidate_hours(constraints)
+        if not candidate_dates or not candidate_hours:
+            return best_date, best_hour
+
+        predicted_views = self._predict_slot_views(song, candidate_dates, candidate_hours)
+        best = np.unravel_index(int(np.argmax(predicted_views)), predicted_views.shape)
+        if predicted_views[best] > 0:
+            best_date = candidate_dates[best[0]]
+            best_hour = candidate_hours[best[1]]
 
-            # 曜日制約チェック
-            if not self._is_allowed_day_of_week(candidate_date, constraints):
-                continue
+        return best_date, best_hour
 
-            # 最適時間を探索
-            optimal_hour = self._find_optimal_hour(song, candidate_date, constraints)
+    @traced('ComprehensiveScheduler._score_songs')
+    def _score_songs(self, song_indices: np.ndarray, slots: np.ndarray):
+        """曲 × スロットの予測視聴数を一括で計算してキャッシュ
 
-            # 予測視聴数を取得
-            if self.ml_predictor:
-                features = self._create_features_for_prediction(song, candidate_date, optimal_hour)
-                try:
-                    predicted_views, confidence = self.ml_predictor.predict(features)
-                    predicted_views = predicted_views[0] if isinstance(predicted_views, np.ndarray) else predicted_views
-
-                    if predicted_views > best_predicted_views:
-                        best_predicted_views = predicted_views
-                        best_date = candidate_date
-                        best_hour = optimal_hour
-                except:
-                    pass
+        実行をまたぐ予測キャッシュ（self.prediction_cache）にある (曲, スロット) はモデルで予測しない。
+        """
+        lattice = self._get_slot_lattice()
+        views = np.full((len(song_indices), len(slots)), np.nan)
+        version = self._prediction_version()
+        if version is not None:
+            hours = lattice.slot_epoch_hours(slots)
+            keys = [lattice.song_key(int(song_idx)) for song_idx in song_indices]
+            for row, key in enumerate(keys):
+                views[row] = self.prediction_cache.lookup(version, key, hours)[0]
+
+        missing = np.isnan(views)
+        if missing.any():
+            rows = np.flatnonzero(missing.any(axis=1))
+            columns = np.flatnonzero(missing.any(axis=0))
+            predicted, confidence = self._predict_block(song_indices[rows], slots[columns])
+            views[np.ix_(rows, columns)] = predicted
+            if version is not None:
+                for j, row in enumerate(rows):
+                    self.prediction_cache.store(version, keys[row], hours[columns], predicted[j], confidence[j])
+
+        for song_idx, row in zip(song_indices, views):
+            self._slot_view_cache(int(song_idx))[slots] = row
+
+    def _prediction_version(self):
+        """予測キャッシュのキーにするモデルとスロット特徴の版（予測モデルが対応していない場合は None）"""
+        if not hasattr(self.ml_predictor, 'prediction_version'):
+            return None
+        return (self.ml_predictor.prediction_version(), self._get_slot_lattice().slot_feature_key)
+
+    def _predict_block(self, song_indices: np.ndarray, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """曲 × スロットの (予測視聴数, 信頼度) [曲数 x スロット数] をモデルで予測"""
+        lattice = self._get_slot_lattice()
+        if hasattr(self.ml_predictor, 'score_candidates'):
+            return self.ml_predictor.score_candidates(lattice, song_indices, slots)
+        block = lattice.candidate_block(song_indices, slots)
+        features = pd.DataFrame(block.reshape(-1, block.shape[-1]), columns=lattice.feature_names, copy=False)
+        views, confidence = self.ml_predictor.predict(features)
+        shape = (len(song_indices), len(slots))
+        return (np.asarray(views, dtype=float).reshape(shape),
+                np.asarray(confidence, dtype=float).reshape(shape))
+
+    def _slot_view_cache(self, song_idx: int) -> np.ndarray:
+        """曲の予測視聴数キャッシュ（ラティスの拡張に合わせてNaNで延長）"""
+        size = len(self._get_slot_lattice())
+        cached = self._slot_views.get(song_idx)
+        if cached is None or len(cached) < size:
+            grown = np.full(size, np.nan)
+            if cached is not None:
+                grown[:len(cached)] = cached
+            cached = self._slot_views[song_idx] = grown
+        return cached
+
+    def _predict_slot_views(self, song: Dict[str, Any], dates: List[datetime.date],
+                            hours: List[int]) -> np.ndarray:
+        """日付 × 時の予測視聴数 [日付数 x 時の数]（未予測のスロットだけを一括で予測）"""
+        song_idx = self._get_slot_lattice().song_index(song)
+        return self._slot_score_tensor(np.array([song_idx]), dates, hours)[0]
+
+    def _slot_score_tensor(self, song_indices: np.ndarray, dates: List[datetime.date],
+                           hours: List[int]) -> np.ndarray:
+        """曲 × 日付 × 時の予測視聴数テンソル [曲数 x 日付数 x 時の数]
+
+        キャッシュにないスロットは、不足のある曲 × 不足のあるスロットをまとめて1回のバッチで予測する。
+        """
+        lattice = self._get_slot_lattice()
+        slots = lattice.slot_grid(dates, hours).ravel()
+        shape = (len(song_indices), len(dates), len(hours))
+        if not slots.size or not len(song_indices):
+            return np.empty(shape)
+
+        views = np.stack([self._slot_view_cache(int(song_idx))[slots] for song_idx in song_indices])
+        missing = np.isnan(views)
+        if missing.any():
+            rows = np.flatnonzero(missing.any(axis=1))
+            self._score_songs(song_indices[rows], np.unique(slots[missing.any(axis=0)]))
+            views[rows] = np.stack([self._slot_views[int(song_indices[row])][slots] for row in rows])
+        return views.reshape(shape)
+
+    @traced('ComprehensiveScheduler._assign_slots_globally')
+    def _assign_slots_globally(self, songs_data: List[Dict[str, Any]],
+                               constraints: Dict[str, Any],
+                               verbose: bool = True) -> List[Dict[str, Any]]:
+        """全曲の投稿スロットを制約付きの割当問題として一括で決める
 
-        return best_date, best_hour
+        優先順に1曲ずつ日時を選んでから間隔を調整する方法と違い、1日あたりの最大投稿数・
+        最低投稿間隔・日付固定をすべて満たすスロットの中から、予測視聴数の合計が最大になる
+        割り当てを探す（SlotAssigner）。
+
+        完全自由な曲の探索期間は max_days_ahead 日。期間内に全曲が収まらない場合は、優先順位が
+        n 番目の曲の期間を、毎日詰めて投稿した場合の n 番目の投稿日が中央になるようにずらす。
 
+        Args:
+            songs_data: 曲データ（優先順位順）
+            constraints: 制約条件
+            verbose: 進捗表示
+
+        Returns:
+            投稿日時が決定された曲リスト
+        """
+        if verbose:
+            print("=" * 60)
+            print("投稿スロット一括最適化")
+            print("=" * 60)
+
+        window = max(1, constraints.get('max_days_ahead', 90))
+        hours = self._get_candidate_hours(constraints)
+        assigner = SlotAssigner(max_posts_per_day=constraints.get('max_posts_per_day', 2),
+                                min_interval_hours=constraints.get('min_interval_hours', 6))
+        lattice = self._get_slot_lattice(window)
+        song_indices = np.array([lattice.song_index(song) for song in songs_data], dtype=np.int64)
+        free = np.array([i for i, song in enumerate(songs_data) if '_fixed_date' not in song], dtype=np.int64)
+        fixed = [i for i, song in enumerate(songs_data) if '_fixed_date' in song]
+
+        # 曲ごとの探索期間の最初の日（今日からの日数）。日付固定の曲はその日だけ
+        offsets = np.zeros(len(songs_data), dtype=np.int64)
+        allowed_share = np.mean([self._is_allowed_day_of_week(self.today + datetime.timedelta(days=day), constraints)
+                                 for day in range(7)])
+        posts_per_day = assigner.posts_per_day(hours) * allowed_share
+        if posts_per_day > 0:
+            latest = max(0, int(np.ceil(len(songs_data) / posts_per_day)) - window)
+            offsets[free] = np.clip((np.arange(len(free)) / posts_per_day).astype(np.int64) - window // 2,
+                                    0, latest)
+        for i in fixed:
+            offsets[i] = (songs_data[i]['_fixed_date'] - self.today).days
+
+        # 曲 × 探索期間の日 × 時 の予測視聴数（置けないスロットは -inf）
+        values = np.full((len(songs_data), window, len(hours)), -np.inf)
+        if hours:
+            for offset in np.unique(offsets[free]):
+                members = free[offsets[free] == offset]
+                days = np.array([day for day in range(offset, offset + window) if self._is_allowed_day_of_week(
+                    self.today + datetime.timedelta(days=int(day)), constraints)], dtype=np.int64)
+                if len(days):
+                    dates = [self.today + datetime.timedelta(days=int(day)) for day in days]
+                    values[np.ix_(members, days - offset)] = self._slot_score_tensor(song_indices[members], dates, hours)
+            by_date: Dict[datetime.date, List[int]] = {}
+            for i in fixed:
+                by_date.setdefault(songs_data[i]['_fixed_date'], []).append(i)
+            for date, members in by_date.items():
+                values[members, 0] = self._slot_score_tensor(song_indices[members], [date], hours)[:, 0]
+
+        song_days, song_hours = assigner.assign(values, hours, offsets)
+
+        # 制約内に収まらなかった曲: 日付固定はその日の最適な時、完全自由は割り当ての後に1日1曲
+        next_day = int(song_days.max()) + 1 if len(song_days) and song_days.max() >= 0 else 0
+        unassigned = 0
+        for i, song in enumerate(songs_data):
+            if song_days[i] >= 0:
+                date = self.today + datetime.timedelta(days=int(song_days[i]))
+                hour = hours[song_hours[i]]
+                song['slot_predicted_views'] = float(values[i, song_days[i] - offsets[i], song_hours[i]])
+                # サマリー表示と rankings.json への書き戻しは predicted_view_count を読む
+                song['predicted_view_count'] = song['slot_predicted_views']
+            else:
+                unassigned += 1
+                if '_fixed_date' in song:
+                    date = song['_fixed_date']
+                    row = values[i, 0]
+                    if len(row) and row.max() > 0:
+                        hour = hours[int(np.argmax(row))]
+                        song['slot_predicted_views'] = song['predicted_view_count'] = float(row.max())
+                    else:
+                        hour = self._fallback_hour(date)
+                else:
+                    date = self.today + datetime.timedelta(days=next_day)
+                    hour = self._fallback_hour(date)
+                    next_day += 1
+            song['optimal_posting_datetime'] = datetime.datetime.combine(date, datetime.time(hour=hour)).isoformat()
+            song['scheduling_mode'] = 'date_fixed' if '_fixed_date' in song else 'free'
+
+        if verbose:
+            total = assigner.total(values, offsets, song_days, song_hours)
+            print(f"✓ {len(songs_data) - unassigned}曲を割り当て（予測視聴数の合計: {total:,.0f}）")
+            if unassigned:
+                print(f"⚠ 制約内に収まらなかった曲: {unassigned}曲（日付固定はその日、完全自由は期間の後に配置）")
+            print()
+
+        return songs_data
+
+    @traced('ComprehensiveScheduler._optimize_intervals')
     def _optimize_intervals(self, songs_data: List[Dict[str, Any]],
                            constraints: Dict[str, Any],
                            verbose: bool = True) -> List[Dict[str, Any]]:
@@ -434,55 +770,39 @@ class ComprehensiveScheduler:
             print("投稿間隔最適化")
             print("=" * 60)
 
-        min_interval_hours = constraints.get('min_interval_hours', 6)
+        min_interval = datetime.timedelta(hours=constraints.get('min_interval_hours', 6))
         max_posts_per_day = constraints.get('max_posts_per_day', 2)
 
-        # 投稿時間でソート
-        sorted_songs = sorted(
-            songs_data,
-            key=lambda x: datetime.datetime.fromisoformat(x['optimal_posting_datetime'])
+        # 投稿時間でソート（日時の文字列は1回だけ解析する）
+        scheduled = sorted(
+            ((datetime.datetime.fromisoformat(song['optimal_posting_datetime']), song) for song in songs_data),
+            key=lambda item: item[0]
         )
 
         adjusted_songs = []
-        previous_datetime = None
-        posts_on_current_day = 0
-        current_day = None
-
-        for song in sorted_songs:
-            optimal_datetime = datetime.datetime.fromisoformat(song['optimal_posting_datetime'])
-
-            # 日付が変わったらカウントリセット
-            if current_day != optimal_datetime.date():
-                current_day = optimal_datetime.date()
-                posts_on_current_day = 0
-
-            # 前回投稿からの間隔をチェック
-            if previous_datetime:
-                interval_hours = (optimal_datetime - previous_datetime).total_seconds() / 3600
-
-                if interval_hours < min_interval_hours:
-                    # 間隔が短すぎる → 調整
-                    adjusted_datetime = previous_datetime + datetime.timedelta(hours=min_interval_hours)
-                    song['optimal_posting_datetime'] = adjusted_datetime.isoformat()
-                    song['interval_adjusted'] = True
-                    optimal_datetime = adjusted_datetime
-
-            # 1日あたりの投稿数制限
-            if posts_on_current_day >= max_posts_per_day:
-                # 翌日に延期
-                next_day = current_day + datetime.timedelta(days=1)
-                adjusted_datetime = datetime.datetime.combine(next_day, datetime.time(hour=18))
-                song['optimal_posting_datetime'] = adjusted_datetime.isoformat()
+        occupancy = SlotOccupancy()
+
+        for optimal_datetime, song in scheduled:
+            adjusted = False
+            while True:
+                # 直前の投稿からの間隔が短すぎる → 調整
+                previous_datetime = occupancy.latest()
+                if previous_datetime and optimal_datetime - previous_datetime < min_interval:
+                    optimal_datetime = previous_datetime + min_interval
+                    adjusted = True
+
+                # 1日あたりの投稿数制限を超える → 翌日に延期
+                if occupancy.posts_on_day(optimal_datetime.date()) < max_posts_per_day:
+                    break
+                next_day = optimal_datetime.date() + datetime.timedelta(days=1)
+                optimal_datetime = datetime.datetime.combine(next_day, datetime.time(hour=18))
+                adjusted = True
+
+            if adjusted:
+                song['optimal_posting_datetime'] = optimal_datetime.isoformat()
                 song['interval_adjusted'] = True
-                optimal_datetime = adjusted_datetime
-
-                current_day = next_day
-                posts_on_current_day = 1
-            else:
-                posts_on_current_day += 1
-
+            occupancy.add(optimal_datetime)
             adjusted_songs.append(song)
-            previous_datetime = optimal_datetime
 
         if verbose:
             adjusted_count = sum(1 for s in adjusted_songs if s.get('interval_adjusted', False))
@@ -513,21 +833,29 @@ class ComprehensiveScheduler:
 
         violations = []
 
-        # 投稿時間でソート
-        sorted_songs = sorted(
-            songs_data,
-            key=lambda x: datetime.datetime.fromisoformat(x['optimal_posting_datetime'])
+        min_interval = constraints.get('min_interval_hours', 6)
+        max_posts_per_day = constraints.get('max_posts_per_day', 2)
+
+        # 投稿時間でソート（日時の文字列は1回だけ解析する）
+        scheduled = sorted(
+            ((datetime.datetime.fromisoformat(song['optimal_posting_datetime']), song) for song in songs_data),
+            key=lambda item: item[0]
         )
+        sorted_songs = [song for _, song in scheduled]
+        occupancy = SlotOccupancy(optimal_datetime for optimal_datetime, _ in scheduled)
 
         previous_datetime = None
 
-        for song in sorted_songs:
-            optimal_datetime = datetime.datetime.fromisoformat(song['optimal_posting_datetime'])
+        for optimal_datetime, song in scheduled:
+            # 1日あたりの投稿数チェック（その日の最初の投稿で1回だけ）
+            if previous_datetime is None or previous_datetime.date() != optimal_datetime.date():
+                posts = occupancy.posts_on_day(optimal_datetime.date())
+                if posts > max_posts_per_day:
+                    violations.append(f"⚠ 投稿数違反: {optimal_datetime.date()} ({posts}件 > {max_posts_per_day}件)")
 
             # 間隔チェック
             if previous_datetime:
                 interval_hours = (optimal_datetime - previous_datetime).total_seconds() / 3600
-                min_interval = constraints.get('min_interval_hours', 6)
 
                 if interval_hours < min_interval:
                     violations.append(f"⚠ 間隔違反: {song.get('song_name')} ({interval_hours:.1f}時間 < {min_interval}時間)")
@@ -551,31 +879,18 @@ class ComprehensiveScheduler:
                                        hour: int) -> pd.DataFrame:
         """ML予測用の特徴量を生成
 
+        スロットの時間的特徴はラティスから引き、曲ごとの特徴と合成する。
+
         Args:
             song: 曲データ
             date: 投稿日
             hour: 投稿時
 
         Returns:
-            特徴量DataFrame
+            特徴量DataFrame（FeatureEngineer.prepare_training_data と同じ列）
         """
-        features = {
-            'hour': hour,
-            'day_of_week': date.weekday(),
-            'is_weekend': 1 if date.weekday() >= 5 else 0,
-            'month': date.month,
-        }
-
-        # 曲の既存特徴量を追加
-        for key in ['view_count', 'like_count', 'comment_count', 'support_rate',
-                   'growth_rate', 'analytics_avg_percentage_viewed', 'analytics_retention_rate',
-                   'analytics_engagement_rate', 'analytics_ctr']:
-            if key in song:
-                features[key] = song[key]
-            else:
-                features[key] = 0
-
-        return pd.DataFrame([features])
+        lattice = self._get_slot_lattice()
+        return lattice.candidate_frame(lattice.song_index(song), [lattice.slot_index(date, hour)])
 
     @staticmethod
     def _get_default_constraints() -> Dict[str, Any]:
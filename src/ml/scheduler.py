@@ -3,41 +3,177 @@ ML視聴数予測モジュール
 Deep Learningを使用してYouTube動画の視聴数を予測
 """
 
+import itertools
+import json
+import os
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Any, Union
 import datetime
-from sklearn.model_selection import TimeSeriesSplit
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.multioutput import MultiOutputRegressor
 import joblib
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras import layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
+from .backends import is_available, lazy_import, load
+from .augmentation import Augmenter, keras_sequence
+from .hist_gb_backend import HistGBViewModel, validation_split_indices
+from .numpy_runtime import NumpyMLP
+from ..utils.profiling import span
+
+# TensorFlowはインストール有無だけを調べ、モデルの構築・読み込み時に初めてインポートする
+TF_AVAILABLE = is_available('tensorflow')
+if not TF_AVAILABLE:
     print("警告: TensorFlowが利用できません。scikit-learnのGradientBoostingRegressorを使用します。")
+keras = lazy_import('tensorflow.keras')
+layers = lazy_import('tensorflow.keras.layers')
+
+
+def _load_tensorflow() -> bool:
+    """TensorFlowを読み込む（初回のみ数秒かかる）。読み込めない場合は False"""
+    try:
+        load('tensorflow')
+        return True
+    except ImportError as e:
+        print(f"警告: {e}")
+        return False
+
+
+def _as_matrix(X) -> np.ndarray:
+    """特徴量をコピーせずにndarrayとして取得
+
+    DataFrame（メモリマップされたキャッシュを含む）と配列の両方を受け付ける。
+    """
+    if isinstance(X, pd.DataFrame):
+        return X.to_numpy(copy=False)
+    return np.asarray(X)
+
+
+# 訓練バックエンド
+# auto: TensorFlowがあれば keras、なければ gbr
+# keras: Kerasのニューラルネットワーク
+# gbr: GradientBoostingRegressor（MultiOutputRegressor）
+# hgb: HistGradientBoostingRegressor（src.ml.hist_gb_backend）
+TRAINING_BACKENDS = ('auto', 'keras', 'gbr', 'hgb')
+
+# ViewCountPredictor.model_version の払い出し（インスタンスをまたいでプロセス内で一意）
+_MODEL_VERSIONS = itertools.count(1)
 
 
 class ViewCountPredictor:
     """視聴数予測モデル"""
 
-    def __init__(self, input_dim: int = 40):
+    def __init__(self, input_dim: int = 40, backend: str = 'auto',
+                 backend_params: Optional[Dict[str, Any]] = None,
+                 augmentation_factor: int = 5,
+                 jitter: Optional[Dict[Union[str, int], Dict[str, Any]]] = None):
         """初期化
 
         Args:
             input_dim: 入力特徴量の次元数
+            backend: 訓練バックエンド（TRAINING_BACKENDS のいずれか）
+            backend_params: バックエンドのモデルに渡すパラメータ（hgb の場合は HistGBViewModel の引数）
+            augmentation_factor: データ拡張の倍率
+            jitter: 列名 -> ジッタリングの設定（省略時は src.ml.augmentation.DEFAULT_JITTER）
         """
+        if backend not in TRAINING_BACKENDS:
+            raise ValueError(f"未対応のバックエンドです: {backend}（{', '.join(TRAINING_BACKENDS)}）")
         self.input_dim = input_dim
+        self.backend = backend
+        self.backend_params = dict(backend_params or {})
+        self.augmentation_factor = augmentation_factor
+        self.jitter = jitter
         self.model = None
         self.scaler = StandardScaler()
         self.history = None
+        # 訓練時の特徴量スキーマ（列名・列順・dtype）。DataFrameで訓練した場合のみ記録
+        self.feature_names: Optional[List[str]] = None
+        self.feature_dtype: Optional[str] = None
+        # warm_start_from() で設定した場合、次の train() は既存のモデルから訓練を継続する
+        self.warm_start = False
+        # 信頼度ラベルの閾値（訓練データの視聴数の中央値）。partial_fit で使う
+        self.target_median: Optional[float] = None
+        # モデルの版。訓練・更新・読み込むたびにプロセス内で一意な値に更新する（予測キャッシュのキー）
+        self.model_version = 0
+        # レジストリのモデルID（ModelRegistry が登録・読み込み時に設定し、モデルを変更したら None）
+        self.model_id: Optional[str] = None
+
+    def _record_schema(self, X: Union[pd.DataFrame, np.ndarray]):
+        """訓練データの特徴量スキーマを記録"""
+        if isinstance(X, pd.DataFrame):
+            self.feature_names = [str(name) for name in X.columns]
+            dtypes = set(X.dtypes)
+            self.feature_dtype = str(dtypes.pop()) if len(dtypes) == 1 else 'float64'
+        else:
+            self.feature_names = None
+            self.feature_dtype = str(np.asarray(X).dtype)
+
+    def warm_start_from(self, previous: 'ViewCountPredictor') -> bool:
+        """前回のモデルから訓練を継続するように設定
 
-    def build_model(self) -> keras.Model:
+        hgb（残差を学習するステージを追加）と keras（重みを引き継いで追加学習）のみ対応。NumPyランタイムや
+        gbr のモデル、バックエンドが異なる場合は何もしない。
+
+        Args:
+            previous: 訓練済みのViewCountPredictor（Kerasモデルは prefer_numpy=False で読み込んだもの）
+
+        Returns:
+            継続訓練を設定した場合 True
+        """
+        model = previous.model
+        if isinstance(model, HistGBViewModel):
+            supported = self.backend == 'hgb'
+        else:
+            supported = (model is not None and self.backend in ('auto', 'keras') and TF_AVAILABLE
+                         and not isinstance(model, (MultiOutputRegressor, NumpyMLP)))
+        if not supported:
+            return False
+
+        self.model = model
+        self.scaler = previous.scaler
+        self.feature_names = previous.feature_names
+        self.feature_dtype = previous.feature_dtype
+        self.warm_start = True
+        self.model_version = next(_MODEL_VERSIONS)
+        self.model_id = None
+        return True
+
+    def _can_warm_start(self, X: Union[pd.DataFrame, np.ndarray]) -> bool:
+        """継続訓練できるか（特徴量スキーマが前回と同じか）"""
+        if not self.warm_start or self.model is None:
+            return False
+        if isinstance(X, pd.DataFrame) and self.feature_names is not None:
+            return [str(name) for name in X.columns] == self.feature_names
+        return _as_matrix(X).shape[1] == getattr(self.scaler, 'n_features_in_', None)
+
+    def align_features(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """特徴量を訓練時のスキーマ（列名・列順・dtype）に揃える
+
+        Args:
+            X: 特徴量DataFrameまたは配列
+
+        Returns:
+            訓練時と同じ列順の特徴量行列
+
+        Raises:
+            ValueError: 列が不足している・列数が一致しない場合
+        """
+        if isinstance(X, pd.DataFrame) and self.feature_names is not None:
+            missing = [name for name in self.feature_names if name not in X.columns]
+            if missing:
+                raise ValueError(f"訓練時の特徴量が不足しています（{len(missing)}列）: {missing[:5]}")
+            if list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+
+        matrix = _as_matrix(X)
+        expected = len(self.feature_names) if self.feature_names is not None else getattr(self.scaler, 'n_features_in_', None)
+        if expected is not None and matrix.shape[1] != expected:
+            raise ValueError(f"特徴量の列数({matrix.shape[1]})が訓練時({expected})と一致しません")
+        if self.feature_dtype is not None:
+            matrix = matrix.astype(self.feature_dtype, copy=False)
+        return matrix
+
+    def build_model(self) -> 'keras.Model':
         """ニューラルネットワークモデルを構築
 
         Returns:
@@ -90,7 +226,7 @@ class ViewCountPredictor:
 
         return model
 
-    def _train_sklearn(self, X: pd.DataFrame, y: np.ndarray,
+    def _train_sklearn(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
                       use_augmentation: bool = True,
                       verbose: int = 1) -> Dict[str, Any]:
         """scikit-learnを使用してモデルを訓練
@@ -104,19 +240,24 @@ class ViewCountPredictor:
         Returns:
             訓練履歴
         """
-        if verbose:
+        if verbose and self.backend != 'gbr':
             print("\n⚠ TensorFlowが利用できないため、GradientBoostingRegressorを使用します")
 
-        # 特徴量を正規化
-        X_scaled = self.scaler.fit_transform(X.values)
+        self.warm_start = False
+
+        # 特徴量を正規化（データ拡張は正規化前の特徴量に適用する）
+        self._record_schema(X)
+        matrix = _as_matrix(X)
+        self.scaler.fit(matrix)
 
         # データ拡張
-        if use_augmentation and len(X_scaled) < 1000:
+        if use_augmentation and len(matrix) < 1000:
             if verbose:
-                print(f"データ拡張を実行: {len(X_scaled)}サンプル → ", end='')
-            X_scaled, y = self.augment_data(X_scaled, y, augmentation_factor=5)
+                print(f"データ拡張を実行: {len(matrix)}サンプル → ", end='')
+            matrix, y = self.augment_data(matrix, y, augmentation_factor=self.augmentation_factor)
             if verbose:
-                print(f"{len(X_scaled)}サンプル")
+                print(f"{len(matrix)}サンプル")
+        X_scaled = self.scaler.transform(matrix)
 
         # 対数変換（視聴数）
         y_log = np.log1p(y)
@@ -155,39 +296,91 @@ class ViewCountPredictor:
         self.history = {'train_mae': train_mae}
         return self.history
 
+    def _train_hist_gb(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
+                       validation_split: float = 0.2,
+                       use_augmentation: bool = True,
+                       verbose: int = 1) -> Dict[str, Any]:
+        """HistGradientBoostingRegressorでモデルを訓練
+
+        木モデルは正規化の影響を受けないため、正規化前の特徴量（NaN可）で訓練する。
+        検証データはデータ拡張の前に分けて早期終了に使う。
+
+        Args:
+            X: 特徴量DataFrameまたは配列
+            y: ターゲット配列（視聴数）
+            validation_split: 早期終了に使う検証データの割合
+            use_augmentation: データ拡張を使用するか
+            verbose: 詳細度
+
+        Returns:
+            訓練履歴
+        """
+        warm_start = self._can_warm_start(X) and isinstance(self.model, HistGBViewModel)
+        self.warm_start = False
+        self._record_schema(X)
+        matrix = _as_matrix(X)
+        # スキーマ検証（列数）のためにスケーラーも合わせておく
+        self.scaler.fit(matrix)
+        y = np.asarray(y, dtype=np.float64)
+
+        train_idx, val_idx = validation_split_indices(len(matrix), validation_split)
+        X_train, y_train = matrix[train_idx], y[train_idx]
+        X_val, y_val = (matrix[val_idx], y[val_idx]) if len(val_idx) else (None, None)
+
+        if use_augmentation and len(X_train) < 1000:
+            if verbose:
+                print(f"データ拡張を実行: {len(X_train)}サンプル → ", end='')
+            X_train, y_train = self.augment_data(X_train, y_train, augmentation_factor=self.augmentation_factor)
+            if verbose:
+                print(f"{len(X_train)}サンプル")
+
+        if verbose:
+            print(f"\n訓練開始（HistGradientBoosting）: {len(X_train)}サンプル")
+
+        if warm_start:
+            if verbose:
+                print("前回のモデルから訓練を継続します")
+            self.model.fit(X_train, y_train, X_val, y_val, warm_start=True)
+        else:
+            self.model = HistGBViewModel(**self.backend_params).fit(X_train, y_train, X_val, y_val)
+
+        train_views, _ = self.model.predict(matrix)
+        self.history = {'train_mae': float(np.mean(np.abs(train_views - y))),
+                        'n_iter': self.model.n_iter}
+        if X_val is not None:
+            val_views, _ = self.model.predict(X_val)
+            self.history['val_mae'] = float(np.mean(np.abs(val_views - y_val)))
+
+        if verbose:
+            print(f"\n訓練完了:")
+            print(f"  Training MAE: {self.history['train_mae']:,.0f}")
+            if 'val_mae' in self.history:
+                print(f"  Validation MAE: {self.history['val_mae']:,.0f}")
+            print(f"  反復数: {self.history['n_iter']}")
+
+        return self.history
+
+    def _augmenter(self) -> Augmenter:
+        """訓練時のスキーマの列名でジッタリングするAugmenter"""
+        return Augmenter(self.feature_names, self.jitter)
+
     def augment_data(self, X: np.ndarray, y: np.ndarray,
                     augmentation_factor: int = 5) -> Tuple[np.ndarray, np.ndarray]:
-        """データ拡張を実行
+        """データ拡張を実行（勾配ブースティング用。元の行のインデックスを再標本化して生成）
+
+        時刻（'hour' 列）などのジッタリングは列名で対象を決めるため、正規化前の特徴量を渡す。
 
         Args:
-            X: 特徴量配列
+            X: 特徴量配列（正規化前）
             y: ターゲット配列
             augmentation_factor: 拡張倍率
 
         Returns:
             (拡張された特徴量, 拡張されたターゲット)
         """
-        augmented_X = [X]
-        augmented_y = [y]
-
-        for _ in range(augmentation_factor - 1):
-            # 時間ジッタリング（±3時間）
-            X_aug = X.copy()
-            # hourカラムにノイズを追加（存在する場合）
-            if X.shape[1] > 0:
-                hour_noise = np.random.uniform(-3, 3, X.shape[0])
-                # 最初のカラムをhourと仮定
-                X_aug[:, 0] = np.clip(X_aug[:, 0] + hour_noise, 0, 23)
-
-            # 視聴数に±5%のノイズを追加
-            y_aug = y * np.random.uniform(0.95, 1.05, len(y))
+        return self._augmenter().resample(X, y, augmentation_factor)
 
-            augmented_X.append(X_aug)
-            augmented_y.append(y_aug)
-
-        return np.vstack(augmented_X), np.concatenate(augmented_y)
-
-    def train(self, X: pd.DataFrame, y: np.ndarray,
+    def train(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
              validation_split: float = 0.2,
              epochs: int = 100,
              batch_size: int = 32,
@@ -196,7 +389,7 @@ class ViewCountPredictor:
         """モデルを訓練
 
         Args:
-            X: 特徴量DataFrame
+            X: 特徴量DataFrameまたは配列（メモリマップ可）
             y: ターゲット配列（視聴数）
             validation_split: 検証データの割合
             epochs: エポック数
@@ -207,30 +400,44 @@ class ViewCountPredictor:
         Returns:
             訓練履歴
         """
-        # TensorFlowがない場合はscikit-learnを使用
-        if not TF_AVAILABLE:
+        self.target_median = float(np.median(np.asarray(y, dtype=np.float64)))
+        self.model_version = next(_MODEL_VERSIONS)
+        self.model_id = None
+        if self.backend == 'hgb':
+            return self._train_hist_gb(X, y, validation_split, use_augmentation, verbose)
+        if self.backend == 'gbr':
             return self._train_sklearn(X, y, use_augmentation, verbose)
 
-        # 特徴量を正規化
-        X_scaled = self.scaler.fit_transform(X.values)
-
-        # データ拡張
-        if use_augmentation and len(X_scaled) < 1000:
-            print(f"データ拡張を実行: {len(X_scaled)}サンプル → ", end='')
-            X_scaled, y = self.augment_data(X_scaled, y, augmentation_factor=5)
-            print(f"{len(X_scaled)}サンプル")
-
-        # 対数変換（視聴数）
-        y_log = np.log1p(y)
-
-        # 信頼度ラベル（高視聴数 = 高信頼）
-        y_confidence = (y > np.median(y)).astype(float)
+        # TensorFlowがない（読み込めない）場合はscikit-learnを使用
+        if not TF_AVAILABLE or not _load_tensorflow():
+            if self.backend == 'keras':
+                raise ImportError("TensorFlowを読み込めません（pip install tensorflow）")
+            return self._train_sklearn(X, y, use_augmentation, verbose)
 
-        # モデル構築
-        self.input_dim = X_scaled.shape[1]
-        self.model = self.build_model()
+        # 継続訓練では前回のスケーラーをそのまま使う（入力の分布をモデルに合わせる）
+        warm_start = self._can_warm_start(X) and not isinstance(self.model, (HistGBViewModel, NumpyMLP))
+        self.warm_start = False
+
+        # 特徴量を正規化（データ拡張はバッチごとに正規化前の特徴量へ適用する）
+        self._record_schema(X)
+        matrix = _as_matrix(X)
+        if not warm_start:
+            self.scaler.fit(matrix)
+        y = np.asarray(y, dtype=np.float64)
+        median = np.median(y)
+
+        def targets(values: np.ndarray) -> Dict[str, np.ndarray]:
+            # 対数変換（視聴数）と信頼度ラベル（高視聴数 = 高信頼）
+            return {'views': np.log1p(values), 'confidence': (values > median).astype(float)}
+
+        # モデル構築（継続訓練では前回のモデルをそのまま使う）
+        self.input_dim = matrix.shape[1]
+        if warm_start:
+            print("前回のモデルから訓練を継続します")
+        else:
+            self.model = self.build_model()
 
-        if verbose:
+        if verbose and not warm_start:
             print("\nモデルアーキテクチャ:")
             self.model.summary()
 
@@ -251,14 +458,27 @@ class ViewCountPredictor:
             verbose=verbose
         )
 
+        if use_augmentation and len(matrix) < 1000:
+            # 検証データは拡張前に分け、訓練データだけをバッチごとに拡張する（コピーを実体化しない）
+            train_idx, val_idx = validation_split_indices(len(matrix), validation_split)
+            batches = self._augmenter().batches(matrix[train_idx], y[train_idx], self.augmentation_factor,
+                                                batch_size, transform=self.scaler.transform, targets=targets)
+            print(f"データ拡張を実行: {len(train_idx)}サンプル → {batches.n_rows}サンプル（バッチごとに生成）")
+            validation_data = None
+            if len(val_idx):
+                validation_data = (self.scaler.transform(matrix[val_idx]), targets(y[val_idx]))
+            fit_data = {'x': keras_sequence(batches), 'validation_data': validation_data}
+            n_samples = batches.n_rows
+        else:
+            fit_data = {'x': self.scaler.transform(matrix), 'y': targets(y),
+                        'validation_split': validation_split, 'batch_size': batch_size}
+            n_samples = len(matrix)
+
         # 訓練
-        print(f"\n訓練開始: {len(X_scaled)}サンプル")
+        print(f"\n訓練開始: {n_samples}サンプル")
         history = self.model.fit(
-            X_scaled,
-            {'views': y_log, 'confidence': y_confidence},
-            validation_split=validation_split,
+            **fit_data,
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=[early_stopping, reduce_lr],
             verbose=verbose
         )
@@ -275,11 +495,69 @@ class ViewCountPredictor:
 
         return self.history
 
+    def partial_fit(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
+                    epochs: int = 5, extra_estimators: int = 20,
+                    batch_size: int = 32, verbose: int = 0) -> Dict[str, Any]:
+        """新しいラベル付きデータで訓練済みモデルを更新（再訓練しない）
+
+        - hgb: 既存の木を残し、新しい行の残差を extra_estimators 本の木で学習するステージを追加
+        - gbr: 各出力の GradientBoostingRegressor に warm_start で extra_estimators 本を追加
+          （既存の木は正規化後の値で分割しているため、スケーラーは更新しない）
+        - keras: スケーラーの平均・分散を逐次更新し、現在の重みから epochs エポックだけ追加学習
+
+        Args:
+            X: 新しい行の特徴量（訓練時のスキーマ）
+            y: 新しい行の視聴数
+            epochs: 追加学習のエポック数（keras）
+            extra_estimators: 追加する木の数（hgb / gbr）
+            batch_size: バッチサイズ（keras）
+            verbose: 詳細度
+
+        Returns:
+            更新の記録（rows / mae_before / mae_after）
+
+        Raises:
+            ValueError: モデルが訓練されていない・NumPyランタイムの場合
+        """
+        if self.model is None:
+            raise ValueError("モデルが訓練されていません。先にtrain()を実行してください。")
+        if isinstance(self.model, NumpyMLP):
+            raise ValueError("NumPyランタイムは更新できません。load(prefer_numpy=False) で読み込んでください。")
+
+        matrix = self.align_features(X)
+        y = np.asarray(y, dtype=np.float64)
+        median = self.target_median if self.target_median is not None else float(np.median(y))
+        mae_before = float(np.mean(np.abs(self._predict_matrix(matrix)[0] - y)))
+
+        if isinstance(self.model, HistGBViewModel):
+            self.scaler.partial_fit(matrix)
+            self.model.update(matrix, y, extra_estimators)
+        elif isinstance(self.model, MultiOutputRegressor):
+            X_scaled = self.scaler.transform(matrix)
+            targets = [np.log1p(y), (y > median).astype(float)]
+            for estimator, target in zip(self.model.estimators_, targets):
+                estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators_ + extra_estimators)
+                estimator.fit(X_scaled, target)
+        else:
+            # Kerasモデル: 実行中の平均・分散を更新してから追加学習
+            self.scaler.partial_fit(matrix)
+            self.model.fit(self.scaler.transform(matrix),
+                           {'views': np.log1p(y), 'confidence': (y > median).astype(float)},
+                           epochs=epochs, batch_size=batch_size, verbose=verbose)
+
+        self.model_version = next(_MODEL_VERSIONS)
+        self.model_id = None
+        mae_after = float(np.mean(np.abs(self._predict_matrix(matrix)[0] - y)))
+        update = {'rows': int(len(y)), 'mae_before': mae_before, 'mae_after': mae_after}
+        if verbose:
+            print(f"モデルを更新: {len(y)}件  MAE {mae_before:,.0f} → {mae_after:,.0f}")
+        return update
+
     def predict(self, X: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """視聴数を予測
 
         Args:
-            X: 特徴量DataFrame
+            X: 特徴量DataFrame（訓練時の列名で並べ替える）または訓練時と同じ列順の配列
 
         Returns:
             (予測視聴数, 信頼度スコア)
@@ -287,69 +565,175 @@ class ViewCountPredictor:
         if self.model is None:
             raise ValueError("モデルが訓練されていません。先にtrain()を実行してください。")
 
+        with span('ViewCountPredictor.predict', rows=len(X)):
+            return self._predict_matrix(self.align_features(X))
+
+    def prediction_version(self) -> Hashable:
+        """予測キャッシュ（src.ml.prediction_cache）のモデルのバージョン
+
+        レジストリのモデルはモデルID（再読み込みしても同じ）、それ以外はプロセス内で一意なモデルの版。
+        """
+        if self.model_id is not None:
+            return self.model_id
+        return self.model_version
+
+    def _predict_matrix(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """訓練時の列順に揃えた特徴量行列を1回のバッチで予測"""
+        if isinstance(self.model, (NumpyMLP, HistGBViewModel)):
+            # NumPyランタイムは正規化を最初の層に畳み込み済み、木モデルは正規化前の特徴量で訓練
+            return self.model.predict(matrix)
+
         # 正規化
-        X_scaled = self.scaler.transform(X.values)
+        X_scaled = self.scaler.transform(matrix)
 
         # TensorFlowモデルかscikit-learnモデルかで分岐
-        if TF_AVAILABLE and hasattr(self.model, 'predict') and callable(getattr(self.model, 'predict')):
-            try:
-                # TensorFlowモデル
-                pred_log, pred_confidence = self.model.predict(X_scaled, verbose=0)
-                pred_views = np.expm1(pred_log.flatten())
-                pred_confidence = pred_confidence.flatten()
-            except:
-                # sklearn MultiOutputRegressor
-                predictions = self.model.predict(X_scaled)
-                pred_views = np.expm1(predictions[:, 0])
-                pred_confidence = predictions[:, 1]
-        else:
+        if isinstance(self.model, MultiOutputRegressor):
             # sklearn MultiOutputRegressor
             predictions = self.model.predict(X_scaled)
             pred_views = np.expm1(predictions[:, 0])
             pred_confidence = predictions[:, 1]
+        else:
+            # TensorFlowモデル
+            pred_log, pred_confidence = self.model.predict(X_scaled, verbose=0)
+            pred_views = np.expm1(pred_log.flatten())
+            pred_confidence = pred_confidence.flatten()
 
         return pred_views, pred_confidence
 
+    def score_candidates(self, lattice, songs: Sequence[int], slots: Sequence[int],
+                         batch_size: int = 262144) -> Tuple[np.ndarray, np.ndarray]:
+        """曲 × 候補スロットのすべての組み合わせを一括で予測
+
+        特徴量は SlotFeatureLattice から訓練時のスキーマ（列名・列順）で組み立てる。
+
+        Args:
+            lattice: スロット特徴量ラティス（src.ml.slot_lattice.SlotFeatureLattice）
+            songs: 曲の番号の配列（lattice.add_songs / song_index の戻り値）
+            slots: スロット番号の配列
+            batch_size: 1回の予測に渡す最大行数（メモリ使用量の上限）
+
+        Returns:
+            (予測視聴数 [曲数 x スロット数], 信頼度スコア [曲数 x スロット数])
+
+        Raises:
+            ValueError: ラティスに訓練時の特徴量が不足している場合
+        """
+        if self.model is None:
+            raise ValueError("モデルが訓練されていません。先にtrain()を実行してください。")
+
+        songs = np.asarray(songs, dtype=np.int64)
+        slots = np.asarray(slots, dtype=np.int64)
+
+        # ラティスの列 -> 訓練時の列順
+        columns = None
+        if self.feature_names is not None and self.feature_names != lattice.feature_names:
+            position = {name: i for i, name in enumerate(lattice.feature_names)}
+            missing = [name for name in self.feature_names if name not in position]
+            if missing:
+                raise ValueError(f"訓練時の特徴量が不足しています（{len(missing)}列）: {missing[:5]}")
+            columns = np.array([position[name] for name in self.feature_names])
+
+        views = np.empty((len(songs), len(slots)))
+        confidence = np.empty((len(songs), len(slots)))
+        songs_per_batch = max(1, batch_size // max(len(slots), 1))
+
+        for start in range(0, len(songs), songs_per_batch):
+            stop = min(start + songs_per_batch, len(songs))
+            block = lattice.candidate_block(songs[start:stop], slots)
+            matrix = block.reshape(-1, block.shape[-1])
+            if columns is not None:
+                matrix = matrix[:, columns]
+            with span('ViewCountPredictor.predict', rows=len(matrix)):
+                batch_views, batch_confidence = self._predict_matrix(self.align_features(matrix))
+            views[start:stop] = batch_views.reshape(stop - start, len(slots))
+            confidence[start:stop] = batch_confidence.reshape(stop - start, len(slots))
+
+        return views, confidence
+
     def save(self, model_path: str = 'models/view_predictor.pkl',
-            scaler_path: str = 'models/view_scaler.pkl'):
+            scaler_path: str = 'models/view_scaler.pkl',
+            schema_path: str = 'models/view_schema.json'):
         """モデルを保存
 
         Args:
             model_path: モデルの保存先
             scaler_path: スケーラーの保存先
+            schema_path: 特徴量スキーマ（列名・dtype）の保存先
         """
-        import os
         os.makedirs('models', exist_ok=True)
 
         if self.model:
             # TensorFlowモデルかscikit-learnモデルかで分岐
-            if TF_AVAILABLE and hasattr(self.model, 'save'):
+            npz_path = model_path.replace('.pkl', '.npz')
+            if isinstance(self.model, NumpyMLP):
+                self.model.save(npz_path)
+                print(f"モデルを保存: {npz_path}")
+            elif TF_AVAILABLE and hasattr(self.model, 'save'):
                 try:
                     self.model.save(model_path.replace('.pkl', '.h5'))
                     print(f"モデルを保存: {model_path.replace('.pkl', '.h5')}")
                 except:
                     joblib.dump(self.model, model_path)
                     print(f"モデルを保存: {model_path}")
+                self.export_numpy_runtime(npz_path)
             else:
                 joblib.dump(self.model, model_path)
                 print(f"モデルを保存: {model_path}")
+                # 以前のKerasモデルのランタイムが残っていると load で優先されるため削除
+                if os.path.exists(npz_path):
+                    os.remove(npz_path)
 
         joblib.dump(self.scaler, scaler_path)
         print(f"スケーラーを保存: {scaler_path}")
 
+        with open(schema_path, 'w', encoding='utf-8') as f:
+            json.dump({'feature_names': self.feature_names, 'dtype': self.feature_dtype,
+                       'target_median': self.target_median},
+                      f, ensure_ascii=False, indent=2)
+        print(f"特徴量スキーマを保存: {schema_path}")
+
+    def export_numpy_runtime(self, path: str = 'models/view_predictor.npz') -> bool:
+        """KerasモデルをNumPyランタイム（.npz）として書き出し
+
+        BatchNormとスケーラーを全結合層の重みに畳み込むため、読み込み側はTensorFlowを必要としない。
+
+        Args:
+            path: 保存先
+
+        Returns:
+            書き出した場合 True（Kerasモデル以外・未対応の構造の場合は False）
+        """
+        if self.model is None or isinstance(self.model, (MultiOutputRegressor, HistGBViewModel, NumpyMLP)):
+            return False
+        try:
+            runtime = NumpyMLP.from_keras(self.model, self.scaler, self.feature_names)
+        except (ValueError, AttributeError) as e:
+            print(f"⚠ NumPyランタイムへの変換に失敗: {e}")
+            return False
+        runtime.save(path)
+        print(f"NumPyランタイムを保存: {path}")
+        return True
+
     def load(self, model_path: str = 'models/view_predictor.pkl',
-            scaler_path: str = 'models/view_scaler.pkl'):
+            scaler_path: str = 'models/view_scaler.pkl',
+            schema_path: str = 'models/view_schema.json',
+            prefer_numpy: bool = True):
         """モデルを読み込み
 
         Args:
             model_path: モデルのパス
             scaler_path: スケーラーのパス
+            schema_path: 特徴量スキーマのパス（古いモデルで存在しない場合は列数のみ検証）
+            prefer_numpy: .npz（NumPyランタイム）があればKerasモデルより優先する
         """
-        import os
-
-        # .h5ファイルが存在する場合はTensorFlowモデルとして読み込み
+        # .npzファイルが存在する場合はTensorFlowなしで推論できるNumPyランタイムとして読み込み
+        npz_path = model_path.replace('.pkl', '.npz')
         h5_path = model_path.replace('.pkl', '.h5')
-        if TF_AVAILABLE and os.path.exists(h5_path):
+        if prefer_numpy and os.path.exists(npz_path):
+            self.model = NumpyMLP.load(npz_path)
+            print(f"モデルを読み込み: {npz_path}")
+        # .h5ファイルが存在する場合はTensorFlowモデルとして読み込み
+        elif TF_AVAILABLE and os.path.exists(h5_path):
             self.model = keras.models.load_model(h5_path)
             print(f"モデルを読み込み: {h5_path}")
         elif os.path.exists(model_path):
@@ -361,6 +745,18 @@ class ViewCountPredictor:
         self.scaler = joblib.load(scaler_path)
         print(f"スケーラーを読み込み: {scaler_path}")
 
+        self.feature_names = None
+        self.feature_dtype = None
+        self.target_median = None
+        if os.path.exists(schema_path):
+            with open(schema_path, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+            self.feature_names = schema.get('feature_names')
+            self.feature_dtype = schema.get('dtype')
+            self.target_median = schema.get('target_median')
+        self.model_version = next(_MODEL_VERSIONS)
+        self.model_id = None
+
 
 def train_view_predictor(X: pd.DataFrame, y: np.ndarray,
                         epochs: int = 100,
@@ -390,37 +786,33 @@ def train_view_predictor(X: pd.DataFrame, y: np.ndarray,
 
 
 def cross_validate(X: pd.DataFrame, y: np.ndarray,
-                  n_splits: int = 5) -> List[float]:
-    """時系列クロスバリデーション
+                  n_splits: int = 5, n_jobs: int = -1,
+                  backend: str = 'auto') -> List[float]:
+    """時系列クロスバリデーション（foldをプロセス並列で評価）
 
     Args:
         X: 特徴量DataFrame
         y: ターゲット配列
         n_splits: 分割数
+        n_jobs: 並列プロセス数（-1 で全コア、1 で逐次実行）
+        backend: 訓練バックエンド
 
     Returns:
         各分割のMAEスコアリスト
     """
-
-    tscv = TimeSeriesSplit(n_splits=n_splits)
-    scores = []
+    from .tuning import FoldRunner
 
     print(f"\n時系列クロスバリデーション ({n_splits} splits):")
 
-    for fold, (train_idx, val_idx) in enumerate(tscv.split(X), 1):
-        print(f"\nFold {fold}/{n_splits}")
-
-        X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-        y_train, y_val = y[train_idx], y[val_idx]
+    config = {'name': backend, 'backend': backend}
+    with FoldRunner(X, y, n_splits=n_splits, n_jobs=n_jobs) as runner:
+        results = runner.run([(config, fold) for fold in range(n_splits)])
 
-        predictor = ViewCountPredictor(input_dim=X.shape[1])
-        predictor.train(X_train, y_train, validation_split=0, epochs=50, verbose=0)
-
-        pred_views, _ = predictor.predict(X_val)
-        mae = np.mean(np.abs(pred_views - y_val))
-        scores.append(mae)
-
-        print(f"  MAE: {mae:,.0f}")
+    scores = []
+    for result in results:
+        print(f"\nFold {result['fold'] + 1}/{n_splits}")
+        print(f"  MAE: {result['mae']:,.0f}")
+        scores.append(result['mae'])
 
     print(f"\n平均MAE: {np.mean(scores):,.0f} ± {np.std(scores):,.0f}")
     return scores
@@ -0,0 +1,192 @@
+"""
+投稿スロットの一括割り当て
+曲 × 日付 × 時 の予測視聴数から、全曲の投稿スロットを同時に決める（予測視聴数の合計を最大化）
+
+制約:
+- 1日あたりの最大投稿数（max_posts_per_day）
+- 最低投稿間隔（min_interval_hours、日をまたぐ投稿どうしも含む）
+- 日付固定の曲・曜日の制約（呼び出し側で置けないスロットの値を -inf にする）
+
+手順:
+1. 初期スロット: 日ごとに、曲の平均予測視聴数が高い時から、制約を満たす範囲でスロットを開く
+2. 割当問題: 開いたスロットへの曲の割り当てを二部グラフの最小コスト完全マッチング
+   （scipy.sparse.csgraph.min_weight_full_bipartite_matching）で解く。
+   曲ごとに「割り当てない」ダミーのスロットを加え、置けない曲があっても解けるようにする
+3. 局所探索: 各曲を、他の曲との制約を満たす空きスロットのうち予測視聴数が最も高いスロットへ移す
+4. 使用中のスロットと未割り当ての曲で 2-3 を、改善がなくなるまで繰り返す
+
+曲数が多い場合は、曲ごとに異なる期間（offsets から window 日）だけの予測視聴数を渡せる。
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+from .slot_occupancy import SlotOccupancy
+
+
+class SlotAssigner:
+    """制約付きの投稿スロット割り当て（割当問題 + 局所探索）"""
+
+    def __init__(self, max_posts_per_day: int = 2, min_interval_hours: int = 6, max_rounds: int = 10):
+        """
+        Args:
+            max_posts_per_day: 1日あたりの最大投稿数
+            min_interval_hours: 最低投稿間隔（時間）
+            max_rounds: 割当問題と局所探索を繰り返す最大回数
+        """
+        self.max_posts_per_day = max(1, int(max_posts_per_day))
+        # 同じ時に2曲は置けないため、間隔は最低1時間
+        self.min_interval_hours = max(1, int(min_interval_hours))
+        self.max_rounds = max_rounds
+
+    def posts_per_day(self, hours: Sequence[int], days: int = 28) -> float:
+        """候補の時に毎日詰めて投稿した場合の、1日あたりの投稿数（日をまたぐ間隔も考慮）"""
+        hours = sorted(hours)
+        last = None
+        count = 0
+        for day in range(days):
+            placed = 0
+            for hour in hours:
+                t = day * 24 + hour
+                if placed < self.max_posts_per_day and (last is None or t - last >= self.min_interval_hours):
+                    last = t
+                    placed += 1
+            count += placed
+        return count / days
+
+    def assign(self, values: np.ndarray, hours: Sequence[int],
+               offsets: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """全曲の投稿スロットを割り当てる
+
+        Args:
+            values: 予測視聴数 [曲数 x 日数 x 時の数]（置けないスロットは -inf）
+            hours: values の最後の軸に対応する時（0-23）
+            offsets: 曲ごとの values の最初の日（今日からの日数、省略時はすべて0）
+
+        Returns:
+            (曲ごとの日（今日からの日数）, 曲ごとの時の番号)。割り当てられなかった曲は -1
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n_songs, window, n_hours = values.shape
+        hours = np.asarray(hours, dtype=np.int64)
+        offsets = np.zeros(n_songs, dtype=np.int64) if offsets is None else np.asarray(offsets, dtype=np.int64)
+        song_days = np.full(n_songs, -1, dtype=np.int64)
+        song_hours = np.full(n_songs, -1, dtype=np.int64)
+        if n_songs == 0 or window == 0 or n_hours == 0:
+            return song_days, song_hours
+        n_days = int(offsets.max()) + window
+
+        # 1. 初期スロット
+        slot_days, slot_hours = self._initial_slots(values, hours, offsets, n_days)
+
+        total = -np.inf
+        for _ in range(self.max_rounds):
+            # 2. 割当問題（2回目以降は使用中のスロットの間で曲を入れ替え、未割り当ての曲も候補にする）
+            self._match(values, offsets, np.arange(n_songs), slot_days, slot_hours, song_days, song_hours)
+            # 3. 局所探索
+            self._relocate(values, hours, offsets, song_days, song_hours)
+
+            new_total = self.total(values, offsets, song_days, song_hours)
+            if new_total <= total + 1e-9 * max(1.0, abs(total)):
+                break
+            total = new_total
+            assigned = song_days >= 0
+            slot_days, slot_hours = song_days[assigned], song_hours[assigned]
+        return song_days, song_hours
+
+    @staticmethod
+    def total(values: np.ndarray, offsets: np.ndarray,
+              song_days: np.ndarray, song_hours: np.ndarray) -> float:
+        """割り当てたスロットの予測視聴数の合計"""
+        assigned = np.flatnonzero(song_days >= 0)
+        return float(values[assigned, song_days[assigned] - offsets[assigned], song_hours[assigned]].sum())
+
+    def _initial_slots(self, values: np.ndarray, hours: np.ndarray, offsets: np.ndarray,
+                       n_days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """日ごとに、曲の平均予測視聴数が高い時から順に、制約を満たすスロットを開く"""
+        n_songs, window, n_hours = values.shape
+        finite = np.isfinite(values)
+        day_grid = offsets[:, None] + np.arange(window)[None, :]
+        sums = np.zeros((n_days, n_hours))
+        counts = np.zeros((n_days, n_hours))
+        np.add.at(sums, day_grid, np.where(finite, values, 0.0))
+        np.add.at(counts, day_grid, finite)
+        mean = np.where(counts > 0, sums / np.maximum(counts, 1), -np.inf)
+
+        occupancy = SlotOccupancy()
+        slot_days, slot_hours = [], []
+        for day in range(n_days):
+            for hour_idx in np.argsort(-mean[day], kind='stable'):
+                if not np.isfinite(mean[day, hour_idx]) or occupancy.day_posts(day) >= self.max_posts_per_day:
+                    break
+                hour = int(hours[hour_idx])
+                if occupancy.is_free(day, hour, self.max_posts_per_day, self.min_interval_hours):
+                    occupancy.add_hours(day * 24 + hour)
+                    slot_days.append(day)
+                    slot_hours.append(hour_idx)
+        return np.array(slot_days, dtype=np.int64), np.array(slot_hours, dtype=np.int64)
+
+    @staticmethod
+    def _match(values: np.ndarray, offsets: np.ndarray, songs: np.ndarray,
+               slot_days: np.ndarray, slot_hours: np.ndarray,
+               song_days: np.ndarray, song_hours: np.ndarray):
+        """songs を (slot_days, slot_hours) のスロットに、予測視聴数の合計が最大になるよう割り当て直す"""
+        if not len(songs) or not len(slot_days):
+            return
+        window = values.shape[1]
+        order = np.argsort(slot_days, kind='stable')
+        slot_days, slot_hours = slot_days[order], slot_hours[order]
+
+        # 曲ごとに期間内のスロットを辺にする
+        lo = np.searchsorted(slot_days, offsets[songs], side='left')
+        hi = np.searchsorted(slot_days, offsets[songs] + window, side='left')
+        lengths = hi - lo
+        rows = np.repeat(np.arange(len(songs)), lengths)
+        cols = np.repeat(lo - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+        gains = values[songs[rows], slot_days[cols] - offsets[songs[rows]], slot_hours[cols]]
+        edge = np.isfinite(gains)
+        rows, cols, gains = rows[edge], cols[edge], gains[edge]
+
+        # コストは正の値にする（0 の辺は辺がないものとみなされるため）。ダミーのスロットは最も高い
+        top = gains.max() if len(gains) else 0.0
+        costs = top - gains + 1.0
+        dummy_cost = (costs.max() if len(costs) else 1.0) * (len(songs) + 1)
+        n_slots = len(slot_days)
+        graph = csr_matrix((np.r_[costs, np.full(len(songs), dummy_cost)],
+                            (np.r_[rows, np.arange(len(songs))], np.r_[cols, n_slots + np.arange(len(songs))])),
+                           shape=(len(songs), n_slots + len(songs)))
+        _, matched = min_weight_full_bipartite_matching(graph)
+
+        song_days[songs] = -1
+        song_hours[songs] = -1
+        real = matched < n_slots
+        song_days[songs[real]] = slot_days[matched[real]]
+        song_hours[songs[real]] = slot_hours[matched[real]]
+
+    def _relocate(self, values: np.ndarray, hours: np.ndarray, offsets: np.ndarray,
+                  song_days: np.ndarray, song_hours: np.ndarray):
+        """各曲を、制約を満たす空きスロットのうち予測視聴数が最も高いスロットへ移す（未割り当ての曲は追加する）"""
+        window = values.shape[1]
+        occupancy = SlotOccupancy()
+        for song in np.flatnonzero(song_days >= 0):
+            occupancy.add_hours(int(song_days[song]) * 24 + int(hours[song_hours[song]]))
+
+        for song in range(len(song_days)):
+            day, hour_idx = int(song_days[song]), int(song_hours[song])
+            current = -np.inf
+            if day >= 0:
+                current = values[song, day - offsets[song], hour_idx]
+                occupancy.add_hours(day * 24 + int(hours[hour_idx]), -1)
+
+            free = occupancy.free_mask(int(offsets[song]), window, hours,
+                                       self.max_posts_per_day, self.min_interval_hours)
+            candidates = np.where(free, values[song], -np.inf)
+            best = np.unravel_index(int(np.argmax(candidates)), candidates.shape)
+            if candidates[best] > current:
+                day, hour_idx = int(offsets[song]) + int(best[0]), int(best[1])
+                song_days[song], song_hours[song] = day, hour_idx
+            if day >= 0:
+                occupancy.add_hours(day * 24 + int(hours[hour_idx]))
@@ -0,0 +1,249 @@
+"""
+投稿スロット特徴量ラティス
+スケジューリング期間の (日付, 時) スロットごとに、時間的特徴・チャンネル固有特徴を一度だけ計算しておく
+
+スケジューラーは候補スロットごとに特徴量を作り直す代わりに、ラティスの行を引いて
+曲ごとの特徴（コンテンツ・エンゲージメント）と release_date 関連の特徴をブロードキャストで合成する。
+"""
+
+import datetime
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .columnar_features import STATIC_COLUMNS, ColumnarFeatureBuilder, parse_release_days
+
+# 交互作用特徴の計算に使う列
+_INTERACTION_TEMPORAL = ['is_evening', 'is_night', 'is_afternoon', 'is_weekend', 'is_peak_hour']
+_INTERACTION_CONTENT = ['has_anime_tag', 'has_vocaloid_tag', 'has_pop_tag', 'difficulty_avg']
+
+# スロット特徴の定義のキーを計算する基準の1週間（月曜 0時から）
+_REFERENCE_WEEK = pd.date_range('2024-01-01', periods=7 * 24, freq='h')
+
+
+class SlotFeatureLattice:
+    """(日付, 時) スロットの特徴量ラティス
+
+    スロット番号は日付優先（day_offset * len(hours) + 時のインデックス）。
+    """
+
+    def __init__(self, builder: ColumnarFeatureBuilder, start_date: datetime.date,
+                 days: int = 90, hours: Iterable[int] = range(24)):
+        """
+        Args:
+            builder: 列指向の特徴量ビルダー（FeatureEngineer.columnar_builder）
+            start_date: スケジューリング期間の開始日
+            days: 期間の日数
+            hours: スロットとする時（0-23）
+        """
+        self.builder = builder
+        self.start_date = start_date
+        self.hours = np.array(sorted(set(hours)), dtype=np.int64)
+        self.feature_names: List[str] = builder.feature_names
+        self._column_index = {name: i for i, name in enumerate(self.feature_names)}
+        self._hour_position = np.full(24, -1, dtype=np.int64)
+        self._hour_position[self.hours] = np.arange(len(self.hours))
+
+        # 曲ごとの特徴（コンテンツ・エンゲージメント）
+        self.song_matrix = np.empty((0, len(self.feature_names)), dtype=np.float32)
+        self.song_release_days = np.empty(0, dtype='datetime64[D]')
+        self._song_positions: Dict[str, int] = {}
+        self._song_names: List[str] = []
+        self._static_positions = np.array([self._column_index[name] for name in STATIC_COLUMNS])
+        self._slot_feature_key: Optional[str] = None
+
+        self.days = 0
+        self._build(days)
+
+    def _build(self, days: int):
+        """スロット特徴量を計算"""
+        self.days = days
+        day_offsets = np.repeat(np.arange(days), len(self.hours))
+        slot_hours = np.tile(self.hours, days)
+
+        self.slot_days = np.datetime64(self.start_date, 'D') + day_offsets
+        self.slot_hours = slot_hours
+        targets = pd.DatetimeIndex(self.slot_days.astype('datetime64[ns]')
+                                   + slot_hours * np.timedelta64(1, 'h'))
+
+        columns = self.builder.slot_columns(targets)
+        self.slot_feature_names = list(columns)
+        self.slot_matrix = np.column_stack([columns[name] for name in self.slot_feature_names]).astype(np.float32)
+        self._slot_positions = np.array([self._column_index[name] for name in self.slot_feature_names])
+        self._interaction_temporal = {name: columns[name] for name in _INTERACTION_TEMPORAL}
+
+    def __len__(self) -> int:
+        return len(self.slot_days)
+
+    @property
+    def end_date(self) -> datetime.date:
+        """期間の最終日"""
+        return self.start_date + datetime.timedelta(days=self.days - 1)
+
+    def ensure(self, date: datetime.date):
+        """指定日までラティスを拡張（期間内なら何もしない）"""
+        needed = (date - self.start_date).days + 1
+        if needed > self.days:
+            self._build(max(needed, self.days * 2))
+
+    # ------------------------------------------------------------------
+    # スロット
+    # ------------------------------------------------------------------
+
+    def slot_index(self, date: datetime.date, hour: int) -> int:
+        """(日付, 時) のスロット番号（期間外・対象外の時は KeyError）"""
+        day_offset = (date - self.start_date).days
+        if day_offset < 0 or not 0 <= hour < 24 or self._hour_position[hour] < 0:
+            raise KeyError((date, hour))
+        self.ensure(date)
+        return day_offset * len(self.hours) + int(self._hour_position[hour])
+
+    def slot_indices(self, date: datetime.date, hours: Optional[Sequence[int]] = None) -> np.ndarray:
+        """指定日の（指定した時の）スロット番号の配列"""
+        hours = self.hours if hours is None else hours
+        return np.array([self.slot_index(date, hour) for hour in hours], dtype=np.int64)
+
+    def slot_grid(self, dates: Sequence[datetime.date], hours: Sequence[int]) -> np.ndarray:
+        """日付 × 時のスロット番号の行列 [日付数 x 時の数]"""
+        hours = np.asarray(hours, dtype=np.int64)
+        if len(dates) == 0:
+            return np.empty((0, len(hours)), dtype=np.int64)
+        day_offsets = np.array([(date - self.start_date).days for date in dates], dtype=np.int64)
+        if (day_offsets < 0).any() or ((hours < 0) | (hours > 23)).any() or (self._hour_position[hours] < 0).any():
+            raise KeyError((dates, hours))
+        self.ensure(max(dates))
+        return day_offsets[:, None] * len(self.hours) + self._hour_position[hours][None, :]
+
+    def slot_epoch_hours(self, slots: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """スロット番号 -> 絶対時刻（1970-01-01 からの時間数、ラティスの開始日に依存しない）"""
+        slots = np.asarray(slots, dtype=np.int64)
+        return self.slot_days[slots].astype(np.int64) * 24 + self.slot_hours[slots]
+
+    @property
+    def slot_feature_key(self) -> str:
+        """スロット特徴の定義のキー（列構成とチャンネル固有特徴のテーブルで変わる）
+
+        スロット特徴は投稿日時だけで決まり、曜日・時以外は周期的なため、基準の1週間の値で判定する。
+        """
+        if self._slot_feature_key is None:
+            columns = self.builder.slot_columns(_REFERENCE_WEEK)
+            digest = hashlib.sha1(','.join(self.feature_names).encode('utf-8'))
+            for name in sorted(columns):
+                digest.update(name.encode('utf-8'))
+                digest.update(np.ascontiguousarray(columns[name], dtype=np.float64).tobytes())
+            self._slot_feature_key = digest.hexdigest()[:16]
+        return self._slot_feature_key
+
+    def slot_datetime(self, slot: int) -> datetime.datetime:
+        """スロット番号 -> 投稿日時"""
+        date = self.start_date + datetime.timedelta(days=int(slot) // len(self.hours))
+        return datetime.datetime.combine(date, datetime.time(hour=int(self.slot_hours[slot])))
+
+    # ------------------------------------------------------------------
+    # 曲
+    # ------------------------------------------------------------------
+
+    def add_songs(self, songs: Sequence[Dict[str, Any]],
+                  taiko_data_map: Optional[Dict[str, Dict[str, Any]]] = None) -> np.ndarray:
+        """曲ごとの特徴を計算して登録（アーティスト統計はこの曲リスト全体で計算）
+
+        Args:
+            songs: 曲データのリスト
+            taiko_data_map: 曲名 -> TaikoGameデータのマッピング
+
+        Returns:
+            登録した曲の番号の配列
+        """
+        songs = list(songs)
+        if not songs:
+            return np.empty(0, dtype=np.int64)
+
+        matrix, _ = self.builder.build(songs, taiko_data_map,
+                                       datetime.datetime.combine(self.start_date, datetime.time()))
+        offset = len(self.song_matrix)
+        self.song_matrix = np.vstack([self.song_matrix, matrix])
+        self.song_release_days = np.concatenate([self.song_release_days, parse_release_days(songs)])
+
+        for i, song in enumerate(songs):
+            self._song_positions[song.get('song_name', '')] = offset + i
+        self._song_names.extend(str(song.get('song_name', '')) for song in songs)
+        return np.arange(offset, offset + len(songs))
+
+    def song_index(self, song: Dict[str, Any],
+                   taiko_data_map: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+        """曲名から曲の番号を取得（未登録なら単独で登録）"""
+        position = self._song_positions.get(song.get('song_name', ''))
+        if position is None:
+            position = int(self.add_songs([song], taiko_data_map)[0])
+        return position
+
+    def song_key(self, song: int) -> str:
+        """曲のキー（曲名と、投稿日時に依存しない特徴・リリース日の内容）
+
+        アーティスト統計は一緒に登録した曲リストで変わるため、曲名だけでなく特徴の値で判定する。
+        """
+        digest = hashlib.sha1(self._song_names[song].encode('utf-8'))
+        digest.update(np.ascontiguousarray(self.song_matrix[song, self._static_positions]).tobytes())
+        digest.update(str(self.song_release_days[song]).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def candidate_features(self, song: int, slots: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """曲 × 候補スロットの特徴量行列（列順は feature_names）
+
+        Args:
+            song: 曲の番号（add_songs / song_index の戻り値）
+            slots: スロット番号の配列
+
+        Returns:
+            float32の特徴量行列 [スロット数 x 特徴量数]
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        base = self.song_matrix[song]
+
+        features = np.empty((len(slots), len(self.feature_names)), dtype=np.float32)
+        features[:] = base
+        features[:, self._slot_positions] = self.slot_matrix[slots]
+
+        release = self.builder.release_columns(self.slot_days[slots], self.song_release_days[song])
+        temporal = {name: values[slots] for name, values in self._interaction_temporal.items()}
+        content = {name: base[self._column_index[name]] for name in _INTERACTION_CONTENT}
+        interactions = self.builder.interaction_columns(temporal, content)
+
+        for name, values in {**release, **interactions}.items():
+            features[:, self._column_index[name]] = values
+        return features
+
+    def candidate_block(self, songs: Union[Sequence[int], np.ndarray],
+                        slots: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """曲 × スロットのすべての組み合わせの特徴量（ブロードキャストで一括計算）
+
+        Args:
+            songs: 曲の番号の配列
+            slots: スロット番号の配列
+
+        Returns:
+            float32の特徴量テンソル [曲数 x スロット数 x 特徴量数]
+        """
+        songs = np.asarray(songs, dtype=np.int64)
+        slots = np.asarray(slots, dtype=np.int64)
+        base = self.song_matrix[songs]
+
+        block = np.empty((len(songs), len(slots), len(self.feature_names)), dtype=np.float32)
+        block[:] = base[:, None, :]
+        block[:, :, self._slot_positions] = self.slot_matrix[slots][None, :, :]
+
+        release = self.builder.release_columns(self.slot_days[slots][None, :],
+                                               self.song_release_days[songs][:, None])
+        temporal = {name: values[slots][None, :] for name, values in self._interaction_temporal.items()}
+        content = {name: base[:, self._column_index[name]][:, None] for name in _INTERACTION_CONTENT}
+        interactions = self.builder.interaction_columns(temporal, content)
+
+        for name, values in {**release, **interactions}.items():
+            block[:, :, self._column_index[name]] = values
+        return block
+
+    def candidate_frame(self, song: int, slots: Union[Sequence[int], np.ndarray]) -> pd.DataFrame:
+        """candidate_features をDataFrameで返す（ViewCountPredictor.predict 用）"""
+        return pd.DataFrame(self.candidate_features(song, slots), columns=self.feature_names, copy=False)
@@ -0,0 +1,156 @@
+"""
+投稿スロットの占有状況の索引
+スケジューラ・検証・RL環境の制約チェック（1日・1週間あたりの投稿数、最も近い投稿との間隔）で共有する
+
+- 時ごと・日ごとの投稿数: 必要に応じて前後に拡張する配列（時ごとの配列は時単位のビットマップ）
+- 投稿時刻: 時刻順のリスト（二分探索で直前・直後・最も近い投稿を求める）
+
+時刻は 0001-01-01 0時からの経過時間（内部ではマイクロ秒の整数）で扱うため、日付を持たない
+呼び出し側（SlotAssigner）は 日の番号 × 24 + 時 をそのまま使える。
+"""
+
+import bisect
+import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+MICROSECONDS_PER_HOUR = 3600 * 10 ** 6
+
+
+def _key_of(when: datetime.datetime) -> int:
+    """日時 -> 0001-01-01 0時からの経過時間（マイクロ秒）"""
+    seconds = ((when.toordinal() * 24 + when.hour) * 60 + when.minute) * 60 + when.second
+    return seconds * 10 ** 6 + when.microsecond
+
+
+def _datetime_of(key: int) -> datetime.datetime:
+    """0001-01-01 0時からの経過時間（マイクロ秒） -> 日時"""
+    day, rest = divmod(key, 24 * MICROSECONDS_PER_HOUR)
+    return (datetime.datetime.combine(datetime.date.fromordinal(day), datetime.time())
+            + datetime.timedelta(microseconds=rest))
+
+
+class SlotOccupancy:
+    """投稿済みの日時の索引（日・週の投稿数は O(1)、最も近い投稿は O(log n)）"""
+
+    def __init__(self, posts: Iterable[datetime.datetime] = ()):
+        """
+        Args:
+            posts: 投稿済みの日時
+        """
+        self._times: List[int] = []
+        self._first_day = 0
+        self._hourly = np.zeros(0, dtype=np.int64)
+        self._daily = np.zeros(0, dtype=np.int64)
+        for when in posts:
+            self.add(when)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def _ensure(self, first_day: int, last_day: int):
+        """first_day から last_day までの日の配列を確保（倍々で前後に拡張）"""
+        if not len(self._daily):
+            self._first_day = first_day
+            self._daily = np.zeros(max(last_day - first_day + 1, 64), dtype=np.int64)
+            self._hourly = np.zeros(len(self._daily) * 24, dtype=np.int64)
+            return
+        end_day = self._first_day + len(self._daily)
+        if first_day >= self._first_day and last_day < end_day:
+            return
+        size = len(self._daily)
+        new_first = min(first_day, self._first_day - size if first_day < self._first_day else self._first_day)
+        new_end = max(last_day + 1, end_day + size if last_day >= end_day else end_day)
+        daily = np.zeros(new_end - new_first, dtype=np.int64)
+        hourly = np.zeros(len(daily) * 24, dtype=np.int64)
+        shift = self._first_day - new_first
+        daily[shift:shift + size] = self._daily
+        hourly[shift * 24:(shift + size) * 24] = self._hourly
+        self._first_day, self._daily, self._hourly = new_first, daily, hourly
+
+    def _add_key(self, key: int, count: int):
+        slot = key // MICROSECONDS_PER_HOUR
+        day = slot // 24
+        self._ensure(day, day)
+        for _ in range(count):
+            bisect.insort(self._times, key)
+        for _ in range(-count):
+            index = bisect.bisect_left(self._times, key)
+            if index == len(self._times) or self._times[index] != key:
+                raise KeyError(f"投稿がありません: {_datetime_of(key)}")
+            del self._times[index]
+        self._hourly[slot - self._first_day * 24] += count
+        self._daily[day - self._first_day] += count
+
+    def add_hours(self, hours: int, count: int = 1):
+        """経過時間 hours（日の番号 × 24 + 時）の投稿を count 件追加（負の値で削除）"""
+        self._add_key(int(hours) * MICROSECONDS_PER_HOUR, count)
+
+    def add(self, when: datetime.datetime):
+        """投稿を追加"""
+        self._add_key(_key_of(when), 1)
+
+    def remove(self, when: datetime.datetime):
+        """投稿を削除"""
+        self._add_key(_key_of(when), -1)
+
+    def times(self) -> List[datetime.datetime]:
+        """時刻順の投稿日時"""
+        return [_datetime_of(key) for key in self._times]
+
+    def latest(self) -> Optional[datetime.datetime]:
+        """最も遅い投稿"""
+        return _datetime_of(self._times[-1]) if self._times else None
+
+    def day_posts(self, day: int) -> int:
+        """日の番号（date.toordinal()）の投稿数"""
+        index = day - self._first_day
+        return int(self._daily[index]) if 0 <= index < len(self._daily) else 0
+
+    def posts_on_day(self, date: datetime.date) -> int:
+        """その日の投稿数"""
+        return self.day_posts(date.toordinal())
+
+    def posts_in_week(self, date: datetime.date) -> int:
+        """その日を含む週（月曜始まり）の投稿数"""
+        monday = date.toordinal() - date.weekday()
+        return sum(self.day_posts(day) for day in range(monday, monday + 7))
+
+    def hours_to_nearest(self, when: datetime.datetime) -> float:
+        """日時から最も近い投稿までの時間（投稿がなければ inf）"""
+        key = _key_of(when)
+        index = bisect.bisect_left(self._times, key)
+        gaps = [abs(self._times[i] - key) for i in (index - 1, index) if 0 <= i < len(self._times)]
+        return min(gaps, default=float('inf')) / MICROSECONDS_PER_HOUR
+
+    def free_mask(self, first_day: int, n_days: int, hours: np.ndarray,
+                  max_posts_per_day: int, min_interval_hours: int) -> np.ndarray:
+        """first_day から n_days 日の 日 × 時 のうち、投稿を追加しても制約を満たすスロット
+
+        間隔は時単位で数える（時ちょうどの投稿を前提とする）。
+
+        Args:
+            first_day: 最初の日の番号
+            n_days: 日数
+            hours: 候補の時（0-23）
+            max_posts_per_day: 1日あたりの最大投稿数
+            min_interval_hours: 最低投稿間隔（時間、1以上）
+
+        Returns:
+            [日数 x 時の数] の真偽値配列
+        """
+        pad = max(1, int(min_interval_hours))
+        margin = (pad + 23) // 24
+        self._ensure(first_day - margin, first_day + n_days + margin)
+        start = (first_day - self._first_day) * 24 - pad
+        counts = np.concatenate([[0], np.cumsum(self._hourly[start:start + n_days * 24 + 2 * pad])])
+        t = np.arange(n_days)[:, None] * 24 + np.asarray(hours)[None, :]
+        # 間隔が min_interval_hours 未満になる前後の投稿数
+        conflicts = counts[t + 2 * pad] - counts[t + 1]
+        daily = self._daily[first_day - self._first_day:first_day - self._first_day + n_days]
+        return (conflicts == 0) & (daily[:, None] < max_posts_per_day)
+
+    def is_free(self, day: int, hour: int, max_posts_per_day: int, min_interval_hours: int) -> bool:
+        """日の番号 × 時のスロットに投稿を追加しても制約を満たすか"""
+        return bool(self.free_mask(day, 1, np.array([hour]), max_posts_per_day, min_interval_hours)[0, 0])
@@ -0,0 +1,174 @@
+"""
+タグ語彙とスパースなマルチホット行列
+TaikoGameデータの tags 列（JSON配列の文字列）をJSONとして安全に解析し、
+曲ごとのタグを scipy の CSR 行列として表す
+"""
+
+import ast
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# TaikoGameデータのCSV（語彙の構築に使用）
+DEFAULT_TAG_SOURCES = [
+    'filtered data/taiko_server_未投稿_filtered.csv',
+    'filtered data/taiko_server_リリース_開発中_filtered.csv',
+]
+
+# 個別のフラグ特徴量にしているタグ
+FLAG_TAGS = {
+    'has_vocaloid_tag': 'ボカロ',
+    'has_anime_tag': 'アニメ',
+    'has_pop_tag': 'ポップス',
+    'has_game_tag': 'ゲーム',
+}
+
+
+def parse_tags(value: Any) -> List[str]:
+    """tags 列の値をタグのリストに変換（解析できない値は空リスト）
+
+    JSON配列（'["ボカロ", "アニメ"]'）として解析し、シングルクォートの
+    Pythonリテラル形式のみ ast.literal_eval で受け付ける（eval は使わない）。
+    """
+    if isinstance(value, (list, tuple)):
+        parsed = value
+    elif not isinstance(value, str) or not value.strip():
+        return []
+    else:
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            try:
+                parsed = ast.literal_eval(value)
+            except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+                return []
+
+    if not isinstance(parsed, (list, tuple)):
+        return []
+    return [str(tag) for tag in parsed if isinstance(tag, str) and tag]
+
+
+class TagVocabulary:
+    """タグ語彙（タグ -> 列番号）と、tags 文字列ごとの解析結果のキャッシュ
+
+    未知のタグは出現した時点で語彙に追加されるため、行列の列数は語彙とともに増える。
+    """
+
+    def __init__(self, tags: Iterable[str] = ()):
+        """
+        Args:
+            tags: 初期の語彙
+        """
+        self.index: Dict[str, int] = {}
+        self._row_cache: Dict[Any, np.ndarray] = {}
+        for tag in list(FLAG_TAGS.values()) + list(tags):
+            self.add(tag)
+
+    @classmethod
+    def from_csv(cls, paths: Optional[Sequence[str]] = None, column: str = 'tags') -> 'TagVocabulary':
+        """TaikoGameデータのCSVから語彙を構築（存在しないファイルは無視）
+
+        Args:
+            paths: CSVのパス（省略時は DEFAULT_TAG_SOURCES）
+            column: タグの列名
+
+        Returns:
+            TagVocabulary
+        """
+        vocabulary = cls()
+        for path in DEFAULT_TAG_SOURCES if paths is None else paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                values = pd.read_csv(path, usecols=[column])[column]
+            except (OSError, ValueError):
+                continue
+            # ユニークな文字列ごとに1回だけ解析し、キャッシュにも載せる
+            for value in values.dropna().unique():
+                vocabulary.encode_one(value)
+        return vocabulary
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.index
+
+    @property
+    def tags(self) -> List[str]:
+        """列番号順のタグ"""
+        return list(self.index)
+
+    def add(self, tag: str) -> int:
+        """タグを語彙に追加して列番号を返す"""
+        position = self.index.get(tag)
+        if position is None:
+            position = self.index[tag] = len(self.index)
+        return position
+
+    def encode_one(self, value: Any) -> np.ndarray:
+        """tags の値 -> タグの列番号の配列（文字列ごとにキャッシュ）"""
+        key = self._cache_key(value)
+        columns = self._row_cache.get(key)
+        if columns is None:
+            unique_tags = dict.fromkeys(parse_tags(key))
+            columns = np.array([self.add(tag) for tag in unique_tags], dtype=np.int32)
+            self._row_cache[key] = columns
+        return columns
+
+    @staticmethod
+    def _cache_key(value: Any) -> Optional[str]:
+        """キャッシュのキー（リストはJSON文字列に、文字列以外は None に揃える）"""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (list, tuple)):
+            return json.dumps(list(value), ensure_ascii=False)
+        return None
+
+    def decode(self, columns: np.ndarray) -> List[str]:
+        """列番号の配列 -> タグのリスト"""
+        tags = self.tags
+        return [tags[column] for column in columns]
+
+    def encode(self, values: Sequence[Any]) -> sparse.csr_matrix:
+        """tags の値の列 -> マルチホットのCSR行列 [行数 x 語彙数]
+
+        Args:
+            values: 曲ごとの tags の値（JSON文字列・リスト・None）
+
+        Returns:
+            float32 の CSR 行列
+        """
+        keys = pd.Series([self._cache_key(value) for value in values], dtype=object)
+        codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        unique_rows = [self.encode_one(value) for value in uniques]
+
+        # ユニーク値ごとの列番号を連結し、各行の範囲をまとめて引く
+        unique_lengths = np.array([len(row) for row in unique_rows], dtype=np.int64)
+        unique_starts = np.zeros(len(unique_rows), dtype=np.int64)
+        np.cumsum(unique_lengths[:-1], out=unique_starts[1:])
+        flat = np.concatenate(unique_rows) if unique_rows else np.empty(0, dtype=np.int32)
+
+        lengths = unique_lengths[codes]
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        gather = np.repeat(unique_starts[codes] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        indices = flat[gather].astype(np.int32)
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(codes), len(self.index)))
+
+    def flag_columns(self, matrix: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+        """CSR行列からタグ数と個別フラグの列を取り出す
+
+        Returns:
+            tag_count / has_*_tag -> float64 配列 の辞書
+        """
+        columns = {'tag_count': np.diff(matrix.indptr).astype(np.float64)}
+        # フラグのタグは常に語彙に含まれる（__init__ で追加）
+        for name, tag in FLAG_TAGS.items():
+            columns[name] = matrix[:, self.index[tag]].toarray().ravel().astype(np.float64)
+        return columns
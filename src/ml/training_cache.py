@@ -0,0 +1,172 @@
+"""
+訓練データのバイナリキャッシュモジュール
+特徴量行列・ターゲット・カラムスキーマを .npy で保存し、メモリマップで読み込む
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 特徴量の定義を変更した場合はこの値を上げてキャッシュを無効化する
+FEATURE_SCHEMA_VERSION = 1
+
+
+def source_fingerprint(*paths: str, extra: str = '') -> str:
+    """ソースファイルのフィンガープリントを計算
+
+    ファイル内容ではなくパス・サイズ・更新時刻から算出するため、
+    大きなJSONでも読み込まずに判定できる。
+
+    Args:
+        paths: ソースファイルのパス（存在しないファイルも可）
+        extra: フィンガープリントに含める追加情報（対象日時など）
+
+    Returns:
+        フィンガープリント文字列
+    """
+    digest = hashlib.sha1()
+    digest.update(f"schema={FEATURE_SCHEMA_VERSION};{extra}".encode('utf-8'))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+        except OSError:
+            digest.update(f"{os.path.abspath(path)}:missing;".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def data_digest(*values: Any) -> str:
+    """値（曲データ・TaikoGameデータなど）の内容のフィンガープリント
+
+    JSONに直列化してハッシュするため、ファイルを持たないデータや、読み込み後に
+    加工したデータも内容で判定できる。
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def default_cache_dir(source_path: str) -> str:
+    """ソースファイルの隣に置くキャッシュディレクトリ（例: ML_training_data_enriched.cache）"""
+    root, _ = os.path.splitext(source_path)
+    return root + '.cache'
+
+
+class TrainingCache:
+    """訓練データのメモリマップ可能なバイナリキャッシュ
+
+    ディレクトリ構成:
+        X.npy        特徴量行列（float64, C順）
+        y.npy        ターゲット配列
+        schema.json  カラム名・dtype・行数・フィンガープリント
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: キャッシュディレクトリ
+        """
+        self.cache_dir = cache_dir
+        self.x_path = os.path.join(cache_dir, 'X.npy')
+        self.y_path = os.path.join(cache_dir, 'y.npy')
+        self.schema_path = os.path.join(cache_dir, 'schema.json')
+
+    def load(self, fingerprint: str) -> Optional[Tuple[pd.DataFrame, np.ndarray, List[str]]]:
+        """キャッシュを読み込み（ゼロコピー）
+
+        Args:
+            fingerprint: 期待するソースのフィンガープリント
+
+        Returns:
+            (特徴量DataFrame, ターゲット配列, 特徴量名リスト)。無効な場合はNone
+        """
+        try:
+            with open(self.schema_path, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if schema.get('fingerprint') != fingerprint:
+            return None
+
+        try:
+            X = np.load(self.x_path, mmap_mode='r')
+            y = np.load(self.y_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        feature_names = schema['columns']
+        if X.shape != (schema['n_rows'], len(feature_names)) or len(y) != schema['n_rows']:
+            return None
+
+        # 単一dtypeの2次元配列なのでメモリマップをそのまま参照する
+        features_df = pd.DataFrame(X, columns=feature_names, copy=False)
+        return features_df, y, feature_names
+
+    def save(self, fingerprint: str, X: pd.DataFrame, y: np.ndarray,
+             feature_names: List[str]):
+        """キャッシュを保存（一時ファイル経由でアトミックに置換）
+
+        Args:
+            fingerprint: ソースのフィンガープリント
+            X: 特徴量DataFrame
+            y: ターゲット配列
+            feature_names: 特徴量名リスト
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        matrix = np.ascontiguousarray(X[feature_names].to_numpy(dtype=np.float64))
+        targets = np.ascontiguousarray(np.asarray(y, dtype=np.float64))
+
+        for path, array in ((self.x_path, matrix), (self.y_path, targets)):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+
+        schema = {
+            'fingerprint': fingerprint,
+            'columns': list(feature_names),
+            'dtype': 'float64',
+            'n_rows': int(matrix.shape[0]),
+        }
+        tmp_path = self.schema_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(schema, f, ensure_ascii=False, indent=2)
+        # スキーマは最後に置換し、行列が揃ってから有効になるようにする
+        os.replace(tmp_path, self.schema_path)
+
+    def get_or_build(self, fingerprint: str,
+                     build_fn: Callable[[], Tuple[pd.DataFrame, np.ndarray, List[str]]],
+                     verbose: bool = True) -> Tuple[pd.DataFrame, np.ndarray, List[str]]:
+        """キャッシュがあれば読み込み、なければ構築して保存
+
+        Args:
+            fingerprint: ソースのフィンガープリント
+            build_fn: (特徴量DataFrame, ターゲット配列, 特徴量名リスト) を返す関数
+            verbose: 進捗表示
+
+        Returns:
+            (特徴量DataFrame, ターゲット配列, 特徴量名リスト)
+        """
+        cached = self.load(fingerprint)
+        if cached is not None:
+            if verbose:
+                print(f"✓ 訓練データキャッシュを使用: {self.cache_dir} ({len(cached[1])}件)")
+            return cached
+
+        X, y, feature_names = build_fn()
+        try:
+            self.save(fingerprint, X, y, feature_names)
+            if verbose:
+                print(f"✓ 訓練データキャッシュを保存: {self.cache_dir}")
+        except OSError as e:
+            print(f"⚠ 訓練データキャッシュの保存に失敗: {e}")
+
+        return X, y, feature_names
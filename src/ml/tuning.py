@@ -0,0 +1,278 @@
+"""
+視聴数予測モデルの並列クロスバリデーションとハイパーパラメータ探索
+時系列分割の各fold・各候補設定をプロセス並列で訓練し、successive halving で
+成績の悪い設定を早期に打ち切る
+
+- 特徴量行列は最初に1回だけ .npy に書き出し、ワーカーはメモリマップで読む（foldごとの再特徴量化・転送なし）
+- ワーカーごとのBLAS/OpenMP・TensorFlowのスレッド数を、リソースガバナー（src.utils.resources）が
+  割り当てたスレッド数に制限する（過剰な並列を防ぐ。動画の書き出しと同時に動く場合はコアを分け合う）
+- 結果はリーダーボード（JSON）に書き出し、訓練（src.actions.ml_rl_schedule_optimization）は
+  load_best_config() で最上位の設定を使う
+
+実行: python -m src.ml.tuning（メニューの「11. MLハイパーパラメータ探索」と同じ）
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.model_selection import TimeSeriesSplit
+from threadpoolctl import threadpool_limits
+
+from ..utils.resources import get_governor, limit_process_threads
+
+# 既定のリーダーボードの保存先
+DEFAULT_LEADERBOARD_PATH = 'models/tuning_leaderboard.json'
+
+
+def default_search_space() -> List[Dict[str, Any]]:
+    """既定の候補設定（hgb のグリッドと、比較用の gbr）
+
+    Returns:
+        {'name', 'backend', 'backend_params', 'train_params'} のリスト
+    """
+    candidates = []
+    for learning_rate in (0.05, 0.1):
+        for max_leaf_nodes in (15, 31, 63):
+            for min_samples_leaf in (5, 20):
+                candidates.append({
+                    'name': f"hgb_lr{learning_rate}_leaf{max_leaf_nodes}_min{min_samples_leaf}",
+                    'backend': 'hgb',
+                    'backend_params': {'learning_rate': learning_rate, 'max_leaf_nodes': max_leaf_nodes,
+                                       'min_samples_leaf': min_samples_leaf},
+                })
+    candidates.append({'name': 'gbr', 'backend': 'gbr'})
+    return candidates
+
+
+def _evaluate_fold(data_dir: str, config: Dict[str, Any], fold: int,
+                   train_idx: np.ndarray, val_idx: np.ndarray,
+                   n_threads: Optional[int] = None, interop_threads: int = 1) -> Dict[str, Any]:
+    """1つの設定を1つのfoldで訓練・評価（ワーカープロセスで実行）"""
+    if n_threads is not None:
+        # TensorFlowは読み込み時にスレッド数を決めるため、モデルを読み込む前に制限する
+        limit_process_threads(n_threads, interop_threads)
+    from .scheduler import ViewCountPredictor
+
+    X = np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(data_dir, 'y.npy'))
+
+    predictor = ViewCountPredictor(input_dim=X.shape[1], backend=config.get('backend', 'auto'),
+                                   backend_params=config.get('backend_params'))
+    train_params = {'validation_split': 0, 'epochs': 50, 'verbose': 0}
+    train_params.update(config.get('train_params', {}))
+
+    start = time.perf_counter()
+    predictor.train(np.asarray(X[train_idx]), y[train_idx], **train_params)
+    fit_seconds = time.perf_counter() - start
+
+    pred_views, _ = predictor.predict(np.asarray(X[val_idx]))
+
+    y_val = y[val_idx]
+    return {
+        'name': config['name'], 'fold': fold, 'fit_seconds': fit_seconds,
+        'mae': float(np.mean(np.abs(pred_views - y_val))),
+        'log_mae': float(np.mean(np.abs(np.log1p(np.maximum(pred_views, 0)) - np.log1p(y_val)))),
+    }
+
+
+class FoldRunner:
+    """時系列分割のfoldを並列に評価する
+
+    特徴量行列とターゲットを一時ディレクトリに1回だけ書き出し、すべての評価で共有する。
+    """
+
+    def __init__(self, X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
+                 n_splits: int = 5, n_jobs: int = -1, cache_dir: Optional[str] = None):
+        """
+        Args:
+            X: 特徴量DataFrameまたは配列（時系列順）
+            y: ターゲット配列（視聴数）
+            n_splits: 分割数
+            n_jobs: 並列プロセス数（-1 で全コア、1 で逐次実行）
+            cache_dir: fold用データの書き出し先（省略時は一時ディレクトリ）
+        """
+        self.n_splits = n_splits
+        self.n_jobs = effective_n_jobs(n_jobs)
+        # ワーカーあたりのスレッド数（close() まで割り当てを保持する）
+        self.lease = get_governor().acquire('ml', jobs=self.n_jobs)
+        self.n_threads = self.lease.threads
+        self.folds = list(TimeSeriesSplit(n_splits=n_splits).split(np.zeros(len(y))))
+
+        self._owns_dir = cache_dir is None
+        self.data_dir = tempfile.mkdtemp(prefix='view_cv_') if cache_dir is None else cache_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+        matrix = X.to_numpy(dtype=np.float32) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float32)
+        np.save(os.path.join(self.data_dir, 'X.npy'), np.ascontiguousarray(matrix))
+        np.save(os.path.join(self.data_dir, 'y.npy'), np.asarray(y, dtype=np.float64))
+
+    def run(self, tasks: Sequence[Tuple[Dict[str, Any], int]]) -> List[Dict[str, Any]]:
+        """(設定, fold番号) の組をまとめて評価
+
+        Returns:
+            評価結果（name / fold / fit_seconds / mae / log_mae）のリスト（tasks と同じ順）
+        """
+        if self.n_jobs == 1 or len(tasks) <= 1:
+            # 呼び出し元のプロセスでは一時的に制限する
+            with threadpool_limits(limits=self.n_threads):
+                return [_evaluate_fold(self.data_dir, config, fold, *self.folds[fold]) for config, fold in tasks]
+        jobs = [delayed(_evaluate_fold)(self.data_dir, config, fold, *self.folds[fold],
+                                        self.n_threads, self.lease.interop_threads)
+                for config, fold in tasks]
+        return Parallel(n_jobs=min(self.n_jobs, len(jobs)), backend='loky',
+                        inner_max_num_threads=self.n_threads)(jobs)
+
+    def close(self):
+        """スレッドの割り当てを返し、一時ディレクトリを削除"""
+        self.lease.release()
+        if self._owns_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def __enter__(self) -> 'FoldRunner':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def successive_halving(X: Union[pd.DataFrame, np.ndarray], y: np.ndarray,
+                       candidates: Optional[List[Dict[str, Any]]] = None,
+                       n_splits: int = 5, min_folds: int = 1, eta: int = 3,
+                       metric: str = 'mae', n_jobs: int = -1,
+                       leaderboard_path: Optional[str] = DEFAULT_LEADERBOARD_PATH,
+                       feature_names: Optional[Sequence[str]] = None,
+                       verbose: int = 1) -> pd.DataFrame:
+    """successive halving によるハイパーパラメータ探索
+
+    ラウンドごとに評価するfold数を eta 倍に増やし、平均スコアの上位 1/eta の設定だけを残す。
+    直近のfold（訓練データが最も多く、本番に近い）から順に使う。
+
+    Args:
+        X: 特徴量DataFrameまたは配列（時系列順）
+        y: ターゲット配列（視聴数）
+        candidates: 候補設定のリスト（省略時は default_search_space()）
+        n_splits: 時系列分割数
+        min_folds: 最初のラウンドで評価するfold数
+        eta: 1ラウンドで残す割合の逆数
+        metric: 順位付けに使う指標（'mae' または 'log_mae'）
+        n_jobs: 並列プロセス数
+        leaderboard_path: リーダーボードの保存先（None の場合は保存しない）
+        feature_names: リーダーボードに記録する特徴量名（省略時は X の列名）
+        verbose: 詳細度
+
+    Returns:
+        設定ごとの成績（順位順）の DataFrame
+    """
+    candidates = default_search_space() if candidates is None else candidates
+    names = [config['name'] for config in candidates]
+    if len(set(names)) != len(names):
+        raise ValueError("候補設定の name が重複しています")
+
+    scores: Dict[str, List[Dict[str, Any]]] = {name: [] for name in names}
+    rounds: Dict[str, int] = {name: 0 for name in names}
+    alive = list(candidates)
+    n_folds = min(max(1, min_folds), n_splits)
+    # 新しいfoldから使う
+    fold_order = list(range(n_splits))[::-1]
+    start = time.perf_counter()
+
+    with FoldRunner(X, y, n_splits=n_splits, n_jobs=n_jobs) as runner:
+        round_number = 0
+        while True:
+            round_number += 1
+            tasks = [(config, fold) for config in alive for fold in fold_order[:n_folds]
+                     if fold not in {result['fold'] for result in scores[config['name']]}]
+            if verbose:
+                print(f"ラウンド{round_number}: {len(alive)}設定 × {n_folds}fold "
+                      f"（{len(tasks)}件を{runner.n_jobs}プロセスで評価）")
+            for result in runner.run(tasks):
+                scores[result['name']].append(result)
+            for config in alive:
+                rounds[config['name']] = round_number
+
+            if n_folds >= n_splits or len(alive) <= 1:
+                break
+            ranked = sorted(alive, key=lambda config: np.mean([r[metric] for r in scores[config['name']]]))
+            alive = ranked[:max(1, len(ranked) // eta)]
+            n_folds = min(n_folds * eta, n_splits)
+
+    rows = []
+    by_name = {config['name']: config for config in candidates}
+    for name, results in scores.items():
+        rows.append({
+            'name': name,
+            'mae': float(np.mean([r['mae'] for r in results])),
+            'log_mae': float(np.mean([r['log_mae'] for r in results])),
+            'n_folds': len(results),
+            'rounds': rounds[name],
+            'fit_seconds': float(np.sum([r['fit_seconds'] for r in results])),
+            'config': by_name[name],
+        })
+    # 多くのfoldで評価された（後のラウンドまで残った）設定を上位にする
+    leaderboard = pd.DataFrame(rows).sort_values(['rounds', metric], ascending=[False, True])
+    leaderboard = leaderboard.reset_index(drop=True)
+
+    if verbose:
+        print(f"\n探索完了（{time.perf_counter() - start:.1f}秒）:")
+        for rank, row in enumerate(leaderboard.head(5).itertuples(), 1):
+            print(f"  {rank}. {row.name}: MAE {row.mae:,.0f}  log MAE {row.log_mae:.4f}（{row.n_folds}fold）")
+
+    if leaderboard_path:
+        if feature_names is None and isinstance(X, pd.DataFrame):
+            feature_names = X.columns.tolist()
+        write_leaderboard(leaderboard, leaderboard_path, metric=metric, n_splits=n_splits,
+                          feature_names=list(feature_names) if feature_names is not None else None)
+    return leaderboard
+
+
+def write_leaderboard(leaderboard: pd.DataFrame, path: str = DEFAULT_LEADERBOARD_PATH, **meta):
+    """リーダーボードをJSONとして保存"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    payload = dict(meta, created_at=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   entries=leaderboard.to_dict(orient='records'))
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def load_best_config(path: str = DEFAULT_LEADERBOARD_PATH,
+                     feature_names: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """リーダーボードの最上位の設定
+
+    Args:
+        path: リーダーボードのJSON
+        feature_names: 現在の特徴量名。指定した場合、探索時の特徴量名と一致しない
+            （または記録がない）リーダーボードは警告を出して無視する
+
+    Returns:
+        {'name', 'backend', 'backend_params', 'train_params'}（リーダーボードがない場合は None）
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        entries = payload.get('entries') or []
+    except (OSError, ValueError, AttributeError):
+        return None
+    config = entries[0].get('config') if entries and isinstance(entries[0], dict) else None
+    if not (isinstance(config, dict) and config.get('name')):
+        return None
+
+    if feature_names is not None:
+        stored = payload.get('feature_names')
+        if stored is None or list(stored) != list(feature_names):
+            detail = ("特徴量名の記録がありません" if stored is None
+                      else f"探索時 {len(stored)}列 / 現在 {len(feature_names)}列")
+            print(f"⚠ 特徴量が探索時と異なるため、チューニング結果を使いません（{detail}）: {path}")
+            return None
+    return config
+
+if __name__ == '__main__':
+    # python -m src.ml.tuning
+    from ..actions import ml_tune_hyperparameters
+    ml_tune_hyperparameters()
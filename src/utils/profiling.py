@@ -0,0 +1,300 @@
+"""Stage-level timing for the ML/RL pipeline.
+
+Spans record wall time, CPU time, peak RSS and an optional row count. A run
+writes them as a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev)
+and prints a per-stage summary, so a slower stage shows up as a number rather
+than a guess.
+
+    tracer = start_run('ml_rl_schedule')
+    tracer.stage('features', rows=len(songs))
+    ...
+    tracer.finish()          # traces/ml_rl_schedule-<timestamp>.json
+
+Library code marks hot calls with ``span()`` / ``@traced()``. These are a single
+global check while no run is active.
+
+Optional profiling (``profile=`` or the ML_PROFILE environment variable):
+    'cprofile'  cProfile stats for the whole run (<trace>.prof, open with pstats/snakeviz)
+    'sample'    samples the main thread's stack every few ms and writes collapsed
+                stacks (<trace>.folded, the flamegraph.pl / speedscope input format)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_TRACE_DIR = 'traces'
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Span:
+    """One timed region; set ``rows`` inside the block if the count is only known there."""
+
+    __slots__ = ('name', 'rows', 'args', 'start', 'wall', 'cpu', 'rss_mb', 'tid', 'depth', '_cpu_start')
+
+    def __init__(self, name: str, rows: Optional[int] = None, args: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.rows = rows
+        self.args = args or {}
+        self.start = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rss_mb: Optional[float] = None
+        self.tid = 0
+        self.depth = 0
+        self._cpu_start = 0.0
+
+
+class _NullSpan:
+    """Stand-in used while tracing is off (accepts ``rows`` and discards it)."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    def __init__(self, tracer: 'Tracer', span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.tracer._open(self.span)
+        return self.span
+
+    def __exit__(self, *exc):
+        self.tracer._close(self.span)
+        return False
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval (py-spy style, in-process)."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Tracer:
+    """Collects spans for one run and writes them as a Chrome trace."""
+
+    def __init__(self, name: str = 'run', profile: Optional[str] = None, max_events: int = 100000):
+        """
+        Args:
+            name: Run name (used in the trace file name)
+            profile: None, 'cprofile' or 'sample'
+            max_events: Spans kept as individual trace events; later ones only count in the summary
+        """
+        if profile is not None and profile not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode: {profile} ({', '.join(PROFILE_MODES)})")
+        self.name = name
+        self.profile = profile
+        self.max_events = max_events
+        self.events: List[Span] = []
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._stage: Optional[Span] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def span(self, name: str, rows: Optional[int] = None, **args) -> _SpanContext:
+        """Context manager timing the enclosed block."""
+        return _SpanContext(self, Span(name, rows, args))
+
+    def _open(self, span: Span):
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        span.depth = depth
+        span.tid = threading.get_ident()
+        span._cpu_start = time.process_time()
+        span.start = time.perf_counter()
+
+    def _close(self, span: Span):
+        span.wall = time.perf_counter() - span.start
+        span.cpu = time.process_time() - span._cpu_start
+        span.rss_mb = peak_rss_mb()
+        self._local.depth = span.depth
+
+        total = self.totals.get(span.name)
+        if total is None:
+            total = self.totals[span.name] = {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0,
+                                              'rss_mb': 0.0, 'depth': span.depth}
+        total['count'] += 1
+        total['wall'] += span.wall
+        total['cpu'] += span.cpu
+        total['rows'] += span.rows or 0
+        total['rss_mb'] = max(total['rss_mb'], span.rss_mb or 0.0)
+        if len(self.events) < self.max_events:
+            self.events.append(span)
+
+    def stage(self, name: str, rows: Optional[int] = None, **args) -> Span:
+        """End the current pipeline stage (if any) and start the next one."""
+        self.end_stage()
+        self._stage = Span(name, rows, args)
+        self._open(self._stage)
+        return self._stage
+
+    def end_stage(self):
+        if self._stage is not None:
+            self._close(self._stage)
+            self._stage = None
+
+    def start(self) -> 'Tracer':
+        """Make this the active tracer and start the profiler, if any."""
+        global _active
+        _active = self
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'sample':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        return self
+
+    def stop(self):
+        """End the current stage, stop the profiler and deactivate."""
+        global _active
+        self.end_stage()
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        if _active is self:
+            _active = None
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-span-name totals, in order of first completion."""
+        return [dict(name=name, **total) for name, total in self.totals.items()]
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace-event JSON (complete events, microseconds)."""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+        for span in self.events:
+            args = dict(span.args, cpu_ms=round(span.cpu * 1000, 3))
+            if span.rows is not None:
+                args['rows'] = span.rows
+            if span.rss_mb is not None:
+                args['peak_rss_mb'] = round(span.rss_mb, 1)
+            events.append({'name': span.name, 'ph': 'X', 'pid': pid, 'tid': span.tid,
+                           'ts': round((span.start - self._origin) * 1e6, 1),
+                           'dur': round(span.wall * 1e6, 1), 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'run': self.name, 'summary': self.summary(),
+                              'dropped_events': sum(t['count'] for t in self.totals.values()) - len(self.events)}}
+
+    def write(self, path: str) -> str:
+        """Write the Chrome trace (and the profiler output next to it)."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        stem = os.path.splitext(path)[0]
+        if self._profiler is not None:
+            self._profiler.dump_stats(stem + '.prof')
+        if self._sampler is not None:
+            self._sampler.write_folded(stem + '.folded')
+        return path
+
+    def finish(self, directory: str = DEFAULT_TRACE_DIR, verbose: bool = True) -> str:
+        """Stop, write ``<directory>/<name>-<timestamp>.json`` and print the summary."""
+        self.stop()
+        path = self.write(os.path.join(directory, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.json"))
+        if verbose:
+            print(f"\nStage timings ({path}):")
+            for total in self.summary():
+                rows = f"  {int(total['rows']):>8,} rows" if total['rows'] else ''
+                print(f"  {'  ' * int(total['depth'])}{total['name']:<40} {total['count']:>6}x "
+                      f"wall {total['wall']:8.3f}s  cpu {total['cpu']:8.3f}s  "
+                      f"peak RSS {total['rss_mb']:7.1f}MB{rows}")
+        return path
+
+
+_active: Optional[Tracer] = None
+
+
+def active_tracer() -> Optional[Tracer]:
+    return _active
+
+
+def start_run(name: str, profile: Optional[str] = None) -> Tracer:
+    """Start tracing a run (profile defaults to the ML_PROFILE environment variable)."""
+    profile = profile or os.getenv('ML_PROFILE') or None
+    return Tracer(name, profile=profile).start()
+
+
+def span(name: str, rows: Optional[int] = None, **args):
+    """Time a block in the active run (no-op while no run is active)."""
+    tracer = _active
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, rows, **args)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: time every call of the function in the active run."""
+    def decorate(function: Callable) -> Callable:
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _active
+            if tracer is None:
+                return function(*args, **kwargs)
+            with tracer.span(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
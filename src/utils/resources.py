@@ -0,0 +1,321 @@
+"""CPU budget governor for ML and ffmpeg jobs that run at the same time.
+
+Every ML library (BLAS, OpenMP, TensorFlow, PyTorch) and ffmpeg's ``-threads 0``
+start one thread per core by default. Inside a process pool, or while a batch
+render runs next to model training, that oversubscribes the machine many times
+over. The governor hands each job a thread budget instead:
+
+- Jobs take a lease for their kind ('ml' or 'render') and the number of
+  concurrent workers they run. Leases are recorded in a small SQLite table, so
+  separate processes (the scheduler and a batch render) see each other.
+- ML gets ``ml_share`` of the cores and rendering the rest, whether or not the
+  other kind is active yet. Thread pools (ffmpeg, TensorFlow) are sized once
+  when a job starts, so a job that took every core while running alone would
+  keep them after the other kind starts. Each kind's share is split evenly
+  between its workers.
+- Pool workers call ``init_worker(threads)`` to cap every library in that
+  process. ``process_threads()`` returns the cap, and VideoCompositor uses it
+  for ffmpeg. In a long-lived process, use ``limit_process_threads()`` as a
+  context manager so the previous limits come back when the job ends.
+
+The policy is configured through environment variables:
+
+    GOVERNOR_CPUS             cores to hand out (default: os.cpu_count())
+    GOVERNOR_ML_SHARE         fraction of the cores reserved for ML (default 0.5)
+    GOVERNOR_INTEROP_THREADS  TensorFlow/PyTorch inter-op threads per process (default 1)
+    GOVERNOR_STATE            SQLite file for the active leases (empty: only this process)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+JOB_KINDS = ('ml', 'render')
+
+# Set in each worker by init_worker(); read back by process_threads()
+THREADS_ENV = 'GOVERNOR_THREADS'
+
+# Thread-count variables read by BLAS/OpenMP and the ML frameworks when they load
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid        INTEGER NOT NULL,
+    kind       TEXT NOT NULL,
+    jobs       INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        return True  # os.kill(pid, 0) terminates the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class ResourcePolicy:
+    """How many cores to hand out and how to split them between ML and rendering."""
+
+    def __init__(self, cpus: Optional[int] = None, ml_share: float = 0.5,
+                 interop_threads: int = 1, state_path: Optional[str] = None):
+        """
+        Args:
+            cpus: Cores to hand out (default: os.cpu_count())
+            ml_share: Fraction of the cores for ML (rendering gets the rest)
+            interop_threads: TensorFlow/PyTorch inter-op threads per process
+            state_path: SQLite file shared by every process (None: leases are only seen in this process)
+        """
+        if not 0.0 < ml_share < 1.0:
+            raise ValueError("ml_share must be between 0 and 1")
+        self.cpus = max(1, cpus or os.cpu_count() or 1)
+        self.ml_share = ml_share
+        self.interop_threads = max(1, interop_threads)
+        self.state_path = state_path
+
+    @classmethod
+    def from_env(cls) -> 'ResourcePolicy':
+        """Build the policy from the GOVERNOR_* environment variables."""
+        default_state = os.path.join(tempfile.gettempdir(), 'resource_governor.db')
+        return cls(cpus=int(os.getenv('GOVERNOR_CPUS', '0')) or None,
+                   ml_share=float(os.getenv('GOVERNOR_ML_SHARE', '0.5')),
+                   interop_threads=int(os.getenv('GOVERNOR_INTEROP_THREADS', '1')),
+                   state_path=os.getenv('GOVERNOR_STATE', default_state) or None)
+
+    def shares(self) -> Dict[str, int]:
+        """Cores reserved for each kind (at least one each, unless there is only one core)."""
+        if self.cpus == 1:
+            return {kind: 1 for kind in JOB_KINDS}
+        ml_cores = min(self.cpus - 1, max(1, round(self.cpus * self.ml_share)))
+        return {'ml': ml_cores, 'render': self.cpus - ml_cores}
+
+    def split(self, active: Dict[str, int]) -> Dict[str, int]:
+        """Threads per worker for each kind, given the number of active workers of each kind.
+
+        Each kind's share is reserved even while the other kind is idle, so budgets
+        already handed out stay valid when it starts.
+        """
+        shares = self.shares()
+        return {kind: max(1, shares[kind] // max(1, active.get(kind, 0))) for kind in JOB_KINDS}
+
+
+class Lease:
+    """Thread budget held by one job until release()."""
+
+    def __init__(self, governor: 'ResourceGovernor', lease_id: int, kind: str, jobs: int, threads: int):
+        self.governor = governor
+        self.lease_id = lease_id
+        self.kind = kind
+        self.jobs = jobs
+        self.threads = threads
+        self.interop_threads = governor.policy.interop_threads
+
+    def release(self):
+        if self.lease_id is not None:
+            self.governor._release(self.lease_id)
+            self.lease_id = None
+
+    def __enter__(self) -> 'Lease':
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ResourceGovernor:
+    """Hands out per-worker thread budgets between concurrent ML and render jobs."""
+
+    def __init__(self, policy: Optional[ResourcePolicy] = None):
+        """
+        Args:
+            policy: Core count and split (default: ResourcePolicy.from_env())
+        """
+        self.policy = policy or ResourcePolicy.from_env()
+        self._local: Dict[int, tuple] = {}
+        self._next_id = 1
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.policy.state_path:
+            return None
+        try:
+            conn = sqlite3.connect(self.policy.state_path, timeout=10.0, isolation_level=None)
+            conn.executescript(_SCHEMA)
+            return conn
+        except sqlite3.Error as e:
+            print(f"Warning: resource governor state unavailable ({e}); budgets are per process")
+            return None
+
+    def active(self) -> Dict[str, int]:
+        """Number of active workers of each kind (leases of dead processes are dropped)."""
+        counts = {kind: 0 for kind in JOB_KINDS}
+        conn = self._connect()
+        if conn is None:
+            rows = list(self._local.values())
+        else:
+            with conn:
+                rows = conn.execute("SELECT id, pid, kind, jobs FROM leases").fetchall()
+                stale = [(row[0],) for row in rows if not _pid_alive(row[1])]
+                if stale:
+                    conn.executemany("DELETE FROM leases WHERE id = ?", stale)
+                rows = [(row[2], row[3]) for row in rows if _pid_alive(row[1])]
+            conn.close()
+        for kind, jobs in rows:
+            counts[kind] = counts.get(kind, 0) + jobs
+        return counts
+
+    def budget(self, kind: str, jobs: int = 1) -> int:
+        """Threads per worker that a new job of this kind would get (without taking a lease)."""
+        active = self.active()
+        active[kind] = active.get(kind, 0) + max(1, jobs)
+        return self.policy.split(active)[kind]
+
+    def acquire(self, kind: str, jobs: int = 1) -> Lease:
+        """Register a job of `jobs` concurrent workers and return its per-worker thread budget.
+
+        Args:
+            kind: 'ml' or 'render'
+            jobs: Number of workers the job runs at the same time
+
+        Returns:
+            Lease (use as a context manager, or call release() when the job ends)
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind: {kind} ({', '.join(JOB_KINDS)})")
+        jobs = max(1, jobs)
+        conn = self._connect()
+        if conn is None:
+            lease_id = self._next_id
+            self._next_id += 1
+            self._local[lease_id] = (kind, jobs)
+        else:
+            with conn:
+                lease_id = conn.execute(
+                    "INSERT INTO leases (pid, kind, jobs, created_at) VALUES (?, ?, ?, ?)",
+                    (os.getpid(), kind, jobs, time.time())).lastrowid
+            conn.close()
+        threads = self.policy.split(self.active())[kind]
+        return Lease(self, lease_id, kind, jobs, threads)
+
+    def _release(self, lease_id: int):
+        conn = self._connect()
+        if conn is None:
+            self._local.pop(lease_id, None)
+            return
+        with conn:
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+        conn.close()
+
+
+class ThreadLimits:
+    """Thread caps applied by limit_process_threads(); restore() puts the previous ones back."""
+
+    def __init__(self, environ: Dict[str, Optional[str]], threadpool: Any = None,
+                 torch_threads: Optional[Tuple[Any, int]] = None):
+        self._environ = environ
+        self._threadpool = threadpool
+        self._torch_threads = torch_threads
+
+    def restore(self):
+        """Restore the environment variables, BLAS/OpenMP and PyTorch limits (once)."""
+        for name, value in self._environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self._environ = {}
+        if self._threadpool is not None:
+            self._threadpool.restore_original_limits()
+            self._threadpool = None
+        if self._torch_threads is not None:
+            torch, threads = self._torch_threads
+            torch.set_num_threads(threads)
+            self._torch_threads = None
+
+    def __enter__(self) -> 'ThreadLimits':
+        return self
+
+    def __exit__(self, *exc):
+        self.restore()
+
+
+def limit_process_threads(threads: int, interop_threads: int = 1) -> ThreadLimits:
+    """Cap every thread pool in this process at `threads`.
+
+    Libraries that are not loaded yet read the environment variables; BLAS/OpenMP,
+    PyTorch and TensorFlow that are already loaded are capped directly.
+
+    Pool workers can keep the cap for their lifetime. Long-lived processes (the
+    interactive menu) should use the result as a context manager, which restores
+    the previous limits on exit. TensorFlow's thread counts are fixed once its
+    runtime starts, so they cannot be restored after the first op runs.
+
+    Returns:
+        ThreadLimits (call restore(), or use as a context manager)
+    """
+    threads = max(1, int(threads))
+    names: List[str] = [THREADS_ENV, *_THREAD_ENV_VARS, 'TF_NUM_INTEROP_THREADS']
+    environ = {name: os.environ.get(name) for name in names}
+    os.environ[THREADS_ENV] = str(threads)
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(interop_threads)
+
+    threadpool = None
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool = threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+    torch_threads = None
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch_threads = (torch, torch.get_num_threads())
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass  # only allowed before the first parallel op
+
+    tf = sys.modules.get('tensorflow')
+    if tf is not None:
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(interop_threads)
+        except RuntimeError:
+            pass  # only allowed before TensorFlow initializes its runtime
+
+    return ThreadLimits(environ, threadpool, torch_threads)
+
+
+def init_worker(threads: int, interop_threads: int = 1):
+    """multiprocessing.Pool initializer: cap this worker's threads."""
+    limit_process_threads(threads, interop_threads)
+
+
+def process_threads() -> Optional[int]:
+    """This process's thread cap set by init_worker(), or None if uncapped."""
+    value = os.getenv(THREADS_ENV)
+    return int(value) if value and value.isdigit() else None
+
+
+_governor: Optional[ResourceGovernor] = None
+
+
+def get_governor() -> ResourceGovernor:
+    """Process-wide governor built from the environment policy."""
+    global _governor
+    if _governor is None:
+        _governor = ResourceGovernor()
+    return _governor
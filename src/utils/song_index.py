@@ -0,0 +1,179 @@
+import csv
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bracketed annotations such as "(feat. X)", "[MV]", "【公式】" after NFKC folding
+_BRACKET_PATTERN = re.compile(r'[\(\[【〔〈《].*?[\)\]】〕〉》]')
+# "feat. X" / "ft. X" / "featuring X" up to the end of the string
+_FEAT_PATTERN = re.compile(r'\s*(?<![a-z])(?:feat\b\.?|ft\.|featuring\b).*$', re.IGNORECASE)
+
+# Katakana (ァ-ヶ) -> Hiragana (ぁ-ゖ)
+_KANA_FOLD = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+def normalize_song_name(name: str) -> str:
+    """Normalize a song name into a join key (NFKC, case/kana folding, bracket/feat./punctuation stripping)."""
+    if not name:
+        return ""
+
+    text = unicodedata.normalize('NFKC', str(name))
+    stripped = _FEAT_PATTERN.sub('', _BRACKET_PATTERN.sub(' ', text))
+    # Keep the bracket content if the whole name was an annotation
+    if stripped.strip():
+        text = stripped
+
+    text = text.casefold().translate(_KANA_FOLD)
+    # Drop punctuation, symbols and whitespace; keep letters, marks and digits
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] in 'LNM')
+
+
+def _ngrams(key: str, n: int) -> List[str]:
+    """Return the distinct character n-grams of a key (the key itself if shorter than n)."""
+    if len(key) <= n:
+        return [key]
+    return list({key[i:i + n] for i in range(len(key) - n + 1)})
+
+
+class SongNameIndex:
+    """Join index from normalized song names to rows, with an opt-in n-gram fuzzy lookup.
+
+    Behaves like a read-only dict keyed by song name (``get`` / ``in`` / ``[]``),
+    so it can be passed anywhere a ``song_name -> row`` map was used before.
+    Dict-style access only matches the normalized name exactly; near matches
+    (e.g. a sequel such as "千本桜2") are only returned by ``lookup(name, fuzzy=True)``.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = (), key: str = 'song_name',
+                 ngram: int = 2, min_similarity: float = 0.75,
+                 short_name_length: int = 8, short_min_similarity: float = 0.9,
+                 min_fuzzy_length: int = 3, max_candidates: int = 20, max_posting: int = 200):
+        """
+        Args:
+            rows: Rows to index (dicts holding ``key``)
+            key: Column holding the song name
+            ngram: Character n-gram size for the fuzzy lookup
+            min_similarity: Minimum Dice similarity accepted by the fuzzy lookup
+            short_name_length: Pairs where either normalized name is shorter than this are "short"
+            short_min_similarity: Minimum Dice similarity for short names
+            min_fuzzy_length: Names shorter than this are only matched exactly
+            max_candidates: Number of top-overlap candidates scored per fuzzy lookup
+            max_posting: Grams shared by more keys than this are skipped as uninformative
+        """
+        self.key = key
+        self.ngram = ngram
+        self.min_similarity = min_similarity
+        self.short_name_length = short_name_length
+        self.short_min_similarity = short_min_similarity
+        self.min_fuzzy_length = min_fuzzy_length
+        self.max_candidates = max_candidates
+        self.max_posting = max_posting
+
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[str] = []
+        self._gram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self.add_all(rows)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        """Index a single row (later rows win on identical normalized names)."""
+        norm = normalize_song_name(row.get(self.key, ''))
+        if not norm:
+            return
+        if norm not in self._rows:
+            key_id = len(self._keys)
+            grams = _ngrams(norm, self.ngram)
+            self._keys.append(norm)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(key_id)
+        self._rows[norm] = row
+
+    def add_all(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Index many rows in one linear pass."""
+        for row in rows:
+            self.add(row)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, **kwargs) -> 'SongNameIndex':
+        """Build an index from a CSV file (e.g. the filtered TaikoGame exports)."""
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            return cls(csv.DictReader(f), **kwargs)
+
+    def _threshold(self, query: str, candidate: str) -> float:
+        """Minimum similarity for a fuzzy match (stricter when either name is short)."""
+        if min(len(query), len(candidate)) < self.short_name_length:
+            return self.short_min_similarity
+        return self.min_similarity
+
+    def lookup(self, name: str, fuzzy: bool = False) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Find the row for a song name.
+
+        Args:
+            name: Song name to look up
+            fuzzy: Fall back to the n-gram similarity search when there is no exact
+                match. Every fuzzy match is printed so joins on near names stay visible.
+
+        Returns:
+            (row or None, similarity) — 1.0 for an exact normalized match
+        """
+        norm = normalize_song_name(name)
+        if not norm:
+            return None, 0.0
+
+        row = self._rows.get(norm)
+        if row is not None:
+            return row, 1.0
+        if not fuzzy or len(norm) < self.min_fuzzy_length:
+            return None, 0.0
+
+        grams = _ngrams(norm, self.ngram)
+        overlap: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting or len(posting) > self.max_posting:
+                continue
+            for key_id in posting:
+                overlap[key_id] += 1
+
+        if not overlap:
+            return None, 0.0
+
+        best_key, best_score, top_score = None, 0.0, 0.0
+        candidates = sorted(overlap.items(), key=lambda x: x[1], reverse=True)[:self.max_candidates]
+        for key_id, shared in candidates:
+            candidate = self._keys[key_id]
+            if len(candidate) < self.min_fuzzy_length:
+                continue
+            score = 2.0 * shared / (len(grams) + self._gram_counts[key_id])
+            top_score = max(top_score, score)
+            if score > best_score and score >= self._threshold(norm, candidate):
+                best_key, best_score = candidate, score
+
+        if best_key is None:
+            return None, top_score
+        row = self._rows[best_key]
+        print(f"  Fuzzy match: '{name}' -> '{row.get(self.key, '')}' (similarity {best_score:.2f})")
+        return row, best_score
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """dict-compatible lookup (exact normalized key only)."""
+        row, _ = self.lookup(name)
+        return row if row is not None else default
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        row, _ = self.lookup(name)
+        if row is None:
+            raise KeyError(name)
+        return row
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.lookup(name)[0] is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Return the indexed rows (one per normalized name)."""
+        return list(self._rows.values())
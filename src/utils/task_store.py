@@ -0,0 +1,240 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Workflow flags per song (the keys of the legacy tasks.json entries)
+TASK_FLAGS = ('recording', 'editing', 'posting')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    song_name     TEXT PRIMARY KEY,
+    recording     INTEGER NOT NULL DEFAULT 0,
+    editing       INTEGER NOT NULL DEFAULT 0,
+    posting       INTEGER NOT NULL DEFAULT 0,
+    rendered_path TEXT,
+    rendered_at   REAL,
+    scheduled_at  TEXT,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (recording, editing, posting);
+CREATE INDEX IF NOT EXISTS idx_tasks_rendered ON tasks (rendered_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_scheduled ON tasks (scheduled_at);
+"""
+
+_COLUMNS = TASK_FLAGS + ('rendered_path', 'rendered_at', 'scheduled_at', 'updated_at')
+
+
+class TaskStore:
+    """SQLite-backed per-song task store, safe to share between worker processes.
+
+    Every update is a single-row transaction, so concurrent writers (batch render
+    workers, the scheduler, the interactive menu) never overwrite each other's
+    changes the way rewriting the whole tasks.json did.
+    """
+
+    def __init__(self, db_path: str = 'tasks.db', legacy_json: Optional[str] = 'tasks.json',
+                 timeout: float = 30.0):
+        """
+        Args:
+            db_path: SQLite database file
+            legacy_json: tasks.json to import once when the database is first created
+            timeout: Seconds to wait for a competing writer's lock
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        self._connection().executescript(_SCHEMA)
+
+        if legacy_json and os.path.exists(legacy_json) and len(self) == 0:
+            self.import_json(legacy_json)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this process's connection (connections are not shared across fork)."""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers proceed while a worker holds the write lock
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in a write transaction (taking the lock up front)."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        """Close this process's connection."""
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def __getstate__(self):
+        # Pickled into Pool workers without the live connection
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pid'] = None
+        return state
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        task = {key: row[key] for key in _COLUMNS}
+        for flag in TASK_FLAGS:
+            task[flag] = bool(task[flag])
+        return task
+
+    def _ensure(self, conn: sqlite3.Connection, song_name: str):
+        conn.execute('INSERT OR IGNORE INTO tasks (song_name, updated_at) VALUES (?, ?)',
+                     (song_name, time.time()))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def __contains__(self, song_name: str) -> bool:
+        row = self._connection().execute('SELECT 1 FROM tasks WHERE song_name = ?', (song_name,)).fetchone()
+        return row is not None
+
+    def get(self, song_name: str) -> Dict[str, Any]:
+        """Return a song's task state (all flags False if it has no row yet)."""
+        row = self._connection().execute('SELECT * FROM tasks WHERE song_name = ?', (song_name,)).fetchone()
+        if row is None:
+            return {flag: False for flag in TASK_FLAGS}
+        return self._to_dict(row)
+
+    def get_many(self, song_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return task states for several songs in one query."""
+        if not song_names:
+            return {}
+        placeholders = ','.join('?' * len(song_names))
+        rows = self._connection().execute(
+            f'SELECT * FROM tasks WHERE song_name IN ({placeholders})', list(song_names)).fetchall()
+        return {row['song_name']: self._to_dict(row) for row in rows}
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """Return every task as ``song_name -> state`` (the tasks.json layout)."""
+        rows = self._connection().execute('SELECT * FROM tasks ORDER BY song_name').fetchall()
+        return {row['song_name']: self._to_dict(row) for row in rows}
+
+    def query(self, rendered: Optional[bool] = None, scheduled: Optional[bool] = None,
+              **flags: bool) -> List[str]:
+        """Return song names matching the given status, using the status indexes.
+
+        Example: ``store.query(recording=True, posting=False)`` lists songs
+        recorded but not yet posted.
+        """
+        clauses, params = [], []
+        for flag, value in flags.items():
+            if flag not in TASK_FLAGS:
+                raise ValueError(f"Unknown task flag: {flag}")
+            clauses.append(f'{flag} = ?')
+            params.append(int(bool(value)))
+        if rendered is not None:
+            clauses.append('rendered_at IS NOT NULL' if rendered else 'rendered_at IS NULL')
+        if scheduled is not None:
+            clauses.append('scheduled_at IS NOT NULL' if scheduled else 'scheduled_at IS NULL')
+
+        sql = 'SELECT song_name FROM tasks'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        rows = self._connection().execute(sql + ' ORDER BY song_name', params).fetchall()
+        return [row[0] for row in rows]
+
+    # ------------------------------------------------------------------
+    # Atomic per-row updates
+    # ------------------------------------------------------------------
+
+    def set_flags(self, song_name: str, **flags: bool) -> Dict[str, Any]:
+        """Set workflow flags for a song and return its new state."""
+        unknown = set(flags) - set(TASK_FLAGS)
+        if unknown:
+            raise ValueError(f"Unknown task flag: {', '.join(sorted(unknown))}")
+
+        with self._transaction() as conn:
+            self._ensure(conn, song_name)
+            if flags:
+                assignments = ', '.join(f'{flag} = ?' for flag in flags)
+                conn.execute(f'UPDATE tasks SET {assignments}, updated_at = ? WHERE song_name = ?',
+                             [int(bool(v)) for v in flags.values()] + [time.time(), song_name])
+        return self.get(song_name)
+
+    def toggle(self, song_name: str, flag: str) -> bool:
+        """Flip one flag in place (read-modify-write happens inside SQLite) and return the new value."""
+        if flag not in TASK_FLAGS:
+            raise ValueError(f"Unknown task flag: {flag}")
+
+        with self._transaction() as conn:
+            self._ensure(conn, song_name)
+            conn.execute(f'UPDATE tasks SET {flag} = 1 - {flag}, updated_at = ? WHERE song_name = ?',
+                         (time.time(), song_name))
+            value = conn.execute(f'SELECT {flag} FROM tasks WHERE song_name = ?', (song_name,)).fetchone()[0]
+        return bool(value)
+
+    def clear(self, song_name: str) -> Dict[str, Any]:
+        """Reset all workflow flags for a song."""
+        return self.set_flags(song_name, **{flag: False for flag in TASK_FLAGS})
+
+    def mark_rendered(self, song_name: str, video_path: str):
+        """Record a finished render (called from batch render workers)."""
+        with self._transaction() as conn:
+            self._ensure(conn, song_name)
+            now = time.time()
+            conn.execute('UPDATE tasks SET rendered_path = ?, rendered_at = ?, updated_at = ? WHERE song_name = ?',
+                         (video_path, now, now, song_name))
+
+    def mark_scheduled(self, song_name: str, scheduled_at: Optional[str]):
+        """Record (or clear, with None) the planned posting time in ISO format."""
+        with self._transaction() as conn:
+            self._ensure(conn, song_name)
+            conn.execute('UPDATE tasks SET scheduled_at = ?, updated_at = ? WHERE song_name = ?',
+                         (scheduled_at, time.time(), song_name))
+
+    # ------------------------------------------------------------------
+    # Legacy tasks.json
+    # ------------------------------------------------------------------
+
+    def import_json(self, json_path: str) -> int:
+        """Import a legacy tasks.json (``song -> {recording, editing, posting}``)."""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            tasks = json.load(f)
+
+        now = time.time()
+        rows = [
+            (song_name, *(int(bool(state.get(flag))) for flag in TASK_FLAGS), now)
+            for song_name, state in tasks.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                'INSERT INTO tasks (song_name, recording, editing, posting, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(song_name) DO UPDATE SET recording = excluded.recording, '
+                'editing = excluded.editing, posting = excluded.posting, updated_at = excluded.updated_at',
+                rows)
+        return len(rows)
+
+    def export_json(self, json_path: str):
+        """Write the workflow flags back out in the tasks.json layout."""
+        tasks = {
+            song_name: {flag: state[flag] for flag in TASK_FLAGS}
+            for song_name, state in self.all().items()
+        }
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, json_path)
@@ -0,0 +1,70 @@
+import os
+import zipfile
+
+from youtube_analytics_ingester import StudioExportIngester, detect_export_type
+
+def _write_zip(directory, name, table, chart=None):
+    with zipfile.ZipFile(os.path.join(directory, name), 'w') as zf:
+        zf.writestr('表データ.csv', '﻿' + table)
+        if chart is not None:
+            zf.writestr('グラフデータ.csv', '﻿' + chart)
+
+def test_detect_export_type():
+    assert detect_export_type(['コンテンツ', '視聴回数']) == 'content'
+    assert detect_export_type(['日付', '視聴回数']) == 'date'
+    assert detect_export_type(['オーガニック トラフィックと有料のトラフィック']) == 'traffic'
+    assert detect_export_type([]) == 'other'
+
+def test_date_exports_are_deduplicated(tmp_path):
+    _write_zip(tmp_path, '日付 2024-01-01_2024-01-03 ch.zip',
+               '日付,視聴回数\n合計,30\n2024-01-01,10\n2024-01-02,20\n上位 500 件の結果を表示しています,\n')
+    _write_zip(tmp_path, '日付 2024-01-02_2024-01-04 ch.zip',
+               '日付,視聴回数\n合計,55\n2024-01-02,25\n2024-01-03,30\n')
+
+    ingester = StudioExportIngester(str(tmp_path))
+    entries = ingester.discover(verbose=False)
+    assert [(e['start'], e['end']) for e in entries] == [('2024-01-01', '2024-01-02'), ('2024-01-02', '2024-01-03')]
+
+    dates = ingester.load('date', entries)
+    dates = dates[dates['日付'].str.match(r'\d{4}-')]
+    assert dates['日付'].tolist() == ['2024-01-01', '2024-01-02', '2024-01-03']
+    assert dates['視聴回数'].tolist() == [10, 25, 30]
+
+def test_disjoint_content_exports_are_combined(tmp_path):
+    _write_zip(tmp_path, 'コンテンツ 2024-01-01_2024-01-31 ch.zip',
+               'コンテンツ,動画のタイトル,視聴回数,平均視聴率 (%)\n合計,,10,50\nvid1,A,10,50\n',
+               '日付,コンテンツ,視聴回数\n2024-01-01,vid1,10\n2024-01-31,vid1,0\n')
+    _write_zip(tmp_path, 'コンテンツ 2024-02-01_2024-02-29 ch.zip',
+               'コンテンツ,動画のタイトル,視聴回数,平均視聴率 (%)\n合計,,25,40\nvid1,A,5,40\nvid2,B,20,30\n',
+               '日付,コンテンツ,視聴回数\n2024-02-01,vid1,5\n2024-02-29,vid2,20\n')
+
+    content = StudioExportIngester(str(tmp_path)).load('content')
+    assert content['コンテンツ'].tolist() == ['vid1', 'vid2']
+    assert content['視聴回数'].tolist() == [15, 20]
+    assert content['平均視聴率 (%)'].tolist() == [40, 30]
+
+def test_catalog_is_reused(tmp_path):
+    _write_zip(tmp_path, '日付 2024-01-01_2024-01-02 ch.zip', '日付,視聴回数\n2024-01-01,1\n')
+    StudioExportIngester(str(tmp_path)).discover(verbose=False)
+    assert os.path.exists(tmp_path / 'ingest_catalog.json')
+
+    ingester = StudioExportIngester(str(tmp_path))
+    assert '日付 2024-01-01_2024-01-02 ch.zip' in ingester.catalog
+
+def test_new_exports_notify_listener(tmp_path):
+    _write_zip(tmp_path, '日付 2024-01-01_2024-01-02 ch.zip', '日付,視聴回数\n2024-01-01,1\n')
+    notified = []
+    StudioExportIngester(str(tmp_path), on_new_exports=notified.append).discover(verbose=False)
+    StudioExportIngester(str(tmp_path), on_new_exports=notified.append).discover(verbose=False)
+    assert [[entry['name'] for entry in entries] for entries in notified] == [['日付 2024-01-01_2024-01-02 ch.zip']]
+
+def test_zip_without_table_is_skipped(tmp_path, capsys):
+    _write_zip(tmp_path, '日付 2024-01-01_2024-01-02 ch.zip', '日付,視聴回数\n2024-01-01,1\n')
+    with zipfile.ZipFile(tmp_path / 'readme.zip', 'w') as zf:
+        zf.writestr('readme.txt', 'not an export')
+
+    ingester = StudioExportIngester(str(tmp_path))
+    entries = ingester.discover(verbose=False)
+    assert [entry['name'] for entry in entries] == ['日付 2024-01-01_2024-01-02 ch.zip']
+    assert 'readme.zip' in capsys.readouterr().out
+    assert ingester.load('date', entries)['視聴回数'].tolist() == [1]
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from youtube_analytics_integrator import YouTubeAnalyticsIntegrator
+
+def _integrator():
+    integrator = YouTubeAnalyticsIntegrator(analytics_dir='unused')
+    integrator.content_data = pd.DataFrame({
+        'コンテンツ': ['vid1', 'vid2', 'vid3'],
+        '動画のタイトル': ['曲A', '曲B広告_縦', '曲C'],
+        '視聴回数': [1000, 500, None],
+        '高評価数': [50, 5, 0],
+        'コメントの追加回数': [10, 0, 0],
+        '平均視聴時間': ['0:00:21', '3:45', 'bad'],
+        'インプレッション数': [2000, 0, 0],
+    })
+    integrator.traffic_data = pd.DataFrame({
+        'オーガニック トラフィックと有料のトラフィック': ['有料', 'オーガニック'],
+        '視聴回数': [300, 100],
+    })
+    return integrator
+
+def test_durations_to_seconds():
+    seconds = YouTubeAnalyticsIntegrator._durations_to_seconds(pd.Series(['0:00:21', '1:02:03', '3:45', '', None]))
+    assert seconds.tolist() == [21, 3723, 225, 0, 0]
+
+def test_content_features_are_typed_columns():
+    features = _integrator().extract_content_features()
+    assert features['analytics_views'].dtype == 'int64'
+    assert features['analytics_views'].tolist() == [1000, 500, 0]
+    assert features['analytics_engagement_rate'].tolist() == [6.0, 1.0, 0.0]
+    assert features['analytics_views_per_impression'].tolist() == [0.5, 0.0, 0.0]
+    assert features['channel_organic_ratio'].iloc[0] == 25.0
+
+def test_enrich_merges_on_video_id_and_flags_ads():
+    ml_data = [
+        {'video_id': 'vid1', 'view_count': 200, 'like_count': 20, 'comment_count': 0},
+        {'video_id': 'vid2', 'view_count': 100},
+        {'video_id': 'vid3', 'view_count': 50},
+        {'video_id': 'other', 'view_count': 10},
+    ]
+    enriched = _integrator().enrich_ml_training_data(ml_data)
+
+    assert enriched[0]['view_count'] == 1000
+    assert enriched[0]['data_source'] == 'analytics'
+    assert enriched[0]['relative_like_rate'] == 10.0
+    assert enriched[1]['is_advertisement'] is True
+    assert 'analytics_views' not in enriched[1]
+    assert enriched[2]['view_count'] == 50
+    assert enriched[2]['data_source'] == 'youtube_api'
+    assert 'is_advertisement' not in enriched[3]
@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.ml.augmentation import Augmenter
+from src.ml.scheduler import ViewCountPredictor
+
+NAMES = ['log_view_count', 'day_of_week', 'hour']
+
+
+def _data(n=50):
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(10, 1, n), rng.integers(0, 7, n), rng.integers(0, 24, n)]).astype(float)
+    return X, np.full(n, 1000.0)
+
+def test_jitter_targets_named_column():
+    X, y = _data()
+    X_aug, y_aug = Augmenter(NAMES, seed=0).resample(X, y, factor=4)
+    assert X_aug.shape == (200, 3)
+
+    np.testing.assert_array_equal(X_aug[:50], X)
+    np.testing.assert_array_equal(y_aug[:50], y)
+    copies = X_aug[50:]
+    np.testing.assert_array_equal(copies[:, :2], np.tile(X[:, :2], (3, 1)))
+    assert (copies[:, 2] != np.tile(X[:, 2], 3)).any()
+    assert copies[:, 2].min() >= 0 and copies[:, 2].max() <= 23
+    assert (np.abs(copies[:, 2] - np.tile(X[:, 2], 3)) <= 3).all()
+    assert ((y_aug[50:] >= 950) & (y_aug[50:] <= 1050)).all()
+
+    # スキーマにない列名は無視、列番号でも指定できる
+    X_custom, _ = Augmenter(None, jitter={'hour': {'low': 1, 'high': 1}, 0: {'low': 5, 'high': 5}},
+                            seed=0).resample(X, y, factor=2)
+    np.testing.assert_array_equal(X_custom[50:, 0], X[:, 0] + 5)
+    np.testing.assert_array_equal(X_custom[50:, 2], X[:, 2])
+
+def test_resample_caps_rows_and_keeps_originals():
+    X, y = _data()
+    X_aug, _ = Augmenter(NAMES, seed=0).resample(X, y, factor=100, max_rows=120)
+    assert X_aug.shape == (120, 3)
+    np.testing.assert_array_equal(X_aug[:50], X)
+
+def test_batches_stream_every_augmented_row_once_per_epoch():
+    X, y = _data()
+    batches = Augmenter(NAMES, seed=0).batches(X, y, factor=5, batch_size=32,
+                                               transform=lambda m: m * 2, targets=np.log1p)
+    assert batches.n_rows == 250 and len(batches) == 8
+
+    seen = np.zeros(250, dtype=int)
+    for index in range(len(batches)):
+        X_batch, targets = batches[index]
+        assert len(X_batch) <= 32
+        assert (np.abs(targets - np.log1p(1000)) <= -np.log(0.95)).all()
+        seen[batches.order[index * 32:(index + 1) * 32]] += 1
+    assert (seen == 1).all()
+
+def test_predictor_augments_hour_by_schema_name():
+    import pandas as pd
+
+    X, y = _data()
+    frame = pd.DataFrame(X, columns=NAMES)
+    predictor = ViewCountPredictor(backend='hgb')
+    predictor._record_schema(frame)
+    X_aug, _ = predictor.augment_data(X, y, augmentation_factor=3)
+    np.testing.assert_array_equal(X_aug[50:, 0], np.tile(X[:, 0], 2))
@@ -0,0 +1,60 @@
+import datetime
+import os
+
+import numpy as np
+
+from src.ml import channel_specific_features as csf
+from src.ml.channel_specific_features import (
+    CHANNEL_FEATURE_NAMES, ChannelSpecificFeatureEngineer, ChannelStats, load_channel_stats,
+    stats_sidecar_path,
+)
+
+def _write_history(path, rows):
+    lines = ['is_short,published_day_of_week,published_hour,view_count']
+    lines += [f'True,{dow},{hour},{views}' for dow, hour, views in rows]
+    lines.append('False,0,0,999999')
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def test_defaults_derive_best_slots():
+    stats = ChannelStats.defaults()
+    assert (stats.best_day, stats.best_hour, stats.second_best_hour) == (3, 6, 8)
+    assert stats.feature_table.shape == (7, 24, len(CHANNEL_FEATURE_NAMES))
+
+def test_best_slots_ignore_small_samples():
+    stats = ChannelStats({0: 100, 1: 5000}, {5: 100, 6: 5000}, {0: 20, 1: 2}, {5: 20, 6: 2})
+    assert stats.best_day == 0
+    assert stats.best_hour == 5
+    assert stats.second_best_hour is None
+
+def test_memo_sidecar_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(csf, '_STATS_MEMO', {})
+    path = tmp_path / 'history.csv'
+    _write_history(path, [(0, 6, 100), (0, 6, 300), (2, 8, 1000)])
+
+    stats = load_channel_stats(str(path), verbose=False)
+    assert stats.day_of_week_stats == {0: 200.0, 2: 1000.0}
+    assert load_channel_stats(str(path), verbose=False) is stats
+    assert os.path.exists(stats_sidecar_path(str(path)))
+
+    # A fresh process reads the sidecar instead of the CSV
+    read_csv = csf.pd.read_csv
+    monkeypatch.setattr(csf, '_STATS_MEMO', {})
+    monkeypatch.setattr(csf.pd, 'read_csv', lambda *args, **kwargs: 1 / 0)
+    assert load_channel_stats(str(path), verbose=False).hour_stats == stats.hour_stats
+    monkeypatch.setattr(csf.pd, 'read_csv', read_csv)
+
+    # Rewriting the CSV invalidates both caches
+    _write_history(path, [(4, 9, 50)])
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert load_channel_stats(str(path), verbose=False).day_of_week_stats == {4: 50.0}
+
+def test_vectorized_lookup_matches_dict():
+    engineer = ChannelSpecificFeatureEngineer('missing_history.csv')
+    dows = np.array([0, 3, 3, 6])
+    hours = np.array([0, 6, 8, 23])
+    table = engineer.performance_features(dows, hours)
+    for row, (dow, hour) in enumerate(zip(dows, hours)):
+        features = engineer.extract_channel_performance_features(
+            datetime.datetime(2024, 1, 1 + int(dow), int(hour)))
+        assert table[row].tolist() == [features[name] for name in CHANNEL_FEATURE_NAMES]
+    assert engineer.extract_channel_performance_features(datetime.datetime(2024, 1, 4, 6))['is_golden_timeslot'] == 1
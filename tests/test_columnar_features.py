@@ -0,0 +1,53 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.ml.channel_specific_features import ChannelSpecificFeatureEngineer
+from src.ml.feature_engineering import FeatureEngineer
+
+SONGS = [
+    {'song_name': '曲A', 'artist_name': 'X', 'release_date': '2025/06/14', 'view_count': 1000,
+     'like_count': 50, 'comment_count': 3, 'support_rate': 1.2, 'data_source': 'analytics',
+     'analytics_ctr': 4.5},
+    {'song_name': '曲B', 'artist_name': 'X', 'release_date': '2025/7/1', 'view_count': 0,
+     'like_count': 0, 'comment_count': 0},
+    {'song_name': '曲C', 'artist_name': '', 'release_date': 'bad', 'view_count': 123456,
+     'like_count': 789, 'comment_count': 10, 'growth_rate': 33.3},
+    {'song_name': '曲D', 'view_count': 5},
+]
+TAIKO = {
+    '曲A': {'tags': "['ボカロ', 'アニメ']", 'difficulty': 'かんたん：1むずかしい：6げきむず：3'},
+    '曲B': {'tags': 'not a list', 'difficulty': ''},
+    '曲C': {'tags': "['ポップス']"},
+}
+
+def _engineer(use_channel_features):
+    engineer = FeatureEngineer(use_channel_features=False)
+    if use_channel_features:
+        engineer.use_channel_features = True
+        engineer.channel_engineer = ChannelSpecificFeatureEngineer('missing_history.csv')
+        engineer.columnar_builder.channel_engineer = engineer.channel_engineer
+    return engineer
+
+@pytest.mark.parametrize('use_channel_features', [False, True])
+@pytest.mark.parametrize('target', [datetime.datetime(2025, 6, 14, 19, 30), datetime.datetime(2024, 12, 30, 4)])
+def test_matches_dict_path(use_channel_features, target):
+    engineer = _engineer(use_channel_features)
+    X_ref, y_ref, names_ref = engineer._prepare_training_data_dicts(SONGS, TAIKO, target)
+    X, y, names = engineer.prepare_training_data(SONGS, TAIKO, target)
+
+    assert names == names_ref
+    assert X.to_numpy().dtype == np.float32
+    np.testing.assert_array_equal(X.to_numpy(), X_ref.to_numpy(dtype=np.float64).astype(np.float32))
+    np.testing.assert_array_equal(y, y_ref)
+
+def test_per_song_target_datetimes():
+    engineer = _engineer(True)
+    targets = [datetime.datetime(2025, 6, 12, 6), datetime.datetime(2025, 6, 14, 20)]
+    matrix, names = engineer.build_feature_matrix(SONGS[:2], TAIKO, targets)
+
+    for row, target in enumerate(targets):
+        expected, _, _ = engineer._prepare_training_data_dicts([SONGS[row]], TAIKO, target)
+        temporal = [names.index(name) for name in ('hour', 'is_golden_timeslot', 'days_since_release')]
+        np.testing.assert_array_equal(matrix[row, temporal], expected.iloc[0, temporal].to_numpy(dtype=np.float32))
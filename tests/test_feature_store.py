@@ -0,0 +1,92 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.ml.columnar_features import STATIC_COLUMNS
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.feature_store import FeatureStore, song_ids
+
+SONGS = [
+    {'video_id': 'v1', 'song_name': 'A', 'artist_name': 'X', 'release_date': '2025/01/01',
+     'view_count': 1000, 'like_count': 50, 'comment_count': 5},
+    {'song_name': 'B', 'artist_name': 'X', 'view_count': 3000, 'like_count': 90},
+    {'song_name': 'B', 'artist_name': 'Y', 'view_count': 10},
+]
+TAIKO = {'A': {'tags': '["ボカロ"]', 'difficulty': '★5'}}
+
+def test_song_ids_prefer_video_id_and_disambiguate():
+    frame = pd.DataFrame(SONGS)
+    assert song_ids(frame) == ['v1', 'B', 'B#2']
+
+def test_point_batch_reads_and_upsert(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    columns = ['a', 'b']
+    store.write('v', ['s1', 's2'], np.array([[1, 2], [3, 4]]), columns)
+    store.write('v', ['s2', 's3'], np.array([[5, 6], [7, 8]]), columns)
+
+    assert store.get('v', 's2').tolist() == [5, 6]
+    assert store.get('v', 'missing') is None
+    assert store.get('v', 's1', columns=['other']) is None
+    matrix, found = FeatureStore(str(tmp_path)).read('v', ['s3', 'x', 's1'], columns)
+    assert found.tolist() == [True, False, True]
+    assert matrix.tolist() == [[7, 8], [0, 0], [1, 2]]
+
+def test_prune_keeps_newest_versions(tmp_path):
+    store = FeatureStore(str(tmp_path), max_versions=2)
+    for version in ['v1', 'v2', 'v3']:
+        store.write(version, ['s'], np.zeros((1, 1)), ['a'])
+    assert sorted(store.versions()) == ['v2', 'v3']
+
+def test_builder_reuses_static_features(tmp_path, monkeypatch):
+    target = datetime.datetime(2025, 6, 1, 19)
+    engineer = FeatureEngineer(use_channel_features=False, feature_store=FeatureStore(str(tmp_path)))
+    expected, _, _ = FeatureEngineer(use_channel_features=False).prepare_training_data(SONGS, TAIKO, target)
+
+    first, _, _ = engineer.prepare_training_data(SONGS, TAIKO, target)
+    assert len(engineer.feature_store.versions()) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError('static features recomputed')
+    monkeypatch.setattr(engineer.columnar_builder, '_content_columns', fail)
+    second, _, _ = engineer.prepare_training_data(SONGS, TAIKO, target + datetime.timedelta(days=3))
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second[STATIC_COLUMNS], expected[STATIC_COLUMNS])
+
+    # Changed input data gets a new version
+    monkeypatch.undo()
+    changed = [dict(SONGS[0], view_count=2000)] + SONGS[1:]
+    engineer.prepare_training_data(changed, TAIKO, target)
+    assert len(engineer.feature_store.versions()) == 2
+
+def test_load_training_data_versions_by_source(tmp_path, monkeypatch):
+    path = tmp_path / 'training.json'
+    path.write_text(json.dumps(SONGS), encoding='utf-8')
+    engineer = FeatureEngineer(use_channel_features=False, feature_store=FeatureStore(str(tmp_path / 'store')))
+    first, _, _ = engineer.load_training_data(str(path), TAIKO, datetime.datetime(2025, 6, 1, 19), use_cache=False)
+
+    monkeypatch.setattr(engineer.columnar_builder, '_content_columns', None)
+    second, _, _ = engineer.load_training_data(str(path), TAIKO, datetime.datetime(2025, 6, 2, 8), use_cache=False)
+    pd.testing.assert_frame_equal(second[STATIC_COLUMNS], first[STATIC_COLUMNS])
+
+def test_cached_training_data_is_keyed_by_contents(tmp_path, monkeypatch):
+    engineer = FeatureEngineer(use_channel_features=False)
+    cache_dir = str(tmp_path / 'cache')
+    target = datetime.datetime(2025, 6, 1, 19)
+    engineer.prepare_training_data_cached(SONGS, TAIKO, target, cache_dir=cache_dir)
+
+    # 別の時刻でも静的特徴は作らず、時間的特徴だけを計算する
+    later = datetime.datetime(2025, 6, 3, 8)
+    expected, expected_y, expected_names = engineer.prepare_training_data(SONGS, TAIKO, later)
+    monkeypatch.setattr(engineer.columnar_builder, 'static_features', None)
+    cached, cached_y, cached_names = engineer.prepare_training_data_cached(SONGS, dict(TAIKO), later,
+                                                                           cache_dir=cache_dir)
+    assert cached_names == expected_names and cached_y.tolist() == expected_y.tolist()
+    pd.testing.assert_frame_equal(cached, expected)
+
+    # TaikoGameデータが変わったら作り直す
+    monkeypatch.undo()
+    changed = {'A': {'tags': '["アニメ"]', 'difficulty': '★5'}}
+    rebuilt, _, _ = engineer.prepare_training_data_cached(SONGS, changed, later, cache_dir=cache_dir)
+    assert rebuilt['has_anime_tag'].tolist()[0] == 1 and cached['has_anime_tag'].tolist()[0] == 0
@@ -0,0 +1,89 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.incremental import IncrementalUpdater, load_training_songs, update_registered_model
+from src.ml.model_registry import ModelRegistry
+from src.ml.scheduler import ViewCountPredictor
+
+TARGET = datetime.datetime(2025, 6, 10, 19)
+
+
+def _songs(start, stop):
+    return [{'song_name': f'曲{i}', 'video_id': f'v{i}', 'artist_name': 'XYZ'[i % 3],
+             'release_date': f'2025/05/{i % 28 + 1:02d}', 'view_count': 100 * (i % 17 + 1) ** 2,
+             'like_count': 3 * i, 'comment_count': i % 5} for i in range(start, stop)]
+
+@pytest.mark.parametrize('backend', ['hgb', 'gbr'])
+def test_partial_fit_adds_trees_and_fits_new_rows(backend):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = np.expm1(6 + X[:, 0])
+    predictor = ViewCountPredictor(backend=backend)
+    predictor.train(X, y, use_augmentation=False, verbose=0)
+
+    # 分布がずれた新しいデータ
+    X_new = rng.normal(size=(40, 4))
+    y_new = np.expm1(7 + X_new[:, 0])
+    update = predictor.partial_fit(X_new, y_new, extra_estimators=30)
+    assert update['rows'] == 40
+    assert update['mae_after'] < update['mae_before']
+    if backend == 'hgb':
+        assert predictor.model.n_iter['stages'] == [30]
+        assert predictor.scaler.n_samples_seen_ == 340
+
+def test_updater_folds_in_only_unseen_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    engineer = FeatureEngineer(use_channel_features=False)
+    updater = IncrementalUpdater(registry, engineer, extra_estimators=5)
+
+    songs = _songs(0, 120)
+    assert updater.update(songs, target_datetime=TARGET, verbose=0) is None
+
+    X, y, _ = engineer.prepare_training_data(songs, {}, TARGET)
+    _, base_id, _ = registry.get_or_train('base', ViewCountPredictor(backend='hgb'), X, y,
+                                          verbose=0, use_augmentation=False)
+    updater.mark_seen(songs)
+    assert updater.update(songs, target_datetime=TARGET, verbose=0) is None
+
+    songs = songs + _songs(120, 140)
+    songs[0] = dict(songs[0], view_count=songs[0]['view_count'] * 2)
+    assert updater.pending_mask(songs).sum() == 21
+
+    model_id = updater.update(songs, target_datetime=TARGET, verbose=0)
+    assert model_id is not None and registry.current() == model_id
+    manifest = registry.manifest(model_id)
+    assert manifest['parent'] == base_id and manifest['metrics']['incremental']['rows'] == 21
+    assert not updater.pending_mask(songs).any()
+
+    # 元のデータのフィンガープリントで見つかっても、逐次更新したモデルを使い続ける
+    _, reused_id, trained = registry.get_or_train('base', ViewCountPredictor(backend='hgb'), X, y, verbose=0)
+    assert not trained and reused_id == model_id and registry.current() == model_id
+    # 逐次更新ではないモデルが現在のモデルなら、フィンガープリントのモデルに戻す
+    registry.set_current(base_id)
+    assert registry.get_or_train('base', ViewCountPredictor(backend='hgb'), X, y, verbose=0)[1] == base_id
+
+def test_updater_loads_the_training_taiko_data(tmp_path):
+    taiko_path = tmp_path / 'taiko.csv'
+    taiko_path.write_text('song_name,tags\n曲1,"[""ボカロ""]"\n', encoding='utf-8')
+    updater = IncrementalUpdater(ModelRegistry(str(tmp_path / 'registry')), taiko_path=str(taiko_path))
+    row, _ = updater.load_taiko_map().lookup('曲1')
+    assert row['tags'] == '["ボカロ"]'
+    assert IncrementalUpdater(ModelRegistry(str(tmp_path / 'registry')),
+                              taiko_path=str(tmp_path / 'missing.csv')).load_taiko_map() == {}
+
+def test_training_songs_come_from_rankings(tmp_path):
+    metrics = {'view_count': 1200, 'like_count': 30, 'comment_count': 2, 'support_rate': 0.5,
+               'growth_rate': 0.1, 'days_since_published': 40}
+    rankings = {'overall': [{'song_name': '曲1', 'video_id': 'v1', 'metrics': metrics}], 'views': []}
+    path = tmp_path / 'rankings.json'
+    path.write_text(json.dumps(rankings, ensure_ascii=False), encoding='utf-8')
+
+    songs = load_training_songs(str(path))
+    assert songs == [dict(metrics, song_name='曲1', artist_name='', video_id='v1', release_date='')]
+    assert load_training_songs(str(tmp_path / 'missing.json')) is None
+    assert update_registered_model(rankings_path=str(tmp_path / 'missing.json'), verbose=0) is None
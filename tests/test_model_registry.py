@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from src.ml.model_registry import ModelRegistry, training_data_fingerprint
+from src.ml.scheduler import ViewCountPredictor
+
+SONGS = [{'song_name': f'曲{i}', 'view_count': 100 * (i + 1)} for i in range(5)]
+
+
+def _data(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(300, 4))
+    return X, np.expm1(6 + X[:, 0] + rng.normal(scale=0.1, size=300))
+
+def test_fingerprint_tracks_songs_and_config(tmp_path):
+    source = tmp_path / 'taiko.csv'
+    source.write_text('a\n1\n')
+    base = training_data_fingerprint(SONGS, str(source), config={'epochs': 50})
+    assert training_data_fingerprint(list(SONGS), str(source), config={'epochs': 50}) == base
+    assert training_data_fingerprint(SONGS[:-1], str(source), config={'epochs': 50}) != base
+    assert training_data_fingerprint(SONGS, str(source), config={'epochs': 10}) != base
+
+    # 曲データ以外から作る特徴量の入力（data_key）と特徴量名も含める
+    keyed = training_data_fingerprint(SONGS, str(source), feature_names=['a', 'b'], data_key='k1')
+    assert keyed != training_data_fingerprint(SONGS, str(source))
+    assert training_data_fingerprint(SONGS, str(source), feature_names=['a', 'b'], data_key='k1') == keyed
+    assert training_data_fingerprint(SONGS, str(source), feature_names=['a', 'b'], data_key='k2') != keyed
+    assert training_data_fingerprint(SONGS, str(source), feature_names=['a', 'c'], data_key='k1') != keyed
+
+def test_get_or_train_skips_retraining_and_warm_starts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    X, y = _data(0)
+    params = {'use_augmentation': False}
+
+    predictor, first_id, trained = registry.get_or_train(
+        'data1', ViewCountPredictor(backend='hgb'), X, y, verbose=0, **params)
+    assert trained and registry.current() == first_id
+    manifest = registry.manifest(first_id)
+    assert manifest['fingerprint'] == 'data1' and manifest['metrics']['n_iter']['views'] > 0
+
+    loaded, model_id, trained = registry.get_or_train(
+        'data1', ViewCountPredictor(backend='hgb'), X, y, verbose=0, **params)
+    assert not trained and model_id == first_id
+    np.testing.assert_array_equal(loaded.predict(X)[0], predictor.predict(X)[0])
+
+    X2, y2 = _data(1)
+    # 継続訓練は指定した場合のみ
+    _, fresh_id, _ = registry.get_or_train('fresh', ViewCountPredictor(backend='hgb'), X2, y2, verbose=0, **params)
+    assert not registry.load(fresh_id).model.stages and registry.manifest(fresh_id)['parent'] is None
+    registry.set_current(first_id)
+    warm, second_id, trained = registry.get_or_train(
+        'data2', ViewCountPredictor(backend='hgb'), X2, y2, warm_start=True, verbose=0, **params)
+    assert trained and second_id != first_id and registry.current() == second_id
+    # 継続訓練では前回のモデルを残し、残差を学習するステージを追加する
+    previous = registry.load(first_id).model
+    assert not previous.stages and len(warm.model.stages) == 1
+    np.testing.assert_array_equal(warm.model.views_model.predict(X2), previous.views_model.predict(X2))
+
+    # ステージが上限に達したら基本モデルから訓練し直す
+    warm.model.max_stages = 1
+    warm.model.fit(X2, y2, warm_start=True)
+    assert not warm.model.stages
+
+    # 古いモデルを削除しても現在のモデルとそのポインタは残る
+    registry.prune(keep=1)
+    assert registry.models() == [second_id]
+    assert registry.find('data1') is None and registry.find('data2') == second_id
+    assert not [name for name in os.listdir(registry.objects_dir) if name.startswith('.staging')]
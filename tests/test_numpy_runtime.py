@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.ml.numpy_runtime import NumpyMLP
+from src.ml.scheduler import ViewCountPredictor
+
+
+class InputLayer:
+    name = 'input'
+
+class Dense:
+    def __init__(self, name, kernel, bias, activation):
+        self.name, self.weights, self.activation = name, [kernel, bias], activation
+
+    def get_weights(self):
+        return self.weights
+
+    def get_config(self):
+        return {'activation': self.activation, 'use_bias': True}
+
+class Dropout:
+    def __init__(self, name):
+        self.name = name
+
+    def get_weights(self):
+        return []
+
+    def get_config(self):
+        return {'rate': 0.3}
+
+class BatchNormalization:
+    def __init__(self, name, size, rng):
+        self.name = name
+        self.weights = [rng.uniform(0.5, 1.5, size), rng.normal(0, 0.1, size),
+                        rng.normal(0, 0.5, size), rng.uniform(0.5, 2.0, size)]
+
+    def get_weights(self):
+        return self.weights
+
+    def get_config(self):
+        return {'epsilon': 1e-3, 'center': True, 'scale': True}
+
+class FakeModel:
+    """ViewCountPredictor.build_model と同じ層構成"""
+
+    def __init__(self, input_dim, seed=0):
+        rng = np.random.default_rng(seed)
+        dense = lambda name, n_in, n_out, act: Dense(name, rng.normal(0, 1 / np.sqrt(n_in), (n_in, n_out)),
+                                                      rng.normal(0, 0.1, n_out), act)
+        self.layers = [
+            InputLayer(),
+            dense('dense', input_dim, 128, 'relu'), Dropout('dropout'), BatchNormalization('bn', 128, rng),
+            dense('dense_1', 128, 64, 'relu'), Dropout('dropout_1'), BatchNormalization('bn_1', 64, rng),
+            dense('dense_2', 64, 32, 'relu'),
+            dense('views', 32, 1, 'linear'),
+            dense('dense_3', 32, 16, 'relu'),
+            dense('confidence', 16, 1, 'sigmoid'),
+        ]
+
+    def predict(self, X_scaled, verbose=0):
+        """BatchNormを畳み込まない参照実装"""
+        h = X_scaled
+        outputs = {}
+        for layer in self.layers[1:]:
+            if isinstance(layer, BatchNormalization):
+                gamma, beta, mean, var = layer.weights
+                h = gamma * (h - mean) / np.sqrt(var + 1e-3) + beta
+            elif isinstance(layer, Dense):
+                x = outputs['trunk'] if layer.name == 'dense_3' else h
+                z = x @ layer.weights[0] + layer.weights[1]
+                z = {'relu': lambda v: np.maximum(v, 0), 'linear': lambda v: v,
+                     'sigmoid': lambda v: 1 / (1 + np.exp(-v))}[layer.activation](z)
+                if layer.name == 'dense_2':
+                    outputs['trunk'] = z
+                if layer.name == 'views':
+                    outputs['views'] = z
+                else:
+                    h = z
+        return outputs['views'], h
+
+
+@pytest.fixture
+def keras_predictor():
+    rng = np.random.default_rng(1)
+    X = rng.normal(50, 20, (64, 12))
+    predictor = ViewCountPredictor(input_dim=12)
+    predictor.scaler = StandardScaler().fit(X)
+    predictor.model = FakeModel(12)
+    return predictor, X
+
+def test_runtime_matches_unfolded_network(keras_predictor):
+    predictor, X = keras_predictor
+    expected_views, expected_confidence = predictor.predict(X)
+
+    runtime = NumpyMLP.from_keras(predictor.model, predictor.scaler)
+    assert [W.shape for W, _, _ in runtime.trunk] == [(12, 128), (128, 64), (64, 32)]
+    views, confidence = runtime.predict(X)
+    np.testing.assert_allclose(np.log1p(views), np.log1p(expected_views), rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(confidence, expected_confidence, rtol=1e-4, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        runtime.predict(X[:, :5])
+
+def test_load_prefers_numpy_runtime(keras_predictor, tmp_path, monkeypatch):
+    predictor, X = keras_predictor
+    expected_views, expected_confidence = predictor.predict(X)
+
+    monkeypatch.chdir(tmp_path)
+    paths = {'model_path': str(tmp_path / 'models' / 'view_predictor.pkl'),
+             'scaler_path': str(tmp_path / 'models' / 'view_scaler.pkl'),
+             'schema_path': str(tmp_path / 'models' / 'view_schema.json')}
+    (tmp_path / 'models').mkdir()
+    assert predictor.export_numpy_runtime(paths['model_path'].replace('.pkl', '.npz'))
+    predictor.model = None
+    predictor.save(**paths)
+
+    loaded = ViewCountPredictor()
+    loaded.load(**paths)
+    assert isinstance(loaded.model, NumpyMLP)
+    views, confidence = loaded.predict(X)
+    np.testing.assert_allclose(np.log1p(views), np.log1p(expected_views), rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(confidence, expected_confidence, rtol=1e-4, atol=1e-5)
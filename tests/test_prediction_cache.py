@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.prediction_cache import PredictionCache
+from src.ml.rl_scheduler import ComprehensiveScheduler
+
+
+def test_lookup_returns_stored_slots_and_nan_elsewhere():
+    cache = PredictionCache(max_songs=10)
+    cache.store('m1', 'song', [100, 102], np.array([1.0, 3.0]), np.array([0.1, 0.3]))
+    # 範囲の前後に広げても既存の値は残る
+    cache.store('m1', 'song', [98, 105], np.array([5.0, 6.0]), np.array([0.5, 0.6]))
+
+    views, confidence = cache.lookup('m1', 'song', [98, 100, 101, 102, 105, 200])
+    np.testing.assert_array_equal(views, [5, 1, np.nan, 3, 6, np.nan])
+    np.testing.assert_array_equal(confidence[:2], [0.5, 0.1])
+    assert cache.stats()['hits'] == 4 and cache.stats()['misses'] == 2
+    # モデルのバージョンが違えば別のエントリ
+    assert np.isnan(cache.lookup('m2', 'song', [100])[0]).all()
+
+def test_cache_evicts_least_recently_used_song():
+    cache = PredictionCache(max_songs=2)
+    for song in ('a', 'b'):
+        cache.store('m', song, [0], np.ones(1), np.ones(1))
+    cache.lookup('m', 'a', [0])
+    cache.store('m', 'c', [0], np.ones(1), np.ones(1))
+    assert len(cache) == 2 and cache.evictions == 1
+    assert not np.isnan(cache.lookup('m', 'a', [0])[0]).any()
+    assert np.isnan(cache.lookup('m', 'b', [0])[0]).all()
+
+    with pytest.raises(ValueError):
+        PredictionCache(max_songs=0)
+
+
+class CountingPredictor:
+    """Evening-peaked views; counts the rows it is asked to predict."""
+
+    def __init__(self, version):
+        self.version = version
+        self.rows = 0
+
+    def prediction_version(self):
+        return self.version
+
+    def predict(self, X):
+        self.rows += len(X)
+        hour = X['hour'].to_numpy(dtype=float)
+        return 100 - (hour - 20) ** 2 + X['day_of_month'].to_numpy(dtype=float), np.ones(len(X))
+
+def test_repeated_scheduler_runs_hit_the_cache():
+    songs = [{'song_name': f'曲{i}', 'artist_name': 'X', 'release_date': '', 'view_count': 10 * (i + 1)}
+             for i in range(5)]
+    engineer = FeatureEngineer(use_channel_features=False)
+    cache = PredictionCache()
+
+    def run(predictor, **constraints):
+        scheduler = ComprehensiveScheduler(ml_predictor=predictor, feature_engineer=engineer,
+                                           prediction_cache=cache)
+        constraints = dict(scheduler._get_default_constraints(), max_days_ahead=7, **constraints)
+        return scheduler.optimize_schedule(songs, constraints=constraints, verbose=False)
+
+    first_predictor = CountingPredictor('m1')
+    first = run(first_predictor)
+    assert first_predictor.rows > 0
+
+    # 新しいスケジューラ・同じモデル: 予測はすべてキャッシュから
+    second_predictor = CountingPredictor('m1')
+    assert run(second_predictor) == first
+    assert second_predictor.rows == 0
+    # What-if（制約を変えた再実行）も既存のスロットはキャッシュから
+    run(second_predictor, avoid_hours=list(range(12)))
+    assert second_predictor.rows == 0
+
+    # モデルが変わったら予測し直す
+    other = CountingPredictor('m2')
+    run(other)
+    assert other.rows == first_predictor.rows
@@ -0,0 +1,68 @@
+import json
+import time
+
+import pytest
+
+from src.utils import profiling
+from src.utils.profiling import Tracer, span, start_run, traced
+
+@traced('busy')
+def _busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+    return seconds
+
+def test_spans_are_noops_without_an_active_run():
+    assert profiling.active_tracer() is None
+    with span('idle', rows=3) as s:
+        s.rows = 5
+    assert _busy(0) == 0
+
+def test_run_writes_chrome_trace_with_stage_breakdown(tmp_path):
+    tracer = start_run('pipeline')
+    tracer.stage('features', rows=10)
+    with span('predict', rows=4) as s:
+        _busy(0.01)
+        s.rows = 6
+    tracer.stage('optimize')
+    for _ in range(3):
+        _busy(0)
+    path = tracer.finish(directory=str(tmp_path), verbose=False)
+    assert profiling.active_tracer() is None
+
+    trace = json.loads(open(path, encoding='utf-8').read())
+    events = {}
+    for event in trace['traceEvents']:
+        if event['ph'] == 'X':
+            events.setdefault(event['name'], event)
+    assert set(events) == {'features', 'predict', 'busy', 'optimize'}
+    assert events['predict']['args']['rows'] == 6
+    assert events['busy']['args']['cpu_ms'] >= 10
+    # 子のspanは親の区間に含まれる
+    parent, child = events['features'], events['predict']
+    assert parent['ts'] <= child['ts'] and child['ts'] + child['dur'] <= parent['ts'] + parent['dur']
+
+    totals = {t['name']: t for t in trace['otherData']['summary']}
+    assert totals['busy']['count'] == 4 and totals['predict']['depth'] == 1
+    assert totals['features']['rows'] == 10
+
+def test_event_cap_keeps_summary_totals(tmp_path):
+    tracer = Tracer('capped', max_events=2).start()
+    for _ in range(5):
+        with span('row'):
+            pass
+    tracer.stop()
+    trace = tracer.to_chrome_trace()
+    assert len([e for e in trace['traceEvents'] if e['ph'] == 'X']) == 2
+    assert trace['otherData']['dropped_events'] == 3
+
+@pytest.mark.parametrize('mode, suffix', [('cprofile', '.prof'), ('sample', '.folded')])
+def test_profile_modes_write_profiler_output(tmp_path, mode, suffix):
+    tracer = start_run('profiled', profile=mode)
+    _busy(0.05)
+    path = tracer.finish(directory=str(tmp_path), verbose=False)
+    output = path[:-len('.json')] + suffix
+    assert (tmp_path / output.split('/')[-1]).stat().st_size > 0
+    with pytest.raises(ValueError):
+        Tracer(profile='py-spy')
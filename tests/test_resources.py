@@ -0,0 +1,58 @@
+import os
+from multiprocessing import Pool
+
+import pytest
+
+from src.utils.resources import (ResourceGovernor, ResourcePolicy, init_worker, limit_process_threads,
+                                 process_threads)
+
+def _worker_threads(_):
+    return process_threads()
+
+def test_policy_splits_cores_between_ml_and_render():
+    policy = ResourcePolicy(cpus=8, ml_share=0.25)
+    # 単独で動いていても、もう一方の種類の分は空けておく
+    assert policy.split({'ml': 2}) == {'ml': 1, 'render': 6}
+    assert policy.split({'ml': 1, 'render': 3}) == {'ml': 2, 'render': 2}
+    # ワーカーがコアより多くても1スレッドは割り当てる
+    assert policy.split({'render': 16})['render'] == 1
+    with pytest.raises(ValueError):
+        ResourcePolicy(ml_share=1.0)
+
+def test_leases_are_shared_between_governors(tmp_path):
+    policy = ResourcePolicy(cpus=8, ml_share=0.5, state_path=str(tmp_path / 'governor.db'))
+    renderer, trainer = ResourceGovernor(policy), ResourceGovernor(policy)
+
+    with renderer.acquire('render', jobs=2) as render:
+        assert render.threads == 2
+        assert trainer.budget('ml') == 4
+        with trainer.acquire('ml') as ml:
+            assert ml.threads == 4
+            assert renderer.active() == {'ml': 1, 'render': 2}
+        # 既存の2ワーカーに2ワーカーを加えた場合
+        assert renderer.budget('render', jobs=2) == 1
+    assert trainer.active() == {'ml': 0, 'render': 0}
+
+def test_leases_of_dead_processes_are_dropped(tmp_path):
+    policy = ResourcePolicy(cpus=4, state_path=str(tmp_path / 'governor.db'))
+    governor = ResourceGovernor(policy)
+    governor.acquire('render', jobs=3)
+    conn = governor._connect()
+    with conn:
+        conn.execute("UPDATE leases SET pid = ?", (2 ** 22 + 12345,))
+    conn.close()
+    assert governor.active() == {'ml': 0, 'render': 0}
+
+def test_pool_workers_get_the_thread_cap():
+    with Pool(processes=2, initializer=init_worker, initargs=(3,)) as pool:
+        assert pool.map(_worker_threads, range(2)) == [3, 3]
+
+def test_thread_limits_are_restored(monkeypatch):
+    monkeypatch.setenv('OMP_NUM_THREADS', '7')
+    monkeypatch.delenv('MKL_NUM_THREADS', raising=False)
+    assert process_threads() is None
+    with limit_process_threads(2):
+        assert os.environ['OMP_NUM_THREADS'] == os.environ['MKL_NUM_THREADS'] == '2'
+        assert process_threads() == 2
+    assert os.environ['OMP_NUM_THREADS'] == '7' and 'MKL_NUM_THREADS' not in os.environ
+    assert process_threads() is None
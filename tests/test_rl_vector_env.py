@@ -0,0 +1,57 @@
+import datetime
+
+import numpy as np
+
+from rl_scheduler import RolloutBuffer, SchedulingEnvironment, VectorSchedulingEnvironment, compute_gae
+
+
+def test_vector_environment_matches_scalar_environment():
+    today = datetime.date.today()
+    songs = [{'song_name': f'曲{i}', 'release_date': '', 'view_count': 100000 * i} for i in range(30)]
+    songs[4]['release_date'] = (today + datetime.timedelta(days=3)).strftime('%Y/%m/%d')
+    songs[9]['release_date'] = '2020/01/01'
+    rng = np.random.default_rng(0)
+
+    vector_env = VectorSchedulingEnvironment(songs, num_envs=3)
+    envs = [SchedulingEnvironment(songs) for _ in range(3)]
+    vector_env.reset()
+    for env in envs:
+        env.reset()
+    done = False
+    while not done:
+        # 間隔・週あたり投稿数のペナルティが出るよう、狭い範囲に集める
+        actions = rng.normal(size=(3, 2)) * [5, 8] + [5, 12]
+        states, rewards, done = vector_env.step(actions)
+        for k, env in enumerate(envs):
+            state, reward, env_done, _ = env.step(actions[k])
+            np.testing.assert_allclose(states[k], state)
+            # 逐次版の投稿日時は現在時刻のマイクロ秒を含む
+            assert abs(rewards[k] - reward) < 1e-5
+            assert env_done == done
+
+    for k, env in enumerate(envs):
+        expected = [(song['song_name'], when.replace(microsecond=0)) for song, when in env.schedule]
+        assert [(song['song_name'], when) for song, when in vector_env.schedule(k)] == expected
+    assert vector_env.schedule(0)[4][1].date() == today + datetime.timedelta(days=3)
+
+def test_gae_over_rollout_buffer():
+    rng = np.random.default_rng(1)
+    buffer = RolloutBuffer(num_steps=6, num_envs=2, state_dim=3, action_dim=2)
+    for t in range(6):
+        buffer.add(rng.normal(size=(2, 3)), rng.normal(size=(2, 2)), rng.normal(size=2),
+                   rng.normal(size=2), rng.normal(size=2), [float(t == 2), float(t == 5)])
+
+    gamma, lam = 0.9, 0.8
+    advantages, returns = compute_gae(buffer.rewards, buffer.values, buffer.dones, gamma, lam)
+    for env in range(2):
+        # 環境ごとの素朴な定義: A_t = Σ (γλ)^k δ_{t+k}（エピソードの終わりまで）
+        for t in range(6):
+            expected, factor = 0.0, 1.0
+            for k in range(t, 6):
+                next_value = 0.0 if buffer.dones[k, env] or k == 5 else buffer.values[k + 1, env]
+                expected += factor * (buffer.rewards[k, env] + gamma * next_value - buffer.values[k, env])
+                if buffer.dones[k, env]:
+                    break
+                factor *= gamma * lam
+            assert abs(advantages[t, env] - expected) < 1e-5
+    np.testing.assert_allclose(returns, advantages + buffer.values)
@@ -0,0 +1,89 @@
+import datetime
+import itertools
+
+import numpy as np
+
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.rl_scheduler import ComprehensiveScheduler
+from src.ml.slot_assignment import SlotAssigner
+
+
+def post_times(song_days, song_hours, hours):
+    return sorted(int(day) * 24 + int(hours[hour]) for day, hour in zip(song_days, song_hours) if day >= 0)
+
+def assert_feasible(times, max_posts_per_day, min_interval_hours):
+    assert all(b - a >= min_interval_hours for a, b in zip(times, times[1:]))
+    assert np.bincount([t // 24 for t in times]).max() <= max_posts_per_day
+
+def best_total(values, hours, max_posts_per_day, min_interval_hours):
+    slots = list(itertools.product(range(values.shape[1]), range(values.shape[2])))
+    best = -np.inf
+    for chosen in itertools.permutations(range(len(slots)), len(values)):
+        times = sorted(slots[i][0] * 24 + hours[slots[i][1]] for i in chosen)
+        if any(b - a < min_interval_hours for a, b in zip(times, times[1:])):
+            continue
+        if np.bincount([t // 24 for t in times]).max() > max_posts_per_day:
+            continue
+        best = max(best, sum(values[song][slots[i]] for song, i in enumerate(chosen)))
+    return best
+
+def test_assignment_is_feasible_and_near_optimal():
+    rng = np.random.default_rng(0)
+    hours = np.array([8, 12, 18, 21])
+    assigner = SlotAssigner(max_posts_per_day=2, min_interval_hours=4)
+    gaps = []
+    for _ in range(10):
+        values = rng.random((3, 2, len(hours))) * 100
+        song_days, song_hours = assigner.assign(values, hours)
+        assert (song_days >= 0).all()
+        assert_feasible(post_times(song_days, song_hours, hours), 2, 4)
+        best = best_total(values, hours, 2, 4)
+        gaps.append((best - assigner.total(values, np.zeros(3, dtype=int), song_days, song_hours)) / best)
+    assert np.mean(gaps) < 0.01
+
+def test_interval_spans_midnight_and_blocked_slots_are_skipped():
+    hours = np.array([1, 23])
+    values = np.full((2, 2, 2), 10.0)
+    values[0, 0, 1] = 100.0  # 曲0は 0日目23時が最良
+    values[1, 1, 0] = 90.0   # 曲1は 1日目1時が最良だが、23時から2時間しか空かない
+    values[1, 0, :] = -np.inf
+
+    song_days, song_hours = SlotAssigner(max_posts_per_day=2, min_interval_hours=6).assign(values, hours)
+    times = post_times(song_days, song_hours, hours)
+    assert_feasible(times, 2, 6)
+    assert (song_days[0], hours[song_hours[0]]) == (0, 23)
+    assert song_days[1] == 1
+
+def test_songs_that_do_not_fit_are_left_unassigned():
+    values = np.ones((3, 1, 2))
+    song_days, _ = SlotAssigner(max_posts_per_day=2, min_interval_hours=1).assign(values, [18, 20])
+    assert sorted(song_days) == [-1, 0, 0]
+
+
+class EveningPredictor:
+    """Predicts the most views at 20:00, more on weekends."""
+
+    def predict(self, X):
+        hour = X['hour'].to_numpy(dtype=float)
+        weekend = 1 + 0.5 * X['is_weekend'].to_numpy(dtype=float)
+        return (100 - (hour - 20) ** 2) * weekend, np.ones(len(X))
+
+def test_comprehensive_schedule_respects_constraints():
+    today = datetime.date.today()
+    songs = [{'song_name': f'曲{i}', 'artist_name': 'X', 'release_date': '', 'view_count': 10 * i}
+             for i in range(12)]
+    songs[3]['release_date'] = (today + datetime.timedelta(days=2)).isoformat()
+    scheduler = ComprehensiveScheduler(ml_predictor=EveningPredictor(),
+                                       feature_engineer=FeatureEngineer(use_channel_features=False))
+    constraints = dict(scheduler._get_default_constraints(), max_days_ahead=14, avoid_hours=list(range(12)))
+
+    schedule = scheduler.optimize_schedule(songs, constraints=constraints, verbose=False)
+    posted = {song['song_name']: datetime.datetime.fromisoformat(song['optimal_posting_datetime'])
+              for song in schedule}
+    assert posted['曲3'].date() == today + datetime.timedelta(days=2)
+    times = sorted(int((when - datetime.datetime.combine(today, datetime.time())).total_seconds() // 3600)
+                   for when in posted.values())
+    assert_feasible(times, constraints['max_posts_per_day'], constraints['min_interval_hours'])
+    assert all(song['slot_predicted_views'] > 0 for song in schedule)
+    # The summary and the rankings.json write-back read predicted_view_count
+    assert all(song['predicted_view_count'] == song['slot_predicted_views'] for song in schedule)
@@ -0,0 +1,49 @@
+import datetime
+
+import numpy as np
+
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.rl_scheduler import ComprehensiveScheduler
+from src.ml.slot_lattice import SlotFeatureLattice
+
+SONGS = [
+    {'song_name': '曲A', 'artist_name': 'X', 'release_date': '2025/06/03', 'view_count': 1000,
+     'like_count': 50, 'comment_count': 3},
+    {'song_name': '曲B', 'artist_name': 'X', 'release_date': '', 'view_count': 10, 'like_count': 1},
+]
+TAIKO = {'曲A': {'tags': "['アニメ']", 'difficulty': 'かんたん：1むずかしい：6げきむず：3'}}
+
+class HourPredictor:
+    """Predicts more views for later hours, so the best slot is the latest allowed hour."""
+
+    def predict(self, X):
+        return X['hour'].to_numpy(dtype=float) + 1, np.ones(len(X))
+
+def test_candidate_features_match_prepare_training_data():
+    engineer = FeatureEngineer(use_channel_features=False)
+    lattice = SlotFeatureLattice(engineer.columnar_builder, datetime.date(2025, 6, 1), days=5)
+    lattice.add_songs(SONGS, TAIKO)
+
+    slots = np.arange(len(lattice))
+    for song in range(len(SONGS)):
+        features = lattice.candidate_features(song, slots)
+        for slot in (0, 19, 2 * 24 + 20, len(lattice) - 1):
+            X, _, _ = engineer.prepare_training_data(SONGS, TAIKO, lattice.slot_datetime(slot))
+            np.testing.assert_array_equal(features[slot], X.to_numpy()[song])
+
+def test_lattice_extends_on_demand():
+    engineer = FeatureEngineer(use_channel_features=False)
+    lattice = SlotFeatureLattice(engineer.columnar_builder, datetime.date(2025, 6, 1), days=2)
+    slot = lattice.slot_index(datetime.date(2025, 6, 10), 7)
+    assert lattice.end_date >= datetime.date(2025, 6, 10)
+    assert lattice.slot_datetime(slot) == datetime.datetime(2025, 6, 10, 7)
+
+def test_scheduler_uses_lattice_features():
+    engineer = FeatureEngineer(use_channel_features=False)
+    scheduler = ComprehensiveScheduler(ml_predictor=HourPredictor(), feature_engineer=engineer)
+    scheduler._get_slot_lattice(10).add_songs(SONGS, TAIKO)
+
+    features = scheduler._create_features_for_prediction(SONGS[0], scheduler.today, 18)
+    assert list(features.columns) == engineer.columnar_builder.feature_names
+    constraints = scheduler._get_default_constraints()
+    assert scheduler._find_optimal_hour(SONGS[0], scheduler.today, constraints) == 23
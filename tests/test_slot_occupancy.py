@@ -0,0 +1,56 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.ml.rl_scheduler import ComprehensiveScheduler
+from src.ml.slot_occupancy import SlotOccupancy
+
+MONDAY = datetime.datetime(2025, 6, 2)
+
+
+def test_counts_and_nearest_post():
+    posts = [MONDAY + datetime.timedelta(hours=h) for h in (18, 22, 24 * 6 + 20, 24 * 7 + 9)]
+    occupancy = SlotOccupancy(reversed(posts))
+
+    assert occupancy.times() == posts
+    assert occupancy.latest() == posts[-1]
+    assert occupancy.posts_on_day(MONDAY.date()) == 2
+    assert occupancy.posts_in_week(MONDAY.date() + datetime.timedelta(days=3)) == 3
+    assert occupancy.posts_in_week(MONDAY.date() + datetime.timedelta(days=7)) == 1
+    assert occupancy.hours_to_nearest(MONDAY + datetime.timedelta(hours=19, minutes=30)) == 1.5
+    assert SlotOccupancy().hours_to_nearest(MONDAY) == float('inf')
+
+    occupancy.remove(posts[1])
+    assert occupancy.posts_on_day(MONDAY.date()) == 1
+    assert occupancy.hours_to_nearest(MONDAY + datetime.timedelta(hours=23)) == 5
+    with pytest.raises(KeyError):
+        occupancy.remove(posts[1])
+
+def test_free_mask_checks_interval_across_days():
+    occupancy = SlotOccupancy()
+    occupancy.add_hours(100 * 24 + 23)
+    hours = np.array([1, 12, 23])
+
+    # 配列の先頭より前の日を問い合わせても拡張される
+    free = occupancy.free_mask(98, 4, hours, max_posts_per_day=1, min_interval_hours=6)
+    np.testing.assert_array_equal(free, [[True, True, True],
+                                         [True, True, True],
+                                         [False, False, False],
+                                         [False, True, True]])
+    assert occupancy.is_free(101, 5, 1, 6) and not occupancy.is_free(101, 4, 1, 6)
+
+def test_interval_adjustment_defers_past_full_days():
+    scheduler = ComprehensiveScheduler()
+    day = datetime.datetime.combine(scheduler.today, datetime.time())
+    songs = [{'song_name': f'曲{i}', 'optimal_posting_datetime': (day + delta).isoformat()}
+             for i, delta in enumerate([datetime.timedelta(hours=9), datetime.timedelta(hours=18),
+                                        datetime.timedelta(hours=20), datetime.timedelta(days=1, hours=9),
+                                        datetime.timedelta(days=1, hours=18)])]
+    constraints = dict(scheduler._get_default_constraints(), max_posts_per_day=2, min_interval_hours=6)
+
+    adjusted = scheduler._optimize_intervals(songs, constraints, verbose=False)
+    times = [datetime.datetime.fromisoformat(song['optimal_posting_datetime']) for song in adjusted]
+    occupancy = SlotOccupancy(times)
+    assert max(occupancy.posts_on_day(t.date()) for t in times) <= 2
+    assert all((b - a) >= datetime.timedelta(hours=6) for a, b in zip(occupancy.times(), occupancy.times()[1:]))
@@ -0,0 +1,45 @@
+import pytest
+
+from src.utils.song_index import SongNameIndex, normalize_song_name
+
+def test_normalize_width_and_case():
+    assert normalize_song_name("ＷＡＴＣＨ　ＭＥ！") == normalize_song_name("Watch Me!")
+
+def test_normalize_kana_folding():
+    assert normalize_song_name("マシュマロ") == normalize_song_name("ましゅまろ")
+
+def test_normalize_strips_brackets_and_feat():
+    assert normalize_song_name("マシュマロ (feat. 初音ミク)") == normalize_song_name("マシュマロ")
+    assert normalize_song_name("【MV】Bling-Bang-Bang-Born") == "blingbangbangborn"
+    assert normalize_song_name("Song ft.Someone") == "song"
+
+def test_normalize_keeps_bracket_only_name():
+    assert normalize_song_name("【MV】") == "mv"
+
+def test_exact_lookup_on_normalized_key():
+    index = SongNameIndex([{'song_name': 'WATCH ME!', 'id': '1'}])
+    row, score = index.lookup('watch me')
+    assert row['id'] == '1'
+    assert score == 1.0
+    assert 'ＷＡＴＣＨ ＭＥ' in index
+
+def test_fuzzy_fallback():
+    index = SongNameIndex([{'song_name': '粛聖!!ロリ神レクイエム☆', 'id': '3'}])
+    row, score = index.lookup('ロリ神レクイエム', fuzzy=True)
+    assert row['id'] == '3'
+    assert 0.75 <= score < 1.0
+    assert index.lookup('ロリ神レクイエム')[0] is None
+    # dict-style access never falls back to a near name
+    assert index.get('ロリ神レクイエム') is None and 'ロリ神レクイエム' not in index
+    with pytest.raises(KeyError):
+        index['ロリ神レクイエム']
+
+def test_short_names_need_a_closer_match():
+    index = SongNameIndex([{'song_name': '千本桜', 'id': '1'}, {'song_name': '夜に駆ける', 'id': '2'}])
+    assert index.lookup('千本桜2', fuzzy=True)[0] is None
+    assert index.lookup('千本桜', fuzzy=True)[0]['id'] == '1'
+
+def test_unrelated_name_misses():
+    index = SongNameIndex([{'song_name': 'マシュマロ'}, {'song_name': 'WATCH ME!'}])
+    assert index.get('全然違う曲', {}) == {}
+    assert len(index) == 2
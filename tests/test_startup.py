@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.ml.backends import is_available, lazy_import, load
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds allowed for `import main` (override with STARTUP_IMPORT_BUDGET on slow machines)
+IMPORT_BUDGET = float(os.environ.get('STARTUP_IMPORT_BUDGET', '1.0'))
+HEAVY_MODULES = ['tensorflow', 'torch', 'sklearn', 'pandas', 'scipy']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+def test_import_main_is_fast_and_skips_ml_frameworks():
+    result = subprocess.run([sys.executable, '-c', _PROBE], cwd=REPO_ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report['loaded'] == []
+    assert report['elapsed'] < IMPORT_BUDGET, f"import main took {report['elapsed']:.2f}s"
+
+def test_lazy_module_imports_on_first_attribute():
+    sys.modules.pop('colorsys', None)
+    colorsys = lazy_import('colorsys')
+    assert not colorsys.loaded and 'colorsys' not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert colorsys.loaded
+
+def test_missing_backend():
+    assert not is_available('no_such_backend_pkg')
+    with pytest.raises(ImportError):
+        load('no_such_backend_pkg')
+    with pytest.raises(ImportError):
+        lazy_import('no_such_backend_pkg').anything
@@ -0,0 +1,29 @@
+from src.ml.tag_vocabulary import TagVocabulary, parse_tags
+
+def test_parse_tags_is_safe():
+    assert parse_tags('["ボカロ", "アニメ"]') == ['ボカロ', 'アニメ']
+    assert parse_tags("['ゲーム']") == ['ゲーム']
+    assert parse_tags('__import__("os").getcwd()') == []
+    assert parse_tags('"ボカロ"') == []
+    assert parse_tags(None) == []
+    assert parse_tags(float('nan')) == []
+
+def test_vocabulary_from_csv(tmp_path):
+    path = tmp_path / 'taiko.csv'
+    path.write_text('song_name,tags\nA,"[""ボカロ""]"\nB,"[""アニメ"", ""キッズ""]"\nC,\n', encoding='utf-8')
+    vocabulary = TagVocabulary.from_csv([str(path), str(tmp_path / 'missing.csv')])
+    assert 'キッズ' in vocabulary
+    assert vocabulary.tags[:4] == ['ボカロ', 'アニメ', 'ポップス', 'ゲーム']
+
+def test_encode_multi_hot_and_flags():
+    vocabulary = TagVocabulary()
+    matrix = vocabulary.encode(['["ボカロ"]', None, '["アニメ", "新タグ", "アニメ"]', '["ボカロ"]'])
+
+    assert matrix.shape == (4, len(vocabulary))
+    assert matrix[2, vocabulary.index['新タグ']] == 1
+    flags = vocabulary.flag_columns(matrix)
+    assert flags['tag_count'].tolist() == [1, 0, 2, 1]
+    assert flags['has_vocaloid_tag'].tolist() == [1, 0, 0, 1]
+    assert flags['has_anime_tag'].tolist() == [0, 0, 1, 0]
+    # Each distinct tags string is parsed once
+    assert len(vocabulary._row_cache) == 3
@@ -0,0 +1,49 @@
+import json
+from multiprocessing import Pool
+
+from src.utils.task_store import TaskStore
+
+def _toggle_many(args):
+    db_path, song_name, count = args
+    store = TaskStore(db_path, legacy_json=None)
+    for _ in range(count):
+        store.toggle(song_name, 'editing')
+    store.mark_rendered(song_name, f'{song_name}.mp4')
+    store.close()
+
+def test_imports_legacy_json_once(tmp_path):
+    legacy = tmp_path / 'tasks.json'
+    legacy.write_text(json.dumps({'曲A': {'recording': True, 'editing': False, 'posting': False}}), encoding='utf-8')
+
+    store = TaskStore(str(tmp_path / 'tasks.db'), legacy_json=str(legacy))
+    assert store.get('曲A')['recording'] is True
+    store.set_flags('曲A', recording=False)
+    store.close()
+
+    reopened = TaskStore(str(tmp_path / 'tasks.db'), legacy_json=str(legacy))
+    assert reopened.get('曲A')['recording'] is False
+
+def test_status_queries(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'), legacy_json=None)
+    store.set_flags('曲A', recording=True)
+    store.set_flags('曲B', recording=True, editing=True, posting=True)
+    store.set_flags('曲C')
+    store.mark_scheduled('曲C', '2025-01-01 19:00:00')
+
+    assert store.query(recording=True, posting=False) == ['曲A']
+    assert store.query(scheduled=True) == ['曲C']
+    assert store.query(rendered=False) == ['曲A', '曲B', '曲C']
+    assert store.get('未登録') == {'recording': False, 'editing': False, 'posting': False}
+
+def test_concurrent_workers_do_not_lose_writes(tmp_path):
+    db_path = str(tmp_path / 'tasks.db')
+    TaskStore(db_path, legacy_json=None).close()
+
+    jobs = [(db_path, f'曲{i % 3}', 5 + i % 2) for i in range(6)]
+    with Pool(3) as pool:
+        pool.map(_toggle_many, jobs)
+
+    store = TaskStore(db_path, legacy_json=None)
+    # 曲0: 5+6 toggles, 曲1: 6+5, 曲2: 5+6 -> 11 each, so every flag ends up True
+    assert store.query(editing=True) == ['曲0', '曲1', '曲2']
+    assert store.query(rendered=True) == ['曲0', '曲1', '曲2']
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from src.ml.training_cache import TrainingCache, source_fingerprint
+
+def _sample():
+    X = pd.DataFrame({'hour': [18, 20, 6], 'log_view_count': [10.5, 12.0, 8.25]})
+    y = np.array([1000, 5000, 200])
+    return X, y, list(X.columns)
+
+def test_roundtrip_is_memory_mapped(tmp_path):
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    X, y, names = _sample()
+    cache.save('fp1', X, y, names)
+
+    loaded_X, loaded_y, loaded_names = cache.load('fp1')
+    assert loaded_names == names
+    assert isinstance(loaded_y, np.memmap)
+    # A read-only view means the frame still points at the mmap rather than a copy
+    assert not loaded_X.to_numpy(copy=False).flags.writeable
+    np.testing.assert_array_equal(loaded_X.to_numpy(), X.to_numpy(dtype=float))
+    np.testing.assert_array_equal(loaded_y, y.astype(float))
+
+def test_fingerprint_mismatch_invalidates(tmp_path):
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    X, y, names = _sample()
+    cache.save('fp1', X, y, names)
+    assert cache.load('fp2') is None
+
+def test_get_or_build_builds_once(tmp_path):
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _sample()
+
+    cache.get_or_build('fp', build, verbose=False)
+    cache.get_or_build('fp', build, verbose=False)
+    assert len(calls) == 1
+
+def test_source_fingerprint_tracks_file_changes(tmp_path):
+    source = tmp_path / 'data.json'
+    source.write_text('[]')
+    before = source_fingerprint(str(source))
+    source.write_text('[{"view_count": 1}]')
+    assert source_fingerprint(str(source)) != before
+    assert source_fingerprint(str(source), extra='a') != source_fingerprint(str(source), extra='b')
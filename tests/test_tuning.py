@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from src.ml.scheduler import cross_validate
+from src.ml.tuning import load_best_config, successive_halving
+
+
+def _data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    y = np.expm1(7 + X[:, 0] + rng.normal(scale=0.2, size=n))
+    return X, y
+
+def test_successive_halving_drops_configs_and_writes_leaderboard(tmp_path):
+    X, y = _data()
+    candidates = [
+        {'name': f'hgb_{max_iter}', 'backend': 'hgb', 'backend_params': {'max_iter': max_iter},
+         'train_params': {'use_augmentation': False}}
+        for max_iter in (1, 5, 200)
+    ]
+    path = tmp_path / 'leaderboard.json'
+    leaderboard = successive_halving(X, y, candidates, n_splits=3, min_folds=1, eta=3,
+                                     n_jobs=1, leaderboard_path=str(path), verbose=0)
+
+    assert leaderboard['name'].iloc[0] == 'hgb_200'
+    assert leaderboard.set_index('name')['n_folds'].to_dict() == {'hgb_200': 3, 'hgb_5': 1, 'hgb_1': 1}
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    assert [entry['name'] for entry in saved['entries']] == list(leaderboard['name'])
+    assert load_best_config(str(path))['backend_params'] == {'max_iter': 200}
+    assert load_best_config(str(tmp_path / 'missing.json')) is None
+
+def test_best_config_is_ignored_when_the_features_changed(tmp_path):
+    X, y = _data(120)
+    candidates = [{'name': 'hgb_5', 'backend': 'hgb', 'backend_params': {'max_iter': 5},
+                   'train_params': {'use_augmentation': False}}]
+    path = str(tmp_path / 'leaderboard.json')
+    names = [f'f{i}' for i in range(X.shape[1])]
+    successive_halving(X, y, candidates, n_splits=2, n_jobs=1, leaderboard_path=path,
+                       feature_names=names, verbose=0)
+
+    assert load_best_config(path, feature_names=names)['name'] == 'hgb_5'
+    assert load_best_config(path, feature_names=names + ['new_feature']) is None
+    assert load_best_config(path, feature_names=names[::-1]) is None
+
+def test_cross_validate_runs_folds_in_worker_processes():
+    X, y = _data(120)
+    scores = cross_validate(X, y, n_splits=3, n_jobs=2, backend='hgb')
+    assert len(scores) == 3
+    assert np.isfinite(scores).all()
@@ -0,0 +1,139 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from src.ml.feature_engineering import FeatureEngineer
+from src.ml.rl_scheduler import ComprehensiveScheduler
+from src.ml.scheduler import ViewCountPredictor
+from src.ml.slot_lattice import SlotFeatureLattice
+
+SONGS = [
+    {'song_name': f'曲{i}', 'artist_name': 'XY'[i % 2], 'release_date': f'2025/06/{i + 1:02d}',
+     'view_count': 100 * (i + 1) ** 2, 'like_count': 5 * i, 'comment_count': i}
+    for i in range(12)
+]
+
+@pytest.fixture(scope='module')
+def trained():
+    engineer = FeatureEngineer(use_channel_features=False)
+    X, y, _ = engineer.prepare_training_data(SONGS, {}, datetime.datetime(2025, 6, 10, 19))
+    predictor = ViewCountPredictor(input_dim=X.shape[1])
+    predictor._train_sklearn(X, y, use_augmentation=False, verbose=0)
+    return engineer, predictor, X
+
+def test_predict_aligns_to_training_schema(trained):
+    _, predictor, X = trained
+    assert predictor.feature_names == list(X.columns)
+    assert predictor.feature_dtype == 'float32'
+
+    expected, _ = predictor.predict(X)
+    shuffled, _ = predictor.predict(X[X.columns[::-1]])
+    np.testing.assert_array_equal(shuffled, expected)
+    with pytest.raises(ValueError):
+        predictor.predict(X.drop(columns=['hour']))
+    with pytest.raises(ValueError):
+        predictor.predict(X.to_numpy()[:, :5])
+
+def test_score_candidates_matches_per_slot_predict(trained):
+    engineer, predictor, _ = trained
+    lattice = SlotFeatureLattice(engineer.columnar_builder, datetime.date(2025, 6, 1), days=3)
+    songs = lattice.add_songs(SONGS[:4])
+    slots = np.array([0, 7, 30, 71])
+
+    views, confidence = predictor.score_candidates(lattice, songs, slots, batch_size=8)
+    assert views.shape == confidence.shape == (4, 4)
+    for song in songs:
+        expected, _ = predictor.predict(lattice.candidate_frame(song, slots))
+        np.testing.assert_allclose(views[song], expected)
+
+def test_schema_round_trip(trained, tmp_path, monkeypatch):
+    _, predictor, X = trained
+    monkeypatch.chdir(tmp_path)
+    predictor.save()
+    loaded = ViewCountPredictor()
+    loaded.load()
+    assert loaded.feature_names == predictor.feature_names
+    np.testing.assert_array_equal(loaded.predict(X)[0], predictor.predict(X)[0])
+
+def test_scheduler_picks_best_scored_slot(trained):
+    engineer, predictor, _ = trained
+    scheduler = ComprehensiveScheduler(ml_predictor=predictor, feature_engineer=engineer)
+    lattice = scheduler._get_slot_lattice(14)
+    scheduler._score_songs(lattice.add_songs(SONGS), np.arange(24 * 3))
+    constraints = dict(scheduler._get_default_constraints(), max_days_ahead=14)
+
+    date, hour = scheduler._find_optimal_datetime(SONGS[3], scheduler.today, constraints)
+    hours = scheduler._get_candidate_hours(constraints)
+    best = max(
+        (predictor.predict(scheduler._create_features_for_prediction(SONGS[3], d, h))[0][0], -offset, -h)
+        for offset in range(14) for h in hours
+        for d in [scheduler.today + datetime.timedelta(days=offset)]
+    )
+    assert (date, hour) == (scheduler.today + datetime.timedelta(days=-best[1]), -best[2])
+
+def test_hist_gb_backend_handles_missing_values_and_round_trips(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    y = np.expm1(8 + X[:, 0] + 0.5 * X[:, 1] + rng.normal(scale=0.1, size=400))
+    X[rng.random(X.shape) < 0.05] = np.nan
+
+    predictor = ViewCountPredictor(input_dim=6, backend='hgb', backend_params={'max_iter': 300})
+    history = predictor.train(X, y, use_augmentation=False, verbose=0)
+    assert history['n_iter']['views'] < 300
+    assert 'confidence' not in history['n_iter']
+
+    views, confidence = predictor.predict(X)
+    assert np.isfinite(views).all()
+    assert ((confidence >= 0) & (confidence <= 1)).all()
+    # 中央値を超える曲ほど信頼度が高い
+    assert confidence[y > np.median(y)].mean() > confidence[y <= np.median(y)].mean()
+
+    paths = {'model_path': str(tmp_path / 'view_predictor.pkl'),
+             'scaler_path': str(tmp_path / 'view_scaler.pkl'),
+             'schema_path': str(tmp_path / 'view_schema.json')}
+    predictor.save(**paths)
+    loaded = ViewCountPredictor()
+    loaded.load(**paths)
+    np.testing.assert_array_equal(loaded.predict(X)[0], views)
+
+def test_hist_gb_backend_can_fit_confidence_classifier():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 4))
+    y = np.expm1(6 + X[:, 0])
+    predictor = ViewCountPredictor(backend='hgb', backend_params={'fit_confidence': True})
+    history = predictor.train(X, y, use_augmentation=False, verbose=0)
+    assert 'confidence' in history['n_iter']
+    _, confidence = predictor.predict(X)
+    assert ((confidence >= 0) & (confidence <= 1)).all()
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        ViewCountPredictor(backend='xgboost')
+
+def test_tensor_search_matches_per_song_search(trained):
+    engineer, predictor, _ = trained
+    scheduler = ComprehensiveScheduler(ml_predictor=predictor, feature_engineer=engineer)
+    constraints = dict(scheduler._get_default_constraints(), max_days_ahead=10,
+                       preferred_days=[1, 3, 5, 6], avoid_hours=list(range(0, 12)))
+    songs = [dict(song, release_date='') for song in SONGS]
+    fixed_date = scheduler.today + datetime.timedelta(days=4)
+    songs[2]['release_date'] = songs[7]['release_date'] = fixed_date.isoformat()
+    scheduler._categorize_songs_by_release_date(songs)
+
+    # 曲ごとに探索する場合の結果
+    expected = []
+    current_date = scheduler.today
+    for song in songs:
+        if '_fixed_date' in song:
+            expected.append((song['_fixed_date'], scheduler._find_optimal_hour(song, song['_fixed_date'], constraints)))
+        else:
+            expected.append(scheduler._find_optimal_datetime(song, current_date, constraints))
+            current_date = expected[-1][0] + datetime.timedelta(days=1)
+
+    scheduler._slot_views.clear()
+    scheduled = scheduler._optimize_posting_times(songs, {}, constraints, verbose=False)
+    actual = [datetime.datetime.fromisoformat(song['optimal_posting_datetime']) for song in scheduled]
+    assert [(value.date(), value.hour) for value in actual] == expected
+    # 12曲を10日ずつ探索するため、テンソルは最初の範囲の外まで延長される
+    assert max(value.date() for value in actual) > scheduler.today + datetime.timedelta(days=10)
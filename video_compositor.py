@@ -2,6 +2,8 @@ import json
 import subprocess
 import os
 
+from src.utils.resources import get_governor, process_threads
+
 
 class VideoCompositor:
     """FFmpegを使用して動画を合成"""
@@ -64,6 +66,7 @@ class VideoCompositor:
 
         # FFmpegコマンドを構築
         cmd = [self.ffmpeg_path, '-y']  # -y: 上書き確認なし
+        lease = None
 
         # レイヤー順序: 背景 → 動画 → PNG → テキスト
         # 入力ファイルを順番に追加
@@ -148,7 +151,12 @@ class VideoCompositor:
             cmd.extend(['-c:v', 'libx264'])
             cmd.extend(['-preset', 'veryfast'])  # fast → veryfast で高速化
             cmd.extend(['-crf', '23'])
-            cmd.extend(['-threads', '0'])  # 全CPUコアを使用
+            # プールのワーカーでは割り当てられたスレッド数、単独実行では同時に動くML処理と分け合う
+            threads = process_threads()
+            if threads is None:
+                lease = get_governor().acquire('render')
+                threads = lease.threads
+            cmd.extend(['-threads', str(threads)])
 
         # オーディオをコピー
         cmd.extend(['-c:a', 'copy'])
@@ -163,7 +171,11 @@ class VideoCompositor:
         print(f"コマンド: {' '.join(cmd)}")
 
         # FFmpegを実行
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        finally:
+            if lease is not None:
+                lease.release()
 
         if result.returncode != 0:
             print(f"エラー: {result.stderr}")
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+YouTube Studio エクスポートZIPの取り込みモジュール
+youtube anarytics taiko フォルダ内のエクスポートZIPを展開せずに直接読み込み、
+ヘッダーからエクスポート種別を判定して、期間の重複を除いたデータを返す
+
+月次エクスポートなどを同じフォルダに置くだけで、次回の読み込みから自動的に反映される。
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+TABLE_MEMBER = '表データ.csv'  # 集計表（1行1コンテンツ/1日/1トラフィック種別）
+CHART_MEMBER = 'グラフデータ.csv'  # 日次の内訳（期間の判定に使用）
+TOTAL_LABEL = '合計'
+
+# 合計・平均・率などの列は期間をまたいで足し合わせない
+_NON_ADDITIVE_PATTERN = re.compile(r'%|平均|あたり|率|長さ|公開時刻|タイトル')
+_DATE_RANGE_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})_(\d{4}-\d{2}-\d{2})')
+_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}$')
+
+
+def detect_export_type(header: List[str]) -> str:
+    """表データ.csv のヘッダーからエクスポート種別を判定
+
+    Args:
+        header: CSVのヘッダー行
+
+    Returns:
+        'content' / 'date' / 'traffic' / 'other'
+    """
+    if not header:
+        return 'other'
+
+    dimension = header[0].strip()
+    if dimension == 'コンテンツ':
+        return 'content'
+    if dimension == '日付':
+        return 'date'
+    if 'トラフィック' in dimension:
+        return 'traffic'
+    return 'other'
+
+
+class StudioExportIngester:
+    """YouTube Studio エクスポート（ZIP/展開済みフォルダ）のカタログと読み込み"""
+
+    def __init__(self, analytics_dir: str = 'youtube anarytics taiko',
+                 catalog_path: Optional[str] = None,
+                 on_new_exports: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """
+        Args:
+            analytics_dir: エクスポートを置くディレクトリ
+            catalog_path: カタログJSONのパス（デフォルト: analytics_dir/ingest_catalog.json）
+            on_new_exports: 新しい（または更新された）エクスポートを見つけたときに
+                そのカタログエントリのリストを渡して呼ぶ関数（モデルの逐次更新など）
+        """
+        self.analytics_dir = analytics_dir
+        self.on_new_exports = on_new_exports
+        self.catalog_path = catalog_path or os.path.join(analytics_dir, 'ingest_catalog.json')
+        self.catalog: Dict[str, Dict[str, Any]] = self._load_catalog()
+
+    # ------------------------------------------------------------------
+    # カタログ
+    # ------------------------------------------------------------------
+
+    def _load_catalog(self) -> Dict[str, Dict[str, Any]]:
+        """カタログを読み込み"""
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_catalog(self):
+        """カタログを保存（一時ファイル経由でアトミックに置換）"""
+        try:
+            tmp_path = self.catalog_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.catalog, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.catalog_path)
+        except OSError as e:
+            print(f"⚠ 取り込みカタログの保存に失敗: {e}")
+
+    def discover(self, verbose: bool = True) -> List[Dict[str, Any]]:
+        """エクスポートを探索し、カタログを更新
+
+        ZIPと展開済みフォルダの両方を対象にする。前回から変更のないエクスポートは
+        カタログの情報を再利用し、新しいものだけヘッダーを読む。
+
+        Args:
+            verbose: 進捗表示
+
+        Returns:
+            カタログエントリのリスト
+        """
+        if not os.path.isdir(self.analytics_dir):
+            return []
+
+        entries = []
+        seen = set()
+        new_entries = []
+
+        for name in sorted(os.listdir(self.analytics_dir)):
+            path = os.path.join(self.analytics_dir, name)
+            if name.lower().endswith('.zip') and os.path.isfile(path):
+                kind = 'zip'
+            elif os.path.isdir(path) and os.path.exists(os.path.join(path, TABLE_MEMBER)):
+                kind = 'dir'
+            else:
+                continue
+
+            stat = os.stat(path if kind == 'zip' else os.path.join(path, TABLE_MEMBER))
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            seen.add(name)
+
+            entry = self.catalog.get(name)
+            if entry is None or entry.get('signature') != signature:
+                try:
+                    entry = self._describe(name, kind, signature)
+                except (OSError, zipfile.BadZipFile, ValueError, KeyError) as e:
+                    print(f"⚠ エクスポートを読み込めません: {name} ({e})")
+                    continue
+                self.catalog[name] = entry
+                new_entries.append(entry)
+
+            entries.append(entry)
+
+        # 削除されたエクスポートをカタログから除外
+        for name in list(self.catalog):
+            if name not in seen:
+                del self.catalog[name]
+
+        if new_entries:
+            self._save_catalog()
+            if verbose:
+                print(f"✓ 新しいエクスポートを{len(new_entries)}件カタログに追加")
+            if self.on_new_exports is not None:
+                self.on_new_exports(new_entries)
+
+        return entries
+
+    def _describe(self, name: str, kind: str, signature: str) -> Dict[str, Any]:
+        """エクスポートの種別・期間を判定してカタログエントリを作成"""
+        entry = {'name': name, 'kind': kind, 'signature': signature}
+
+        with self._open_member(entry, TABLE_MEMBER) as f:
+            header = next(csv.reader(f), [])
+        entry['type'] = detect_export_type(header)
+        entry['dimension'] = header[0].strip() if header else ''
+
+        start, end = self._detect_date_range(entry)
+        if start is None:
+            # 日付列がない場合のみファイル名から推定
+            match = _DATE_RANGE_PATTERN.search(name)
+            if match:
+                start, end = match.group(1), match.group(2)
+        entry['start'] = start
+        entry['end'] = end
+        return entry
+
+    def _detect_date_range(self, entry: Dict[str, Any]):
+        """データ内の日付列から期間を判定"""
+        member = TABLE_MEMBER if entry['type'] == 'date' else CHART_MEMBER
+        if member not in self._members(entry):
+            return None, None
+
+        with self._open_member(entry, member) as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if not header or header[0].strip() != '日付':
+                return None, None
+            # 合計行や「上位 500 件の結果を表示しています」などの注記行は除外
+            dates = [row[0] for row in reader if row and _DATE_PATTERN.match(row[0])]
+
+        if not dates:
+            return None, None
+        return min(dates), max(dates)
+
+    # ------------------------------------------------------------------
+    # メンバーの読み込み（ZIPは展開せずにストリームで読む）
+    # ------------------------------------------------------------------
+
+    def _members(self, entry: Dict[str, Any]) -> List[str]:
+        """エクスポートに含まれるCSVファイル名"""
+        path = os.path.join(self.analytics_dir, entry['name'])
+        if entry['kind'] == 'zip':
+            with zipfile.ZipFile(path) as zf:
+                return [os.path.basename(info.filename) for info in zf.infolist()]
+        return os.listdir(path)
+
+    @contextmanager
+    def _open_member(self, entry: Dict[str, Any], member: str) -> Iterator[io.TextIOBase]:
+        """エクスポート内のCSVをテキストストリームとして開く"""
+        path = os.path.join(self.analytics_dir, entry['name'])
+        if entry['kind'] == 'dir':
+            with open(os.path.join(path, member), 'r', encoding='utf-8-sig', newline='') as f:
+                yield f
+            return
+
+        with zipfile.ZipFile(path) as zf:
+            info = next((i for i in zf.infolist() if os.path.basename(i.filename) == member), None)
+            if info is None:
+                raise KeyError(f"{member} がありません")
+            with zf.open(info) as raw:
+                yield io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+    def read_table(self, entry: Dict[str, Any]) -> pd.DataFrame:
+        """表データ.csv を読み込み（合計行を除外）"""
+        with self._open_member(entry, TABLE_MEMBER) as f:
+            table = pd.read_csv(f)
+        return table[table.iloc[:, 0] != TOTAL_LABEL].reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # 期間の重複排除
+    # ------------------------------------------------------------------
+
+    def load(self, export_type: str, entries: Optional[List[Dict[str, Any]]] = None) -> Optional[pd.DataFrame]:
+        """指定種別のエクスポートを重複を除いて結合
+
+        - 日付別: 全エクスポートを結合し、同じ日付は最新の期間のエクスポートを採用
+        - コンテンツ別・トラフィック別: 期間が重ならないエクスポートを広い順に選び、
+          件数系の列は合算、率・平均系の列は最新のエクスポートの値を採用
+
+        Args:
+            export_type: 'content' / 'date' / 'traffic'
+            entries: カタログエントリ（省略時は discover() の結果）
+
+        Returns:
+            結合済みDataFrame（該当エクスポートがない場合はNone）
+        """
+        if entries is None:
+            entries = self.discover(verbose=False)
+
+        candidates = [e for e in entries if e['type'] == export_type]
+        if not candidates:
+            return None
+
+        # 古い期間 → 新しい期間の順（同じ期間ならZIPを優先）
+        candidates.sort(key=lambda e: (e['end'] or '', e['start'] or '', e['kind'] == 'zip'))
+
+        if export_type == 'date':
+            tables = [self.read_table(e) for e in candidates]
+            merged = pd.concat(tables, ignore_index=True)
+            key = merged.columns[0]
+            merged = merged.drop_duplicates(key, keep='last')
+            return merged.sort_values(key).reset_index(drop=True)
+
+        selected = self._select_non_overlapping(candidates)
+        tables = [self.read_table(e) for e in selected]
+        if len(tables) == 1:
+            return tables[0]
+        return self._combine_periods(tables)
+
+    @staticmethod
+    def _select_non_overlapping(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """期間が重ならないエクスポートを、期間の広い順に選択（結果は古い順）"""
+        def span(entry):
+            if not entry['start'] or not entry['end']:
+                return pd.Timedelta(0)
+            return pd.Timestamp(entry['end']) - pd.Timestamp(entry['start'])
+
+        # 広い期間を優先し、同じ広さなら新しい（後ろの）エクスポートを優先
+        ordered = sorted(enumerate(candidates), key=lambda x: (span(x[1]), x[0]), reverse=True)
+
+        selected = []
+        for _, entry in ordered:
+            overlaps = any(
+                not entry['start'] or not other['start']
+                or (entry['start'] <= other['end'] and other['start'] <= entry['end'])
+                for other in selected
+            )
+            if not overlaps:
+                selected.append(entry)
+
+        return sorted(selected, key=lambda e: (e['end'] or '', e['start'] or ''))
+
+    @staticmethod
+    def _combine_periods(tables: List[pd.DataFrame]) -> pd.DataFrame:
+        """期間の異なる集計表をディメンション列（先頭列）で結合"""
+        key = tables[0].columns[0]
+        merged = pd.concat(tables, ignore_index=True)
+
+        aggregations = {}
+        for column in merged.columns:
+            if column == key:
+                continue
+            numeric = pd.api.types.is_numeric_dtype(merged[column])
+            if numeric and not _NON_ADDITIVE_PATTERN.search(column):
+                aggregations[column] = 'sum'
+            else:
+                aggregations[column] = 'last'
+
+        combined = merged.groupby(key, sort=False).agg(aggregations).reset_index()
+        return combined[merged.columns]
+
+    def load_all(self, verbose: bool = True) -> Dict[str, Optional[pd.DataFrame]]:
+        """コンテンツ別・日付別・トラフィック別のデータをまとめて読み込み"""
+        entries = self.discover(verbose=verbose)
+        return {
+            export_type: self.load(export_type, entries)
+            for export_type in ('content', 'date', 'traffic')
+        }
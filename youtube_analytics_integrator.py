@@ -5,12 +5,16 @@ youtube anarytics taiko フォルダのCSVデータを読み込み、ML訓練デ
 """
 
 import os
+import re
 import csv
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from youtube_analytics_ingester import StudioExportIngester
+
 
 class YouTubeAnalyticsIntegrator:
     """既存のYouTubeアナリティクスCSVデータを統合"""
@@ -26,212 +30,182 @@ class YouTubeAnalyticsIntegrator:
         self.traffic_data = None  # トラフィックソース別データ
 
     def load_all_analytics(self):
-        """すべてのアナリティクスCSVを読み込み"""
+        """すべてのアナリティクスCSVを読み込み
+
+        エクスポートZIP（および展開済みフォルダ）を StudioExportIngester で探索し、
+        ヘッダーから種別を判定して期間の重複を除いた表データを読み込む。
+        """
         print("=" * 60)
         print("YouTubeアナリティクスデータ読み込み")
         print("=" * 60)
 
-        # コンテンツ別データ
-        content_path = os.path.join(
-            self.analytics_dir,
-            'コンテンツ 2023-11-01_2025-12-16 たいこでヒットソング',
-            '表データ.csv'
-        )
-        if os.path.exists(content_path):
-            self.content_data = pd.read_csv(content_path)
-            # 最初の行（合計）を除外
-            self.content_data = self.content_data[self.content_data['コンテンツ'] != '合計']
+        ingester = StudioExportIngester(self.analytics_dir)
+        tables = ingester.load_all()
+
+        # コンテンツ別データ（合計行は除外済み）
+        self.content_data = tables['content']
+        if self.content_data is not None:
             print(f"✓ コンテンツデータ: {len(self.content_data)}件")
         else:
-            print(f"⚠ コンテンツデータが見つかりません: {content_path}")
+            print(f"⚠ コンテンツデータが見つかりません: {self.analytics_dir}")
 
         # 日付別データ
-        date_path = os.path.join(
-            self.analytics_dir,
-            '日付 2023-11-01_2025-12-16 たいこでヒットソング',
-            '表データ.csv'
-        )
-        if os.path.exists(date_path):
-            self.date_data = pd.read_csv(date_path)
-            # 最初の行（合計）を除外
-            self.date_data = self.date_data[self.date_data['日付'] != '合計']
+        self.date_data = tables['date']
+        if self.date_data is not None:
             print(f"✓ 日付データ: {len(self.date_data)}件")
         else:
-            print(f"⚠ 日付データが見つかりません: {date_path}")
+            print(f"⚠ 日付データが見つかりません: {self.analytics_dir}")
 
         # トラフィックソース別データ
-        traffic_path = os.path.join(
-            self.analytics_dir,
-            'オーガニック トラフィックと有料のトラフィック 2023-11-01_2025-12-16 たいこでヒットソング',
-            '表データ.csv'
-        )
-        if os.path.exists(traffic_path):
-            self.traffic_data = pd.read_csv(traffic_path)
-            # 最初の行（合計）を除外
-            self.traffic_data = self.traffic_data[self.traffic_data.iloc[:, 0] != '合計']
+        self.traffic_data = tables['traffic']
+        if self.traffic_data is not None:
             print(f"✓ トラフィックデータ: {len(self.traffic_data)}件")
         else:
-            print(f"⚠ トラフィックデータが見つかりません: {traffic_path}")
+            print(f"⚠ トラフィックデータが見つかりません: {self.analytics_dir}")
 
         print()
 
-    def extract_traffic_features(self) -> Dict[str, Dict[str, Any]]:
+    def extract_traffic_features(self) -> pd.DataFrame:
         """トラフィックソース別データから特徴量を抽出
 
         Returns:
-            全体、有料、オーガニックのトラフィックデータ
+            トラフィック種別（有料/オーガニック）をインデックスとする型付きDataFrame
         """
-        if self.traffic_data is None:
-            return {}
-
-        traffic_features = {}
-
-        for _, row in self.traffic_data.iterrows():
-            traffic_type = row.iloc[0]  # 最初の列: 有料/オーガニック
-
-            if traffic_type in ['有料', 'オーガニック']:
-                traffic_features[traffic_type] = {
-                    'views': self._safe_int(row.get('視聴回数', 0)),
-                    'watch_time_hours': self._safe_float(row.get('総再生時間（単位: 時間）', 0)),
-                    'avg_view_duration': row.get('平均視聴時間', '0:00:00'),
-                    'shares': self._safe_int(row.get('共有数', 0)),
-                    'likes': self._safe_int(row.get('高評価数', 0)),
-                }
-
-        return traffic_features
-
-    def extract_content_features(self) -> List[Dict[str, Any]]:
+        data = self.traffic_data
+        if data is None or data.shape[1] == 0:
+            data = pd.DataFrame({'traffic_type': pd.Series(dtype='object')})
+        data = data[data.iloc[:, 0].isin(['有料', 'オーガニック'])]
+
+        traffic = pd.DataFrame({
+            'views': self._to_int(data, '視聴回数'),
+            'watch_time_hours': self._to_float(data, '総再生時間（単位: 時間）'),
+            'avg_view_duration': self._to_str(data, '平均視聴時間', '0:00:00'),
+            'shares': self._to_int(data, '共有数'),
+            'likes': self._to_int(data, '高評価数'),
+        })
+        traffic.index = data.iloc[:, 0].to_numpy()
+        # 同じ種別が複数行ある場合は最後の行を採用
+        return traffic[~traffic.index.duplicated(keep='last')]
+
+    def extract_content_features(self) -> pd.DataFrame:
         """コンテンツ別データから特徴量を抽出
 
         Returns:
-            動画ごとの特徴量リスト
+            動画ごとの特徴量（1行1動画の型付きDataFrame）
         """
-        if self.content_data is None:
-            return []
-
-        content_features = []
-
-        # トラフィックデータを取得（チャンネル全体の集計データ）
-        traffic_features = self.extract_traffic_features()
+        # データがない場合も同じ列構成の空フレームを返す
+        data = self.content_data if self.content_data is not None else pd.DataFrame()
 
-        # チャンネル全体のオーガニック比率を計算
-        channel_organic_views = traffic_features.get('オーガニック', {}).get('views', 0)
-        channel_paid_views = traffic_features.get('有料', {}).get('views', 0)
+        # チャンネル全体のオーガニック比率を計算（トラフィックデータの集計値）
+        traffic = self.extract_traffic_features()
+        channel_organic_views = int(traffic['views'].get('オーガニック', 0))
+        channel_paid_views = int(traffic['views'].get('有料', 0))
         channel_total_traffic = channel_organic_views + channel_paid_views
 
         channel_organic_ratio = 0.0
         if channel_total_traffic > 0:
             channel_organic_ratio = round(channel_organic_views / channel_total_traffic * 100, 2)
 
-        for _, row in self.content_data.iterrows():
-            video_id = row['コンテンツ']
-            title = row['動画のタイトル']
-
-            # 重要なメトリクスを抽出
-            features = {
-                'video_id': video_id,
-                'title': title,
-                'published_at': row.get('動画公開時刻', ''),
-                'duration_text': row.get('長さ', ''),
-
-                # エンゲージメント指標（自分のチャンネルの実データ）
-                'analytics_views': self._safe_int(row.get('視聴回数', 0)),
-                'analytics_watch_time_hours': self._safe_float(row.get('総再生時間（単位: 時間）', 0)),
-                'analytics_avg_view_duration': row.get('平均視聴時間', '0:00:00'),
-                'analytics_avg_percentage_viewed': self._safe_float(row.get('平均再生率（%） (%)', 0)),
-                'analytics_retention_rate': self._safe_float(row.get('視聴を継続 (%)', 0)),
-
-                # ユーザー行動
-                'analytics_unique_viewers': self._safe_int(row.get('ユニーク視聴者数', 0)),
-                'analytics_views_per_viewer': self._safe_float(row.get('視聴者あたりの平均視聴回数', 0)),
-
-                # エンゲージメント
-                'analytics_likes': self._safe_int(row.get('高評価数', 0)),
-                'analytics_dislikes': self._safe_int(row.get('低評価数', 0)),
-                'analytics_like_rate': self._safe_float(row.get('高評価率（低評価比） (%)', 0)),
-                'analytics_shares': self._safe_int(row.get('共有数', 0)),
-                'analytics_comments': self._safe_int(row.get('コメントの追加回数', 0)),
-
-                # 登録者
-                'analytics_subscribers_gained': self._safe_int(row.get('登録者増加数', 0)),
-                'analytics_subscribers_lost': self._safe_int(row.get('登録者減少数', 0)),
-                'analytics_net_subscribers': self._safe_int(row.get('登録者増加数', 0)) - self._safe_int(row.get('登録者減少数', 0)),
-
-                # インプレッション
-                'analytics_impressions': self._safe_int(row.get('インプレッション数', 0)),
-                'analytics_ctr': self._safe_float(row.get('インプレッションのクリック率 (%)', 0)),
-
-                # 終了画面・カード
-                'analytics_end_screen_clicks': self._safe_int(row.get('終了画面要素のクリック数', 0)),
-                'analytics_end_screen_shown': self._safe_int(row.get('終了画面要素の表示回数', 0)),
-                'analytics_card_clicks': self._safe_int(row.get('カードのクリック数', 0)),
-                'analytics_card_shown': self._safe_int(row.get('カードの表示回数', 0)),
-
-                # チャンネル全体のオーガニック比率（参考値）
-                'channel_organic_ratio': channel_organic_ratio,
-            }
-
-            # 平均視聴時間を秒数に変換
-            avg_view_duration_seconds = self._parse_duration_to_seconds(features['analytics_avg_view_duration'])
-            features['analytics_avg_view_duration_seconds'] = avg_view_duration_seconds
-
-            # 算出メトリクス
-            if features['analytics_views'] > 0:
-                features['analytics_engagement_rate'] = round(
-                    (features['analytics_likes'] + features['analytics_comments']) / features['analytics_views'] * 100, 2
-                )
-                features['analytics_share_rate'] = round(
-                    features['analytics_shares'] / features['analytics_views'] * 100, 4
-                )
-            else:
-                features['analytics_engagement_rate'] = 0
-                features['analytics_share_rate'] = 0
-
-            if features['analytics_impressions'] > 0:
-                features['analytics_views_per_impression'] = round(
-                    features['analytics_views'] / features['analytics_impressions'], 4
-                )
-            else:
-                features['analytics_views_per_impression'] = 0
-
-            content_features.append(features)
-
-        return content_features
-
-    def extract_time_series_features(self) -> Dict[str, List[Dict[str, Any]]]:
+        subscribers_gained = self._to_int(data, '登録者増加数')
+        subscribers_lost = self._to_int(data, '登録者減少数')
+        avg_view_duration = self._to_str(data, '平均視聴時間', '0:00:00')
+
+        features = pd.DataFrame({
+            'video_id': self._to_str(data, 'コンテンツ'),
+            'title': self._to_str(data, '動画のタイトル'),
+            'published_at': self._to_str(data, '動画公開時刻'),
+            'duration_text': self._to_float(data, '長さ'),  # 秒数（Studioエクスポートでは数値列）
+
+            # エンゲージメント指標（自分のチャンネルの実データ）
+            'analytics_views': self._to_int(data, '視聴回数'),
+            'analytics_watch_time_hours': self._to_float(data, '総再生時間（単位: 時間）'),
+            'analytics_avg_view_duration': avg_view_duration,
+            'analytics_avg_percentage_viewed': self._to_float(data, '平均再生率（%） (%)'),
+            'analytics_retention_rate': self._to_float(data, '視聴を継続 (%)'),
+
+            # ユーザー行動
+            'analytics_unique_viewers': self._to_int(data, 'ユニーク視聴者数'),
+            'analytics_views_per_viewer': self._to_float(data, '視聴者あたりの平均視聴回数'),
+
+            # エンゲージメント
+            'analytics_likes': self._to_int(data, '高評価数'),
+            'analytics_dislikes': self._to_int(data, '低評価数'),
+            'analytics_like_rate': self._to_float(data, '高評価率（低評価比） (%)'),
+            'analytics_shares': self._to_int(data, '共有数'),
+            'analytics_comments': self._to_int(data, 'コメントの追加回数'),
+
+            # 登録者
+            'analytics_subscribers_gained': subscribers_gained,
+            'analytics_subscribers_lost': subscribers_lost,
+            'analytics_net_subscribers': subscribers_gained - subscribers_lost,
+
+            # インプレッション
+            'analytics_impressions': self._to_int(data, 'インプレッション数'),
+            'analytics_ctr': self._to_float(data, 'インプレッションのクリック率 (%)'),
+
+            # 終了画面・カード
+            'analytics_end_screen_clicks': self._to_int(data, '終了画面要素のクリック数'),
+            'analytics_end_screen_shown': self._to_int(data, '終了画面要素の表示回数'),
+            'analytics_card_clicks': self._to_int(data, 'カードのクリック数'),
+            'analytics_card_shown': self._to_int(data, 'カードの表示回数'),
+        })
+
+        # チャンネル全体のオーガニック比率（参考値）
+        features['channel_organic_ratio'] = channel_organic_ratio
+
+        # 平均視聴時間を秒数に変換
+        features['analytics_avg_view_duration_seconds'] = self._durations_to_seconds(avg_view_duration)
+
+        # 算出メトリクス（視聴回数・インプレッション数が0の行は0）
+        views = features['analytics_views']
+        impressions = features['analytics_impressions']
+        safe_views = views.where(views > 0, 1)
+        safe_impressions = impressions.where(impressions > 0, 1)
+
+        features['analytics_engagement_rate'] = (
+            (features['analytics_likes'] + features['analytics_comments']) / safe_views * 100
+        ).round(2).where(views > 0, 0.0)
+        features['analytics_share_rate'] = (
+            features['analytics_shares'] / safe_views * 100
+        ).round(4).where(views > 0, 0.0)
+        features['analytics_views_per_impression'] = (
+            views / safe_impressions
+        ).round(4).where(impressions > 0, 0.0)
+
+        return features.reset_index(drop=True)
+
+    def extract_time_series_features(self) -> pd.DataFrame:
         """日付別データから時系列特徴量を抽出
 
         Returns:
-            日付ごとのメトリクス
+            1行1日の型付きDataFrame
         """
-        if self.date_data is None:
-            return {}
-
-        time_series = []
-
-        for _, row in self.date_data.iterrows():
-            date_str = row['日付']
-
-            time_series.append({
-                'date': date_str,
-                'views': self._safe_int(row.get('視聴回数', 0)),
-                'watch_time_hours': self._safe_float(row.get('総再生時間（単位: 時間）', 0)),
-                'subscribers_gained': self._safe_int(row.get('登録者増加数', 0)),
-                'subscribers_lost': self._safe_int(row.get('登録者減少数', 0)),
-                'net_subscribers': self._safe_int(row.get('登録者増加数', 0)) - self._safe_int(row.get('登録者減少数', 0)),
-                'likes': self._safe_int(row.get('高評価数', 0)),
-                'comments': self._safe_int(row.get('コメントの追加回数', 0)),
-                'impressions': self._safe_int(row.get('インプレッション数', 0)),
-                'ctr': self._safe_float(row.get('インプレッションのクリック率 (%)', 0)),
-                'avg_percentage_viewed': self._safe_float(row.get('平均再生率（%） (%)', 0)),
-            })
-
-        return {'time_series': time_series}
+        data = self.date_data if self.date_data is not None else pd.DataFrame()
+        subscribers_gained = self._to_int(data, '登録者増加数')
+        subscribers_lost = self._to_int(data, '登録者減少数')
+
+        time_series = pd.DataFrame({
+            'date': self._to_str(data, '日付'),
+            'views': self._to_int(data, '視聴回数'),
+            'watch_time_hours': self._to_float(data, '総再生時間（単位: 時間）'),
+            'subscribers_gained': subscribers_gained,
+            'subscribers_lost': subscribers_lost,
+            'net_subscribers': subscribers_gained - subscribers_lost,
+            'likes': self._to_int(data, '高評価数'),
+            'comments': self._to_int(data, 'コメントの追加回数'),
+            'impressions': self._to_int(data, 'インプレッション数'),
+            'ctr': self._to_float(data, 'インプレッションのクリック率 (%)'),
+            'avg_percentage_viewed': self._to_float(data, '平均再生率（%） (%)'),
+        })
+
+        return time_series.reset_index(drop=True)
 
     def enrich_ml_training_data(self, ml_data: List[Dict[str, Any]],
                                filter_ads: bool = True) -> List[Dict[str, Any]]:
         """ML訓練データにアナリティクスデータを統合
 
+        video_idで1回だけマージし、派生指標は列単位で計算する。
+
         Args:
             ml_data: 既存のML訓練データ
             filter_ads: 広告動画を除外するか
@@ -243,68 +217,72 @@ class YouTubeAnalyticsIntegrator:
         print("アナリティクスデータ統合")
         print("=" * 60)
 
-        # コンテンツ特徴量を抽出
-        content_features = self.extract_content_features()
-
-        # video_idでマッピング
-        content_map = {item['video_id']: item for item in content_features}
-
-        enriched_count = 0
-        ad_filtered_count = 0
-
-        for item in ml_data:
-            video_id = item.get('video_id', '')
-
-            if video_id in content_map:
-                # アナリティクスデータを追加
-                analytics_data = content_map[video_id]
-
-                # 広告フィルタリング
-                if filter_ads:
-                    title = analytics_data.get('title', '')
-                    if self._is_advertisement(title):
-                        item['is_advertisement'] = True
-                        ad_filtered_count += 1
-                        continue
-
-                # YouTube API raw dataの数値は他のチャンネルのデータ
-                # → 絶対値は使わず、相対的なバズり度の指標として使用
-                youtube_api_views = item.get('view_count', 0)
-                youtube_api_likes = item.get('like_count', 0)
-                youtube_api_comments = item.get('comment_count', 0)
-
-                # 相対的なバズり度指標を計算
-                if youtube_api_views > 0:
-                    # YouTube API データの相対的な評価指標
-                    item['relative_engagement_score'] = round(
-                        (youtube_api_likes + youtube_api_comments) / youtube_api_views * 100, 4
-                    )
-                    item['relative_like_rate'] = round(
-                        youtube_api_likes / youtube_api_views * 100, 4
-                    )
-                    item['relative_comment_rate'] = round(
-                        youtube_api_comments / youtube_api_views * 100, 4
-                    )
-                else:
-                    item['relative_engagement_score'] = 0.0
-                    item['relative_like_rate'] = 0.0
-                    item['relative_comment_rate'] = 0.0
-
-                # 自分のチャンネルの実データをview_countとして使用
-                analytics_views = analytics_data.get('analytics_views', 0)
-                if analytics_views > 0:
-                    item['view_count'] = analytics_views  # 実データで上書き
-                    item['data_source'] = 'analytics'  # データソースを明記
-                else:
-                    item['data_source'] = 'youtube_api'  # YouTube APIのデータ
-
-                # すべてのアナリティクスフィールドを追加
-                for key, value in analytics_data.items():
-                    if key not in ['video_id', 'title']:  # 重複を避ける
-                        item[key] = value
-
-                item['is_advertisement'] = False
-                enriched_count += 1
+        # コンテンツ特徴量を抽出（同じvideo_idは最後の行を採用）
+        content = self.extract_content_features().drop_duplicates('video_id', keep='last')
+
+        # ML訓練データのうちマージに必要な列だけをフレーム化
+        left = pd.DataFrame({
+            'row': np.arange(len(ml_data)),
+            'video_id': [item.get('video_id', '') for item in ml_data],
+            'youtube_api_views': [item.get('view_count', 0) for item in ml_data],
+            'youtube_api_likes': [item.get('like_count', 0) for item in ml_data],
+            'youtube_api_comments': [item.get('comment_count', 0) for item in ml_data],
+        })
+        for column in ['youtube_api_views', 'youtube_api_likes', 'youtube_api_comments']:
+            left[column] = pd.to_numeric(left[column], errors='coerce').fillna(0)
+
+        merged = left.merge(content, on='video_id', how='inner')
+
+        # 広告フィルタリング
+        if filter_ads:
+            is_ad = self._is_advertisement_series(merged['title'])
+        else:
+            is_ad = pd.Series(False, index=merged.index)
+
+        ads = merged[is_ad]
+        for row in ads['row']:
+            ml_data[row]['is_advertisement'] = True
+        ad_filtered_count = len(ads)
+
+        merged = merged[~is_ad]
+
+        # YouTube API raw dataの数値は他のチャンネルのデータ
+        # → 絶対値は使わず、相対的なバズり度の指標として使用
+        api_views = merged['youtube_api_views']
+        safe_api_views = api_views.where(api_views > 0, 1)
+        has_api_views = api_views > 0
+        enriched = pd.DataFrame({
+            'relative_engagement_score': (
+                (merged['youtube_api_likes'] + merged['youtube_api_comments']) / safe_api_views * 100
+            ).round(4).where(has_api_views, 0.0),
+            'relative_like_rate': (
+                merged['youtube_api_likes'] / safe_api_views * 100
+            ).round(4).where(has_api_views, 0.0),
+            'relative_comment_rate': (
+                merged['youtube_api_comments'] / safe_api_views * 100
+            ).round(4).where(has_api_views, 0.0),
+        }, index=merged.index)
+
+        # 自分のチャンネルの実データをview_countとして使用（実データがある場合のみ上書き）
+        has_analytics = merged['analytics_views'] > 0
+        enriched['data_source'] = np.where(has_analytics, 'analytics', 'youtube_api')
+
+        # すべてのアナリティクスフィールドを追加（video_id, titleは重複を避ける）
+        analytics_columns = [c for c in content.columns if c not in ('video_id', 'title')]
+        enriched = pd.concat([enriched, merged[analytics_columns]], axis=1)
+        enriched['is_advertisement'] = False
+
+        # 元の辞書に書き戻し（ネイティブ型に変換済みのレコード）
+        rows = merged['row'].tolist()
+        analytics_views = merged['analytics_views'].tolist()
+        for row, views, has_views, record in zip(rows, analytics_views, has_analytics.tolist(),
+                                                  enriched.to_dict('records')):
+            item = ml_data[row]
+            if has_views:
+                item['view_count'] = views  # 実データで上書き
+            item.update(record)
+
+        enriched_count = len(rows)
 
         print(f"✓ {enriched_count}/{len(ml_data)}件にアナリティクスデータを統合")
         if filter_ads and ad_filtered_count > 0:
@@ -333,50 +311,49 @@ class YouTubeAnalyticsIntegrator:
         return False
 
     @staticmethod
-    def _safe_int(value, default=0) -> int:
-        """安全に整数に変換"""
-        try:
-            if pd.isna(value) or value == '':
-                return default
-            return int(float(value))
-        except (ValueError, TypeError):
-            return default
+    def _is_advertisement_series(titles: pd.Series) -> pd.Series:
+        """_is_advertisement の列版"""
+        ad_keywords = ['広告', '広告_', '_広告', 'ad_', '_ad']
+        lowered = titles.fillna('').astype(str).str.lower()
+        pattern = '|'.join(re.escape(keyword) for keyword in ad_keywords)
+        return lowered.str.contains(pattern, regex=True)
 
     @staticmethod
-    def _safe_float(value, default=0.0) -> float:
-        """安全に浮動小数点に変換"""
-        try:
-            if pd.isna(value) or value == '':
-                return default
-            return float(value)
-        except (ValueError, TypeError):
-            return default
+    def _to_float(data: pd.DataFrame, column: str, default: float = 0.0) -> pd.Series:
+        """列を浮動小数点に変換（欠損・変換不能は default）"""
+        if column not in data.columns:
+            return pd.Series(default, index=data.index, dtype='float64')
+        return pd.to_numeric(data[column], errors='coerce').fillna(default).astype('float64')
+
+    @classmethod
+    def _to_int(cls, data: pd.DataFrame, column: str, default: int = 0) -> pd.Series:
+        """列を整数に変換（小数は切り捨て、欠損・変換不能は default）"""
+        values = cls._to_float(data, column, float('nan'))
+        return np.trunc(values).fillna(default).astype('int64')
 
     @staticmethod
-    def _parse_duration_to_seconds(duration_str: str) -> int:
-        """時間文字列（0:00:21形式）を秒数に変換
+    def _to_str(data: pd.DataFrame, column: str, default: str = '') -> pd.Series:
+        """列を文字列に変換（欠損は default）"""
+        if column not in data.columns:
+            return pd.Series(default, index=data.index, dtype='object')
+        series = data[column]
+        return series.where(series.notna(), default).astype(str).astype('object')
+
+    @staticmethod
+    def _durations_to_seconds(durations: pd.Series) -> pd.Series:
+        """時間文字列（0:00:21 / 3:45 形式）の列を秒数に変換
 
         Args:
-            duration_str: 時間文字列（例: "0:00:21", "0:03:45"）
+            durations: 時間文字列の列
 
         Returns:
-            秒数
+            秒数の列（解析できない値は0）
         """
-        try:
-            parts = duration_str.split(':')
-            if len(parts) == 3:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = int(parts[2])
-                return hours * 3600 + minutes * 60 + seconds
-            elif len(parts) == 2:
-                minutes = int(parts[0])
-                seconds = int(parts[1])
-                return minutes * 60 + seconds
-            else:
-                return 0
-        except (ValueError, AttributeError):
-            return 0
+        parts = durations.astype(str).str.strip().str.extract(r'^(?:(\d+):)?(\d+):(\d+)$')
+        parts = parts.apply(pd.to_numeric, errors='coerce')
+        matched = parts[1].notna()
+        seconds = parts[0].fillna(0) * 3600 + parts[1].fillna(0) * 60 + parts[2].fillna(0)
+        return seconds.where(matched, 0).astype('int64')
 
 
 def main():
@@ -396,9 +373,9 @@ def main():
     print(f"コンテンツ特徴量: {len(content_features)}件")
 
     # サンプル表示
-    if content_features:
+    if len(content_features):
         print("\n【サンプル】")
-        sample = content_features[0]
+        sample = content_features.iloc[0]
         print(f"  Video ID: {sample['video_id']}")
         print(f"  Title: {sample['title']}")
         print(f"  Views: {sample['analytics_views']:,}")
@@ -409,8 +386,8 @@ def main():
 
     # 時系列特徴量を抽出
     time_series = integrator.extract_time_series_features()
-    if 'time_series' in time_series:
-        print(f"\n時系列データ: {len(time_series['time_series'])}日分")
+    if len(time_series):
+        print(f"\n時系列データ: {len(time_series)}日分")
 
     # ML訓練データと統合
     print("\n" + "=" * 60)
@@ -448,6 +425,14 @@ def main():
 
             print(f"✓ CSV保存: {csv_path}")
 
+        # 登録済みの視聴数予測モデルを rankings.json の新しい行で逐次更新（再訓練しない）
+        # 統合データは訓練データと特徴量の入力が異なるため、訓練と同じ曲データを使う
+        try:
+            from src.ml.incremental import update_registered_model
+            update_registered_model()
+        except ImportError as e:
+            print(f"⚠ src.ml.incremental のインポートに失敗: {e}")
+
     else:
         print(f"⚠ {ml_data_path} が見つかりません")
         print("先に data_integrator.py を実行してください")